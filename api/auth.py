@@ -8,6 +8,7 @@ from werkzeug.security import check_password_hash
 from marshmallow import ValidationError
 
 from models import User, db
+from database.statements import get_user_by_email
 from security.authentication import (
     SessionManager, JWTManager, MFAManager, 
     rate_limiter, PasswordPolicy
@@ -92,7 +93,7 @@ class LoginResource(Resource):
             return {'message': 'Email and password are required'}, 400
         
         # Find user
-        user = User.query.filter_by(email=email).first()
+        user = get_user_by_email(email)
         
         if not user or not check_password_hash(user.password_hash, password):
             rate_limiter.record_attempt(identifier)
@@ -198,7 +199,7 @@ class RegisterResource(Resource):
         data = request.validated_data
         
         # Check if user already exists
-        existing_user = User.query.filter_by(email=data['email']).first()
+        existing_user = get_user_by_email(data['email'])
         if existing_user:
             return {'message': 'User with this email already exists'}, 409
         
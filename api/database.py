@@ -12,6 +12,7 @@ from database import (
     get_pool_metrics, get_query_analyzer
 )
 from database.backup import backup_manager
+from database.index_advisor import get_cached_index_advice
 from api.errors import APIError
 
 # Create namespace
@@ -50,11 +51,26 @@ cache_stats_model = db_ns.model('CacheStats', {
     'entries': fields.List(fields.String, description='Sample cache keys')
 })
 
-index_suggestion_model = db_ns.model('IndexSuggestion', {
+workload_index_model = db_ns.model('WorkloadIndexSuggestion', {
+    'name': fields.String(description='Index name'),
     'table': fields.String(description='Table name'),
-    'column': fields.String(description='Column name'),
+    'columns': fields.List(fields.String, description='Indexed columns in order'),
     'type': fields.String(description='Suggestion type'),
-    'reason': fields.String(description='Reason for suggestion')
+    'reason': fields.String(description='Reason for suggestion'),
+    'estimated_savings': fields.Float(description='Workload plan cost saved, net of write overhead'),
+    'baseline_cost': fields.Float(description='Weighted plan cost of affected statements before'),
+    'new_cost': fields.Float(description='Weighted plan cost of affected statements after'),
+    'improvement_pct': fields.Float(description='Cost reduction on affected statements'),
+    'queries': fields.List(fields.String, description='Affected normalized statements'),
+    'sql': fields.String(description='CREATE INDEX statement')
+})
+
+index_advice_model = db_ns.model('IndexAdvice', {
+    'generated_at': fields.String(description='When the advice was computed'),
+    'workload_statements': fields.Integer(description='Normalized statements in the workload'),
+    'candidates_evaluated': fields.Integer(description='Candidate indexes evaluated'),
+    'suggestions': fields.List(fields.Nested(workload_index_model), description='Ranked suggestions'),
+    'migration': fields.String(description='Alembic migration creating the suggested indexes')
 })
 
 optimization_model = db_ns.model('QueryOptimization', {
@@ -251,15 +267,31 @@ class CacheClearResource(Resource):
 class IndexSuggestionsResource(Resource):
     """Index optimization suggestions."""
     
-    @db_ns.marshal_list_with(index_suggestion_model)
+    @db_ns.marshal_with(index_advice_model)
     @enhanced_login_required
     @role_required_api(['Admin'])
     def get(self):
-        """Get index optimization suggestions."""
+        """Get indexes that measurably lower the cost of the captured workload (cached)."""
+        try:
+            limit = request.args.get('limit', 10, type=int)
+            return get_cached_index_advice(limit=limit), 200
+            
+        except RuntimeError as e:
+            raise APIError(str(e), 409)
+        except Exception as e:
+            raise APIError(f"Failed to get index suggestions: {str(e)}", 500)
+    
+    @db_ns.marshal_with(index_advice_model)
+    @enhanced_login_required
+    @role_required_api(['Admin'])
+    def post(self):
+        """Re-validate index suggestions against the current workload."""
         try:
-            suggestions = DatabaseIndexManager.analyze_missing_indexes()
-            return suggestions, 200
+            limit = request.args.get('limit', 10, type=int)
+            return get_cached_index_advice(limit=limit, refresh=True), 200
             
+        except RuntimeError as e:
+            raise APIError(str(e), 409)
         except Exception as e:
             raise APIError(f"Failed to get index suggestions: {str(e)}", 500)
 
@@ -509,6 +541,25 @@ class BackupRestoreResource(Resource):
             raise APIError(f"Failed to restore backup: {str(e)}", 500)
 
 
+@db_ns.route('/backup/verify/<string:backup_name>')
+class BackupVerifyResource(Resource):
+    """Verify a backup."""
+    
+    @enhanced_login_required
+    @role_required_api(['Admin'])
+    def post(self, backup_name):
+        """Check that the specified backup is complete and restorable."""
+        try:
+            data = request.get_json(silent=True) or {}
+            result = backup_manager.verify_backup(backup_name, deep=data.get('deep', True))
+            return result, 200 if result['valid'] else 409
+            
+        except FileNotFoundError:
+            raise APIError(f"Backup not found: {backup_name}", 404)
+        except Exception as e:
+            raise APIError(f"Failed to verify backup: {str(e)}", 500)
+
+
 @db_ns.route('/backup/delete/<string:backup_name>')
 class BackupDeleteResource(Resource):
     """Delete backup."""
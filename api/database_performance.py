@@ -86,7 +86,8 @@ def get_performance_overview():
                 'available': cache_stats.get('available', False),
                 'hit_rate': cache_stats.get('hit_rate', 0),
                 'total_requests': cache_stats.get('total_requests', 0),
-                'cached_queries': cache_stats.get('cached_queries', 0)
+                'cached_writes': cache_stats.get('set_count', 0),
+                'invalidations': cache_stats.get('invalidation_count', 0)
             }
         }
         
@@ -229,10 +230,11 @@ def get_cache_performance():
                 'miss_count': stats.get('miss_count', 0),
                 'total_requests': stats.get('total_requests', 0),
                 'hit_rate': stats.get('hit_rate', 0),
-                'cached_queries': stats.get('cached_queries', 0),
+                'cached_writes': stats.get('set_count', 0),
+                'invalidations': stats.get('invalidation_count', 0),
                 'default_ttl': stats.get('default_ttl', 0)
             },
-            'sample_entries': stats.get('sample_entries', [])
+            'generations': stats.get('generations', {})
         }
         
         return jsonify(response)
@@ -424,7 +426,7 @@ def clear_query_cache():
         return jsonify({
             'timestamp': datetime.utcnow().isoformat(),
             'cleared_count': cleared_count,
-            'message': f'Cleared {cleared_count} cached queries'
+            'message': 'Cleared all cached queries'
         })
         
     except Exception as e:
@@ -468,7 +470,7 @@ def invalidate_cache():
         return jsonify({
             'timestamp': datetime.utcnow().isoformat(),
             'invalidated_count': invalidated_count,
-            'message': f'Invalidated {invalidated_count} cache entries'
+            'message': f'Invalidated {invalidated_count} cache namespaces'
         })
         
     except Exception as e:
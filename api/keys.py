@@ -233,6 +233,7 @@ class APIKeyResource(Resource):
                     setattr(api_key, field, value)
             
             db.session.commit()
+            security_manager.rate_limiter.invalidate_api_key(api_key.key_hash)
             
             # Log update
             get_audit_logger().log_data_access(
@@ -266,6 +267,7 @@ class APIKeyResource(Resource):
             # Soft delete by deactivating
             api_key.is_active = False
             db.session.commit()
+            security_manager.rate_limiter.invalidate_api_key(api_key.key_hash)
             
             # Log deletion
             get_audit_logger().log_data_access(
@@ -302,9 +304,11 @@ class APIKeyRegenerateResource(Resource):
             
             # Generate new key
             new_key_value = APIKey.generate_key()
+            old_key_hash = api_key.key_hash
             api_key.key_hash = APIKey.hash_key(new_key_value)
             
             db.session.commit()
+            security_manager.rate_limiter.invalidate_api_key(old_key_hash)
             
             # Log regeneration
             get_audit_logger().log_data_access(
@@ -395,7 +399,7 @@ class APIKeyUsageResource(Resource):
             
             # Current rate limit status
             rate_limit_status = security_manager.rate_limiter.get_rate_limit_status(
-                f"api_key:{APIKey.generate_key()}"  # This is just for structure
+                f"api_key:{api_key.key_hash}"
             )
             
             stats = {
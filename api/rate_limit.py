@@ -0,0 +1,240 @@
+"""
+Rate limiting engine shared by all workers.
+
+Limits use the generic cell rate algorithm (GCRA): each client is a single
+"theoretical arrival time" (TAT), so memory per client is one float no matter
+how high the limit is. A limit of ``requests`` per ``window`` seconds admits
+one request every ``window / requests`` seconds with bursts of up to
+``requests``; state expires by itself once the client has been idle for a
+full window.
+
+The TAT lives in a pluggable storage backend:
+
+- ``MemoryRateLimitStorage``: this process only (tests, single worker)
+- ``SQLiteRateLimitStorage``: a WAL database shared by the workers on a host
+- ``RedisRateLimitStorage``: shared by every host, updated by a Lua script
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check, in the units of the ``RateLimit-*`` headers."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the full quota is available again
+    retry_after: float  # Seconds until the next request is admitted (0 if allowed)
+    window: int
+
+    @property
+    def reset(self):
+        """Reset time as a Unix timestamp, for the legacy ``X-RateLimit-Reset`` header."""
+        return int(time.time() + math.ceil(self.reset_after))
+
+    def headers(self):
+        """``RateLimit-*`` headers (IETF draft) plus the legacy ``X-RateLimit-*`` ones."""
+        headers = {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(math.ceil(self.reset_after)),
+            'RateLimit-Policy': f'{self.limit};w={self.window}',
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra(tat, now, limit, window, cost=1):
+    """Apply ``cost`` requests to a stored TAT.
+
+    Returns ``(new_tat, result)``; ``new_tat`` is None when the request is
+    rejected and the stored value must not change.
+    """
+    interval = window / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - window
+
+    if cost and now < allow_at:
+        return None, _result(False, tat, now, limit, window, retry_after=allow_at - now)
+    return new_tat, _result(True, new_tat, now, limit, window)
+
+
+def _result(allowed, tat, now, limit, window, retry_after=0.0):
+    interval = window / limit
+    used = max(0.0, tat - now)
+    remaining = max(0, int((window - used) / interval + 1e-9))
+    return RateLimitResult(allowed, limit, min(remaining, limit), used, retry_after, window)
+
+
+class MemoryRateLimitStorage:
+    """Per-process storage; limits are not shared between workers."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._tats = {}
+        self._lock = threading.Lock()
+
+    def apply(self, key, limit, window, cost=1):
+        now = time.time()
+        with self._lock:
+            new_tat, result = gcra(self._tats.get(key), now, limit, window, cost)
+            if new_tat is not None and cost:
+                if len(self._tats) >= self.max_keys:
+                    self._prune(now)
+                self._tats[key] = new_tat
+        return result
+
+    def _prune(self, now):
+        # A TAT in the past is the same as no entry at all
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+
+    def reset(self, key):
+        with self._lock:
+            self._tats.pop(key, None)
+
+
+class SQLiteRateLimitStorage:
+    """Storage shared by the workers on one host through a WAL database."""
+
+    def __init__(self, path, prune_interval=300):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._next_prune = time.monotonic() + prune_interval
+        self._local = threading.local()
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')  # Losing a few hits on power loss is fine
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def apply(self, key, limit, window, cost=1):
+        conn = self._connection()
+        now = time.time()
+        if not cost:
+            row = conn.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            return gcra(row[0] if row else None, now, limit, window, 0)[1]
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            new_tat, result = gcra(row[0] if row else None, now, limit, window, cost)
+            if new_tat is not None:
+                conn.execute('INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)', (key, new_tat))
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.prune_interval
+                conn.execute('DELETE FROM rate_limits WHERE tat < ?', (now,))
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def reset(self, key):
+        self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+
+# KEYS[1] = limit key; ARGV = now, limit, window, cost
+# Returns {allowed, tat} with tat as a string to keep float precision
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local interval = window / limit
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+if cost > 0 and now < new_tat - window then
+    return {0, tostring(tat)}
+end
+if cost > 0 then
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+end
+return {1, tostring(new_tat)}
+"""
+
+
+class RedisRateLimitStorage:
+    """Storage shared by every host; each check is one atomic script call."""
+
+    def __init__(self, redis_client, key_prefix='rate_limit:'):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+
+    def apply(self, key, limit, window, cost=1):
+        now = time.time()
+        allowed, tat = self.redis_client.eval(
+            _GCRA_SCRIPT, 1, self.key_prefix + key, repr(now), limit, window, cost
+        )
+        tat = float(tat)
+        if allowed:
+            return _result(True, tat, now, limit, window)
+        return _result(False, tat, now, limit, window, retry_after=tat + window / limit * cost - window - now)
+
+    def reset(self, key):
+        self.redis_client.delete(self.key_prefix + key)
+
+
+class LimitCache:
+    """Small LRU with a TTL for per-identifier limit metadata (e.g. API key limits)."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Cached value for ``key``, calling ``loader()`` on a miss or after the TTL."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or all of them."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
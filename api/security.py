@@ -1,17 +1,19 @@
 """
 API security, rate limiting, and usage analytics.
 """
+import os
+import math
 import time
 import hashlib
 import secrets
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
-from collections import defaultdict, deque
-from flask import request, jsonify, current_app, g
+from flask import request, jsonify, current_app, g, has_request_context
 from flask_login import current_user
 from models import db, User
 from security.audit import get_audit_logger, AuditEventType, AuditSeverity
+from api.rate_limit import LimitCache, MemoryRateLimitStorage, RedisRateLimitStorage, SQLiteRateLimitStorage
 
 
 class APIKey(db.Model):
@@ -97,12 +99,21 @@ class APIUsage(db.Model):
 
 
 class RateLimiter:
-    """Advanced rate limiting with multiple strategies."""
+    """Advanced rate limiting with multiple strategies.
+
+    Limits are enforced by ``api.rate_limit`` (GCRA, O(1) state per client)
+    in a storage backend that ``init_rate_limiter`` can share between workers.
+    A client that keeps sending after its limit is exhausted, until it has
+    been rejected as many times as the limit allows (more than twice the
+    limit in total), has its IP blocked for ``block_duration`` seconds.
+    """
     
-    def __init__(self):
-        # In-memory storage for rate limiting (use Redis in production)
-        self.requests = defaultdict(deque)
-        self.blocked_ips = {}
+    def __init__(self, storage=None, api_key_cache_size=1024, api_key_cache_ttl=60,
+                 block_duration=3600):
+        self.storage = storage or MemoryRateLimitStorage()
+        self.block_duration = block_duration
+        # API key hash -> {'requests', 'window'}; saves a DB query per request
+        self.api_key_limits = LimitCache(maxsize=api_key_cache_size, ttl=api_key_cache_ttl)
         
         # Rate limiting configurations
         self.limits = {
@@ -117,7 +128,8 @@ class RateLimiter:
         # Priority: API Key > User ID > IP Address
         api_key = request.headers.get('X-API-Key')
         if api_key:
-            return f"api_key:{api_key}"
+            # Keyed by hash so raw keys never reach the limiter storage
+            return f"api_key:{APIKey.hash_key(api_key)}"
         
         if current_user.is_authenticated:
             return f"user:{current_user.id}"
@@ -128,11 +140,8 @@ class RateLimiter:
         """Get rate limit configuration for identifier."""
         if identifier.startswith('api_key:'):
             # Check if API key has custom rate limit
-            api_key_value = identifier.split(':', 1)[1]
-            api_key = APIKey.query.filter_by(key_hash=APIKey.hash_key(api_key_value)).first()
-            if api_key:
-                return {'requests': api_key.rate_limit, 'window': 3600}
-            return self.limits['api_key']
+            key_hash = identifier.split(':', 1)[1]
+            return self.api_key_limits.get(key_hash, lambda: self._load_api_key_limit(key_hash))
         
         elif identifier.startswith('user:'):
             if current_user.is_authenticated and current_user.role == 'Admin':
@@ -142,75 +151,71 @@ class RateLimiter:
         else:  # IP-based
             return self.limits['anonymous']
     
-    def is_rate_limited(self, identifier=None):
-        """Check if request should be rate limited."""
+    def _load_api_key_limit(self, key_hash):
+        rate_limit = db.session.query(APIKey.rate_limit).filter_by(key_hash=key_hash).scalar()
+        if rate_limit:
+            return {'requests': rate_limit, 'window': 3600}
+        return self.limits['api_key']
+    
+    def invalidate_api_key(self, key_hash):
+        """Forget a cached API key limit after the key is changed or revoked."""
+        self.api_key_limits.invalidate(key_hash)
+    
+    def hit(self, identifier=None, cost=1):
+        """Check and record a request in one atomic step; returns a ``RateLimitResult``."""
         if identifier is None:
             identifier = self.get_identifier()
         
-        # Check if IP is blocked
-        ip = request.remote_addr
-        if ip in self.blocked_ips:
-            if time.time() < self.blocked_ips[ip]:
-                return True
-            else:
-                del self.blocked_ips[ip]
-        
         config = self.get_rate_limit_config(identifier)
-        window = config['window']
-        limit = config['requests']
-        
-        now = time.time()
-        
-        # Clean old requests
-        while self.requests[identifier] and self.requests[identifier][0] < now - window:
-            self.requests[identifier].popleft()
-        
-        # Check if limit exceeded
-        if len(self.requests[identifier]) >= limit:
-            # Block IP for repeated violations
-            if len(self.requests[identifier]) > limit * 2:
-                self.blocked_ips[ip] = now + 3600  # Block for 1 hour
-            
+        result = self.storage.apply(identifier, config['requests'], config['window'], cost)
+        if cost and not result.allowed:
+            self._record_violation(identifier, config)
+        return result
+    
+    def _record_violation(self, identifier, config):
+        # Rejected requests get a budget of their own; exhausting it blocks the IP
+        violations = self.storage.apply(f"violations:{identifier}", config['requests'], config['window'])
+        if not violations.allowed and has_request_context():
+            self.block_ip(request.remote_addr)
+    
+    def block_ip(self, ip, duration=None):
+        """Block ``ip`` on every worker sharing the storage."""
+        # A one-request limit over the block duration: its single slot stays taken until then
+        self.storage.apply(f"blocked:{ip}", 1, duration or self.block_duration)
+        current_app.logger.warning(f"Blocked IP {ip} for repeated rate limit violations")
+    
+    def unblock_ip(self, ip):
+        self.storage.reset(f"blocked:{ip}")
+    
+    def ip_block_status(self, ip=None):
+        """Block state of ``ip``: ``remaining`` is 0 while blocked, ``reset_after`` the seconds left."""
+        ip = ip or request.remote_addr
+        return self.storage.apply(f"blocked:{ip}", 1, self.block_duration, cost=0)
+    
+    def is_ip_blocked(self, ip=None):
+        """Check if an IP address is temporarily blocked."""
+        return self.ip_block_status(ip).remaining == 0
+    
+    def is_rate_limited(self, identifier=None):
+        """Check if request should be rate limited (without recording it)."""
+        if self.is_ip_blocked():
             return True
         
-        return False
+        result = self.hit(identifier, cost=0)
+        return result.remaining == 0
     
     def record_request(self, identifier=None):
         """Record a request for rate limiting."""
-        if identifier is None:
-            identifier = self.get_identifier()
-        
-        self.requests[identifier].append(time.time())
+        return self.hit(identifier)
     
     def get_rate_limit_status(self, identifier=None):
         """Get current rate limit status."""
-        if identifier is None:
-            identifier = self.get_identifier()
-        
-        config = self.get_rate_limit_config(identifier)
-        window = config['window']
-        limit = config['requests']
-        
-        now = time.time()
-        
-        # Clean old requests
-        while self.requests[identifier] and self.requests[identifier][0] < now - window:
-            self.requests[identifier].popleft()
-        
-        current_requests = len(self.requests[identifier])
-        remaining = max(0, limit - current_requests)
-        
-        # Calculate reset time
-        if self.requests[identifier]:
-            reset_time = int(self.requests[identifier][0] + window)
-        else:
-            reset_time = int(now + window)
-        
+        result = self.hit(identifier, cost=0)
         return {
-            'limit': limit,
-            'remaining': remaining,
-            'reset': reset_time,
-            'window': window
+            'limit': result.limit,
+            'remaining': result.remaining,
+            'reset': result.reset,
+            'window': result.window
         }
 
 
@@ -385,6 +390,28 @@ class APISecurityManager:
 security_manager = APISecurityManager()
 
 
+def init_rate_limiter(app, redis_client=None):
+    """Move rate limit state to storage shared by all workers."""
+    mode = app.config.get('RATE_LIMIT_STORAGE', 'auto')
+    if mode == 'redis' or (mode == 'auto' and redis_client is not None and redis_client.is_available()):
+        storage = RedisRateLimitStorage(redis_client)
+    elif mode in ('auto', 'sqlite'):
+        path = app.config.get('RATE_LIMIT_SQLITE_PATH') or os.path.join(app.instance_path, 'rate_limits.db')
+        storage = SQLiteRateLimitStorage(path)
+    else:
+        storage = MemoryRateLimitStorage()
+
+    rate_limiter = security_manager.rate_limiter
+    rate_limiter.storage = storage
+    rate_limiter.block_duration = app.config.get('RATE_LIMIT_BLOCK_SECONDS', 3600)
+    rate_limiter.api_key_limits = LimitCache(
+        maxsize=app.config.get('RATE_LIMIT_API_KEY_CACHE_SIZE', 1024),
+        ttl=app.config.get('RATE_LIMIT_API_KEY_CACHE_TTL', 60)
+    )
+    app.logger.info(f"API rate limiter initialized ({type(storage).__name__})")
+    return rate_limiter
+
+
 def require_auth(permissions=None):
     """Decorator to require authentication and optional permissions."""
     def decorator(f):
@@ -392,36 +419,39 @@ def require_auth(permissions=None):
         def decorated_function(*args, **kwargs):
             start_time = time.time()
             
-            # Check rate limiting first
-            if security_manager.rate_limiter.is_rate_limited():
+            # Check and record the request for rate limiting first
+            rate_limiter = security_manager.rate_limiter
+            identifier = rate_limiter.get_identifier()
+            block = rate_limiter.ip_block_status()
+            rate_status = None if block.remaining == 0 else rate_limiter.hit(identifier)
+            if rate_status is None or not rate_status.allowed:
                 get_audit_logger().log_security_event(
                     'rate_limit_exceeded',
                     severity='medium',
                     details={
                         'endpoint': request.endpoint,
                         'ip': request.remote_addr,
-                        'identifier': security_manager.rate_limiter.get_identifier()
+                        'identifier': identifier
                     }
                 )
                 
-                rate_status = security_manager.rate_limiter.get_rate_limit_status()
+                if rate_status is None:
+                    rate_status = rate_limiter.hit(identifier, cost=0)
+                headers = rate_status.headers()
+                if block.remaining == 0:
+                    headers['Retry-After'] = str(max(1, math.ceil(block.reset_after)))
+                headers.setdefault('Retry-After', headers['RateLimit-Reset'])
                 response = jsonify({
                     'error': {
                         'message': 'Rate limit exceeded',
                         'code': 'RATE_LIMIT_EXCEEDED',
-                        'retry_after': rate_status['reset'] - int(time.time())
+                        'retry_after': int(headers['Retry-After'])
                     }
                 })
                 response.status_code = 429
-                response.headers['Retry-After'] = str(rate_status['reset'] - int(time.time()))
-                response.headers['X-RateLimit-Limit'] = str(rate_status['limit'])
-                response.headers['X-RateLimit-Remaining'] = str(rate_status['remaining'])
-                response.headers['X-RateLimit-Reset'] = str(rate_status['reset'])
+                response.headers.update(headers)
                 return response
             
-            # Record request for rate limiting
-            security_manager.rate_limiter.record_request()
-            
             # Authenticate request
             user = security_manager.authenticate_request()
             if not user:
@@ -475,7 +505,6 @@ def require_auth(permissions=None):
                 security_manager.log_api_usage(start_time, status_code)
                 
                 # Add rate limit headers to response
-                rate_status = security_manager.rate_limiter.get_rate_limit_status()
                 if isinstance(result, tuple):
                     response_data, status_code = result[0], result[1]
                     response = jsonify(response_data)
@@ -483,9 +512,7 @@ def require_auth(permissions=None):
                 else:
                     response = jsonify(result)
                 
-                response.headers['X-RateLimit-Limit'] = str(rate_status['limit'])
-                response.headers['X-RateLimit-Remaining'] = str(rate_status['remaining'])
-                response.headers['X-RateLimit-Reset'] = str(rate_status['reset'])
+                response.headers.update(rate_status.headers())
                 
                 return response
                 
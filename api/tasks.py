@@ -162,8 +162,8 @@ class GenerateReportResource(Resource):
                 raise APIError("Missing required field: report_id", 400)
             
             # Get report data
-            from models import Report
-            report = Report.query.get(data['report_id'])
+            from database.statements import get_report
+            report = get_report(data['report_id'])
             if not report:
                 raise APIError(f"Report {data['report_id']} not found", 404)
             
@@ -35,7 +35,7 @@ from config.manager import init_config_system
 from config.secrets import init_secrets_management
 from middleware_optimized import init_optimized_middleware
 from services.storage_manager import StorageSettingsService, StorageSettingsError
-from session_manager import session_manager
+from session_manager import init_session_manager, session_manager
 from database.fix_missing_columns import ensure_database_ready
 
 # Initialize CSRF protection globally
@@ -206,6 +206,7 @@ def create_app(config_name='default'):
 
     # Initialize Flask-Session for server-side session storage
     Session(app)
+    init_session_manager(app)
 
     # Initialize database and auth
     try:
@@ -236,12 +237,31 @@ def create_app(config_name='default'):
         # Initialize migration system
         from database import (
             init_migrations, init_database_performance,
-            init_connection_pooling
+            init_connection_pooling, init_read_replicas, init_pool_autoscaler,
+            init_query_budget, install_report_touch
         )
         from database.cli import register_db_commands
         _migration_manager = init_migrations(app)
         register_db_commands(app)
         
+        # Route read-only endpoints to replicas when any are configured
+        try:
+            init_read_replicas(app, db)
+        except Exception as replica_error:
+            app.logger.error(f"Failed to initialize read replicas: {replica_error}")
+        
+        # Count each request's statements and flag N+1 patterns
+        try:
+            init_query_budget(app)
+        except Exception as budget_error:
+            app.logger.error(f"Failed to initialize query budget recording: {budget_error}")
+        
+        # Detail-row edits bump Report.updated_at so report ETags change
+        try:
+            install_report_touch(db.session)
+        except Exception as touch_error:
+            app.logger.error(f"Failed to install report version tracking: {touch_error}")
+        
         # Register task management CLI commands (optional)
         try:
             from tasks.cli import tasks
@@ -262,6 +282,10 @@ def create_app(config_name='default'):
         if config_name == 'production':
             init_connection_pooling(app)
             init_database_performance(app)
+            try:
+                init_pool_autoscaler(app, db)
+            except Exception as autoscaler_error:
+                app.logger.error(f"Failed to start pool autoscaler: {autoscaler_error}")
             # Skip backup system on startup for performance
             # init_backup_system(app)  # Run manually when needed
         else:
@@ -657,6 +681,57 @@ def create_app(config_name='default'):
     else:
         app.logger.debug('Dashboard stats cache disabled or database not initialized; skipping refresher thread')
 
+    if db_initialized:
+        try:
+            from security.audit import init_audit_writer
+            init_audit_writer(app)
+        except Exception as e:
+            app.logger.error(f"Failed to start audit writer: {e}")
+
+    # Push channel for notification counts and live architecture edits
+    try:
+        from services.event_bus import init_event_bus
+        cache = getattr(app, 'cache', None)
+        init_event_bus(app, redis_client=getattr(cache, 'redis_client', None))
+    except Exception as e:
+        app.logger.error(f"Failed to start event bus: {e}")
+
+    # Server-side state for AI agent and SAT bot conversations
+    try:
+        from services.conversation_store import init_conversation_store
+        init_conversation_store(app)
+    except Exception as e:
+        app.logger.error(f"Failed to initialize conversation store: {e}")
+
+    # Write-behind SQLite store for the agent's long-term memory
+    try:
+        from services.memory_manager import init_memory_manager
+        init_memory_manager(app)
+    except Exception as e:
+        app.logger.error(f"Failed to initialize agent memory store: {e}")
+
+    # Response cache and request coalescing for LLM provider calls
+    try:
+        from services.llm_gateway import init_llm_gateway
+        init_llm_gateway(app)
+    except Exception as e:
+        app.logger.error(f"Failed to initialize LLM gateway: {e}")
+
+    # Hedged requests and circuit breakers across AI providers
+    try:
+        from services.llm_fanout import init_provider_fanout
+        init_provider_fanout(app)
+    except Exception as e:
+        app.logger.error(f"Failed to initialize LLM provider fan-out: {e}")
+
+    # Rate limits shared between workers for the REST API
+    try:
+        from api.security import init_rate_limiter
+        cache = getattr(app, 'cache', None)
+        init_rate_limiter(app, redis_client=getattr(cache, 'redis_client', None))
+    except Exception as e:
+        app.logger.error(f"Failed to initialize API rate limiter: {e}")
+
     # Error handlers
     def not_found_error(error):
         return render_template('404.html'), 404
@@ -38,6 +38,19 @@ class Config:
     DASHBOARD_STATS_REFRESH_SECONDS = int(os.environ.get('DASHBOARD_STATS_REFRESH_SECONDS', 300))
     DASHBOARD_STATS_MAX_AGE_SECONDS = int(os.environ.get('DASHBOARD_STATS_MAX_AGE_SECONDS', 600))
 
+    # Bulk report operations run as set-based statements of this many ids
+    BULK_OPERATION_CHUNK_SIZE = int(os.environ.get('BULK_OPERATION_CHUNK_SIZE', 500))
+
+    # Audit events are queued and written in batches by a background thread
+    AUDIT_ASYNC_ENABLED = os.environ.get('AUDIT_ASYNC_ENABLED', 'True').lower() == 'true'
+    AUDIT_QUEUE_MAX_SIZE = int(os.environ.get('AUDIT_QUEUE_MAX_SIZE', 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+    AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_FLUSH_INTERVAL_SECONDS', 0.5))
+    AUDIT_SPILL_PATH = os.environ.get('AUDIT_SPILL_PATH')  # Failed batches; defaults to instance/audit_spill.jsonl
+
+    # Startup schema checks wait this long for another worker's migration
+    SCHEMA_MIGRATION_LOCK_TIMEOUT = int(os.environ.get('SCHEMA_MIGRATION_LOCK_TIMEOUT', 300))
+
     # AI assistance configuration
     AI_PROVIDER = os.environ.get('AI_PROVIDER', 'openrouter')
     AI_ENABLED = (
@@ -48,11 +61,27 @@ class Config:
     )
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+    OPENAI_API_URL = os.environ.get('OPENAI_API_URL', 'https://api.openai.com/v1')
     OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY', '')
     OPENROUTER_MODEL = os.environ.get('OPENROUTER_MODEL', 'qwen/qwen3-coder:free')
+    OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL', 'https://openrouter.ai/api/v1')
     HF_API_TOKEN = os.environ.get('HF_API_TOKEN', '')
     HF_MODEL = os.environ.get('HF_MODEL', 'HuggingFaceH4/zephyr-7b-beta')
     HF_API_URL = os.environ.get('HF_API_URL', 'https://api-inference.huggingface.co/models')
+    # Identical LLM requests are answered from a SQLite cache (instance/llm_cache.db by default)
+    LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH')
+    LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', '86400'))
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '5000'))
+    LLM_HTTP_POOL_SIZE = int(os.environ.get('LLM_HTTP_POOL_SIZE', '20'))
+    # Hedged fan-out: providers asked after the primary, in order (unconfigured ones are skipped)
+    LLM_FALLBACK_PROVIDERS = os.environ.get('LLM_FALLBACK_PROVIDERS', 'openrouter,openai,huggingface')
+    LLM_HEDGING_ENABLED = os.environ.get('LLM_HEDGING_ENABLED', 'true').lower() == 'true'
+    LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', '0.95'))
+    LLM_HEDGE_DEFAULT_DELAY = float(os.environ.get('LLM_HEDGE_DEFAULT_DELAY', '2.0'))
+    LLM_FANOUT_WORKERS = int(os.environ.get('LLM_FANOUT_WORKERS', '8'))
+    LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', '5'))
+    LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', '30'))
 
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -165,6 +194,40 @@ class Config:
     # Feature Flags
     ENABLE_EMAIL_NOTIFICATIONS = os.getenv('ENABLE_EMAIL_NOTIFICATIONS', 'True').lower() == 'true'
     
+    # Read replicas - comma-separated URLs; safe (GET/HEAD) requests to the
+    # endpoints below read from a replica, everything else uses the primary
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()
+    ]
+    READ_REPLICA_ENDPOINTS = [
+        'analytics.', 'search.', 'audit.', 'dashboard.api_admin_stats'
+    ]
+    READ_REPLICA_LAG_SECONDS = float(os.environ.get('READ_REPLICA_LAG_SECONDS', '5'))  # Read own writes from primary
+    READ_REPLICA_RETRY_SECONDS = int(os.environ.get('READ_REPLICA_RETRY_SECONDS', '30'))
+
+    # Per-request query recording - a statement shape repeated more than the
+    # threshold within one request is reported as a likely N+1 pattern.
+    # X-Query-* response headers are always sent in debug mode.
+    QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', 'True').lower() == 'true'
+    QUERY_BUDGET_REPEAT_THRESHOLD = int(os.environ.get('QUERY_BUDGET_REPEAT_THRESHOLD', '10'))
+    QUERY_BUDGET_HEADERS = os.environ.get('QUERY_BUDGET_HEADERS', 'False').lower() == 'true'
+
+    # Index advisor - PostgreSQL candidates are validated on a restored copy
+    INDEX_ADVISOR_SCRATCH_URL = os.environ.get('INDEX_ADVISOR_SCRATCH_URL')
+    INDEX_ADVISOR_MIN_EXECUTIONS = int(os.environ.get('INDEX_ADVISOR_MIN_EXECUTIONS', '2'))
+    INDEX_ADVISOR_MIN_IMPROVEMENT = float(os.environ.get('INDEX_ADVISOR_MIN_IMPROVEMENT', '10'))
+    INDEX_ADVISOR_CACHE_TTL = int(os.environ.get('INDEX_ADVISOR_CACHE_TTL', '600'))  # Seconds advice is reused
+
+    # Pool autoscaler - grows the primary pool when requests wait for a
+    # connection and sheds idle connections during the quiet hours (local time)
+    DB_POOL_AUTOSCALE_ENABLED = os.environ.get('DB_POOL_AUTOSCALE_ENABLED', 'False').lower() == 'true'
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '20'))
+    DB_POOL_TARGET_WAIT_MS = float(os.environ.get('DB_POOL_TARGET_WAIT_MS', '50'))
+    DB_POOL_AUTOSCALE_INTERVAL = int(os.environ.get('DB_POOL_AUTOSCALE_INTERVAL', '15'))
+    DB_POOL_AUTOSCALE_COOLDOWN = int(os.environ.get('DB_POOL_AUTOSCALE_COOLDOWN', '60'))
+    DB_POOL_QUIET_HOURS = os.environ.get('DB_POOL_QUIET_HOURS', '1-5')
+
     # Redis caching configuration
     REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.environ.get('REDIS_PORT', '6379'))
@@ -187,7 +250,55 @@ class Config:
     API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', '300'))  # 5 minutes
     QUERY_CACHE_TIMEOUT = int(os.environ.get('QUERY_CACHE_TIMEOUT', '600'))  # 10 minutes
 
-    # Security Settings - Updated for HTTPS
+    # Two-tier query cache (in-process L1 in front of Redis or a shared SQLite L2)
+    QUERY_CACHE_L1_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_L1_MAX_ENTRIES', '2000'))
+    QUERY_CACHE_L1_TTL = int(os.environ.get('QUERY_CACHE_L1_TTL', '30'))  # Upper bound on L1 staleness
+    QUERY_CACHE_L2_PATH = os.environ.get('QUERY_CACHE_L2_PATH')  # Defaults to instance/query_cache_l2.db
+    QUERY_CACHE_INVALIDATION_POLL_SECONDS = float(os.environ.get('QUERY_CACHE_INVALIDATION_POLL_SECONDS', '0.5'))
+
+    # Response compression - Brotli is preferred when installed and accepted.
+    # Bodies above the stream threshold (and generator/file responses) are
+    # compressed chunk by chunk so clients start receiving them sooner.
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '500'))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+    COMPRESSION_STREAM_THRESHOLD = int(os.environ.get('COMPRESSION_STREAM_THRESHOLD', str(256 * 1024)))
+    COMPRESSION_CHUNK_SIZE = int(os.environ.get('COMPRESSION_CHUNK_SIZE', str(64 * 1024)))
+
+    # Server-sent events - workers share events over Redis pub/sub when it is
+    # available, otherwise over localhost UDP ('auto'); 'none' keeps them local
+    EVENT_BUS_TRANSPORT = os.environ.get('EVENT_BUS_TRANSPORT', 'auto')  # auto, redis, local, none
+    EVENT_BUS_SOCKET_DIR = os.environ.get('EVENT_BUS_SOCKET_DIR')  # Defaults to instance/event_bus
+    EVENT_BUS_HISTORY = int(os.environ.get('EVENT_BUS_HISTORY', '200'))  # Events kept per channel for resume
+    SSE_KEEPALIVE_SECONDS = int(os.environ.get('SSE_KEEPALIVE_SECONDS', '15'))
+    SSE_MAX_STREAM_SECONDS = int(os.environ.get('SSE_MAX_STREAM_SECONDS', '300'))  # Clients reconnect after this
+    # Open streams per worker; each holds a server thread (waitress runs WAITRESS_THREADS), the rest poll
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', '2'))
+
+    # API rate limits - shared between workers through Redis when available,
+    # otherwise through SQLite in the instance folder ('auto')
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'auto')  # auto, redis, sqlite, memory
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH')  # Defaults to instance/rate_limits.db
+    RATE_LIMIT_API_KEY_CACHE_SIZE = int(os.environ.get('RATE_LIMIT_API_KEY_CACHE_SIZE', '1024'))
+    RATE_LIMIT_API_KEY_CACHE_TTL = int(os.environ.get('RATE_LIMIT_API_KEY_CACHE_TTL', '60'))  # Seconds
+    RATE_LIMIT_BLOCK_SECONDS = int(os.environ.get('RATE_LIMIT_BLOCK_SECONDS', '3600'))  # IP block after repeated violations
+
+    # AI agent / SAT bot conversations - kept server-side, the session only
+    # holds a conversation ID
+    CONVERSATION_STORE_PATH = os.environ.get('CONVERSATION_STORE_PATH')  # Defaults to instance/conversations.db
+    CONVERSATION_TTL_SECONDS = int(os.environ.get('CONVERSATION_TTL_SECONDS', '86400'))
+    CONVERSATION_HISTORY_LIMIT = int(os.environ.get('CONVERSATION_HISTORY_LIMIT', '50'))  # Agent messages kept
+    # Agent long-term memory: store directory, write-behind interval and hot profile cache
+    MEMORY_STORAGE_PATH = os.environ.get('MEMORY_STORAGE_PATH')  # Defaults to instance/memory
+    MEMORY_FLUSH_INTERVAL_SECONDS = float(os.environ.get('MEMORY_FLUSH_INTERVAL_SECONDS', '1.0'))
+    MEMORY_PROFILE_CACHE_SIZE = int(os.environ.get('MEMORY_PROFILE_CACHE_SIZE', '256'))
+
+    # Revoked sessions - appended to a SQLite log shared by all workers; each
+    # worker replays new revocations at most every SYNC_SECONDS
+    SESSION_REVOCATION_DB = os.environ.get('SESSION_REVOCATION_DB')  # Defaults to instance/revoked_sessions.db
+    SESSION_REVOCATION_TTL = int(os.environ.get('SESSION_REVOCATION_TTL', '86400'))
+    SESSION_REVOCATION_SYNC_SECONDS = float(os.environ.get('SESSION_REVOCATION_SYNC_SECONDS', '1'))
+
     SESSION_COOKIE_SECURE = True  # Require HTTPS for session cookies
     SESSION_COOKIE_HTTPONLY = True  # Standard security
     SESSION_COOKIE_SAMESITE = 'Lax'  # Allow cross-site cookies for external domain access
@@ -255,6 +366,7 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    AUDIT_ASYNC_ENABLED = False
 
 # Configuration dictionary
 config = {
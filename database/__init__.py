@@ -14,9 +14,16 @@ from .performance import (
 )
 from .query_analyzer import query_analyzer, setup_query_analysis, get_query_analyzer
 from .pooling import (
-    pool_manager, leak_detector, init_connection_pooling, get_pool_metrics
+    pool_manager, leak_detector, init_connection_pooling, get_pool_metrics,
+    RoutingSession, init_read_replicas, read_replica, replica_reads, primary_reads
 )
+from .pool_autoscaler import PoolAutoscaler, init_pool_autoscaler, get_pool_autoscaler_status
+from .index_advisor import IndexAdvisor, get_index_advice, get_cached_index_advice
+from .query_budget import init_query_budget, record_queries, assert_max_queries
+from .conditional import report_version, reports_version, notification_version, install_report_touch
+from .notification_counters import add_unread, remove_unread, reconcile_unread_counters
 from .backup import backup_manager, init_backup_system
+from .tiered_cache import TieredQueryCache, init_tiered_cache, get_tiered_cache
 
 __all__ = [
     'MigrationManager', 'migration_manager', 'init_migrations',
@@ -27,6 +34,13 @@ __all__ = [
     'DatabaseIndexManager', 'QueryOptimizer', 'DatabaseMaintenanceManager',
     'init_database_performance', 'cached_query',
     'pool_manager', 'leak_detector', 'init_connection_pooling', 'get_pool_metrics',
+    'RoutingSession', 'init_read_replicas', 'read_replica', 'replica_reads', 'primary_reads',
+    'PoolAutoscaler', 'init_pool_autoscaler', 'get_pool_autoscaler_status',
+    'IndexAdvisor', 'get_index_advice', 'get_cached_index_advice',
+    'init_query_budget', 'record_queries', 'assert_max_queries',
+    'report_version', 'reports_version', 'notification_version', 'install_report_touch',
+    'add_unread', 'remove_unread', 'reconcile_unread_counters',
     'backup_manager', 'init_backup_system',
-    'query_analyzer', 'setup_query_analysis', 'get_query_analyzer'
+    'query_analyzer', 'setup_query_analysis', 'get_query_analyzer',
+    'TieredQueryCache', 'init_tiered_cache', 'get_tiered_cache'
 ]
\ No newline at end of file
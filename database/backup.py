@@ -5,10 +5,17 @@ import os
 import shutil
 import gzip
 import json
+import hashlib
+import fnmatch
+import sqlite3
+import tempfile
 import subprocess
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 from flask import current_app
 from models import db
@@ -19,6 +26,534 @@ import time
 logger = logging.getLogger(__name__)
 
 
+BACKUP_FORMAT = 'sat-backup/2'
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Directories captured by file backups, as (source relative to app root, name in backup)
+BACKUP_FILE_ROOTS = [
+    ('static/uploads', 'uploads'),
+    ('static/signatures', 'signatures'),
+    ('templates', 'templates'),
+    ('instance', 'instance')
+]
+
+# Live database files are captured through the snapshot, never copied raw
+BACKUP_EXCLUDE_PATTERNS = ['*.pyc', '__pycache__', '*.db', '*.db-wal', '*.db-shm', '*.db-journal']
+
+
+class ChunkStore:
+    """Content-addressed store of gzip-compressed chunks shared by all backups.
+    
+    Chunks are named by the SHA-256 of their uncompressed content, so data
+    already stored by an earlier backup is never written again.
+    """
+    
+    def __init__(self, root: str, compression_level: int = 6):
+        self.root = root
+        self.compression_level = compression_level
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+    
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+    
+    def put(self, digest: str, data: bytes) -> int:
+        """Compress and store ``data``; returns the bytes written (0 if present)."""
+        path = self._path(digest)
+        if os.path.exists(path):
+            return 0
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = gzip.compress(data, compresslevel=self.compression_level)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(compressed)
+    
+    def get(self, digest: str, verify: bool = False) -> bytes:
+        with open(self._path(digest), 'rb') as f:
+            data = gzip.decompress(f.read())
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupt")
+        return data
+    
+    def stored_size(self, digest: str) -> int:
+        return os.path.getsize(self._path(digest))
+    
+    def delete(self, digest: str):
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.remove(path)
+    
+    def iter_digests(self) -> Iterator[str]:
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if os.path.isdir(prefix_dir):
+                for name in os.listdir(prefix_dir):
+                    if not name.endswith('.tmp'):
+                        yield name
+
+
+class IncrementalBackupEngine:
+    """Incremental, deduplicated backups described by JSON manifests.
+    
+    A backup is a manifest listing the chunks of an online-consistent
+    database snapshot and of every backed-up file. Unchanged files are
+    carried over from the previous manifest without being read, new chunks
+    are compressed in parallel, and restores fetch only the chunks of the
+    entries they actually rewrite.
+    """
+    
+    def __init__(self, backup_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 workers: Optional[int] = None, compression_level: int = 6):
+        self.backup_dir = backup_dir
+        self.chunk_size = chunk_size
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.manifest_dir = os.path.join(backup_dir, 'manifests')
+        self.store = ChunkStore(os.path.join(backup_dir, 'chunks'), compression_level)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+    
+    # Manifests
+    
+    def _manifest_path(self, backup_name: str) -> str:
+        return os.path.join(self.manifest_dir, f'{backup_name}.json')
+    
+    def has_manifest(self, backup_name: str) -> bool:
+        return os.path.exists(self._manifest_path(backup_name))
+    
+    def load_manifest(self, backup_name: str) -> Dict:
+        with open(self._manifest_path(backup_name), 'r') as f:
+            return json.load(f)
+    
+    def list_manifests(self) -> List[Dict]:
+        """All manifests, newest first."""
+        manifests = []
+        for name in os.listdir(self.manifest_dir):
+            if name.endswith('.json'):
+                try:
+                    manifests.append(self.load_manifest(name[:-len('.json')]))
+                except Exception as e:
+                    logger.warning(f"Unreadable backup manifest {name}: {e}")
+        manifests.sort(key=lambda m: m.get('created_at', ''), reverse=True)
+        return manifests
+    
+    def _write_manifest(self, manifest: Dict):
+        path = self._manifest_path(manifest['backup_name'])
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+    
+    # Backup
+    
+    def create(self, backup_name: str, db_uri: Optional[str], file_roots: Iterable[Tuple[str, str]] = (),
+               metadata: Optional[Dict] = None, exclude: Iterable[str] = ()) -> Dict:
+        """Snapshot the database and ``file_roots`` into a new manifest."""
+        if self.has_manifest(backup_name):
+            raise ValueError(f"Backup already exists: {backup_name}")
+        
+        previous = self.list_manifests()
+        parent = previous[0] if previous else None
+        stats = {'bytes_read': 0, 'new_chunks': 0, 'reused_chunks': 0,
+                 'stored_bytes': 0, 'files_unchanged': 0, 'files_read': 0}
+        started = time.time()
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backup-compress') as executor:
+            pending = {}
+            database = self._snapshot_database(db_uri, executor, pending, stats) if db_uri else None
+            files = self._backup_files(file_roots, parent, executor, pending, stats, list(exclude))
+            self._drain(pending, stats, limit=0)
+        
+        manifest = {
+            'format': BACKUP_FORMAT,
+            'backup_name': backup_name,
+            'created_at': datetime.now().isoformat(),
+            'parent': parent['backup_name'] if parent else None,
+            'chunk_size': self.chunk_size,
+            'metadata': metadata or {},
+            'database': database,
+            'files': files,
+            'stats': {**stats, 'duration_seconds': round(time.time() - started, 3)}
+        }
+        self._write_manifest(manifest)
+        return manifest
+    
+    def _drain(self, pending: Dict, stats: Dict, limit: int):
+        """Wait until at most ``limit`` compressions are in flight."""
+        while len(pending) > limit:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                stats['stored_bytes'] += future.result()
+    
+    def _store_stream(self, blocks: Iterable[bytes], executor, pending: Dict, stats: Dict) -> Dict:
+        """Split a byte stream into chunks, queueing unseen ones for compression."""
+        chunks = []
+        total = hashlib.sha256()
+        size = 0
+        in_flight = {digest for digest in pending.values()}
+        
+        for block in blocks:
+            total.update(block)
+            size += len(block)
+            digest = hashlib.sha256(block).hexdigest()
+            chunks.append(digest)
+            
+            if digest in in_flight or self.store.has(digest):
+                stats['reused_chunks'] += 1
+                continue
+            
+            stats['new_chunks'] += 1
+            pending[executor.submit(self.store.put, digest, block)] = digest
+            in_flight.add(digest)
+            # Bound memory held by queued chunks
+            self._drain(pending, stats, limit=self.workers * 2)
+        
+        stats['bytes_read'] += size
+        return {'size': size, 'sha256': total.hexdigest(), 'chunks': chunks}
+    
+    def _read_blocks(self, stream) -> Iterator[bytes]:
+        """Yield ``chunk_size`` blocks from a binary stream."""
+        buffer = b''
+        while True:
+            data = stream.read(self.chunk_size - len(buffer))
+            if not data:
+                break
+            buffer += data
+            if len(buffer) >= self.chunk_size:
+                yield buffer
+                buffer = b''
+        if buffer:
+            yield buffer
+    
+    def _snapshot_database(self, db_uri: str, executor, pending: Dict, stats: Dict) -> Dict:
+        parsed_uri = urlparse(db_uri)
+        db_type = parsed_uri.scheme.split('+')[0]
+        
+        if db_type == 'sqlite':
+            db_file = db_uri.replace('sqlite:///', '')
+            if not os.path.exists(db_file):
+                raise FileNotFoundError(f"SQLite database file not found: {db_file}")
+            
+            # The backup API copies a consistent snapshot while writers continue
+            fd, snapshot_path = tempfile.mkstemp(dir=self.backup_dir, suffix='.db.snapshot')
+            os.close(fd)
+            try:
+                source = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+                target = sqlite3.connect(snapshot_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+                with open(snapshot_path, 'rb') as f:
+                    entry = self._store_stream(self._read_blocks(f), executor, pending, stats)
+            finally:
+                os.remove(snapshot_path)
+            return {'engine': 'sqlite', 'format': 'sqlite', **entry}
+        
+        if db_type == 'postgresql':
+            cmd, env = _pg_command('pg_dump', parsed_uri)
+            cmd.extend(['--format=custom', '--compress=0'])
+            fmt = 'pg_custom'
+        elif db_type == 'mysql':
+            cmd, env = _mysql_command('mysqldump', parsed_uri)
+            cmd.extend(['--single-transaction', '--routines', '--triggers', parsed_uri.path.lstrip('/')])
+            fmt = 'mysql_sql'
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+        
+        # Stream the dump straight into the chunker; it is never written whole
+        with _piped_process(cmd, env, stdout=subprocess.PIPE) as process:
+            entry = self._store_stream(self._read_blocks(process.stdout), executor, pending, stats)
+        return {'engine': db_type, 'format': fmt, **entry}
+    
+    def _backup_files(self, file_roots, parent: Optional[Dict], executor, pending: Dict,
+                      stats: Dict, exclude: List[str]) -> Dict:
+        previous_files = (parent or {}).get('files', {})
+        files = {}
+        
+        for src_path, dest_name in file_roots:
+            if not os.path.isdir(src_path):
+                continue
+            for dirpath, dirnames, filenames in os.walk(src_path):
+                dirnames[:] = [d for d in dirnames if not _excluded(d, exclude)]
+                for filename in filenames:
+                    if _excluded(filename, exclude):
+                        continue
+                    full_path = os.path.join(dirpath, filename)
+                    rel_path = os.path.relpath(full_path, src_path).replace(os.sep, '/')
+                    key = f'{dest_name}/{rel_path}'
+                    try:
+                        st = os.stat(full_path)
+                    except OSError:
+                        continue
+                    
+                    previous = previous_files.get(key)
+                    if (previous and previous['size'] == st.st_size
+                            and previous.get('mtime_ns') == st.st_mtime_ns
+                            and all(self.store.has(d) for d in previous['chunks'])):
+                        files[key] = previous
+                        stats['files_unchanged'] += 1
+                        stats['reused_chunks'] += len(previous['chunks'])
+                        continue
+                    
+                    try:
+                        with open(full_path, 'rb') as f:
+                            entry = self._store_stream(self._read_blocks(f), executor, pending, stats)
+                    except OSError as e:
+                        logger.warning(f"Failed to back up {full_path}: {e}")
+                        continue
+                    files[key] = {**entry, 'mtime_ns': st.st_mtime_ns}
+                    stats['files_read'] += 1
+        
+        return files
+    
+    # Restore
+    
+    def _assemble(self, entry: Dict, target_path: str, verify: bool = True):
+        """Write ``entry`` to ``target_path`` atomically from its chunks."""
+        os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path) or '.', suffix='.restore')
+        total = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for digest in entry['chunks']:
+                    data = self.store.get(digest, verify=verify)
+                    total.update(data)
+                    f.write(data)
+            if total.hexdigest() != entry['sha256']:
+                raise ValueError(f"Checksum mismatch restoring {target_path}")
+            os.replace(tmp_path, target_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _iter_entry(self, entry: Dict) -> Iterator[bytes]:
+        for digest in entry['chunks']:
+            yield self.store.get(digest, verify=True)
+    
+    def restore_database(self, manifest: Dict, db_uri: str):
+        database = manifest.get('database')
+        if not database:
+            raise FileNotFoundError("Backup has no database snapshot")
+        
+        parsed_uri = urlparse(db_uri)
+        if database['format'] == 'sqlite':
+            db_file = db_uri.replace('sqlite:///', '')
+            if os.path.exists(db_file):
+                backup_current = f"{db_file}.backup_{int(time.time())}"
+                shutil.copy2(db_file, backup_current)
+                logger.info(f"Current database backed up to: {backup_current}")
+            self._assemble(database, db_file)
+            return
+        
+        if database['format'] == 'pg_custom':
+            cmd, env = _pg_command('pg_restore', parsed_uri)
+            cmd.extend(['--clean', '--if-exists'])
+        elif database['format'] == 'mysql_sql':
+            cmd, env = _mysql_command('mysql', parsed_uri)
+            cmd.append(parsed_uri.path.lstrip('/'))
+        else:
+            raise ValueError(f"Unsupported snapshot format: {database['format']}")
+        
+        with _piped_process(cmd, env, stdin=subprocess.PIPE) as process:
+            for data in self._iter_entry(database):
+                process.stdin.write(data)
+    
+    def restore_files(self, manifest: Dict, root_path: str, paths: Optional[Iterable[str]] = None,
+                      file_roots: Iterable[Tuple[str, str]] = BACKUP_FILE_ROOTS) -> Dict:
+        """Restore files (optionally only those under ``paths``), skipping intact ones."""
+        destinations = {dest_name: src for src, dest_name in file_roots}
+        prefixes = tuple(paths) if paths else None
+        restored = skipped = 0
+        
+        for key, entry in manifest.get('files', {}).items():
+            if prefixes and not key.startswith(prefixes):
+                continue
+            root_name, _, rel_path = key.partition('/')
+            if root_name not in destinations:
+                continue
+            target = os.path.join(root_path, destinations[root_name], *rel_path.split('/'))
+            
+            if os.path.exists(target) and os.path.getsize(target) == entry['size'] \
+                    and _file_sha256(target) == entry['sha256']:
+                skipped += 1
+                continue
+            
+            self._assemble(entry, target)
+            restored += 1
+        
+        return {'restored': restored, 'skipped': skipped}
+    
+    # Verification and retention
+    
+    def verify(self, backup_name: str, deep: bool = True) -> Dict:
+        """Check a backup can be restored.
+        
+        The quick check confirms every referenced chunk exists; ``deep``
+        also decompresses and re-hashes every chunk and entry and runs
+        ``PRAGMA integrity_check`` on SQLite snapshots.
+        """
+        errors = []
+        manifest = self.load_manifest(backup_name)
+        if manifest.get('format') != BACKUP_FORMAT:
+            errors.append(f"Unknown manifest format: {manifest.get('format')}")
+        
+        entries = dict(manifest.get('files', {}))
+        if manifest.get('database'):
+            entries['<database>'] = manifest['database']
+        
+        checked = set()
+        for key, entry in entries.items():
+            for digest in entry['chunks']:
+                if digest in checked:
+                    continue
+                checked.add(digest)
+                if not self.store.has(digest):
+                    errors.append(f"{key}: missing chunk {digest}")
+                elif deep:
+                    try:
+                        self.store.get(digest, verify=True)
+                    except Exception as e:
+                        errors.append(f"{key}: {e}")
+        
+        if deep and not errors:
+            for key, entry in entries.items():
+                total = hashlib.sha256()
+                for data in self._iter_entry(entry):
+                    total.update(data)
+                if total.hexdigest() != entry['sha256']:
+                    errors.append(f"{key}: content checksum mismatch")
+            
+            database = manifest.get('database')
+            if database and database['format'] == 'sqlite' and not errors:
+                errors.extend(self._check_sqlite_snapshot(database))
+        
+        return {
+            'backup_name': backup_name,
+            'valid': not errors,
+            'deep': deep,
+            'entries': len(entries),
+            'chunks_checked': len(checked),
+            'errors': errors
+        }
+    
+    def _check_sqlite_snapshot(self, database: Dict) -> List[str]:
+        fd, tmp_path = tempfile.mkstemp(dir=self.backup_dir, suffix='.db.verify')
+        os.close(fd)
+        try:
+            self._assemble(database, tmp_path, verify=False)
+            conn = sqlite3.connect(tmp_path)
+            try:
+                result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+            finally:
+                conn.close()
+            return [] if result == 'ok' else [f"<database>: integrity_check reported {result}"]
+        finally:
+            os.remove(tmp_path)
+    
+    def delete(self, backup_name: str) -> int:
+        """Delete a manifest and the chunks no other backup references."""
+        os.remove(self._manifest_path(backup_name))
+        return self.collect_garbage()
+    
+    def collect_garbage(self) -> int:
+        referenced = set()
+        for manifest in self.list_manifests():
+            if manifest.get('database'):
+                referenced.update(manifest['database']['chunks'])
+            for entry in manifest.get('files', {}).values():
+                referenced.update(entry['chunks'])
+        
+        removed = 0
+        for digest in list(self.store.iter_digests()):
+            if digest not in referenced:
+                self.store.delete(digest)
+                removed += 1
+        return removed
+    
+    def manifest_size(self, manifest: Dict) -> int:
+        """Logical size of everything a manifest restores."""
+        size = (manifest.get('database') or {}).get('size', 0)
+        return size + sum(entry['size'] for entry in manifest.get('files', {}).values())
+
+
+def _excluded(name: str, patterns: List[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pg_command(program: str, parsed_uri) -> Tuple[List[str], Dict]:
+    env = os.environ.copy()
+    if parsed_uri.password:
+        env['PGPASSWORD'] = parsed_uri.password
+    cmd = [
+        program,
+        '-h', parsed_uri.hostname or 'localhost',
+        '-p', str(parsed_uri.port or 5432),
+        '-d', parsed_uri.path.lstrip('/'),
+        '--no-password'
+    ]
+    if parsed_uri.username:
+        cmd.extend(['-U', parsed_uri.username])
+    return cmd, env
+
+
+def _mysql_command(program: str, parsed_uri) -> Tuple[List[str], Dict]:
+    env = os.environ.copy()
+    if parsed_uri.password:
+        env['MYSQL_PWD'] = parsed_uri.password
+    cmd = [program, '-h', parsed_uri.hostname or 'localhost', '-P', str(parsed_uri.port or 3306)]
+    if parsed_uri.username:
+        cmd.extend(['-u', parsed_uri.username])
+    return cmd, env
+
+
+@contextmanager
+def _piped_process(cmd: List[str], env: Dict, **popen_kwargs):
+    """Run a dump or restore tool whose stdin or stdout is streamed by the caller.
+    
+    stderr goes to a temporary file rather than a pipe, so a tool writing
+    lots of warnings never blocks while the caller is busy with the other
+    stream. The child is killed if the caller fails and is always reaped.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, env=env, stderr=stderr, **popen_kwargs)
+        try:
+            yield process
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            for stream in (process.stdin, process.stdout):
+                if stream:
+                    try:
+                        stream.close()
+                    except OSError:
+                        pass
+            process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{cmd[0]} failed: {stderr.read().decode(errors='replace')}")
+
+
 class DatabaseBackupManager:
     """Manage database backups and recovery operations."""
     
@@ -27,6 +562,9 @@ class DatabaseBackupManager:
         self.retention_days = 30
         self.max_backups = 50
         self.compression_enabled = True
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.compression_workers = None
+        self.engine = None
         self.backup_scheduler = None
         
     def init_app(self, app):
@@ -35,62 +573,72 @@ class DatabaseBackupManager:
         self.retention_days = app.config.get('BACKUP_RETENTION_DAYS', 30)
         self.max_backups = app.config.get('MAX_BACKUPS', 50)
         self.compression_enabled = app.config.get('BACKUP_COMPRESSION', True)
+        self.chunk_size = app.config.get('BACKUP_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.compression_workers = app.config.get('BACKUP_COMPRESSION_WORKERS')
         
         # Ensure backup directory exists
         os.makedirs(self.backup_dir, exist_ok=True)
+        self.engine = None
         
         # Set up automatic backups if configured
         backup_schedule = app.config.get('BACKUP_SCHEDULE')
         if backup_schedule:
             self.setup_automatic_backups(backup_schedule)
     
+    def get_engine(self):
+        """Incremental backup engine over ``backup_dir``."""
+        if self.engine is None:
+            self.backup_dir = self.backup_dir or 'backups'
+            self.engine = IncrementalBackupEngine(
+                self.backup_dir,
+                chunk_size=self.chunk_size,
+                workers=self.compression_workers,
+                compression_level=6 if self.compression_enabled else 0
+            )
+        return self.engine
+    
     def create_backup(self, backup_name=None, include_files=True):
-        """Create a complete database backup."""
+        """Create an incremental backup (consistent DB snapshot plus changed files)."""
         try:
             if not backup_name:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_name = f'backup_{timestamp}'
             
-            backup_path = os.path.join(self.backup_dir, backup_name)
-            os.makedirs(backup_path, exist_ok=True)
-            
             # Get database URI
             db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
             if not db_uri:
                 raise ValueError("Database URI not configured")
             
-            # Create database backup based on type
-            db_backup_file = self._create_database_backup(db_uri, backup_path)
-            
-            # Create metadata file
-            metadata = self._create_backup_metadata(backup_name, db_backup_file, include_files)
-            metadata_file = os.path.join(backup_path, 'metadata.json')
-            
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2, default=str)
-            
-            # Backup application files if requested
+            file_roots = []
             if include_files:
-                self._backup_application_files(backup_path)
+                file_roots = [
+                    (os.path.join(current_app.root_path, src_dir), dest_name)
+                    for src_dir, dest_name in BACKUP_FILE_ROOTS
+                ]
             
-            # Compress backup if enabled
-            if self.compression_enabled:
-                compressed_file = self._compress_backup(backup_path)
-                # Remove uncompressed directory
-                shutil.rmtree(backup_path)
-                backup_path = compressed_file
+            engine = self.get_engine()
+            metadata = self._create_backup_metadata(backup_name, urlparse(db_uri).scheme, include_files)
+            manifest = engine.create(
+                backup_name, db_uri, file_roots, metadata, exclude=BACKUP_EXCLUDE_PATTERNS
+            )
             
             # Clean up old backups
             self._cleanup_old_backups()
             
-            logger.info(f"Backup created successfully: {backup_path}")
+            stats = manifest['stats']
+            logger.info(
+                f"Backup created successfully: {backup_name} "
+                f"({stats['new_chunks']} new chunks, {stats['reused_chunks']} reused, "
+                f"{stats['files_unchanged']} unchanged files)"
+            )
             
             return {
                 'success': True,
-                'backup_path': backup_path,
+                'backup_path': engine._manifest_path(backup_name),
                 'backup_name': backup_name,
-                'size': self._get_backup_size(backup_path),
-                'metadata': metadata
+                'size': stats['stored_bytes'],
+                'metadata': metadata,
+                'stats': stats
             }
             
         except Exception as e:
@@ -100,202 +648,42 @@ class DatabaseBackupManager:
                 'error': str(e)
             }
     
-    def _create_database_backup(self, db_uri, backup_path):
-        """Create database backup based on database type."""
-        parsed_uri = urlparse(db_uri)
-        db_type = parsed_uri.scheme
-        
-        if db_type == 'sqlite':
-            return self._backup_sqlite(db_uri, backup_path)
-        elif db_type == 'postgresql':
-            return self._backup_postgresql(parsed_uri, backup_path)
-        elif db_type == 'mysql':
-            return self._backup_mysql(parsed_uri, backup_path)
-        else:
-            raise ValueError(f"Unsupported database type: {db_type}")
-    
-    def _backup_sqlite(self, db_uri, backup_path):
-        """Backup SQLite database."""
-        # Extract database file path
-        db_file = db_uri.replace('sqlite:///', '')
-        
-        if not os.path.exists(db_file):
-            raise FileNotFoundError(f"SQLite database file not found: {db_file}")
-        
-        # Copy database file
-        backup_file = os.path.join(backup_path, 'database.db')
-        shutil.copy2(db_file, backup_file)
-        
-        # Create SQL dump as well
-        sql_file = os.path.join(backup_path, 'database.sql')
-        try:
-            # Use sqlite3 command line tool if available
-            subprocess.run([
-                'sqlite3', db_file, '.dump'
-            ], stdout=open(sql_file, 'w'), check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            # Fallback to Python sqlite3 module
-            import sqlite3
-            
-            conn = sqlite3.connect(db_file)
-            with open(sql_file, 'w') as f:
-                for line in conn.iterdump():
-                    f.write(f'{line}\n')
-            conn.close()
-        
-        return backup_file
-    
-    def _backup_postgresql(self, parsed_uri, backup_path):
-        """Backup PostgreSQL database."""
-        # Extract connection parameters
-        host = parsed_uri.hostname or 'localhost'
-        port = parsed_uri.port or 5432
-        database = parsed_uri.path.lstrip('/')
-        username = parsed_uri.username
-        password = parsed_uri.password
-        
-        # Create environment for pg_dump
-        env = os.environ.copy()
-        if password:
-            env['PGPASSWORD'] = password
-        
-        # Create SQL dump
-        sql_file = os.path.join(backup_path, 'database.sql')
-        
-        cmd = [
-            'pg_dump',
-            '-h', host,
-            '-p', str(port),
-            '-U', username,
-            '-d', database,
-            '--no-password',
-            '--verbose',
-            '--clean',
-            '--if-exists',
-            '--create',
-            '-f', sql_file
-        ]
-        
-        try:
-            result = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
-            logger.info(f"PostgreSQL backup completed: {result.stderr}")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"PostgreSQL backup failed: {e.stderr}")
-            raise
-        
-        # Create custom format backup as well
-        custom_file = os.path.join(backup_path, 'database.backup')
-        
-        cmd_custom = [
-            'pg_dump',
-            '-h', host,
-            '-p', str(port),
-            '-U', username,
-            '-d', database,
-            '--no-password',
-            '--format=custom',
-            '--compress=9',
-            '-f', custom_file
-        ]
-        
-        try:
-            subprocess.run(cmd_custom, env=env, capture_output=True, text=True, check=True)
-        except subprocess.CalledProcessError:
-            # Custom format backup failed, but SQL dump succeeded
-            pass
-        
-        return sql_file
-    
-    def _backup_mysql(self, parsed_uri, backup_path):
-        """Backup MySQL database."""
-        # Extract connection parameters
-        host = parsed_uri.hostname or 'localhost'
-        port = parsed_uri.port or 3306
-        database = parsed_uri.path.lstrip('/')
-        username = parsed_uri.username
-        password = parsed_uri.password
-        
-        # Create SQL dump
-        sql_file = os.path.join(backup_path, 'database.sql')
-        
-        cmd = ['mysqldump']
-        
-        if host:
-            cmd.extend(['-h', host])
-        if port:
-            cmd.extend(['-P', str(port)])
-        if username:
-            cmd.extend(['-u', username])
-        if password:
-            cmd.append(f'-p{password}')
-        
-        cmd.extend([
-            '--single-transaction',
-            '--routines',
-            '--triggers',
-            '--add-drop-database',
-            '--create-options',
-            database
-        ])
-        
-        try:
-            with open(sql_file, 'w') as f:
-                result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE, text=True, check=True)
-            logger.info("MySQL backup completed")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"MySQL backup failed: {e.stderr}")
-            raise
-        
-        return sql_file
-    
-    def _backup_application_files(self, backup_path):
-        """Backup application files (uploads, templates, etc.)."""
-        files_backup_dir = os.path.join(backup_path, 'files')
-        os.makedirs(files_backup_dir, exist_ok=True)
-        
-        # Directories to backup
-        backup_dirs = [
-            ('static/uploads', 'uploads'),
-            ('static/signatures', 'signatures'),
-            ('templates', 'templates'),
-            ('instance', 'instance')
-        ]
+    def verify_backup(self, backup_name, deep=True):
+        """Confirm a backup is complete and restorable."""
+        engine = self.get_engine()
+        if engine.has_manifest(backup_name):
+            return engine.verify(backup_name, deep=deep)
         
-        for src_dir, dest_name in backup_dirs:
-            src_path = os.path.join(current_app.root_path, src_dir)
-            dest_path = os.path.join(files_backup_dir, dest_name)
-            
-            if os.path.exists(src_path):
-                try:
-                    shutil.copytree(src_path, dest_path, ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
-                    logger.info(f"Backed up {src_dir} to {dest_name}")
-                except Exception as e:
-                    logger.warning(f"Failed to backup {src_dir}: {e}")
+        # Legacy full backups: check the archive can be read
+        backup_path = os.path.join(self.backup_dir, backup_name)
+        errors = []
+        if not os.path.exists(backup_path):
+            errors.append(f"Backup not found: {backup_name}")
+        elif backup_name.endswith('.tar.gz'):
+            import tarfile
+            try:
+                with tarfile.open(backup_path, 'r:gz') as tar:
+                    for member in tar:
+                        if member.isfile():
+                            tar.extractfile(member).read()
+            except Exception as e:
+                errors.append(f"Archive unreadable: {e}")
+        return {'backup_name': backup_name, 'valid': not errors, 'deep': deep, 'errors': errors}
     
-    def _create_backup_metadata(self, backup_name, db_backup_file, include_files):
+    def _create_backup_metadata(self, backup_name, database_type, include_files):
         """Create backup metadata."""
         return {
             'backup_name': backup_name,
             'created_at': datetime.now(),
-            'database_file': os.path.basename(db_backup_file),
+            'database_type': database_type,
             'database_uri': current_app.config.get('SQLALCHEMY_DATABASE_URI', '').split('@')[-1],  # Hide credentials
             'include_files': include_files,
             'app_version': current_app.config.get('VERSION', 'unknown'),
             'python_version': f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
-            'backup_type': 'full' if include_files else 'database_only'
+            'backup_type': 'incremental' if include_files else 'database_only',
+            'format': BACKUP_FORMAT
         }
     
-    def _compress_backup(self, backup_path):
-        """Compress backup directory."""
-        compressed_file = f"{backup_path}.tar.gz"
-        
-        import tarfile
-        
-        with tarfile.open(compressed_file, 'w:gz') as tar:
-            tar.add(backup_path, arcname=os.path.basename(backup_path))
-        
-        return compressed_file
-    
     def _get_backup_size(self, backup_path):
         """Get backup size in bytes."""
         if os.path.isfile(backup_path):
@@ -313,12 +701,28 @@ class DatabaseBackupManager:
         """List available backups."""
         backups = []
         
-        if not os.path.exists(self.backup_dir):
+        if not self.backup_dir or not os.path.exists(self.backup_dir):
             return backups
         
+        engine = self.get_engine()
+        for manifest in engine.list_manifests():
+            backups.append({
+                'name': manifest['backup_name'],
+                'path': engine._manifest_path(manifest['backup_name']),
+                'size': engine.manifest_size(manifest),
+                'stored_size': manifest.get('stats', {}).get('stored_bytes', 0),
+                'created_at': datetime.fromisoformat(manifest['created_at']),
+                'type': 'incremental',
+                'metadata': manifest.get('metadata', {})
+            })
+        
         for item in os.listdir(self.backup_dir):
             item_path = os.path.join(self.backup_dir, item)
             
+            # Chunk store and manifests belong to incremental backups
+            if item in ('chunks', 'manifests'):
+                continue
+            
             # Check if it's a backup (directory or compressed file)
             if os.path.isdir(item_path) or item.endswith('.tar.gz'):
                 backup_info = {
@@ -361,9 +765,31 @@ class DatabaseBackupManager:
         
         return backups
     
-    def restore_backup(self, backup_name, restore_files=True):
-        """Restore database from backup."""
+    def restore_backup(self, backup_name, restore_files=True, paths=None):
+        """Restore database from backup.
+        
+        For incremental backups only files that differ from the backup (or
+        fall under ``paths`` when given) are rewritten.
+        """
         try:
+            engine = self.get_engine()
+            if engine.has_manifest(backup_name):
+                manifest = engine.load_manifest(backup_name)
+                db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI')
+                engine.restore_database(manifest, db_uri)
+                
+                file_result = None
+                if restore_files and manifest.get('files'):
+                    file_result = engine.restore_files(manifest, current_app.root_path, paths)
+                
+                logger.info(f"Backup restored successfully: {backup_name} ({file_result})")
+                return {
+                    'success': True,
+                    'backup_name': backup_name,
+                    'metadata': manifest.get('metadata', {}),
+                    'files': file_result
+                }
+            
             backup_path = os.path.join(self.backup_dir, backup_name)
             
             if not os.path.exists(backup_path):
@@ -611,6 +1037,12 @@ class DatabaseBackupManager:
     def delete_backup(self, backup_name):
         """Delete a backup."""
         try:
+            engine = self.get_engine()
+            if engine.has_manifest(backup_name):
+                removed_chunks = engine.delete(backup_name)
+                logger.info(f"Backup deleted: {backup_name} ({removed_chunks} chunks freed)")
+                return True
+            
             backup_path = os.path.join(self.backup_dir, backup_name)
             
             if not os.path.exists(backup_path):
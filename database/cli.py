@@ -5,6 +5,7 @@ import click
 from flask import current_app
 from flask.cli import with_appcontext
 from models import db, User
+from .statements import get_user_by_email
 from .migrations import migration_manager
 
 
@@ -129,6 +130,68 @@ def backup_command():
         click.echo(f'[-] Failed to create backup: {e}')
 
 
+@db_cli.command('backup-incremental')
+@click.option('--name', default=None, help='Backup name')
+@click.option('--no-files', is_flag=True, help='Only snapshot the database')
+@with_appcontext
+def backup_incremental_command(name, no_files):
+    """Create an incremental, deduplicated backup."""
+    from .backup import backup_manager
+    
+    if backup_manager.backup_dir is None:
+        backup_manager.init_app(current_app)
+    
+    result = backup_manager.create_backup(name, include_files=not no_files)
+    if result['success']:
+        stats = result['stats']
+        click.echo(f"[+] Backup created: {result['backup_name']}")
+        click.echo(f"   New chunks: {stats['new_chunks']}, reused: {stats['reused_chunks']}, "
+                   f"stored: {stats['stored_bytes']} bytes, unchanged files: {stats['files_unchanged']}")
+    else:
+        click.echo(f"[-] Failed to create backup: {result['error']}")
+
+
+@db_cli.command('backup-verify')
+@click.argument('backup_name')
+@click.option('--quick', is_flag=True, help='Only check that every chunk exists')
+@with_appcontext
+def backup_verify_command(backup_name, quick):
+    """Verify that a backup is complete and restorable."""
+    from .backup import backup_manager
+    
+    if backup_manager.backup_dir is None:
+        backup_manager.init_app(current_app)
+    
+    try:
+        result = backup_manager.verify_backup(backup_name, deep=not quick)
+    except Exception as e:
+        click.echo(f'[-] Verification failed: {e}')
+        raise SystemExit(1)
+    
+    if result['valid']:
+        click.echo(f"[+] Backup {backup_name} verified ({result.get('chunks_checked', 0)} chunks)")
+    else:
+        click.echo(f'[-] Backup {backup_name} is not usable:')
+        for error in result['errors']:
+            click.echo(f'   {error}')
+        raise SystemExit(1)
+
+
+@db_cli.command('reconcile-notifications')
+@with_appcontext
+def reconcile_notifications_command():
+    """Recompute unread notification counters from the notifications table."""
+    from .notification_counters import reconcile_unread_counters
+
+    try:
+        corrected = reconcile_unread_counters()
+        db.session.commit()
+        click.echo(f'[+] Unread counters reconciled ({corrected} corrected)')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'[-] Failed to reconcile unread counters: {e}')
+
+
 @db_cli.command('create-admin')
 @click.option('--email', default='admin@cullyautomation.com', help='Admin email')
 @click.option('--password', default='admin123', help='Admin password')
@@ -137,7 +200,7 @@ def backup_command():
 def create_admin_command(email, password, name):
     """Create admin user."""
     try:
-        existing = User.query.filter_by(email=email).first()
+        existing = get_user_by_email(email)
         if existing:
             click.echo(f'[!]  Admin {email} already exists')
             return
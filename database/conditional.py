@@ -0,0 +1,95 @@
+"""
+Cheap data versions for conditional GET responses.
+
+Each function returns ``(version, last_modified)`` for the data behind a
+response, read with a single indexed aggregate instead of loading and
+rendering the rows. ``middleware_optimized.conditional`` turns the
+version into an ETag and answers ``If-None-Match`` with a 304 before the
+view runs.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import bindparam, event, func, select
+
+from models import NotificationCounter, Report
+from .statements import execute, hot_statement
+
+logger = logging.getLogger(__name__)
+
+# Report detail rows whose changes must also invalidate the parent report
+_REPORT_CHILD_ATTRIBUTE = 'parent_report'
+
+_report_touch_installed = False
+
+
+@hot_statement('report_version')
+def _report_version():
+    return select(Report.updated_at, Report.version, Report.status).where(Report.id == bindparam('report_id'))
+
+
+@hot_statement('notification_version')
+def _notification_version():
+    return (
+        select(NotificationCounter.version, NotificationCounter.unread_count, NotificationCounter.updated_at)
+        .where(NotificationCounter.user_email == bindparam('user_email'))
+    )
+
+
+def report_version(report_id):
+    """Version of one report from its ``updated_at``, revision and status."""
+    row = execute('report_version', report_id=report_id).first()
+    if row is None:
+        return None, None
+    updated_at, version, status = row
+    return (updated_at.isoformat() if updated_at else None, version, status), updated_at
+
+
+def reports_version(query):
+    """Version of a filtered report list: newest ``updated_at`` plus row count.
+
+    ``query`` is the list view's filtered ``Report`` query, before ordering
+    and pagination.
+    """
+    aggregate = query.with_entities(func.max(Report.updated_at), func.count(Report.id)).order_by(None)
+    newest, count = aggregate.one()
+    return (newest.isoformat() if newest else None, count), newest
+
+
+def notification_version(user_email):
+    """Version of a user's notifications from their unread counter row.
+
+    Every create and mark-read bumps the counter version, so this is a
+    primary-key lookup rather than an aggregate over the notifications.
+    """
+    if not user_email:
+        return None, None
+    row = execute('notification_version', user_email=user_email).first()
+    if row is None:
+        return (0, 0), None
+    version, unread, updated_at = row
+    return (version, unread), updated_at
+
+
+def install_report_touch(session):
+    """Bump ``Report.updated_at`` when a report's detail row changes.
+
+    Several views only write ``SATReport.data_json`` (or the other per-type
+    detail rows); without this the report version would not change.
+    """
+    global _report_touch_installed
+    if _report_touch_installed:
+        return
+    _report_touch_installed = True
+
+    @event.listens_for(session, 'before_flush')
+    def touch_parent_reports(flush_session, flush_context, instances):
+        now = datetime.utcnow()
+        for instance in list(flush_session.dirty) + list(flush_session.new):
+            if not hasattr(type(instance), _REPORT_CHILD_ATTRIBUTE):
+                continue
+            if instance in flush_session.dirty and not flush_session.is_modified(instance):
+                continue
+            parent = getattr(instance, _REPORT_CHILD_ATTRIBUTE, None)
+            if isinstance(parent, Report):
+                parent.updated_at = now
@@ -4,12 +4,133 @@ This fixes the login/dashboard access issues caused by missing database columns.
 """
 import os
 import sys
-from sqlalchemy import text, inspect
+import time
+import hashlib
+import importlib
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import text, inspect, MetaData, Table, Column, Integer, String, DateTime
+from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever run_migration() gains a step, so databases stamped with an
+# older fingerprint are migrated again even if the models did not change.
+SCHEMA_MIGRATION_VERSION = 1
+
+# Every module defining models on db.metadata. They are imported before the
+# fingerprint is taken, so tables registered outside models.py are covered
+# even when startup reaches this point before anything else imported them.
+MODEL_MODULES = (
+    'models',
+    'security.audit',
+    'api.security',
+    'services.cully_data_sync',
+)
+
+# Arbitrary application-wide key for pg_advisory_lock
+SCHEMA_MIGRATION_LOCK_KEY = 7263001
+
+# Kept out of db.metadata so the stamp never feeds into its own fingerprint
+_schema_state_metadata = MetaData()
+schema_fingerprint_table = Table(
+    'schema_fingerprint',
+    _schema_state_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('fingerprint', String(64), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def import_model_modules(modules=MODEL_MODULES):
+    """Import the modules in ``modules`` so their tables are on the metadata."""
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Could not import models from {module}: {e}")
+
+
+def compute_schema_fingerprint(metadata, version=SCHEMA_MIGRATION_VERSION):
+    """
+    Hash the table, column and index definitions of the models.
+    Any model change or migration version bump yields a new fingerprint.
+    """
+    digest = hashlib.sha256(f"version={version}".encode('utf-8'))
+    for table in sorted(metadata.tables.values(), key=lambda t: t.fullname):
+        digest.update(f"\ntable={table.fullname}".encode('utf-8'))
+        for column in table.columns:
+            digest.update(
+                f"\ncolumn={column.name}:{column.type!r}:"
+                f"{column.nullable}:{column.primary_key}".encode('utf-8')
+            )
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            columns = ','.join(column.name for column in index.columns)
+            digest.update(f"\nindex={index.name}:{columns}:{index.unique}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def read_schema_fingerprint(engine):
+    """Return the stored fingerprint, or None if the database was never stamped."""
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                schema_fingerprint_table.select().where(schema_fingerprint_table.c.id == 1)
+            ).first()
+    except SQLAlchemyError:
+        return None
+    return row.fingerprint if row else None
+
+
+def record_schema_fingerprint(engine, fingerprint, version=SCHEMA_MIGRATION_VERSION):
+    """Stamp the database with the fingerprint it was just migrated to."""
+    schema_fingerprint_table.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(schema_fingerprint_table.delete())
+        conn.execute(
+            schema_fingerprint_table.insert().values(
+                id=1,
+                version=version,
+                fingerprint=fingerprint,
+                applied_at=datetime.utcnow()
+            )
+        )
+
+
+@contextmanager
+def schema_migration_lock(app, engine, timeout=300, delay=0.25):
+    """
+    Serialize schema migrations across worker processes.
+    PostgreSQL uses an advisory lock so the lock also spans hosts; other
+    databases fall back to a lock file in the instance folder.
+    """
+    if engine.dialect.name == 'postgresql':
+        conn = engine.connect()
+        try:
+            start_time = time.time()
+            while not conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {'key': SCHEMA_MIGRATION_LOCK_KEY}
+            ).scalar():
+                if time.time() - start_time > timeout:
+                    raise TimeoutError(f"Could not acquire schema migration lock within {timeout} seconds")
+                time.sleep(delay)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': SCHEMA_MIGRATION_LOCK_KEY})
+        finally:
+            conn.close()
+    else:
+        from utils import file_lock
+
+        os.makedirs(app.instance_path, exist_ok=True)
+        lock_path = os.path.join(app.instance_path, 'schema_migration.lock')
+        with file_lock(lock_path, mode='w', timeout=timeout, delay=delay):
+            yield
+
 def run_migration(app, db):
     """
     Add missing columns to the reports table and create ReportEdit table if needed.
@@ -338,29 +459,46 @@ def run_migration(app, db):
             return False
 
 
-def ensure_database_ready(app, db):
+def ensure_database_ready(app, db, force=False):
     """
     Ensure database is ready with all required columns.
-    This is called on every app startup.
+    This is called on every app startup, so the common case is a single
+    fingerprint lookup; introspection and DDL only run when the models or
+    the migration version changed, and then only in one process at a time.
     """
     try:
-        # First ensure tables exist
         with app.app_context():
-            try:
-                # Try to create all tables if they don't exist
-                db.create_all()
-            except Exception as e:
-                logger.warning(f"Could not create tables (may already exist): {e}")
-            
-            # Run the migration to add missing columns
-            success = run_migration(app, db)
-            
-            if success:
-                logger.info("Database is ready for use")
-            else:
-                logger.error("Database migration had issues but continuing...")
-            
-            return success
+            engine = db.engine
+            import_model_modules()
+            fingerprint = compute_schema_fingerprint(db.metadata)
+
+            if not force and read_schema_fingerprint(engine) == fingerprint:
+                logger.info("Database schema fingerprint matches; skipping migration checks")
+                return True
+
+            timeout = app.config.get('SCHEMA_MIGRATION_LOCK_TIMEOUT', 300)
+            with schema_migration_lock(app, engine, timeout=timeout):
+                # Another worker may have finished the migration while we waited
+                if not force and read_schema_fingerprint(engine) == fingerprint:
+                    logger.info("Database schema was migrated by another process")
+                    return True
+
+                try:
+                    # Try to create all tables if they don't exist
+                    db.create_all()
+                except Exception as e:
+                    logger.warning(f"Could not create tables (may already exist): {e}")
+
+                # Run the migration to add missing columns
+                success = run_migration(app, db)
+
+                if success:
+                    record_schema_fingerprint(engine, fingerprint)
+                    logger.info("Database is ready for use")
+                else:
+                    logger.error("Database migration had issues but continuing...")
+
+                return success
     except Exception as e:
         logger.error(f"Failed to ensure database readiness: {e}")
         return False
@@ -375,7 +513,7 @@ if __name__ == "__main__":
     from models import db
     
     app = create_app()
-    success = ensure_database_ready(app, db)
+    success = ensure_database_ready(app, db, force=True)
     
     if success:
         print("Migration completed successfully!")
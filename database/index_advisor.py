@@ -0,0 +1,646 @@
+"""
+Workload-driven index advisor for SAT Report Generator.
+
+Candidate indexes are derived from the normalized statements captured by
+``QueryPerformanceMonitor`` and ``QueryAnalyzer``, then validated on a
+scratch copy of the database: each candidate is built there, the affected
+statements are re-planned with EXPLAIN and the plan cost is compared
+with the baseline. Only candidates that lower the weighted workload cost
+are suggested, ranked by estimated savings.
+"""
+import glob
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import create_engine, inspect, text
+
+logger = logging.getLogger(__name__)
+
+_SQL_KEYWORDS = {
+    'where', 'join', 'inner', 'left', 'right', 'outer', 'full', 'cross', 'on',
+    'order', 'group', 'limit', 'offset', 'having', 'set', 'values', 'union',
+    'returning', 'using', 'natural', 'as', 'and', 'or', 'not', 'for'
+}
+_TABLE_REF = re.compile(
+    r'\b(?:from|join|update|into)\s+([a-z_][\w]*)(?:\s+(?:as\s+)?([a-z_][\w]*))?'
+)
+_PREDICATE = re.compile(
+    r'(?:([a-z_]\w*)\.)?([a-z_]\w*)\s*(<=|>=|<>|!=|=|<|>|\bnot\s+in\b|\bin\b|\bis\b|\bbetween\b|\blike\b)\s*'
+    r'(\(|(?:[a-z_]\w*\.)?[a-z_]\w*|\?|\'[^\']*\'|[-\d.]+)?'
+)
+_CLAUSE_END = r'(?=\b(?:group\s+by|order\s+by|limit|offset|having|returning|union|for\s+update)\b|$)'
+_JOIN_CONDITION_END = (
+    r'(?=\b(?:left|right|inner|outer|full|cross|join|where|group\s+by|order\s+by|limit)\b|$)'
+)
+_MAX_INDEX_COLUMNS = 4
+_PLAN_STEP = re.compile(
+    r'(SCAN|SEARCH) (\w+)(?: AS \w+)?'
+    r'(?: USING (COVERING )?(?:INDEX (\w+)|INTEGER PRIMARY KEY|PRIMARY KEY))?(?: \((.*)\))?'
+)
+
+DEFAULT_ADVICE_TTL_SECONDS = 600
+
+_advice_cache: Dict[Tuple[str, int], Tuple[Dict[str, Any], float]] = {}  # (url, limit) -> (advice, expires_at)
+_advice_lock = threading.Lock()
+
+
+@dataclass
+class WorkloadQuery:
+    """A normalized statement and how often / how long it ran."""
+    sql: str
+    count: int
+    total_time: float
+    statement: str
+    tables: Dict[str, str] = field(default_factory=dict)  # alias -> table
+
+    @property
+    def is_write(self) -> bool:
+        return self.statement in ('insert', 'update', 'delete')
+
+
+@dataclass
+class IndexCandidate:
+    """A candidate index and its measured effect on the workload."""
+    table: str
+    columns: Tuple[str, ...]
+    queries: List[WorkloadQuery] = field(default_factory=list)
+    baseline_cost: float = 0.0
+    new_cost: float = 0.0
+    estimated_savings: float = 0.0
+    write_overhead: float = 0.0
+
+    @property
+    def name(self) -> str:
+        name = f"ix_{self.table}_{'_'.join(self.columns)}"
+        return name[:63]
+
+    @property
+    def net_savings(self) -> float:
+        return self.estimated_savings - self.write_overhead
+
+    @property
+    def improvement(self) -> float:
+        if self.baseline_cost <= 0:
+            return 0.0
+        return (1 - self.new_cost / self.baseline_cost) * 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'table': self.table,
+            'columns': list(self.columns),
+            'type': 'workload',
+            'reason': (
+                f"Lowers plan cost of {len(self.queries)} statement(s) "
+                f"by {self.improvement:.0f}%"
+            ),
+            'estimated_savings': round(self.net_savings, 2),
+            'baseline_cost': round(self.baseline_cost, 2),
+            'new_cost': round(self.new_cost, 2),
+            'write_overhead': round(self.write_overhead, 2),
+            'improvement_pct': round(self.improvement, 1),
+            'queries': [q.sql[:200] for q in self.queries[:5]],
+            'sql': f"CREATE INDEX {self.name} ON {self.table} ({', '.join(self.columns)})"
+        }
+
+
+def _strip_literals(sql: str) -> str:
+    return re.sub(r"'[^']*'", "''", sql)
+
+
+def count_placeholders(sql: str) -> int:
+    return _strip_literals(sql).count('?')
+
+
+def to_numbered_placeholders(sql: str) -> str:
+    """Rewrite ``?`` placeholders outside string literals as ``$1, $2, ...``."""
+    parts = re.split(r"('[^']*')", sql)
+    counter = 0
+    for i, part in enumerate(parts):
+        if part.startswith("'"):
+            continue
+
+        def number(match):
+            nonlocal counter
+            counter += 1
+            return f'${counter}'
+
+        parts[i] = re.sub(r'\?', number, part)
+    return ''.join(parts)
+
+
+def parse_predicates(query: WorkloadQuery, table_columns: Dict[str, set]) -> Dict[str, Dict[str, List[str]]]:
+    """Return ``{table: {'eq': [...], 'range': [...], 'order': [...]}}`` for a statement."""
+    sql = query.sql.lower().replace('"', '')
+    aliases = query.tables
+    usage = defaultdict(lambda: {'eq': [], 'range': [], 'order': []})
+
+    def resolve(qualifier, column):
+        if qualifier:
+            table = aliases.get(qualifier)
+            return table if table and column in table_columns.get(table, ()) else None
+        owners = [t for t in set(aliases.values()) if column in table_columns.get(t, ())]
+        return owners[0] if len(owners) == 1 else None
+
+    def add(kind, table, column):
+        if table and column not in usage[table][kind]:
+            usage[table][kind].append(column)
+
+    segments = re.findall(r'\bwhere\b(.*?)' + _CLAUSE_END, sql)
+    segments += re.findall(r'\bon\b(.*?)' + _JOIN_CONDITION_END, sql)
+    for segment in segments:
+        for qualifier, column, op, rhs in _PREDICATE.findall(segment):
+            op = ' '.join(op.split())
+            table = resolve(qualifier, column)
+            if op in ('=', 'in', 'is'):
+                add('eq', table, column)
+                rhs_match = re.match(r'(?:([a-z_]\w*)\.)?([a-z_]\w*)$', rhs or '')
+                if op == '=' and rhs_match and rhs_match.group(2) not in ('null', 'true', 'false'):
+                    add('eq', resolve(rhs_match.group(1), rhs_match.group(2)), rhs_match.group(2))
+            elif op in ('<', '>', '<=', '>=', 'between'):
+                add('range', table, column)
+
+    order = re.search(r'\border\s+by\b(.*?)(?=\b(?:limit|offset|for\s+update)\b|$)', sql)
+    if order:
+        for term in order.group(1).split(','):
+            match = re.match(r'\s*(?:([a-z_]\w*)\.)?([a-z_]\w*)', term)
+            if match:
+                add('order', resolve(match.group(1), match.group(2)), match.group(2))
+
+    return usage
+
+
+class SQLiteScratch:
+    """Scratch copy of a SQLite database used for what-if planning."""
+
+    def __init__(self, engine):
+        fd, self.path = tempfile.mkstemp(prefix='index_advisor_', suffix='.db')
+        os.close(fd)
+        raw = engine.raw_connection()
+        try:
+            target = sqlite3.connect(self.path)
+            raw.driver_connection.backup(target)
+            target.close()
+        finally:
+            raw.close()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('ANALYZE')
+        self._row_counts = {}
+
+    def close(self):
+        self.conn.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def create_index(self, name, table, columns, keep=False):
+        self.conn.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+        self.conn.execute(f"ANALYZE {name}")
+
+    def drop_index(self, name):
+        self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        self.conn.execute("DELETE FROM sqlite_stat1 WHERE idx = ?", (name,))
+
+    def row_count(self, table):
+        if table not in self._row_counts:
+            self._row_counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return self._row_counts[table]
+
+    def _index_stats(self, index_name):
+        row = self.conn.execute("SELECT stat FROM sqlite_stat1 WHERE idx = ?", (index_name,)).fetchone()
+        if not row:
+            return None
+        return [int(value) for value in row[0].split() if value.isdigit()]
+
+    def plan_cost(self, sql, tables=None):
+        """Estimate the cost of ``sql`` from its query plan and the ANALYZE statistics.
+
+        SQLite exposes no cost numbers, so each plan step is priced as the
+        rows it visits (from sqlite_stat1) and nested loops multiply by the
+        rows produced by the outer steps.
+        """
+        params = [None] * count_placeholders(sql)
+        plan = self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+
+        cost = 0.0
+        outer_rows = 1.0
+        last_rows = 1.0
+        for row in plan:
+            detail = row[-1]
+            step = _PLAN_STEP.match(detail)
+            if step:
+                kind, table, covering, index_name, terms = step.groups()
+                table = (tables or {}).get(table.lower(), table)
+                try:
+                    total = max(1, self.row_count(table))
+                except sqlite3.Error:
+                    total = 1
+                if 'PRIMARY KEY' in detail and kind == 'SEARCH':
+                    rows, step_cost = 1.0, math.log2(total + 1)
+                elif kind == 'SCAN':
+                    rows = float(total)
+                    step_cost = total * (1 if covering or not index_name else 2)
+                else:
+                    equalities = len(re.findall(r'(?<![<>!])=', terms or ''))
+                    stats = self._index_stats(index_name) if index_name else None
+                    if stats and len(stats) > equalities:
+                        rows = float(stats[equalities]) if equalities else float(stats[0])
+                    else:
+                        rows = total / 10.0
+                    if re.search(r'[<>]', terms or ''):
+                        rows = max(1.0, rows / 4)
+                    step_cost = math.log2(total + 1) + rows * (1 if covering else 2)
+                cost += outer_rows * step_cost
+                outer_rows *= max(rows, 1.0)
+                last_rows = rows
+            elif detail.startswith('USE TEMP B-TREE'):
+                cost += last_rows * math.log2(last_rows + 1)
+        return cost
+
+
+class PostgresScratch:
+    """Scratch PostgreSQL database (a restored clone) used for what-if planning.
+
+    Everything runs in one transaction that is rolled back on close, and
+    each candidate is built inside a savepoint that is discarded after it
+    was measured. Statements are planned with ``EXPLAIN (GENERIC_PLAN)``
+    (PostgreSQL 16+) so normalized placeholders need no values.
+    """
+
+    def __init__(self, url):
+        self.engine = create_engine(url)
+        self.conn = self.engine.connect()
+        self.transaction = self.conn.begin()
+        self.savepoint = None
+
+    def close(self):
+        self.transaction.rollback()
+        self.conn.close()
+        self.engine.dispose()
+
+    def create_index(self, name, table, columns, keep=False):
+        if not keep:
+            self.savepoint = self.conn.begin_nested()
+        self.conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+
+    def drop_index(self, name):
+        if self.savepoint is not None:
+            self.savepoint.rollback()
+            self.savepoint = None
+
+    def row_count(self, table):
+        return self.conn.execute(
+            text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE relname = :table"),
+            {'table': table}
+        ).scalar() or 0
+
+    def plan_cost(self, sql, tables=None):
+        statement = to_numbered_placeholders(sql)
+        savepoint = self.conn.begin_nested()
+        try:
+            plan = self.conn.exec_driver_sql(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {statement}").scalar()
+        finally:
+            savepoint.rollback()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return float(plan[0]['Plan']['Total Cost'])
+
+
+class IndexAdvisor:
+    """Suggest indexes from the captured workload and validate them on a scratch copy."""
+
+    def __init__(self, engine, monitor=None, analyzer=None, scratch_url=None,
+                 min_executions=2, min_improvement=10.0, workload=None):
+        self.engine = engine
+        self.extra_workload = workload or []
+        self.monitor = monitor
+        self.analyzer = analyzer
+        self.scratch_url = scratch_url
+        self.min_executions = min_executions
+        self.min_improvement = min_improvement
+
+    def collect_workload(self) -> List[WorkloadQuery]:
+        """Merge the normalized statements recorded by the monitor and the analyzer."""
+        merged: Dict[str, WorkloadQuery] = {}
+
+        # Statements exported from another process, e.g. {"sql", "count", "total_time"}
+        for entry in self.extra_workload:
+            self._merge(merged, entry['sql'], entry.get('count', 1), entry.get('total_time', 0.0))
+
+        if self.monitor is not None:
+            for sql, stats in self.monitor.get_query_stats(limit=None):
+                self._merge(merged, sql, stats['count'], stats['total_time'])
+
+        if self.analyzer is not None:
+            with self.analyzer.lock:
+                metrics = list(self.analyzer.query_metrics.values())
+            for metric in metrics:
+                # The analyzer masks quoted identifiers; prefer the monitor's copy
+                if '"?"' in metric.normalized_query:
+                    continue
+                self._merge(merged, metric.normalized_query, metric.execution_count, metric.total_time,
+                            replace=False)
+
+        return [q for q in merged.values() if q.count >= self.min_executions or q.is_write]
+
+    @staticmethod
+    def _merge(merged, sql, count, total_time, replace=True):
+        sql = ' '.join(str(sql).split())
+        key = sql.lower()
+        if key in merged:
+            if replace:
+                merged[key].count = max(merged[key].count, count)
+                merged[key].total_time = max(merged[key].total_time, total_time)
+            return
+
+        statement = key.split(' ', 1)[0]
+        if statement not in ('select', 'update', 'delete', 'insert'):
+            return
+        tables = {}
+        for table, alias in _TABLE_REF.findall(key.replace('"', '')):
+            tables[table] = table
+            if alias and alias not in _SQL_KEYWORDS:
+                tables[alias] = table
+        merged[key] = WorkloadQuery(sql=sql, count=count, total_time=total_time,
+                                    statement=statement, tables=tables)
+
+    def generate_candidates(self, workload: List[WorkloadQuery]) -> List[IndexCandidate]:
+        """Derive candidate indexes (equality, then range or sort columns) per statement."""
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        table_columns = {}
+        existing_indexes = {}
+        for table in {t for q in workload for t in q.tables.values()} & existing_tables:
+            table_columns[table] = {c['name'].lower() for c in inspector.get_columns(table)}
+            indexed = [tuple(c.lower() for c in idx['column_names'] if c) for idx in inspector.get_indexes(table)]
+            pk = inspector.get_pk_constraint(table).get('constrained_columns') or []
+            if pk:
+                indexed.append(tuple(c.lower() for c in pk))
+            existing_indexes[table] = indexed
+
+        candidates: Dict[Tuple[str, Tuple[str, ...]], IndexCandidate] = {}
+
+        def propose(table, columns, query):
+            columns = tuple(dict.fromkeys(columns))[:_MAX_INDEX_COLUMNS]
+            if not columns:
+                return
+            if any(idx[:len(columns)] == columns for idx in existing_indexes.get(table, ())):
+                return
+            candidate = candidates.setdefault((table, columns), IndexCandidate(table, columns))
+            if query not in candidate.queries:
+                candidate.queries.append(query)
+
+        for query in workload:
+            if query.statement == 'insert':
+                continue
+            for table, usage in parse_predicates(query, table_columns).items():
+                eq, rng, order = usage['eq'], usage['range'], usage['order']
+                if eq or rng:
+                    propose(table, eq + (rng[:1] if rng else order), query)
+                    for column in eq + rng[:1]:
+                        propose(table, [column], query)
+                if order and not eq and not rng:
+                    propose(table, order, query)
+
+        return list(candidates.values())
+
+    def _open_scratch(self):
+        if self.engine.dialect.name == 'sqlite':
+            return SQLiteScratch(self.engine)
+        if self.engine.dialect.name == 'postgresql':
+            if not self.scratch_url:
+                raise RuntimeError(
+                    "Set INDEX_ADVISOR_SCRATCH_URL to a restored copy of the database "
+                    "to validate index candidates on PostgreSQL"
+                )
+            return PostgresScratch(self.scratch_url)
+        raise RuntimeError(f"Index advisor does not support {self.engine.dialect.name}")
+
+    def select(self, candidates: List[IndexCandidate], workload: List[WorkloadQuery],
+               limit=10) -> List[IndexCandidate]:
+        """Greedily pick the candidates with the largest measured savings.
+
+        Every round measures each remaining candidate against the indexes
+        already chosen, keeps the best one built on the scratch copy and
+        repeats, so overlapping candidates are only credited with what they
+        add on top of earlier picks.
+        """
+        writes = defaultdict(int)
+        for query in workload:
+            if query.is_write:
+                for table in set(query.tables.values()):
+                    writes[table] += query.count
+
+        scratch = self._open_scratch()
+        try:
+            current = {}
+            for candidate in candidates:
+                for query in candidate.queries:
+                    if query.sql not in current:
+                        current[query.sql] = self._safe_cost(scratch, query)
+
+            chosen: List[IndexCandidate] = []
+            remaining = list(candidates)
+            while remaining and len(chosen) < limit:
+                for candidate in remaining:
+                    self._measure(scratch, candidate, current, writes)
+                remaining = [
+                    c for c in remaining
+                    if c.net_savings > 0 and c.improvement >= self.min_improvement
+                ]
+                if not remaining:
+                    break
+
+                best = max(remaining, key=lambda c: c.net_savings)
+                remaining.remove(best)
+                scratch.create_index(best.name, best.table, best.columns, keep=True)
+                chosen.append(best)
+                for query in best.queries:
+                    cost = self._safe_cost(scratch, query)
+                    if cost is not None and current.get(query.sql) is not None:
+                        current[query.sql] = min(current[query.sql], cost)
+            return chosen
+        finally:
+            scratch.close()
+
+    def _measure(self, scratch, candidate, current, writes):
+        """Build ``candidate`` on the scratch copy and re-plan its statements."""
+        candidate.baseline_cost = candidate.new_cost = 0.0
+        candidate.estimated_savings = candidate.write_overhead = 0.0
+
+        name = f"advisor_{uuid.uuid4().hex[:8]}"
+        try:
+            scratch.create_index(name, candidate.table, candidate.columns)
+        except Exception as e:
+            logger.debug(f"Could not build candidate {candidate.name}: {e}")
+            return
+        try:
+            for query in candidate.queries:
+                before = current.get(query.sql)
+                after = self._safe_cost(scratch, query)
+                if before is None or after is None:
+                    continue
+                candidate.baseline_cost += before * query.count
+                candidate.new_cost += min(before, after) * query.count
+            candidate.estimated_savings = candidate.baseline_cost - candidate.new_cost
+            # Every write to the table also has to maintain the index
+            rows = self._table_rows(scratch, candidate.table)
+            candidate.write_overhead = writes[candidate.table] * math.log2(rows + 1) * len(candidate.columns)
+        finally:
+            scratch.drop_index(name)
+
+    @staticmethod
+    def _safe_cost(scratch, query):
+        try:
+            return scratch.plan_cost(query.sql, query.tables)
+        except Exception as e:
+            logger.debug(f"Could not plan statement for index advice: {e}")
+            return None
+
+    @staticmethod
+    def _table_rows(scratch, table):
+        try:
+            return scratch.row_count(table)
+        except Exception:
+            return 1000
+
+    def advise(self, limit=10) -> Dict[str, Any]:
+        """Return ranked, validated index suggestions for the captured workload."""
+        workload = self.collect_workload()
+        candidates = self.generate_candidates(workload)
+        selected = self.select(candidates, workload, limit=limit) if candidates else []
+
+        return {
+            'generated_at': datetime.utcnow().isoformat(),
+            'workload_statements': len(workload),
+            'candidates_evaluated': len(candidates),
+            'suggestions': [c.to_dict() for c in selected],
+            'migration': render_migration(selected) if selected else None
+        }
+
+
+def _migration_head(versions_dir):
+    """Return the newest revision in ``versions_dir`` (the one nothing revises)."""
+    revisions, parents = set(), set()
+    for path in glob.glob(os.path.join(versions_dir, '*.py')):
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        revision = re.search(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", content, re.MULTILINE)
+        down = re.search(r"^down_revision\s*=\s*['\"]([^'\"]+)['\"]", content, re.MULTILINE)
+        if revision:
+            revisions.add(revision.group(1))
+        if down:
+            parents.add(down.group(1))
+    heads = sorted(revisions - parents)
+    return heads[0] if len(heads) == 1 else None
+
+
+def render_migration(candidates: List[IndexCandidate], down_revision=None, versions_dir='migrations/versions') -> str:
+    """Render suggestions as an Alembic migration, highest savings first."""
+    if down_revision is None and os.path.isdir(versions_dir):
+        down_revision = _migration_head(versions_dir)
+    revision = uuid.uuid4().hex[:12]
+
+    ranking = '\n'.join(
+        f"  {i}. {c.name} on {c.table}({', '.join(c.columns)}): "
+        f"saves ~{c.net_savings:.0f} cost units ({c.improvement:.0f}% on {len(c.queries)} statement(s))"
+        for i, c in enumerate(candidates, 1)
+    )
+    upgrade = '\n'.join(
+        f"    op.create_index('{c.name}', '{c.table}', {list(c.columns)!r}, unique=False)"
+        for c in candidates
+    )
+    downgrade = '\n'.join(
+        f"    op.drop_index('{c.name}', table_name='{c.table}')"
+        for c in reversed(candidates)
+    )
+    down_literal = repr(down_revision) if down_revision else 'None'
+
+    return f'''"""Add indexes suggested by the workload index advisor
+
+Revision ID: {revision}
+Revises: {down_revision or ''}
+Create Date: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')}
+
+Estimated savings per workload replay:
+{ranking}
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = {down_literal}
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{upgrade}
+
+
+def downgrade():
+{downgrade}
+'''
+
+
+def export_workload(monitor=None) -> List[Dict[str, Any]]:
+    """Return the captured workload in the format ``IndexAdvisor(workload=...)`` accepts."""
+    if monitor is None:
+        from database.performance import query_monitor as monitor
+    return [
+        {'sql': sql, 'count': stats['count'], 'total_time': stats['total_time']}
+        for sql, stats in monitor.get_query_stats(limit=None)
+    ]
+
+
+def get_index_advice(limit=10, engine=None, workload=None):
+    """Run the advisor against the application's database and captured workload."""
+    from flask import current_app
+    from models import db
+    from database.performance import query_monitor
+    from database.query_analyzer import get_query_analyzer
+
+    advisor = IndexAdvisor(
+        engine or db.engine,
+        monitor=query_monitor,
+        analyzer=get_query_analyzer(),
+        scratch_url=current_app.config.get('INDEX_ADVISOR_SCRATCH_URL'),
+        min_executions=current_app.config.get('INDEX_ADVISOR_MIN_EXECUTIONS', 2),
+        min_improvement=current_app.config.get('INDEX_ADVISOR_MIN_IMPROVEMENT', 10.0),
+        workload=workload
+    )
+    return advisor.advise(limit=limit)
+
+
+def get_cached_index_advice(limit=10, refresh=False):
+    """Return advice computed within ``INDEX_ADVISOR_CACHE_TTL`` seconds.
+
+    Validation builds every candidate on a scratch copy of the database,
+    so the result is reused until it expires or ``refresh`` is set.
+    Concurrent callers wait for a single run instead of each copying.
+    """
+    from flask import current_app
+    from models import db
+
+    ttl = current_app.config.get('INDEX_ADVISOR_CACHE_TTL', DEFAULT_ADVICE_TTL_SECONDS)
+    key = (db.engine.url.render_as_string(hide_password=True), limit)
+    with _advice_lock:
+        entry = _advice_cache.get(key)
+        if entry and not refresh and entry[1] > time.time():
+            return entry[0]
+        advice = get_index_advice(limit=limit)
+        _advice_cache[key] = (advice, time.time() + ttl)
+        return advice
@@ -0,0 +1,196 @@
+"""
+Denormalized per-user unread notification counters.
+
+``notification_counters`` holds one row per recipient with the unread
+count and a version that changes on every notification write. Counters
+are updated in the same transaction as the notification rows, so reading
+the badge count is a primary-key lookup instead of a ``COUNT(*)``:
+
+* ORM writes (adding or deleting a ``Notification``, assigning its
+  ``read`` attribute) are picked up at flush time by a ``before_flush``
+  listener on ``db.session``, with one upsert for all new rows. The
+  listener is registered when this module is imported.
+* ``Notification.mark_read`` runs a bulk ``UPDATE`` and adjusts the
+  counter itself.
+
+``reconcile_unread_counters`` repairs drift from writes that bypass
+both, such as Core or raw SQL statements.
+"""
+import logging
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import case, delete, event, false, func, select, update
+from sqlalchemy.orm.attributes import get_history
+
+from models import db, Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+_counters = NotificationCounter.__table__
+
+
+def _upsert_insert(session):
+    """Dialect ``INSERT`` supporting ``ON CONFLICT``, or None."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def add_unread(user_emails, session=None):
+    """Add one unread notification per entry in ``user_emails``.
+
+    All recipients are updated with a single upsert statement; an email
+    listed several times is incremented by its number of occurrences.
+    """
+    session = session or db.session
+    increments = Counter(email for email in user_emails if email)
+    if not increments:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {'user_email': email, 'unread_count': count, 'version': 1, 'updated_at': now}
+        for email, count in increments.items()
+    ]
+
+    insert = _upsert_insert(session)
+    if insert is not None:
+        statement = insert(_counters).values(rows)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[_counters.c.user_email],
+            set_={
+                'unread_count': _counters.c.unread_count + statement.excluded.unread_count,
+                'version': _counters.c.version + 1,
+                'updated_at': statement.excluded.updated_at,
+            }
+        ))
+        return
+
+    # Other databases: update existing rows, then create the missing ones
+    for row in rows:
+        result = session.execute(
+            update(_counters)
+            .where(_counters.c.user_email == row['user_email'])
+            .values(unread_count=_counters.c.unread_count + row['unread_count'],
+                    version=_counters.c.version + 1, updated_at=now)
+        )
+        if not result.rowcount:
+            session.execute(_counters.insert().values(row))
+
+
+def remove_unread(user_email, count=1, session=None):
+    """Subtract ``count`` notifications that were just marked read."""
+    if not count:
+        return
+    session = session or db.session
+    session.execute(
+        update(_counters)
+        .where(_counters.c.user_email == user_email)
+        .values(
+            unread_count=case((_counters.c.unread_count > count, _counters.c.unread_count - count), else_=0),
+            version=_counters.c.version + 1,
+            updated_at=datetime.utcnow()
+        )
+    )
+
+
+def _unread_changes(session):
+    """Net change of each recipient's unread count from the pending ORM writes."""
+    changes = Counter()
+    for instance in session.new:
+        if isinstance(instance, Notification) and not instance.read:
+            changes[instance.user_email] += 1
+    for instance in session.deleted:
+        if isinstance(instance, Notification) and not _committed_read(instance):
+            changes[instance.user_email] -= 1
+    for instance in session.dirty:
+        if not isinstance(instance, Notification) or not get_history(instance, 'read').has_changes():
+            continue
+        was_read, is_read = _committed_read(instance), bool(instance.read)
+        if was_read != is_read:
+            changes[instance.user_email] += 1 if was_read else -1
+    return changes
+
+
+def _committed_read(instance):
+    # ``read`` keeps active history, so the database value is known even if it was expired
+    history = get_history(instance, 'read')
+    values = history.deleted or history.unchanged
+    return bool(values[0]) if values else False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _track_unread_changes(flush_session, flush_context, instances):
+    """Keep the counters in step with ORM writes to ``Notification``."""
+    changes = _unread_changes(flush_session)
+    add_unread(Counter({email: n for email, n in changes.items() if n > 0}).elements(), flush_session)
+    for email, n in changes.items():
+        if n < 0:
+            remove_unread(email, -n, flush_session)
+
+
+def unread_counts(user_emails, session=None):
+    """Unread counts for several recipients with one primary-key lookup each."""
+    session = session or db.session
+    return dict(session.execute(
+        select(_counters.c.user_email, _counters.c.unread_count).where(_counters.c.user_email.in_(list(user_emails)))
+    ).all())
+
+
+def drop_counter(user_email, session=None):
+    """Remove a recipient's counter after their notifications are deleted."""
+    session = session or db.session
+    session.execute(delete(_counters).where(_counters.c.user_email == user_email))
+
+
+def reconcile_unread_counters(session=None):
+    """Recompute every counter from ``notifications`` and fix any drift.
+
+    Counters are read before the notifications and only overwritten if
+    their version is unchanged, so a write racing with the reconciler is
+    never undone. Returns the number of corrected counters; the caller
+    commits.
+    """
+    session = session or db.session
+    stored = {
+        user_email: (count, version)
+        for user_email, count, version in session.execute(
+            select(_counters.c.user_email, _counters.c.unread_count, _counters.c.version)
+        )
+    }
+    actual = dict(session.execute(
+        select(Notification.user_email, func.count(Notification.id))
+        .where(Notification.read == false())
+        .group_by(Notification.user_email)
+    ).all())
+
+    now = datetime.utcnow()
+    corrected = 0
+    for user_email in set(actual) | set(stored):
+        count = actual.get(user_email, 0)
+        stored_count, version = stored.get(user_email, (None, None))
+        if stored_count == count:
+            continue
+
+        if version is not None:
+            result = session.execute(
+                update(_counters)
+                .where(_counters.c.user_email == user_email, _counters.c.version == version)
+                .values(unread_count=count, version=version + 1, updated_at=now)
+            )
+        else:
+            insert = _upsert_insert(session)
+            row = {'user_email': user_email, 'unread_count': count, 'version': 1, 'updated_at': now}
+            if insert is not None:
+                result = session.execute(insert(_counters).values(row).on_conflict_do_nothing())
+            else:
+                result = session.execute(_counters.insert().values(row))
+        if result.rowcount:
+            logger.warning(f"Unread counter for {user_email} drifted: stored {stored_count}, actual {count}")
+            corrected += 1
+    return corrected
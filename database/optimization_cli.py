@@ -18,6 +18,7 @@ from database.performance import (
 from database.pooling import pool_manager
 from database.query_cache import get_cache_manager
 from database.query_analyzer import get_query_analyzer
+from database.index_advisor import get_index_advice
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +141,48 @@ def check_indexes():
         click.echo("✅ No additional index suggestions found")
 
 
+@db_optimize.command()
+@click.option('--limit', default=10, help='Maximum number of indexes to suggest')
+@click.option('--workload', 'workload_file', type=click.Path(exists=True),
+              help='JSON workload exported from a running instance')
+@click.option('--output', type=click.Path(), help='Write the suggested Alembic migration to this file')
+@with_appcontext
+def suggest_indexes(limit, workload_file, output):
+    """Suggest indexes for the captured workload, validated on a scratch copy."""
+    click.echo("🔍 Evaluating index candidates against the query workload...")
+    
+    workload = None
+    if workload_file:
+        with open(workload_file) as f:
+            workload = json.load(f)
+    
+    try:
+        advice = get_index_advice(limit=limit, workload=workload)
+    except RuntimeError as e:
+        click.echo(f"❌ {e}")
+        return
+    
+    click.echo(f"Statements in workload: {advice['workload_statements']}")
+    click.echo(f"Candidates evaluated: {advice['candidates_evaluated']}")
+    
+    if not advice['suggestions']:
+        click.echo("✅ No index would measurably lower the workload cost")
+        return
+    
+    click.echo(f"\n💡 Suggested indexes (by estimated savings):")
+    for i, suggestion in enumerate(advice['suggestions'], 1):
+        click.echo(f"{i}. {suggestion['name']} on {suggestion['table']}({', '.join(suggestion['columns'])})")
+        click.echo(f"   Savings: {suggestion['estimated_savings']:.0f} cost units "
+                   f"({suggestion['improvement_pct']:.0f}% on affected statements)")
+    
+    if output:
+        with open(output, 'w') as f:
+            f.write(advice['migration'])
+        click.echo(f"\n📄 Migration written to: {output}")
+    else:
+        click.echo(f"\n{advice['migration']}")
+
+
 @db_optimize.command()
 @with_appcontext
 def pool_status():
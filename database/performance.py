@@ -2,6 +2,7 @@
 Database performance optimization for SAT Report Generator.
 """
 import time
+import hashlib
 import logging
 from functools import wraps
 from flask import current_app, g, request
@@ -11,88 +12,110 @@ from sqlalchemy.pool import Pool
 from models import db
 from datetime import datetime, timedelta
 import threading
-from collections import defaultdict, deque
+from collections import deque
+from .query_fingerprint import ThreadLocalStats, fingerprint
 
 logger = logging.getLogger(__name__)
 
 
+class StatementStats:
+    """Execution counters for one normalized statement."""
+    __slots__ = ('count', 'total_time', 'max_time', 'min_time')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.min_time = float('inf')
+
+    def add(self, duration):
+        self.count += 1
+        self.total_time += duration
+        if duration > self.max_time:
+            self.max_time = duration
+        if duration < self.min_time:
+            self.min_time = duration
+
+    def copy(self):
+        other = StatementStats()
+        other.merge(self)
+        return other
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_time += other.total_time
+        self.max_time = max(self.max_time, other.max_time)
+        self.min_time = min(self.min_time, other.min_time)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.count if self.count else 0,
+            'max_time': self.max_time,
+            'min_time': self.min_time
+        }
+
+
 class QueryPerformanceMonitor:
     """Monitor and analyze database query performance."""
     
     def __init__(self):
         self.slow_queries = deque(maxlen=100)  # Keep last 100 slow queries - reduced from 1000
-        self.query_stats = defaultdict(lambda: {
-            'count': 0,
-            'total_time': 0,
-            'avg_time': 0,
-            'max_time': 0,
-            'min_time': float('inf')
-        })
+        self._stats = ThreadLocalStats()
         self.lock = threading.Lock()
         self.slow_query_threshold = 2.0  # 2 seconds - increased from 1.0 to reduce noise
     
     def record_query(self, query, duration, params=None):
         """Record query execution statistics."""
-        with self.lock:
-            # Normalize query for statistics
-            normalized_query = self._normalize_query(query)
-            
-            stats = self.query_stats[normalized_query]
-            stats['count'] += 1
-            stats['total_time'] += duration
-            stats['avg_time'] = stats['total_time'] / stats['count']
-            stats['max_time'] = max(stats['max_time'], duration)
-            stats['min_time'] = min(stats['min_time'], duration)
-            
-            # Record slow queries
-            if duration > self.slow_query_threshold:
-                self.slow_queries.append({
-                    'query': query,
-                    'duration': duration,
-                    'params': params,
-                    'timestamp': datetime.utcnow(),
-                    'endpoint': getattr(request, 'endpoint', None) if request else None
-                })
-                
-                logger.debug(f"Slow query detected: {duration:.3f}s - {query[:100]}...")  # Changed to debug level
+        # Runs on every statement: cached fingerprint, lock-free thread shard
+        normalized_query = fingerprint(query).normalized
+        
+        shard = self._stats.shard()
+        stats = shard.get(normalized_query)
+        if stats is None:
+            stats = shard[normalized_query] = StatementStats()
+        stats.add(duration)
+        
+        # Record slow queries
+        if duration > self.slow_query_threshold:
+            self.slow_queries.append({
+                'query': query,
+                'duration': duration,
+                'params': params,
+                'timestamp': datetime.utcnow(),
+                'endpoint': getattr(request, 'endpoint', None) if request else None
+            })
+            
+            logger.debug(f"Slow query detected: {duration:.3f}s - {query[:100]}...")  # Changed to debug level
     
     def _normalize_query(self, query):
         """Normalize query for statistics grouping."""
-        # Remove parameter values and normalize whitespace
-        import re
-        
-        # Replace parameter placeholders
-        normalized = re.sub(r'\$\d+|\?|%\([^)]+\)s', '?', str(query))
-        
-        # Replace quoted strings and numbers
-        normalized = re.sub(r"'[^']*'", "'?'", normalized)
-        normalized = re.sub(r'\b\d+\b', '?', normalized)
-        
-        # Normalize whitespace
-        normalized = ' '.join(normalized.split())
-        
-        return normalized
+        return fingerprint(str(query)).normalized
+    
+    @property
+    def query_stats(self):
+        """Statistics per normalized statement, merged across threads."""
+        return {query: stats.as_dict() for query, stats in self._stats.merged().items()}
     
     def get_slow_queries(self, limit=50):
         """Get recent slow queries."""
-        with self.lock:
-            return list(self.slow_queries)[-limit:]
+        return list(self.slow_queries)[-limit:]
     
     def get_query_stats(self, limit=20):
         """Get query statistics sorted by total time."""
-        with self.lock:
-            sorted_stats = sorted(
-                self.query_stats.items(),
-                key=lambda x: x[1]['total_time'],
-                reverse=True
-            )
-            return sorted_stats[:limit]
+        sorted_stats = sorted(
+            self.query_stats.items(),
+            key=lambda x: x[1]['total_time'],
+            reverse=True
+        )
+        return sorted_stats[:limit]
     
     def reset_stats(self):
         """Reset all statistics."""
         with self.lock:
             self.slow_queries.clear()
-            self.query_stats.clear()
+            self._stats.clear()
 
 
 class ConnectionPoolMonitor:
@@ -762,16 +785,33 @@ class DatabaseCacheManager:
 cache_manager = DatabaseCacheManager()
 
 
-def cached_query(ttl=300, key_func=None):
-    """Decorator for caching database query results."""
+def cached_query(ttl=300, key_func=None, tables=None):
+    """Decorator for caching database query results.
+    
+    ``tables`` lists the tables the result is read from. When the tiered
+    cache is initialized, results are shared between workers and dropped
+    everywhere as soon as one of ``tables`` is committed to.
+    """
+    tables = tuple(tables or ())
+    if not tables:
+        raise ValueError("cached_query needs the tables the result depends on")
+    
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
+            # Generate cache key (stable across workers, unlike hash())
             if key_func:
                 cache_key = key_func(*args, **kwargs)
             else:
-                cache_key = f"{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
+                arguments = str(args) + str(sorted(kwargs.items()))
+                cache_key = f"{func.__module__}.{func.__name__}:{hashlib.md5(arguments.encode()).hexdigest()}"
+            
+            from .tiered_cache import get_tiered_cache
+            tiered = get_tiered_cache()
+            if tiered is not None:
+                return tiered.get_or_load(
+                    cache_key, lambda: func(*args, **kwargs), tables, ttl
+                )
             
             # Try to get from cache
             cached_result = cache_manager.get(cache_key)
@@ -880,6 +920,46 @@ class DatabaseMaintenanceManager:
             return 0
 
 
+_cache_invalidation_installed = False
+
+
+def install_cache_invalidation(session):
+    """Invalidate the query caches for the tables each commit touched.
+    
+    Installed once per process; the caches are looked up at commit time so
+    re-initialising either of them does not leave a stale reference here.
+    """
+    global _cache_invalidation_installed
+    if _cache_invalidation_installed:
+        return
+    _cache_invalidation_installed = True
+    
+    from .query_cache import get_cache_manager
+    from .tiered_cache import get_tiered_cache, track_modified_tables, pop_modified_tables
+    
+    track_modified_tables(session)
+    
+    @event.listens_for(session, 'after_commit')
+    def invalidate_cache_after_commit(committed_session):
+        """Invalidate relevant cache entries after database commits."""
+        modified_tables = pop_modified_tables(committed_session)
+        if not modified_tables:
+            return
+        
+        try:
+            # One generation bump per table, no key scanning
+            query_cache_manager = get_cache_manager()
+            if query_cache_manager is not None:
+                query_cache_manager.invalidate_tables(modified_tables)
+            
+            # Broadcast to every worker's L1
+            tiered = get_tiered_cache()
+            if tiered is not None:
+                tiered.invalidate_tables(modified_tables)
+        except Exception as e:
+            logger.error(f"Error invalidating cache after commit: {e}")
+
+
 def init_database_performance(app):
     """Initialize database performance optimizations."""
     
@@ -922,11 +1002,16 @@ def init_database_performance(app):
         except Exception as e:
             logger.error(f"Failed to create indexes: {e}")
     
+    # Initialize the two-tier (in-process L1 / shared L2) cache
+    from .tiered_cache import init_tiered_cache
+    
+    try:
+        redis_client = getattr(app, 'cache', None)
+        init_tiered_cache(app, getattr(redis_client, 'redis_client', None))
+    except Exception as e:
+        logger.error(f"Failed to initialize tiered query cache: {e}")
+    
     # Set up cache invalidation hooks
-    @event.listens_for(db.session, 'after_commit')
-    def invalidate_cache_after_commit(session):
-        """Invalidate relevant cache entries after database commits."""
-        if cache_manager is not None:
-            cache_manager.invalidate()
+    install_cache_invalidation(db.session)
     
     logger.info("Database performance optimizations initialized")
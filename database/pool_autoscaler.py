@@ -0,0 +1,335 @@
+"""
+Adaptive connection pool sizing for SAT Report Generator.
+
+The controller watches how long requests wait for a pooled connection and
+how much of the pool is actually used, then grows or shrinks the live
+``QueuePool`` within configured limits instead of relying on the size
+fixed at engine creation.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def parse_quiet_hours(value):
+    """Parse ``"1-5"`` into ``(1, 5)``; empty values disable quiet hours."""
+    if not value:
+        return None
+    if isinstance(value, (tuple, list)):
+        return int(value[0]), int(value[1])
+    start, _, end = str(value).partition('-')
+    return int(start), int(end)
+
+
+class PoolAutoscaler:
+    """Grow or shrink a live QueuePool from checkout wait and usage samples.
+
+    Every ``interval`` seconds the controller looks at the last window:
+
+    * connection waits above ``target_wait`` (p95), checkout timeouts or
+      overflow connections in use grow the pool by ``grow_step``;
+    * a peak usage well below the pool size shrinks it by ``shrink_step``
+      once ``cooldown`` seconds have passed since the last resize;
+    * during ``quiet_hours`` the pool drops to ``min_size`` and idle
+      connections beyond it are closed.
+    """
+
+    def __init__(self, engine, min_size=2, max_size=20, target_wait=0.05,
+                 grow_step=2, shrink_step=1, idle_ratio=0.5, cooldown=60,
+                 interval=15, quiet_hours=None, clock=time.monotonic, now=datetime.now):
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            raise TypeError(f"Pool autoscaling requires a QueuePool, got {type(pool).__name__}")
+
+        self.engine = engine
+        self.pool = pool
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target_wait = target_wait
+        self.grow_step = grow_step
+        self.shrink_step = shrink_step
+        self.idle_ratio = idle_ratio
+        self.cooldown = cooldown
+        self.interval = interval
+        self.quiet_hours = parse_quiet_hours(quiet_hours)
+        self.clock = clock
+        self.now = now
+
+        self.lock = threading.Lock()
+        self.decisions = deque(maxlen=100)
+        self.stats = {'grown': 0, 'shrunk': 0, 'shed': 0, 'held': 0}
+        self.last_resize_at = None
+        self._reset_window()
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._instrument()
+
+    def _reset_window(self):
+        self.waits = []
+        self.timeouts = 0
+        self.peak_checked_out = self.pool.checkedout()
+        self.peak_overflow = max(0, self.pool.overflow())
+
+    def _instrument(self):
+        """Time every connection acquisition and track usage peaks."""
+        self._wrap_do_get(self.pool)
+
+        # Pool events survive pool.recreate() (engine.dispose()), so they
+        # are registered once and always read the current pool.
+        @event.listens_for(self.pool, 'checkout')
+        def track_checkout(dbapi_conn, connection_record, connection_proxy):
+            pool = self.pool
+            with self.lock:
+                self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+                self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _wrap_do_get(self, pool):
+        do_get = pool._do_get
+
+        def timed_do_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            except exc.TimeoutError:
+                with self.lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                self.record_wait(time.perf_counter() - started)
+
+        # QueuePool has no "waiting for a connection" event, so the
+        # acquisition itself is timed on this pool instance.
+        pool._do_get = timed_do_get
+
+    def _follow_recreated_pool(self):
+        """Pick up the replacement pool after the engine was disposed."""
+        if self.engine.pool is not self.pool:
+            self.pool = self.engine.pool
+            self._wrap_do_get(self.pool)
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.waits.append(seconds)
+
+    @property
+    def size(self):
+        return self.pool.size()
+
+    def sample(self):
+        """Summarize and reset the current observation window."""
+        with self.lock:
+            waits = sorted(self.waits)
+            sample = {
+                'acquisitions': len(waits),
+                'wait_p95': waits[int((len(waits) - 1) * 0.95)] if waits else 0.0,
+                'wait_max': waits[-1] if waits else 0.0,
+                'timeouts': self.timeouts,
+                'peak_checked_out': self.peak_checked_out,
+                'peak_overflow': self.peak_overflow,
+                'idle': self.pool.checkedin(),
+                'pool_size': self.size
+            }
+            self._reset_window()
+        return sample
+
+    def in_quiet_hours(self):
+        if not self.quiet_hours:
+            return False
+        start, end = self.quiet_hours
+        hour = self.now().hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def decide(self, sample):
+        """Return ``(action, target_size, reason)`` for a window sample."""
+        size = sample['pool_size']
+
+        if sample['timeouts'] or sample['wait_p95'] > self.target_wait or sample['peak_overflow'] > 0:
+            target = min(self.max_size, size + self.grow_step)
+            if target > size:
+                reason = (
+                    f"wait p95 {sample['wait_p95'] * 1000:.1f}ms, "
+                    f"{sample['timeouts']} timeouts, {sample['peak_overflow']} overflow"
+                )
+                return 'grow', target, reason
+            return 'hold', size, 'at maximum size'
+
+        if self.in_quiet_hours():
+            return 'shed', self.min_size, 'quiet hours'
+
+        cooling_down = (
+            self.last_resize_at is not None
+            and self.clock() - self.last_resize_at < self.cooldown
+        )
+        if not cooling_down and sample['peak_checked_out'] < size * self.idle_ratio:
+            target = max(self.min_size, size - self.shrink_step, sample['peak_checked_out'])
+            if target < size:
+                return 'shrink', target, f"peak usage {sample['peak_checked_out']} of {size}"
+
+        return 'hold', size, 'within target'
+
+    def tick(self):
+        """Sample the last window and apply one sizing decision."""
+        self._follow_recreated_pool()
+        sample = self.sample()
+        action, target, reason = self.decide(sample)
+        previous = self.size
+
+        if action != 'hold':
+            self.resize(target)
+        closed = self.shed_idle(target) if action in ('shrink', 'shed') else 0
+
+        decision = {
+            'at': self.now().isoformat(),
+            'action': action,
+            'from_size': previous,
+            'to_size': self.size,
+            'closed': closed,
+            'reason': reason,
+            'sample': sample
+        }
+        with self.lock:
+            self.decisions.append(decision)
+            key = {'grow': 'grown', 'shrink': 'shrunk', 'shed': 'shed'}.get(action, 'held')
+            self.stats[key] += 1
+
+        if action != 'hold':
+            logger.info(f"Pool autoscaler {action}: {previous} -> {self.size} ({reason})")
+        self._export_metrics(decision)
+        return decision
+
+    def resize(self, new_size):
+        """Change the number of connections the pool keeps.
+
+        ``QueuePool`` tracks open connections as an overflow counter
+        relative to its size, so the counter moves with the size and the
+        total capacity (size + max_overflow) follows the new size.
+        """
+        new_size = min(self.max_size, max(self.min_size, new_size))
+        pool = self.pool
+        with pool._overflow_lock:
+            delta = new_size - pool._pool.maxsize
+            if delta == 0:
+                return new_size
+            pool._pool.maxsize = new_size
+            pool._overflow -= delta
+        self.last_resize_at = self.clock()
+        return new_size
+
+    def shed_idle(self, keep):
+        """Close idle pooled connections until at most ``keep`` remain."""
+        from sqlalchemy.util import queue as sqla_queue
+
+        closed = 0
+        while self.pool.checkedin() > keep:
+            try:
+                record = self.pool._pool.get(False)
+            except sqla_queue.Empty:
+                break
+            try:
+                record.close()
+            finally:
+                self.pool._dec_overflow()
+            closed += 1
+        return closed
+
+    def _export_metrics(self, decision):
+        try:
+            from monitoring.metrics import record_pool_decision
+        except ImportError:
+            return
+        try:
+            record_pool_decision(decision)
+        except Exception as e:
+            logger.debug(f"Could not export pool autoscaler metrics: {e}")
+
+    def get_status(self):
+        with self.lock:
+            return {
+                'enabled': True,
+                'running': self.running,
+                'pool_size': self.size,
+                'max_overflow': self.pool._max_overflow,
+                'limits': {'min_size': self.min_size, 'max_size': self.max_size},
+                'target_wait_ms': self.target_wait * 1000,
+                'quiet_hours': self.quiet_hours,
+                'stats': self.stats.copy(),
+                'recent_decisions': list(self.decisions)[-10:]
+            }
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.error(f"Pool autoscaler tick failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='PoolAutoscaler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+def init_pool_autoscaler(app, db=None):
+    """Attach an autoscaler to the primary engine's pool and start it."""
+    if not app.config.get('DB_POOL_AUTOSCALE_ENABLED', False):
+        return None
+
+    if db is None:
+        from models import db
+
+    with app.app_context():
+        engine = db.engine
+
+    if not isinstance(engine.pool, QueuePool):
+        logger.info(f"Pool autoscaling skipped for {type(engine.pool).__name__}")
+        return None
+
+    autoscaler = PoolAutoscaler(
+        engine,
+        min_size=app.config.get('DB_POOL_MIN_SIZE', 2),
+        max_size=app.config.get('DB_POOL_MAX_SIZE', 20),
+        target_wait=app.config.get('DB_POOL_TARGET_WAIT_MS', 50) / 1000.0,
+        cooldown=app.config.get('DB_POOL_AUTOSCALE_COOLDOWN', 60),
+        interval=app.config.get('DB_POOL_AUTOSCALE_INTERVAL', 15),
+        quiet_hours=app.config.get('DB_POOL_QUIET_HOURS')
+    )
+    autoscaler.start()
+    app.extensions['pool_autoscaler'] = autoscaler
+    logger.info(
+        f"Pool autoscaler started (size {autoscaler.size}, "
+        f"limits {autoscaler.min_size}-{autoscaler.max_size})"
+    )
+    return autoscaler
+
+
+def get_pool_autoscaler_status(app=None):
+    """Get autoscaler status for monitoring."""
+    from flask import current_app
+
+    autoscaler = (app or current_app).extensions.get('pool_autoscaler')
+    if autoscaler is None:
+        return {'enabled': False}
+    return autoscaler.get_status()
@@ -3,10 +3,13 @@ Database connection pooling optimization for SAT Report Generator.
 """
 import logging
 import time
+from contextlib import contextmanager
+from functools import wraps
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.pool import QueuePool, StaticPool, NullPool
 from sqlalchemy.engine import Engine
-from flask import current_app
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from threading import Lock
 import psutil
 import os
@@ -149,8 +152,14 @@ class ConnectionPoolManager:
         
         pool_config = self.get_optimal_pool_config(database_uri, environment)
         
+        engine_options = dict(pool_config)
+        if engine_options.get('poolclass') is StaticPool:
+            # StaticPool holds a single connection and rejects sizing arguments
+            for option in ('pool_size', 'max_overflow', 'pool_timeout'):
+                engine_options.pop(option, None)
+        
         # Create engine with optimized settings
-        engine = create_engine(database_uri, **pool_config)
+        engine = create_engine(database_uri, **engine_options)
         
         # Set up event listeners for monitoring
         self._setup_pool_monitoring(engine)
@@ -443,6 +452,244 @@ class ConnectionLeakDetector:
         return traceback.format_stack()[-5:]  # Last 5 frames
 
 
+class ReplicaRouter:
+    """Choose a read replica engine for read-only work."""
+    
+    def __init__(self, replica_engines, lag_window=5.0, retry_interval=30.0):
+        self.replicas = list(replica_engines)
+        self.lag_window = lag_window
+        self.retry_interval = retry_interval
+        self.unhealthy_until = {}
+        self.next_index = 0
+        self.stats = {
+            'replica_reads': 0,
+            'primary_reads': 0,
+            'replica_failures': 0,
+            'lag_fallbacks': 0
+        }
+        self.lock = Lock()
+        
+        for engine in self.replicas:
+            self._setup_failure_detection(engine)
+    
+    def _setup_failure_detection(self, engine):
+        """Take a replica out of rotation when its connections fail."""
+        
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            if exception_context.is_disconnect or exception_context.connection is None:
+                self.mark_unhealthy(engine)
+    
+    def mark_unhealthy(self, engine):
+        """Stop routing to ``engine`` until the retry interval has passed."""
+        with self.lock:
+            self.unhealthy_until[engine] = time.time() + self.retry_interval
+            self.stats['replica_failures'] += 1
+        logger.warning(f"Read replica {engine.url.render_as_string(hide_password=True)} marked unhealthy")
+    
+    def choose_replica(self):
+        """Return the next healthy replica (round robin), or ``None``."""
+        now = time.time()
+        with self.lock:
+            for _ in range(len(self.replicas)):
+                engine = self.replicas[self.next_index % len(self.replicas)]
+                self.next_index += 1
+                if self.unhealthy_until.get(engine, 0) <= now:
+                    self.stats['replica_reads'] += 1
+                    return engine
+            self.stats['primary_reads'] += 1
+        return None
+    
+    def record_primary_read(self, lag_fallback=False):
+        with self.lock:
+            self.stats['primary_reads'] += 1
+            if lag_fallback:
+                self.stats['lag_fallbacks'] += 1
+    
+    def get_status(self):
+        now = time.time()
+        with self.lock:
+            return {
+                'replicas': [
+                    {
+                        'url': engine.url.render_as_string(hide_password=True),
+                        'healthy': self.unhealthy_until.get(engine, 0) <= now
+                    }
+                    for engine in self.replicas
+                ],
+                'lag_window_seconds': self.lag_window,
+                'stats': self.stats.copy()
+            }
+    
+    def dispose(self):
+        for engine in self.replicas:
+            engine.dispose()
+
+
+def _replica_reads_requested():
+    """Whether the current context asked for reads to go to a replica."""
+    if not has_app_context():
+        return False
+    return bool(g.get('db_read_replica', False))
+
+
+def _within_lag_window(router):
+    """Whether the current user wrote recently enough that replicas may lag behind."""
+    if not has_request_context():
+        return False
+    last_write = session.get('db_last_write_at')
+    return bool(last_write) and time.time() - last_write < router.lag_window
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session sending read-only statements to replicas and everything else to the primary.
+    
+    Reads are routed only when the request (or a ``replica_reads()`` block)
+    opted in. Once the session has flushed, it sticks to the primary so a
+    request always reads its own writes.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        
+        if bind is not None or not _replica_reads_requested():
+            return primary
+        
+        router = current_app.extensions.get('replica_router')
+        if router is None or primary is not self._db.engines.get(None):
+            return primary
+        
+        is_plain_select = (
+            clause is not None
+            and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None
+        )
+        if not is_plain_select or self._flushing or self.info.get('db_wrote'):
+            router.record_primary_read()
+            return primary
+        
+        return router.choose_replica() or primary
+
+
+def _track_primary_writes(db):
+    """Pin sessions to the primary after a write and remember when the user wrote."""
+    
+    @event.listens_for(db.session, 'after_flush')
+    def mark_session_wrote(flush_session, flush_context):
+        flush_session.info['db_wrote'] = True
+    
+    @event.listens_for(db.session, 'after_commit')
+    def record_user_write(commit_session):
+        if commit_session.info.pop('db_wrote', False) and has_request_context():
+            try:
+                session['db_last_write_at'] = time.time()
+            except Exception:
+                # Session may be unavailable (e.g. already saved) - lag window is best effort
+                pass
+    
+    @event.listens_for(db.session, 'after_rollback')
+    def clear_session_wrote(rollback_session):
+        rollback_session.info.pop('db_wrote', None)
+
+
+def read_replica(view_func):
+    """Decorator routing a view's read-only queries to a replica."""
+    
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        _enable_replica_reads()
+        return view_func(*args, **kwargs)
+    
+    return wrapper
+
+
+@contextmanager
+def replica_reads():
+    """Route read-only queries inside the block to a replica."""
+    previous = g.get('db_read_replica', False)
+    _enable_replica_reads()
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+@contextmanager
+def primary_reads():
+    """Force every query inside the block onto the primary."""
+    previous = g.get('db_read_replica', False)
+    g.db_read_replica = False
+    try:
+        yield
+    finally:
+        g.db_read_replica = previous
+
+
+def _enable_replica_reads():
+    router = current_app.extensions.get('replica_router')
+    if router is None:
+        return
+    if _within_lag_window(router):
+        router.record_primary_read(lag_fallback=True)
+        g.db_read_replica = False
+        return
+    g.db_read_replica = True
+
+
+def init_read_replicas(app, db=None):
+    """Create replica engines and route read-only endpoints to them.
+    
+    Replicas come from ``SQLALCHEMY_REPLICA_URIS``. Requests whose endpoint
+    starts with one of ``READ_REPLICA_ENDPOINTS`` and whose method is safe are
+    routed automatically; other views can opt in with ``@read_replica``.
+    """
+    replica_uris = [uri for uri in app.config.get('SQLALCHEMY_REPLICA_URIS', []) if uri]
+    if not replica_uris:
+        logger.debug("No read replicas configured")
+        return None
+    
+    if db is None:
+        from models import db
+    
+    # Sessions are created lazily per app context, so swapping the factory's
+    # class here applies to every session the application will use.
+    if not issubclass(db.session.session_factory.class_, RoutingSession):
+        db.session.session_factory.class_ = RoutingSession
+    
+    environment = app.config.get('ENV', 'development')
+    replica_engines = [
+        pool_manager.create_optimized_engine(uri, environment) for uri in replica_uris
+    ]
+    router = ReplicaRouter(
+        replica_engines,
+        lag_window=app.config.get('READ_REPLICA_LAG_SECONDS', 5),
+        retry_interval=app.config.get('READ_REPLICA_RETRY_SECONDS', 30)
+    )
+    app.extensions['replica_router'] = router
+    _track_primary_writes(db)
+    
+    replica_endpoints = tuple(app.config.get('READ_REPLICA_ENDPOINTS', ()))
+    
+    @app.before_request
+    def route_read_only_requests():
+        endpoint = request.endpoint or ''
+        if request.method in ('GET', 'HEAD') and endpoint.startswith(replica_endpoints):
+            _enable_replica_reads()
+    
+    logger.info(f"Read replica routing enabled with {len(replica_engines)} replica(s)")
+    return router
+
+
+def get_replica_status():
+    """Get read replica routing status for monitoring."""
+    router = current_app.extensions.get('replica_router')
+    if router is None:
+        return {'enabled': False}
+    status = router.get_status()
+    status['enabled'] = True
+    return status
+
+
 # Global instances
 pool_manager = ConnectionPoolManager()
 leak_detector = ConnectionLeakDetector()
@@ -513,6 +760,7 @@ def get_pool_metrics():
     """Get connection pool metrics for monitoring."""
     try:
         from models import db
+        from database.pool_autoscaler import get_pool_autoscaler_status
         
         engine = db.get_engine()
         if engine:
@@ -524,7 +772,9 @@ def get_pool_metrics():
                 'pool_status': status,
                 'health': health,
                 'potential_leaks': len(leaks),
-                'leak_details': leaks[:5]  # First 5 leaks
+                'leak_details': leaks[:5],  # First 5 leaks
+                'read_replicas': get_replica_status(),
+                'autoscaler': get_pool_autoscaler_status()
             }
         else:
             return {'error': 'Database engine not available'}
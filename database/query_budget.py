@@ -0,0 +1,182 @@
+"""
+Request-scoped query recording, query budgets and N+1 detection.
+
+Every statement executed while a recorder is active (for the duration of
+a request, or inside ``assert_max_queries``) is counted and grouped by its
+normalized shape, the fingerprint ``pattern`` shared with the query
+monitors. A shape that repeats more than the configured threshold within
+one request is the usual signature of an N+1 loop.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database.query_fingerprint import fingerprint
+
+logger = logging.getLogger(__name__)
+
+_active_recorders = ContextVar('active_query_recorders', default=())
+_listeners_installed = False
+_install_lock = threading.Lock()
+
+
+class QueryRecorder:
+    """Statements executed while the recorder was active."""
+
+    def __init__(self, label=None):
+        self.label = label
+        self.statements = []
+        self.shapes = Counter()
+        self.total_time = 0.0
+
+    def record(self, statement, duration):
+        self.statements.append(statement)
+        self.shapes[fingerprint(statement).pattern] += 1
+        self.total_time += duration
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold):
+        """Shapes executed more than ``threshold`` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+    def describe(self, limit=10):
+        lines = [f"{n}x {shape[:200]}" for shape, n in self.shapes.most_common(limit)]
+        return '\n'.join(lines)
+
+
+def _install_listeners():
+    """Record statements for active recorders; no-op when none are active."""
+    global _listeners_installed
+    with _install_lock:
+        if _listeners_installed:
+            return
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            if _active_recorders.get() and context is not None:
+                context._budget_start_time = time.perf_counter()
+
+        @event.listens_for(Engine, 'after_cursor_execute')
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            recorders = _active_recorders.get()
+            if not recorders:
+                return
+            started = getattr(context, '_budget_start_time', None)
+            duration = time.perf_counter() - started if started else 0.0
+            for recorder in recorders:
+                recorder.record(statement, duration)
+
+        _listeners_installed = True
+
+
+@contextmanager
+def record_queries(label=None):
+    """Record every statement executed in this thread inside the block."""
+    _install_listeners()
+    recorder = QueryRecorder(label)
+    token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit, max_repeats=None):
+    """Fail if the block runs more than ``limit`` statements.
+
+    With ``max_repeats``, also fail if any single statement shape runs
+    more than that many times, which catches N+1 loops even when the
+    total stays under budget::
+
+        with assert_max_queries(5, max_repeats=1):
+            client.get('/reports/my-reports')
+    """
+    with record_queries('assert_max_queries') as recorder:
+        yield recorder
+
+    if recorder.count > limit:
+        raise AssertionError(
+            f"Expected at most {limit} queries, {recorder.count} were executed:\n"
+            f"{recorder.describe()}"
+        )
+    if max_repeats is not None:
+        repeated = recorder.repeated(max_repeats)
+        if repeated:
+            raise AssertionError(
+                f"Statement repeated {repeated[0][1]} times (max {max_repeats}):\n"
+                f"{repeated[0][0][:500]}"
+            )
+
+
+def _record_metrics(endpoint, recorder, flagged):
+    try:
+        from monitoring.metrics import record_request_queries
+    except ImportError:
+        return
+    try:
+        record_request_queries(endpoint, recorder.count, len(flagged))
+    except Exception as e:
+        logger.debug(f"Could not export request query metrics: {e}")
+
+
+def init_query_budget(app):
+    """Record the statements of every request and flag repeated shapes."""
+    if not app.config.get('QUERY_BUDGET_ENABLED', True):
+        return
+
+    _install_listeners()
+    threshold = app.config.get('QUERY_BUDGET_REPEAT_THRESHOLD', 10)
+
+    @app.before_request
+    def start_query_recording():
+        recorder = QueryRecorder(request.endpoint)
+        g._query_recorder = recorder
+        _active_recorders.set(_active_recorders.get() + (recorder,))
+
+    @app.after_request
+    def report_request_queries(response):
+        recorder = g.pop('_query_recorder', None)
+        if recorder is None:
+            return response
+        _detach(recorder)
+
+        endpoint = request.endpoint or 'unknown'
+        flagged = recorder.repeated(threshold)
+        if flagged:
+            shape, count = flagged[0]
+            logger.warning(
+                f"Possible N+1 in {endpoint}: statement ran {count} times "
+                f"({recorder.count} queries total): {shape[:200]}"
+            )
+        _record_metrics(endpoint, recorder, flagged)
+
+        if app.debug or app.config.get('QUERY_BUDGET_HEADERS', False):
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time-Ms'] = f"{recorder.total_time * 1000:.1f}"
+            if flagged:
+                response.headers['X-Query-Repeated'] = str(flagged[0][1])
+        return response
+
+    @app.teardown_request
+    def stop_query_recording(exc=None):
+        # after_request is skipped on unhandled errors
+        recorder = g.pop('_query_recorder', None)
+        if recorder is not None:
+            _detach(recorder)
+
+    logger.info(f"Per-request query recording enabled (repeat threshold {threshold})")
+
+
+def _detach(recorder):
+    _active_recorders.set(tuple(r for r in _active_recorders.get() if r is not recorder))
@@ -11,16 +11,59 @@ from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timedelta
 
 from flask import current_app, g, request
-from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Query
 
 logger = logging.getLogger(__name__)
 
+# Cache namespaces that depend on each table. Every cached entry embeds the
+# current generation of its namespaces; invalidating a table just increments
+# those counters and the stale entries age out by TTL.
+INVALIDATION_PATTERNS = {
+    'reports': ['reports', 'sat_reports', 'user_reports', 'report_details', 'system_stats'],
+    'sat_reports': ['sat_reports', 'report_details'],
+    'users': ['users', 'user_reports', 'user_analytics', 'system_stats'],
+    'audit_logs': ['audit', 'user_activity'],
+    'notifications': ['notifications', 'user_notifications'],
+    'api_usage': ['api_usage', 'api_stats'],
+    'system_settings': ['settings', 'config']
+}
+
+
+def tables_for_namespaces(namespaces) -> List[str]:
+    """Tables whose commits invalidate any of ``namespaces``.
+    
+    A namespace without a pattern entry is invalidated by the table of the
+    same name, as in :meth:`QueryCache.invalidate_tables`.
+    """
+    tables = set()
+    for namespace in namespaces or ():
+        tables.add(namespace)
+        tables.update(table for table, dependents in INVALIDATION_PATTERNS.items()
+                      if namespace in dependents)
+    return sorted(tables)
+
+
+def _through_tiered_cache(cache_key, namespaces, ttl, load):
+    """Serve ``cache_key`` from the tiered cache's in-process L1 when possible.
+    
+    ``load`` is the Redis-backed lookup (and the query behind it); its
+    result is shared through the tiered cache and dropped on every worker
+    when one of the tables behind ``namespaces`` is committed to.
+    """
+    from .tiered_cache import get_tiered_cache
+    tiered = get_tiered_cache()
+    tables = tables_for_namespaces(namespaces)
+    if tiered is None or not tables:
+        return load()
+    return tiered.get_or_load(f"query_cache:{cache_key}", load, tables, ttl)
+
 
 class QueryCache:
     """Redis-based query result caching system."""
     
+    GLOBAL_NAMESPACE = 'all'
+    
     def __init__(self, redis_client=None, default_ttl=300, key_prefix='query_cache:'):
         self.redis_client = redis_client
         self.default_ttl = default_ttl
@@ -29,14 +72,11 @@ class QueryCache:
         self.miss_count = 0
         self.enabled = True
         
-        # Cache invalidation patterns
+        self.set_count = 0
+        self.invalidation_count = 0
+        
         self.invalidation_patterns = {
-            'reports': ['reports:', 'sat_reports:', 'user_reports:'],
-            'users': ['users:', 'user_reports:', 'user_analytics:'],
-            'audit_logs': ['audit:', 'user_activity:'],
-            'notifications': ['notifications:', 'user_notifications:'],
-            'api_usage': ['api_usage:', 'api_stats:'],
-            'system_settings': ['settings:', 'config:']
+            table: list(namespaces) for table, namespaces in INVALIDATION_PATTERNS.items()
         }
     
     def is_available(self) -> bool:
@@ -49,13 +89,57 @@ class QueryCache:
         except Exception:
             return False
     
-    def _generate_cache_key(self, query_hash: str, params_hash: str = '') -> str:
+    def _generate_cache_key(self, query_hash: str, params_hash: str = '',
+                            generation_tag: str = '') -> str:
         """Generate cache key for query."""
         key_parts = [self.key_prefix, query_hash]
         if params_hash:
             key_parts.append(params_hash)
+        if generation_tag:
+            key_parts.append(f":g{generation_tag}")
         return ''.join(key_parts)
     
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.key_prefix}gen:{namespace}"
+    
+    def _namespaces_for(self, namespaces: Optional[List[str]]) -> List[str]:
+        """Entries always depend on the global namespace plus their own."""
+        return sorted({self.GLOBAL_NAMESPACE, *(namespaces or [])})
+    
+    def get_generation(self, namespace: str) -> int:
+        """Current generation counter of ``namespace`` (0 when never bumped)."""
+        value = self.redis_client.get(self._generation_key(namespace))
+        return int(value) if value else 0
+    
+    def _generation_tag(self, namespaces: Optional[List[str]]) -> str:
+        namespaces = self._namespaces_for(namespaces)
+        # One round trip for all the counters the entry depends on
+        values = self.redis_client.mget([self._generation_key(namespace) for namespace in namespaces])
+        generations = [
+            f"{namespace}={int(value) if value else 0}"
+            for namespace, value in zip(namespaces, values)
+        ]
+        return hashlib.md5('|'.join(generations).encode()).hexdigest()[:12]
+    
+    def cache_key(self, query: Union[str, Query], params: Optional[Dict] = None,
+                  namespaces: Optional[List[str]] = None) -> Optional[str]:
+        """Key of ``query`` under the current generations of ``namespaces``.
+        
+        Build the key once before running the query and pass it to both
+        :meth:`get` and :meth:`set`: a key built after the query ran would
+        carry the generation of an invalidation that happened meanwhile and
+        store the stale result as current. Returns None when unavailable.
+        """
+        if not self.is_available():
+            return None
+        
+        try:
+            query_hash, params_hash = self._hash_query(query, params)
+            return self._generate_cache_key(query_hash, params_hash, self._generation_tag(namespaces))
+        except Exception as e:
+            logger.error(f"Error building query cache key: {e}")
+            return None
+    
     def _hash_query(self, query: Union[str, Query], params: Optional[Dict] = None) -> tuple:
         """Generate hash for query and parameters."""
         # Convert SQLAlchemy Query to string
@@ -76,14 +160,21 @@ class QueryCache:
         
         return query_hash, params_hash
     
-    def get(self, query: Union[str, Query], params: Optional[Dict] = None) -> Optional[Any]:
-        """Get cached query result."""
+    def get(self, query: Union[str, Query], params: Optional[Dict] = None,
+            namespaces: Optional[List[str]] = None, key: Optional[str] = None) -> Optional[Any]:
+        """Get cached query result.
+        
+        ``namespaces`` (table names or the namespaces in
+        ``invalidation_patterns``) must match those passed to :meth:`set`.
+        ``key`` is a key from :meth:`cache_key`, used instead of building one.
+        """
         if not self.is_available():
             return None
         
         try:
-            query_hash, params_hash = self._hash_query(query, params)
-            cache_key = self._generate_cache_key(query_hash, params_hash)
+            cache_key = key or self.cache_key(query, params, namespaces)
+            if cache_key is None:
+                return None
             
             cached_data = self.redis_client.get(cache_key)
             if cached_data:
@@ -95,11 +186,11 @@ class QueryCache:
                 else:
                     result = cached_data
                 
-                logger.debug(f"Cache hit for query: {query_hash[:8]}...")
+                logger.debug(f"Cache hit for query: {cache_key}")
                 return result
             
             self.miss_count += 1
-            logger.debug(f"Cache miss for query: {query_hash[:8]}...")
+            logger.debug(f"Cache miss for query: {cache_key}")
             return None
             
         except Exception as e:
@@ -107,17 +198,23 @@ class QueryCache:
             return None
     
     def set(self, query: Union[str, Query], result: Any, params: Optional[Dict] = None, 
-            ttl: Optional[int] = None) -> bool:
-        """Cache query result."""
+            ttl: Optional[int] = None, namespaces: Optional[List[str]] = None,
+            key: Optional[str] = None) -> bool:
+        """Cache query result.
+        
+        Pass the ``key`` built with :meth:`cache_key` before the query ran so
+        that an invalidation during the query leaves the result unreachable.
+        """
         if not self.is_available():
             return False
         
         try:
-            query_hash, params_hash = self._hash_query(query, params)
-            cache_key = self._generate_cache_key(query_hash, params_hash)
+            cache_key = key or self.cache_key(query, params, namespaces)
+            if cache_key is None:
+                return False
             
             # Serialize result
-            if hasattr(result, '__iter__') and not isinstance(result, (str, bytes)):
+            if hasattr(result, '__iter__') and not isinstance(result, (str, bytes, dict)):
                 # Handle SQLAlchemy result objects
                 if hasattr(result, '_asdict'):
                     serialized_result = [row._asdict() for row in result]
@@ -137,7 +234,8 @@ class QueryCache:
             )
             
             if success:
-                logger.debug(f"Cached query result: {query_hash[:8]}... (TTL: {cache_ttl}s)")
+                self.set_count += 1
+                logger.debug(f"Cached query result: {cache_key} (TTL: {cache_ttl}s)")
             
             return success
             
@@ -146,34 +244,47 @@ class QueryCache:
             return False
     
     def invalidate(self, pattern: Optional[str] = None, table_name: Optional[str] = None) -> int:
-        """Invalidate cached queries."""
+        """Invalidate cached queries by bumping generation counters.
+        
+        ``pattern`` names a single namespace, ``table_name`` every namespace
+        depending on that table, and neither invalidates everything. Returns
+        the number of namespaces bumped; no keys are scanned or deleted.
+        """
         if not self.is_available():
             return 0
         
-        try:
-            patterns_to_invalidate = []
-            
-            if pattern:
-                patterns_to_invalidate.append(f"{self.key_prefix}*{pattern}*")
-            elif table_name and table_name in self.invalidation_patterns:
-                for pattern in self.invalidation_patterns[table_name]:
-                    patterns_to_invalidate.append(f"{self.key_prefix}*{pattern}*")
-            else:
-                # Invalidate all query cache
-                patterns_to_invalidate.append(f"{self.key_prefix}*")
-            
-            deleted_count = 0
-            for pattern in patterns_to_invalidate:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    deleted_count += self.redis_client.delete(*keys)
-            
-            logger.info(f"Invalidated {deleted_count} cached queries")
-            return deleted_count
-            
-        except Exception as e:
-            logger.error(f"Error invalidating cache: {e}")
+        if pattern:
+            namespaces = [pattern]
+        elif table_name:
+            namespaces = self.invalidation_patterns.get(table_name, [table_name])
+        else:
+            namespaces = [self.GLOBAL_NAMESPACE]
+        
+        return self.bump_generations(namespaces)
+    
+    def invalidate_tables(self, table_names) -> int:
+        """Invalidate every namespace depending on any of ``table_names``."""
+        namespaces = set()
+        for table_name in table_names:
+            namespaces.update(self.invalidation_patterns.get(table_name, [table_name]))
+        return self.bump_generations(namespaces)
+    
+    def bump_generations(self, namespaces) -> int:
+        """Atomically increment the generation counter of each namespace."""
+        if not self.is_available():
             return 0
+        
+        bumped = 0
+        for namespace in namespaces:
+            try:
+                self.redis_client.incr(self._generation_key(namespace))
+                bumped += 1
+            except Exception as e:
+                logger.error(f"Error invalidating cache namespace {namespace}: {e}")
+        
+        self.invalidation_count += bumped
+        logger.debug(f"Bumped {bumped} cache generations")
+        return bumped
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -190,28 +301,20 @@ class QueryCache:
             'default_ttl': self.default_ttl
         }
         
+        stats['set_count'] = self.set_count
+        stats['invalidation_count'] = self.invalidation_count
+        
         if self.is_available():
             try:
-                # Get cache size information
-                pattern = f"{self.key_prefix}*"
-                cache_keys = self.redis_client.keys(pattern)
-                stats['cached_queries'] = len(cache_keys)
-                
-                # Sample some cache entries for analysis
-                sample_keys = cache_keys[:10] if cache_keys else []
-                sample_info = []
-                
-                for key in sample_keys:
-                    ttl = self.redis_client.ttl(key)
-                    size = len(str(self.redis_client.get(key) or ''))
-                    sample_info.append({
-                        'key': key.replace(self.key_prefix, ''),
-                        'ttl': ttl,
-                        'size_bytes': size
-                    })
-                
-                stats['sample_entries'] = sample_info
-                
+                # Generation counters only; scanning the keyspace would block Redis
+                namespaces = {self.GLOBAL_NAMESPACE}
+                for table_namespaces in self.invalidation_patterns.values():
+                    namespaces.update(table_namespaces)
+                namespaces = sorted(namespaces)
+                values = self.redis_client.mget([self._generation_key(namespace) for namespace in namespaces])
+                stats['generations'] = {
+                    namespace: int(value) if value else 0 for namespace, value in zip(namespaces, values)
+                }
             except Exception as e:
                 stats['error'] = str(e)
         
@@ -246,9 +349,6 @@ class CachedQuery:
     def __call__(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if not self.cache.is_available():
-                return func(*args, **kwargs)
-            
             # Generate cache key
             if self.key_func:
                 cache_key = self.key_func(*args, **kwargs)
@@ -261,18 +361,27 @@ class CachedQuery:
                 }
                 cache_key = f"func:{func.__name__}:{hashlib.md5(str(key_data).encode()).hexdigest()}"
             
-            # Try to get from cache
-            cached_result = self.cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            self.cache.set(cache_key, result, ttl=self.ttl)
-            
-            return result
+            return _through_tiered_cache(cache_key, self.invalidate_on, self.ttl,
+                                         lambda: self._load(cache_key, func, args, kwargs))
         
         return wrapper
+    
+    def _load(self, cache_key, func, args, kwargs):
+        # Key the entry by the generations seen before the function runs
+        key = self.cache.cache_key(cache_key, namespaces=self.invalidate_on)
+        if key is None:
+            return func(*args, **kwargs)
+        
+        # Try to get from cache
+        cached_result = self.cache.get(cache_key, key=key)
+        if cached_result is not None:
+            return cached_result
+        
+        # Execute function and cache result
+        result = func(*args, **kwargs)
+        self.cache.set(cache_key, result, ttl=self.ttl, key=key)
+        
+        return result
 
 
 class QueryCacheManager:
@@ -301,35 +410,9 @@ class QueryCacheManager:
         if not self.auto_invalidation_enabled:
             return
         
-        @event.listens_for(db.session, 'after_commit')
-        def invalidate_cache_after_commit(session):
-            """Invalidate cache after successful database commits."""
-            try:
-                # Get modified tables from session
-                modified_tables = set()
-                
-                for obj in session.new:
-                    modified_tables.add(obj.__tablename__)
-                
-                for obj in session.dirty:
-                    modified_tables.add(obj.__tablename__)
-                
-                for obj in session.deleted:
-                    modified_tables.add(obj.__tablename__)
-                
-                # Invalidate cache for modified tables
-                for table_name in modified_tables:
-                    self.query_cache.invalidate(table_name=table_name)
-                    logger.debug(f"Invalidated cache for table: {table_name}")
-                
-            except Exception as e:
-                logger.error(f"Error in auto cache invalidation: {e}")
-        
-        @event.listens_for(db.session, 'after_rollback')
-        def handle_rollback(session):
-            """Handle cache invalidation after rollback."""
-            # No cache invalidation needed on rollback since changes weren't committed
-            logger.debug("Database rollback - no cache invalidation needed")
+        # Tables are collected at flush time and bumped once per commit
+        from .performance import install_cache_invalidation
+        install_cache_invalidation(db.session)
     
     def cached_query(self, ttl: Optional[int] = None, key_func: Optional[callable] = None,
                     invalidate_on: Optional[List[str]] = None):
@@ -351,7 +434,16 @@ class QueryCacheManager:
     
     def invalidate_table_cache(self, table_name: str) -> int:
         """Invalidate cache for specific table."""
-        return self.query_cache.invalidate(table_name=table_name)
+        count = self.query_cache.invalidate(table_name=table_name)
+        self.table_modifications[table_name] = self.table_modifications.get(table_name, 0) + 1
+        return count
+    
+    def invalidate_tables(self, table_names) -> int:
+        """Invalidate cache for several tables at once."""
+        table_names = list(table_names)
+        for table_name in table_names:
+            self.table_modifications[table_name] = self.table_modifications.get(table_name, 0) + 1
+        return self.query_cache.invalidate_tables(table_names)
     
     def clear_all_cache(self) -> int:
         """Clear all cached queries."""
@@ -382,15 +474,25 @@ def get_cache_manager() -> Optional[QueryCacheManager]:
 
 # Enhanced convenience functions for common caching patterns
 def cache_user_reports(user_email: str, ttl: int = 300):
-    """Cache user reports query with performance tracking."""
+    """Cache user reports query with performance tracking.
+    
+    Entries live in the ``user_reports`` namespace, which is invalidated by
+    any change to ``reports`` or ``users``.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            return _through_tiered_cache(f"user_reports:{user_email}", ['user_reports'], ttl,
+                                         lambda: load(*args, **kwargs))
+        
+        def load(*args, **kwargs):
             start_time = time.time()
             
-            if cache_manager and cache_manager.query_cache.is_available():
-                cache_key = f"user_reports:{user_email}"
-                cached_result = cache_manager.query_cache.get(cache_key)
+            key = cache_manager.query_cache.cache_key(
+                f"user_reports:{user_email}", namespaces=['user_reports']
+            ) if cache_manager else None
+            if key is not None:
+                cached_result = cache_manager.query_cache.get(key, key=key)
                 
                 if cached_result is not None:
                     # Track cache hit performance
@@ -408,7 +510,7 @@ def cache_user_reports(user_email: str, ttl: int = 300):
                 result = func(*args, **kwargs)
                 query_time = time.time() - start_time
                 
-                cache_manager.query_cache.set(cache_key, result, ttl=ttl)
+                cache_manager.query_cache.set(key, result, ttl=ttl, key=key)
                 
                 # Track cache miss performance
                 cache_manager.cache_performance['cache_misses'] += 1
@@ -423,8 +525,8 @@ def cache_user_reports(user_email: str, ttl: int = 300):
             
             # No cache available
             result = func(*args, **kwargs)
-            query_time = time.time() - start_time
-            cache_manager.cache_performance['total_queries'] += 1
+            if cache_manager:
+                cache_manager.cache_performance['total_queries'] += 1
             
             return result
         return wrapper
@@ -432,18 +534,24 @@ def cache_user_reports(user_email: str, ttl: int = 300):
 
 
 def cache_report_details(report_id: str, ttl: int = 600):
-    """Cache report details query."""
+    """Cache report details query (``report_details`` namespace)."""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if cache_manager and cache_manager.query_cache.is_available():
-                cache_key = f"report_details:{report_id}"
-                cached_result = cache_manager.query_cache.get(cache_key)
+            return _through_tiered_cache(f"report_details:{report_id}", ['report_details'], ttl,
+                                         lambda: load(*args, **kwargs))
+        
+        def load(*args, **kwargs):
+            key = cache_manager.query_cache.cache_key(
+                f"report_details:{report_id}", namespaces=['report_details']
+            ) if cache_manager else None
+            if key is not None:
+                cached_result = cache_manager.query_cache.get(key, key=key)
                 if cached_result is not None:
                     return cached_result
                 
                 result = func(*args, **kwargs)
-                cache_manager.query_cache.set(cache_key, result, ttl=ttl)
+                cache_manager.query_cache.set(key, result, ttl=ttl, key=key)
                 return result
             
             return func(*args, **kwargs)
@@ -452,18 +560,24 @@ def cache_report_details(report_id: str, ttl: int = 600):
 
 
 def cache_system_stats(ttl: int = 120):
-    """Cache system statistics queries."""
+    """Cache system statistics queries (``system_stats`` namespace)."""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if cache_manager and cache_manager.query_cache.is_available():
-                cache_key = f"system_stats:{func.__name__}"
-                cached_result = cache_manager.query_cache.get(cache_key)
+            return _through_tiered_cache(f"system_stats:{func.__name__}", ['system_stats'], ttl,
+                                         lambda: load(*args, **kwargs))
+        
+        def load(*args, **kwargs):
+            key = cache_manager.query_cache.cache_key(
+                f"system_stats:{func.__name__}", namespaces=['system_stats']
+            ) if cache_manager else None
+            if key is not None:
+                cached_result = cache_manager.query_cache.get(key, key=key)
                 if cached_result is not None:
                     return cached_result
                 
                 result = func(*args, **kwargs)
-                cache_manager.query_cache.set(cache_key, result, ttl=ttl)
+                cache_manager.query_cache.set(key, result, ttl=ttl, key=key)
                 return result
             
             return func(*args, **kwargs)
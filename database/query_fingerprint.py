@@ -0,0 +1,150 @@
+"""
+Statement fingerprinting and per-thread statistics for query monitoring.
+
+SQLAlchemy reuses the compiled SQL string of a statement for every
+execution, so the regex normalization and table extraction done by the
+query monitors only needs to run once per distinct statement text. The
+result is kept in an LRU cache keyed on the raw statement.
+
+Statistics are recorded into a shard owned by the executing thread, so
+the ``after_cursor_execute`` hot path takes no lock. Readers merge the
+shards; shards of finished threads are folded into a single retired
+shard so thread-per-request servers do not accumulate them.
+"""
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+FINGERPRINT_CACHE_SIZE = 4096
+
+_COMMENT_LINE = re.compile(r'--.*$', re.MULTILINE)
+_COMMENT_BLOCK = re.compile(r'/\*.*?\*/', re.DOTALL)
+_PLACEHOLDER = re.compile(r'\$\d+|\?|%\([^)]+\)s')
+_SINGLE_QUOTED = re.compile(r"'[^']*'")
+_DOUBLE_QUOTED = re.compile(r'"[^"]*"')
+_NUMBER = re.compile(r'\b\d+\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_TABLE_REFERENCE = re.compile(
+    r'(?:from|join|update|insert\s+into|delete\s+from)\s+([a-zA-Z_][a-zA-Z0-9_]*)'
+)
+
+
+@dataclass(frozen=True)
+class QueryFingerprint:
+    """Normalized forms of one statement text."""
+    normalized: str        # Literals masked, identifiers and case preserved
+    pattern: str           # Also comment-free, quoted identifiers masked, lowercased
+    query_hash: str
+    tables: Tuple[str, ...]
+
+
+def _normalize(statement: str) -> str:
+    normalized = _PLACEHOLDER.sub('?', statement)
+    normalized = _SINGLE_QUOTED.sub("'?'", normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    return ' '.join(normalized.split())
+
+
+def _pattern(statement: str) -> str:
+    pattern = _COMMENT_LINE.sub('', statement)
+    pattern = _COMMENT_BLOCK.sub('', pattern)
+    pattern = _PLACEHOLDER.sub('?', pattern)
+    pattern = _SINGLE_QUOTED.sub("'?'", pattern)
+    pattern = _DOUBLE_QUOTED.sub('"?"', pattern)
+    pattern = _NUMBER.sub('?', pattern)
+    # Expanded IN lists of any length are the same pattern
+    pattern = _IN_LIST.sub('(?)', pattern)
+    return ' '.join(pattern.split()).lower()
+
+
+def extract_tables(statement: str) -> Tuple[str, ...]:
+    """Table names referenced after FROM, JOIN, UPDATE, INSERT INTO or DELETE FROM."""
+    return tuple(sorted(set(_TABLE_REFERENCE.findall(statement.lower()))))
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def fingerprint(statement: str) -> QueryFingerprint:
+    """Fingerprint a statement, computing it once per distinct text."""
+    pattern = _pattern(statement)
+    return QueryFingerprint(
+        normalized=_normalize(statement),
+        pattern=pattern,
+        query_hash=hashlib.md5(pattern.encode()).hexdigest(),
+        tables=extract_tables(statement)
+    )
+
+
+def fingerprint_cache_info():
+    """Hit/miss counters of the fingerprint cache."""
+    info = fingerprint.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize
+    }
+
+
+class ThreadLocalStats:
+    """Statistics entries sharded per thread and merged on read.
+
+    Entries must provide ``copy()`` and ``merge(other)``. The owning thread
+    mutates its shard without locking; readers see a slightly stale but
+    never corrupted view.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._registry_lock = threading.Lock()
+
+    def shard(self):
+        """The calling thread's shard, a plain dict of key -> entry."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            self._local.shard = shard
+            with self._registry_lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def merged(self):
+        """A new dict combining every shard; entries are copies."""
+        with self._registry_lock:
+            self._retire_finished_threads()
+            shards = [self._retired] + [shard for _, shard in self._shards]
+
+            result = {}
+            for shard in shards:
+                for key, entry in shard.copy().items():
+                    current = result.get(key)
+                    if current is None:
+                        result[key] = entry.copy()
+                    else:
+                        current.merge(entry)
+            return result
+
+    def clear(self):
+        with self._registry_lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+    def _retire_finished_threads(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+                continue
+            for key, entry in shard.items():
+                current = self._retired.get(key)
+                if current is None:
+                    self._retired[key] = entry
+                else:
+                    current.merge(entry)
+        self._shards = live
@@ -0,0 +1,122 @@
+"""
+Registry of pre-built statements for the hottest ORM lookups.
+
+Building ``Model.query.filter_by(...)`` on every call constructs a new
+``Query``, a new ``Select`` and a new cache key before SQLAlchemy can find
+the compiled SQL in its cache. The statements registered here are built
+once with ``bindparam`` placeholders; their cache key is memoized on the
+statement object, so executing them only binds parameters and looks up
+the already compiled form.
+
+Views should call the helpers at the bottom of this module instead of
+spelling out the equivalent ORM query.
+"""
+import logging
+import threading
+from typing import Callable, Dict
+
+from sqlalchemy import bindparam, func, select
+
+from models import db, ModuleSpec, NotificationCounter, Report, SATReport, User
+
+logger = logging.getLogger(__name__)
+
+_builders: Dict[str, Callable] = {}
+_statements: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def hot_statement(name: str):
+    """Register a builder returning a statement with named bind parameters."""
+    def decorator(builder):
+        if name in _builders:
+            raise ValueError(f"Statement {name!r} is already registered")
+        _builders[name] = builder
+        return builder
+    return decorator
+
+
+def get_statement(name: str):
+    """The pre-built statement registered under ``name``."""
+    statement = _statements.get(name)
+    if statement is None:
+        with _lock:
+            statement = _statements.get(name)
+            if statement is None:
+                statement = _statements[name] = _builders[name]()
+    return statement
+
+
+def execute(name: str, **params):
+    """Execute a registered statement on the current session."""
+    return db.session.execute(get_statement(name), params)
+
+
+def registered_statements():
+    return sorted(_builders)
+
+
+@hot_statement('sat_report_by_report_id')
+def _sat_report_by_report_id():
+    return select(SATReport).where(SATReport.report_id == bindparam('report_id')).limit(1)
+
+
+@hot_statement('user_by_email')
+def _user_by_email():
+    return select(User).where(User.email == bindparam('email')).limit(1)
+
+
+@hot_statement('unread_notification_count')
+def _unread_notification_count():
+    return select(NotificationCounter.unread_count).where(NotificationCounter.user_email == bindparam('user_email'))
+
+
+@hot_statement('module_spec_by_company_model')
+def _module_spec_by_company_model():
+    return (
+        select(ModuleSpec)
+        .where(ModuleSpec.company == bindparam('company'))
+        .where(ModuleSpec.model == bindparam('model'))
+        .limit(1)
+    )
+
+
+@hot_statement('module_spec_by_normalized_name')
+def _module_spec_by_normalized_name():
+    return (
+        select(ModuleSpec)
+        .where(func.upper(ModuleSpec.company) == bindparam('company'))
+        .where(func.upper(ModuleSpec.model) == bindparam('model'))
+        .limit(1)
+    )
+
+
+def get_report(report_id):
+    """Report by primary key, served from the session identity map when loaded."""
+    if report_id is None:
+        return None
+    return db.session.get(Report, report_id)
+
+
+def get_sat_report(report_id):
+    """SAT details row of a report, or None."""
+    return execute('sat_report_by_report_id', report_id=report_id).scalars().first()
+
+
+def get_user_by_email(email):
+    return execute('user_by_email', email=email).scalars().first()
+
+
+def count_unread_notifications(user_email) -> int:
+    """Unread notifications of a user, read from the maintained counter."""
+    return execute('unread_notification_count', user_email=user_email).scalar() or 0
+
+
+def get_module_spec(company, model):
+    """Module spec by exact company and model, or None."""
+    return execute('module_spec_by_company_model', company=company, model=model).scalars().first()
+
+
+def find_module_spec(company, model):
+    """Module spec matching upper-cased ``company`` and ``model`` regardless of stored case."""
+    return execute('module_spec_by_normalized_name', company=company, model=model).scalars().first()
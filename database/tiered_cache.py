@@ -0,0 +1,672 @@
+"""
+Two-tier query result cache for SAT Report Generator.
+
+L1 is a small in-process LRU that serves hot reads without a network round
+trip. L2 is shared between all workers on the host (Redis when available,
+otherwise a local SQLite file). Commits broadcast the modified table names so
+that every worker drops the affected L1 entries.
+
+Both tiers refuse fills that raced with an invalidation: L1 compares its
+local epoch, L2 a per-table version stored next to the entries, read before
+the loader ran and checked atomically with the write.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Version of the pseudo-tag bumped by clear(); every guarded fill checks it
+_ALL_TAGS = '*'
+
+
+def _version_tags(tags):
+    return sorted(set(tags) | {_ALL_TAGS})
+
+
+class L1Cache:
+    """In-process LRU cache with per-entry TTL and a tag index."""
+
+    def __init__(self, max_entries=2000, default_ttl=30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self.tag_index = defaultdict(set)
+        self.epoch = 0  # Bumped on every invalidation, guards against stale fills
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value or ``_MISSING``."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at, tags = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return _MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), ttl=None, epoch=None):
+        """Store a value unless an invalidation happened since ``epoch``."""
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return False
+            if key in self.entries:
+                self._remove(key)
+            expires_at = time.time() + (ttl or self.default_ttl)
+            tags = frozenset(tags or ())
+            self.entries[key] = (value, expires_at, tags)
+            for tag in tags:
+                self.tag_index[tag].add(key)
+            while len(self.entries) > self.max_entries:
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+            return True
+
+    def discard(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def invalidate_tags(self, tags):
+        """Drop every entry labelled with one of ``tags``."""
+        removed = 0
+        with self.lock:
+            self.epoch += 1
+            for tag in tags:
+                for key in self.tag_index.pop(tag, ()):
+                    if key in self.entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self):
+        """Drop all entries."""
+        with self.lock:
+            self.epoch += 1
+            self.entries.clear()
+            self.tag_index.clear()
+
+    def _remove(self, key):
+        _value, _expires_at, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteL2Backend:
+    """Shared L2 cache stored in a local SQLite file.
+
+    Used when Redis is not configured: all workers on the host open the same
+    file. Invalidations are appended to a log table that each worker polls.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, poll_interval=0.5, invalidation_retention=3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.invalidation_retention = invalidation_retention
+        self._local = threading.local()
+        self._listener = None
+        self._stop = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._initialize_schema()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _initialize_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache_tags (
+                tag TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (tag, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tags TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache_tag_versions (
+                tag TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+
+    def _read_versions(self, conn, tags):
+        tags = _version_tags(tags)
+        placeholders = ','.join('?' * len(tags))
+        stored = dict(conn.execute(
+            f'SELECT tag, version FROM cache_tag_versions WHERE tag IN ({placeholders})', tags
+        ).fetchall())
+        return tuple(stored.get(tag, 0) for tag in tags)
+
+    def _bump_versions(self, conn, tags):
+        conn.executemany(
+            'INSERT INTO cache_tag_versions (tag, version) VALUES (?, 1) '
+            'ON CONFLICT (tag) DO UPDATE SET version = version + 1',
+            [(tag,) for tag in tags]
+        )
+
+    def versions(self, tags):
+        """Invalidation versions of ``tags``, to pass to a later :meth:`set`."""
+        return self._read_versions(self._connect(), tags)
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        """Store ``value``; with ``versions``, only if none of ``tags`` was invalidated since."""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if versions is not None and self._read_versions(conn, tags) != tuple(versions):
+                return False
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, time.time() + ttl)
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)',
+                [(tag, key) for tag in tags]
+            )
+        return True
+
+    def invalidate(self, tags, origin):
+        tags = list(tags)
+        conn = self._connect()
+        placeholders = ','.join('?' * len(tags))
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            deleted = conn.execute(
+                f'DELETE FROM cache_entries WHERE key IN '
+                f'(SELECT key FROM cache_tags WHERE tag IN ({placeholders}))',
+                tags
+            ).rowcount
+            conn.execute(f'DELETE FROM cache_tags WHERE tag IN ({placeholders})', tags)
+            self._bump_versions(conn, tags)
+            conn.execute(
+                'INSERT INTO cache_invalidations (tags, origin, created_at) VALUES (?, ?, ?)',
+                (json.dumps(tags), origin, time.time())
+            )
+        return deleted
+
+    def clear(self, origin):
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM cache_entries')
+            conn.execute('DELETE FROM cache_tags')
+            self._bump_versions(conn, [_ALL_TAGS])
+            conn.execute(
+                'INSERT INTO cache_invalidations (tags, origin, created_at) VALUES (?, ?, ?)',
+                (json.dumps(['*']), origin, time.time())
+            )
+
+    def _last_invalidation_id(self):
+        row = self._connect().execute('SELECT MAX(id) FROM cache_invalidations').fetchone()
+        return row[0] or 0
+
+    def poll_invalidations(self, since_id):
+        """Return ``(last_id, [(tags, origin), ...])`` logged after ``since_id``."""
+        rows = self._connect().execute(
+            'SELECT id, tags, origin FROM cache_invalidations WHERE id > ? ORDER BY id',
+            (since_id,)
+        ).fetchall()
+        if not rows:
+            return since_id, []
+        return rows[-1][0], [(json.loads(tags), origin) for _id, tags, origin in rows]
+
+    def prune(self):
+        """Remove expired entries and old invalidation records."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'DELETE FROM cache_tags WHERE key IN '
+                '(SELECT key FROM cache_entries WHERE expires_at < ?)', (now,)
+            )
+            conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (now,))
+            conn.execute(
+                'DELETE FROM cache_invalidations WHERE created_at < ?',
+                (now - self.invalidation_retention,)
+            )
+
+    def start_listener(self, callback, origin):
+        """Poll the invalidation log and hand remote invalidations to ``callback``."""
+        if self._listener is not None:
+            return
+        last_id = self._last_invalidation_id()
+
+        def listen():
+            nonlocal last_id
+            last_prune = time.time()
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    last_id, batches = self.poll_invalidations(last_id)
+                    for tags, sender in batches:
+                        if sender != origin:
+                            callback(tags)
+                    if time.time() - last_prune > 60:
+                        self.prune()
+                        last_prune = time.time()
+                except Exception as e:
+                    logger.error(f"Query cache invalidation poll failed: {e}")
+
+        self._listener = threading.Thread(target=listen, name='query-cache-l2-listener', daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=self.poll_interval * 4)
+            self._listener = None
+
+
+# Writes the entry only if every tag version still matches the one read
+# before the load. KEYS: entry, version keys, tag sets. ARGV: value, ttl,
+# number of versions, versions..., member to add to the tag sets.
+_GUARDED_SET_SCRIPT = """
+local count = tonumber(ARGV[3])
+for i = 1, count do
+    if (redis.call('GET', KEYS[i + 1]) or '0') ~= ARGV[i + 3] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = count + 2, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[count + 4])
+    redis.call('EXPIRE', KEYS[i], ARGV[2])
+end
+return 1
+"""
+
+
+class RedisL2Backend:
+    """Shared L2 cache stored in Redis with pub/sub invalidation broadcasts."""
+
+    name = 'redis'
+
+    def __init__(self, redis_client, key_prefix='l2_cache:', channel='query_cache:invalidate'):
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.channel = channel
+        self._listener = None
+        self._stop = threading.Event()
+
+    def _key(self, key):
+        return f"{self.key_prefix}{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.key_prefix}tag:{tag}"
+
+    def _version_key(self, tag):
+        return f"{self.key_prefix}ver:{tag}"
+
+    def versions(self, tags):
+        """Invalidation versions of ``tags``, to pass to a later :meth:`set`."""
+        values = self.redis_client.mget([self._version_key(tag) for tag in _version_tags(tags)])
+        return tuple(int(value) if value else 0 for value in values)
+
+    def get(self, key):
+        value = self.redis_client.get(self._key(key))
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        """Store ``value``; with ``versions``, only if none of ``tags`` was invalidated since."""
+        ttl = int(ttl)
+        if versions is not None:
+            version_keys = [self._version_key(tag) for tag in _version_tags(tags)]
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            return bool(self.redis_client.eval(
+                _GUARDED_SET_SCRIPT, 1 + len(version_keys) + len(tag_keys),
+                self._key(key), *version_keys, *tag_keys,
+                value, ttl, len(version_keys), *[str(version) for version in versions], key
+            ))
+        self.redis_client.set(self._key(key), value, ttl)
+        for tag in tags:
+            self.redis_client.sadd(self._tag_key(tag), key)
+            self.redis_client.expire(self._tag_key(tag), ttl)
+        return True
+
+    def invalidate(self, tags, origin):
+        tags = list(tags)
+        deleted = 0
+        for tag in tags:
+            # Bump first so that fills loaded before this point are refused
+            self.redis_client.incr(self._version_key(tag))
+            members = self.redis_client.smembers(self._tag_key(tag)) or ()
+            keys = [self._key(m.decode('utf-8') if isinstance(m, bytes) else m) for m in members]
+            if keys:
+                deleted += self.redis_client.delete(*keys) or 0
+            self.redis_client.delete(self._tag_key(tag))
+        self.redis_client.publish(self.channel, json.dumps({'origin': origin, 'tags': tags}))
+        return deleted
+
+    def clear(self, origin):
+        # Entries expire by TTL; only the L1 copies must go immediately.
+        self.redis_client.incr(self._version_key(_ALL_TAGS))
+        self.redis_client.publish(self.channel, json.dumps({'origin': origin, 'tags': ['*']}))
+
+    def start_listener(self, callback, origin):
+        """Subscribe to the invalidation channel in a daemon thread."""
+        if self._listener is not None:
+            return
+        pubsub_factory = getattr(self.redis_client, 'pubsub', None)
+        if pubsub_factory is None:
+            logger.warning("Redis client has no pub/sub support; L1 entries expire by TTL only")
+            return
+
+        def listen():
+            while not self._stop.is_set():
+                try:
+                    pubsub = pubsub_factory()
+                    pubsub.subscribe(self.channel)
+                    while not self._stop.is_set():
+                        message = pubsub.get_message(timeout=1.0)
+                        if not message or message.get('type') != 'message':
+                            continue
+                        payload = json.loads(message['data'])
+                        if payload.get('origin') != origin:
+                            callback(payload.get('tags', []))
+                except Exception as e:
+                    logger.error(f"Query cache invalidation subscriber failed: {e}")
+                    self._stop.wait(5)
+
+        self._listener = threading.Thread(target=listen, name='query-cache-l2-listener', daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+            self._listener = None
+
+
+class TieredQueryCache:
+    """Query result cache with an in-process L1 in front of a shared L2."""
+
+    def __init__(self, l2_backend=None, l1_max_entries=2000, l1_ttl=30, default_ttl=600):
+        self.l1 = L1Cache(max_entries=l1_max_entries, default_ttl=l1_ttl)
+        self.l2 = l2_backend
+        self.default_ttl = default_ttl
+        self.origin = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = {
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'local_invalidations': 0,
+            'remote_invalidations': 0,
+            'stale_fills': 0,
+            'l2_errors': 0
+        }
+        self.stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        with self.stats_lock:
+            self.stats[stat] += 1
+
+    def start(self):
+        """Start receiving invalidations broadcast by other workers."""
+        if self.l2 is not None:
+            self.l2.start_listener(self._on_remote_invalidation, self.origin)
+
+    def stop(self):
+        if self.l2 is not None:
+            self.l2.stop_listener()
+
+    def _on_remote_invalidation(self, tags):
+        self._count('remote_invalidations')
+        if '*' in tags:
+            self.l1.clear()
+        else:
+            self.l1.invalidate_tags(tags)
+
+    def get(self, key, default=None):
+        """Look up ``key`` in L1, then L2 (promoting the value into L1)."""
+        value = self.l1.get(key)
+        if value is not _MISSING:
+            self._count('l1_hits')
+            return value
+
+        if self.l2 is not None:
+            epoch = self.l1.epoch
+            try:
+                raw = self.l2.get(key)
+            except Exception as e:
+                logger.error(f"L2 cache read failed: {e}")
+                self._count('l2_errors')
+                raw = None
+            if raw is not None:
+                self._count('l2_hits')
+                entry = json.loads(raw)
+                self.l1.set(key, entry['value'], entry.get('tags', ()), epoch=epoch)
+                return entry['value']
+
+        self._count('misses')
+        return default
+
+    def set(self, key, value, tags=(), ttl=None, epoch=None, versions=None):
+        """Store ``value`` in both tiers, labelled with the tables it depends on.
+
+        ``epoch`` (L1) and ``versions`` (L2) are read before loading the
+        value; a tier invalidated since then keeps no copy.
+        """
+        tags = list(tags or ())
+        if not self.l1.set(key, value, tags, epoch=epoch):
+            # A commit touched the data while it was being loaded.
+            self._count('stale_fills')
+            return False
+        self._count('sets')
+        if self.l2 is not None:
+            try:
+                payload = json.dumps({'value': value, 'tags': tags}, default=str)
+                if self.l2.set(key, payload, ttl or self.default_ttl, tags, versions=versions) is False:
+                    # Another worker committed to one of the tables meanwhile
+                    self._count('stale_fills')
+                    self.l1.discard(key)
+                    return False
+            except Exception as e:
+                logger.error(f"L2 cache write failed: {e}")
+                self._count('l2_errors')
+        return True
+
+    def _l2_versions(self, tags):
+        try:
+            return self.l2.versions(tags)
+        except Exception as e:
+            logger.error(f"L2 cache version read failed: {e}")
+            self._count('l2_errors')
+            return None
+
+    def get_or_load(self, key, loader: Callable[[], Any], tags=(), ttl=None):
+        """Return the cached value for ``key`` or compute and cache it."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        tags = list(tags or ())
+        epoch = self.l1.epoch
+        versions = self._l2_versions(tags) if self.l2 is not None else None
+        value = loader()
+        if self.l2 is not None and versions is None:
+            # Without versions the fill cannot be guarded; keep it local
+            if not self.l1.set(key, value, tags, epoch=epoch):
+                self._count('stale_fills')
+        else:
+            self.set(key, value, tags, ttl, epoch=epoch, versions=versions)
+        return value
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Invalidate entries for ``tables`` locally, in L2 and on other workers."""
+        tables = sorted(set(tables))
+        if not tables:
+            return 0
+        self._count('local_invalidations')
+        removed = self.l1.invalidate_tags(tables)
+        if self.l2 is not None:
+            try:
+                removed += self.l2.invalidate(tables, self.origin)
+            except Exception as e:
+                logger.error(f"L2 cache invalidation failed: {e}")
+                self._count('l2_errors')
+        return removed
+
+    def clear(self):
+        """Clear every tier on every worker."""
+        self.l1.clear()
+        if self.l2 is not None:
+            try:
+                self.l2.clear(self.origin)
+            except Exception as e:
+                logger.error(f"L2 cache clear failed: {e}")
+                self._count('l2_errors')
+
+    def cached(self, tables: Iterable[str], ttl=None, key_func=None):
+        """Decorator caching a function's JSON-serialisable result.
+
+        ``tables`` are the tables the result is read from; commits to any
+        of them drop the entry.
+        """
+        tables = tuple(tables or ())
+        if not tables:
+            raise ValueError("Cached results need the tables they depend on")
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if key_func:
+                    cache_key = key_func(*args, **kwargs)
+                else:
+                    cache_key = f"{func.__module__}.{func.__name__}:{args!r}:{sorted(kwargs.items())!r}"
+                return self.get_or_load(cache_key, lambda: func(*args, **kwargs), tables, ttl)
+            return wrapper
+        return decorator
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats.update({
+            'l1_size': len(self.l1),
+            'l1_max_entries': self.l1.max_entries,
+            'l2_backend': self.l2.name if self.l2 is not None else None,
+            'hit_rate': round((stats['l1_hits'] + stats['l2_hits']) / lookups * 100, 2) if lookups else 0
+        })
+        return stats
+
+
+def track_modified_tables(session):
+    """Record the tables touched by each flush in ``session.info``.
+
+    ``session.new``/``dirty``/``deleted`` are already empty by the time
+    ``after_commit`` fires, so the table names are collected at flush time.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(session, 'after_flush')
+    def collect_modified_tables(flush_session, flush_context):
+        tables = flush_session.info.setdefault('modified_tables', set())
+        for obj in list(flush_session.new) + list(flush_session.dirty) + list(flush_session.deleted):
+            table_name = getattr(obj, '__tablename__', None)
+            if table_name:
+                tables.add(table_name)
+
+    @event.listens_for(session, 'after_rollback')
+    def discard_modified_tables(rollback_session):
+        rollback_session.info.pop('modified_tables', None)
+
+
+def mark_tables_modified(session, tables: Iterable[str]) -> None:
+    """Record tables changed outside the unit of work (bulk UPDATE/DELETE).
+
+    Set-based statements never pass through a flush, so callers flag the
+    tables themselves and the usual after-commit hook invalidates them once.
+    """
+    session.info.setdefault('modified_tables', set()).update(tables)
+
+
+def pop_modified_tables(session) -> Set[str]:
+    """Return and reset the tables recorded by :func:`track_modified_tables`."""
+    return session.info.pop('modified_tables', set())
+
+
+# Global tiered cache instance
+tiered_cache = None
+
+
+def init_tiered_cache(app, redis_client=None):
+    """Initialize the two-tier cache and start the invalidation listener."""
+    global tiered_cache
+
+    if tiered_cache is not None:
+        tiered_cache.stop()
+
+    if redis_client is not None and redis_client.is_available():
+        l2_backend = RedisL2Backend(redis_client)
+    else:
+        l2_path = app.config.get('QUERY_CACHE_L2_PATH') or os.path.join(
+            app.instance_path, 'query_cache_l2.db'
+        )
+        l2_backend = SQLiteL2Backend(
+            l2_path,
+            poll_interval=app.config.get('QUERY_CACHE_INVALIDATION_POLL_SECONDS', 0.5)
+        )
+
+    tiered_cache = TieredQueryCache(
+        l2_backend,
+        l1_max_entries=app.config.get('QUERY_CACHE_L1_MAX_ENTRIES', 2000),
+        l1_ttl=app.config.get('QUERY_CACHE_L1_TTL', 30),
+        default_ttl=app.config.get('QUERY_CACHE_TIMEOUT', 600)
+    )
+    tiered_cache.start()
+
+    logger.info(f"Tiered query cache initialized (L2: {l2_backend.name})")
+    return tiered_cache
+
+
+def get_tiered_cache() -> Optional[TieredQueryCache]:
+    """Get the global tiered cache instance."""
+    return tiered_cache
@@ -2,13 +2,158 @@
 Optimized middleware for SAT Report Generator with caching and compression
 """
 import gzip
-import io
+import mimetypes
+import os
+import zlib
+from datetime import timezone
 from functools import wraps
-from flask import request, make_response, current_app
+from flask import request, make_response, current_app, session, send_file
 from werkzeug.datastructures import Headers
+from werkzeug.security import safe_join
 import hashlib
 import time
 
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content types worth compressing; everything else (images, archives,
+# PDFs, DOCX, woff/woff2 fonts) is already compressed
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/x-javascript', 'image/svg+xml', 'font/ttf', 'font/otf',
+    'application/vnd.ms-fontobject'
+)
+
+# Server-sent events are flushed per event by the browser's EventSource
+INCOMPRESSIBLE_TYPES = ('text/event-stream',)
+
+# Static files that get .br/.gz siblings at build time
+PRECOMPRESSED_EXTENSIONS = ('.js', '.css', '.map', '.json', '.svg', '.ttf', '.otf', '.eot')
+
+# Encoding -> file suffix, in server preference order
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def is_compressible(content_type):
+    """Whether a response of ``content_type`` benefits from compression."""
+    content_type = (content_type or '').lower()
+    if any(content_type.startswith(ct) for ct in INCOMPRESSIBLE_TYPES):
+        return False
+    return any(ct in content_type for ct in COMPRESSIBLE_TYPES)
+
+
+def supported_encodings():
+    """Encodings this server can produce on the fly, in preference order."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def acceptable_encodings(accept_encodings, available):
+    """Encodings from ``available`` the client accepts, best first.
+
+    ``accept_encodings`` is ``request.accept_encodings``; ties in quality
+    keep the server's preference order.
+    """
+    ranked = [(accept_encodings.quality(coding), index, coding) for index, coding in enumerate(available)]
+    return [coding for quality, index, coding in sorted(ranked, key=lambda r: (-r[0], r[1])) if quality > 0]
+
+
+def negotiate_encoding(accept_encodings):
+    """Best on-the-fly encoding for the request, or None for identity."""
+    encodings = acceptable_encodings(accept_encodings, supported_encodings())
+    return encodings[0] if encodings else None
+
+
+class StreamingCompressor:
+    """Incremental gzip or Brotli encoder."""
+
+    def __init__(self, encoding, gzip_level=6, brotli_quality=5):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes the gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        """Emit everything written so far without ending the stream."""
+        if self.encoding == 'br':
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+    def iter_compress(self, chunks, charset='utf-8'):
+        """Compress an iterable body, flushing after each chunk."""
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode(charset)
+                data = self.compress(chunk) + self.flush()
+                if data:
+                    yield data
+            yield self.finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+
+def precompress_static(root, extensions=PRECOMPRESSED_EXTENSIONS, min_size=500, force=False):
+    """Write ``.gz`` (and, with Brotli installed, ``.br``) siblings for static assets.
+
+    Files are compressed once at the highest level, so serving them costs
+    no CPU. Up-to-date siblings are left alone unless ``force`` is set, and
+    a sibling that would not be smaller than its source is removed.
+    Returns counts of written, unchanged and skipped variants.
+    """
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=11)
+
+    stats = {'written': 0, 'unchanged': 0, 'skipped': 0}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(extensions):
+                continue
+            source = os.path.join(directory, filename)
+            if os.path.getsize(source) < min_size:
+                stats['skipped'] += 1
+                continue
+
+            source_mtime = os.path.getmtime(source)
+            data = None
+            for encoding, encode in encoders.items():
+                variant = source + PRECOMPRESSED_SUFFIXES[encoding]
+                if not force and os.path.exists(variant) and os.path.getmtime(variant) >= source_mtime:
+                    stats['unchanged'] += 1
+                    continue
+
+                if data is None:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                compressed = encode(data)
+                if len(compressed) >= len(data):
+                    if os.path.exists(variant):
+                        os.remove(variant)
+                    stats['skipped'] += 1
+                    continue
+
+                with open(variant, 'wb') as f:
+                    f.write(compressed)
+                stats['written'] += 1
+    return stats
+
+
 class OptimizedMiddleware:
     """Middleware for performance optimization"""
     
@@ -26,6 +171,9 @@ class OptimizedMiddleware:
         """Pre-request optimizations"""
         # Record request start time for performance monitoring
         request._start_time = time.time()
+
+        # Static assets with a precompressed sibling cost no compression CPU
+        return self.serve_precompressed()
     
     def after_request(self, response):
         """Post-request optimizations"""
@@ -38,7 +186,7 @@ class OptimizedMiddleware:
         if request.path.startswith('/static/'):
             self.add_static_cache_headers(response)
         
-        # Apply gzip compression for text-based responses
+        # Apply gzip/Brotli compression for text-based responses
         if self.should_compress(response):
             response = self.compress_response(response)
         
@@ -74,58 +222,123 @@ class OptimizedMiddleware:
         response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
         response.headers['Vary'] = 'Accept-Encoding'
     
+    def serve_precompressed(self):
+        """Serve a prebuilt ``.br``/``.gz`` sibling of a static asset.
+
+        The siblings are written by ``scripts/precompress_static.py``; a
+        sibling older than its source is ignored so a stale build never
+        shadows an edited file.
+        """
+        if request.endpoint != 'static' or request.method not in ('GET', 'HEAD'):
+            return None
+        filename = (request.view_args or {}).get('filename', '')
+        if not filename.endswith(PRECOMPRESSED_EXTENSIONS):
+            return None
+
+        static_folder = current_app.static_folder
+        source = safe_join(static_folder, filename) if static_folder else None
+        if not source or not os.path.isfile(source):
+            return None
+
+        for encoding in acceptable_encodings(request.accept_encodings, PRECOMPRESSED_SUFFIXES):
+            variant = source + PRECOMPRESSED_SUFFIXES[encoding]
+            try:
+                if os.path.getmtime(variant) < os.path.getmtime(source):
+                    continue
+            except OSError:
+                continue
+
+            response = send_file(
+                variant,
+                mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                conditional=True,
+                max_age=current_app.get_send_file_max_age(filename)
+            )
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+        return None
+
     def should_compress(self, response):
         """Check if response should be compressed"""
         # Don't compress if already compressed
         if 'Content-Encoding' in response.headers:
             return False
-        
-        # Don't compress small responses (less than 500 bytes)
-        if response.content_length and response.content_length < 500:
+
+        # Nothing to compress, or the client already has the body
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
             return False
-        
+
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+
+        # Don't compress small responses
+        min_size = current_app.config.get('COMPRESSION_MIN_SIZE', 500)
+        if response.content_length is not None and response.content_length < min_size:
+            return False
+
         # Don't compress non-text content
         content_type = response.headers.get('Content-Type', '')
-        compressible_types = [
-            'text/', 'application/json', 'application/javascript',
-            'application/xml', 'application/x-javascript'
-        ]
-        
-        if not any(ct in content_type for ct in compressible_types):
+        if not is_compressible(content_type):
             return False
-        
-        # Check if client accepts gzip
-        accept_encoding = request.headers.get('Accept-Encoding', '')
-        return 'gzip' in accept_encoding.lower()
-    
+
+        # Byte ranges of a file refer to the uncompressed representation
+        if response.direct_passthrough and 'Range' in request.headers:
+            return False
+
+        return negotiate_encoding(request.accept_encodings) is not None
+
     def compress_response(self, response):
-        """Compress response using gzip"""
+        """Compress response with the best encoding the client accepts.
+
+        Small buffered bodies are compressed in one pass and keep their
+        ``Content-Length``. Generator and file responses, and buffered
+        bodies above ``COMPRESSION_STREAM_THRESHOLD``, are compressed chunk
+        by chunk as the server sends them, so the first bytes reach the
+        client before the whole body has been compressed.
+        """
+        config = current_app.config
+        encoding = negotiate_encoding(request.accept_encodings)
+        compressor = StreamingCompressor(
+            encoding,
+            gzip_level=config.get('COMPRESSION_GZIP_LEVEL', 6),
+            brotli_quality=config.get('COMPRESSION_BROTLI_QUALITY', 5)
+        )
+
         try:
-            # Skip compression for direct passthrough responses
-            if response.direct_passthrough:
-                return response
-            
-            # Get response data
-            data = response.get_data()
-            
-            # Compress data
-            gzip_buffer = io.BytesIO()
-            with gzip.GzipFile(mode='wb', fileobj=gzip_buffer, compresslevel=6) as gzip_file:
-                gzip_file.write(data)
-            
-            compressed_data = gzip_buffer.getvalue()
-            
-            # Only use compression if it actually reduces size
-            if len(compressed_data) < len(data):
-                response.set_data(compressed_data)
-                response.headers['Content-Encoding'] = 'gzip'
-                response.headers['Content-Length'] = len(compressed_data)
-                response.headers['Vary'] = 'Accept-Encoding'
+            if response.is_streamed or response.direct_passthrough:
+                chunks = response.response
+            else:
+                data = response.get_data()
+                chunk_size = config.get('COMPRESSION_CHUNK_SIZE', 64 * 1024)
+                if len(data) <= config.get('COMPRESSION_STREAM_THRESHOLD', 256 * 1024):
+                    compressed_data = compressor.compress(data) + compressor.finish()
+                    # Only use compression if it actually reduces size
+                    if len(compressed_data) >= len(data):
+                        return response
+                    response.set_data(compressed_data)
+                    self._mark_compressed(response, encoding)
+                    return response
+                chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+
+            response.response = compressor.iter_compress(chunks, response.charset)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+            response.headers.pop('Accept-Ranges', None)
+            self._mark_compressed(response, encoding)
         except Exception as e:
             current_app.logger.error(f"Compression error: {e}")
-        
+
         return response
-    
+
+    def _mark_compressed(self, response, encoding):
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        # The compressed body is a different representation of the resource
+        etag_value, weak = response.get_etag()
+        if etag_value and not weak:
+            response.set_etag(etag_value, weak=True)
+
     def add_security_headers(self, response):
         """Add security headers for better performance and security"""
         # Prevent clickjacking
@@ -204,6 +417,82 @@ def etag(f):
     return decorated_function
 
 
+def _requester_identity():
+    """Identify who the response was rendered for, so ETags are never shared."""
+    api_key = getattr(request, 'api_key', None)
+    if api_key is not None:
+        return f"key:{getattr(api_key, 'id', api_key)}"
+    try:
+        from flask_login import current_user
+        if current_user and current_user.is_authenticated:
+            return f"user:{current_user.get_id()}"
+    except Exception:
+        pass
+    return 'anonymous'
+
+
+def conditional(validator, html=False):
+    """Answer conditional GETs from a data version before running the view.
+
+    ``validator`` receives the view arguments and returns
+    ``(version, last_modified)``; a ``None`` version disables the check.
+    The ETag combines the version with the URL and the requester, so the
+    view body only runs when the underlying data changed. ``html=True``
+    also folds in the CSRF token window and skips the check while flash
+    messages are pending.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return f(*args, **kwargs)
+
+            try:
+                version, last_modified = validator(*args, **kwargs)
+            except Exception as e:
+                current_app.logger.debug(f"Conditional GET validator failed for {request.endpoint}: {e}")
+                return f(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            parts = [request.full_path, _requester_identity(), version]
+            if html:
+                if session.get('_flashes'):
+                    return f(*args, **kwargs)
+                csrf_window = current_app.config.get('WTF_CSRF_TIME_LIMIT') or 3600
+                parts.append(int(time.time() // csrf_window))
+            etag_value = hashlib.md5(repr(parts).encode()).hexdigest()
+
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+                if last_modified.tzinfo is None:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag_value)
+            else:
+                not_modified = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified <= request.if_modified_since
+                )
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag_value, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers.setdefault('Cache-Control', 'private, no-cache')
+            return response
+        return decorated_function
+    return decorator
+
+
 def init_optimized_middleware(app):
     """Initialize optimized middleware for the application"""
     middleware = OptimizedMiddleware(app)
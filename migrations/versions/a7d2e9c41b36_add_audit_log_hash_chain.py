@@ -0,0 +1,26 @@
+"""Link audit log entries into a hash chain
+
+Revision ID: a7d2e9c41b36
+Revises: f4c62df9092b
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e9c41b36'
+down_revision = 'f4c62df9092b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('previous_checksum', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_column('previous_checksum')
@@ -0,0 +1,45 @@
+"""Add per-user unread notification counters
+
+Revision ID: d81f3a6c2e57
+Revises: a7d2e9c41b36
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3a6c2e57'
+down_revision = 'a7d2e9c41b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_counters',
+    sa.Column('user_email', sa.String(length=120), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_email')
+    )
+
+    # Backfill from the existing notifications
+    notifications = sa.table('notifications',
+        sa.column('user_email', sa.String), sa.column('read', sa.Boolean)
+    )
+    counters = sa.table('notification_counters',
+        sa.column('user_email', sa.String), sa.column('unread_count', sa.Integer),
+        sa.column('version', sa.Integer), sa.column('updated_at', sa.DateTime)
+    )
+    op.execute(counters.insert().from_select(
+        ['user_email', 'unread_count', 'version', 'updated_at'],
+        sa.select(
+            notifications.c.user_email, sa.func.count(), sa.literal(1), sa.func.current_timestamp()
+        ).where(notifications.c.read == sa.false()).group_by(notifications.c.user_email)
+    ))
+
+
+def downgrade():
+    op.drop_table('notification_counters')
@@ -0,0 +1,48 @@
+"""Sequence audit log entries behind a single chain head row
+
+Revision ID: e3b8c1f07a92
+Revises: d81f3a6c2e57
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8c1f07a92'
+down_revision = 'd81f3a6c2e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sequence', sa.BigInteger(), nullable=True))
+        batch_op.create_index('idx_audit_sequence', ['sequence'], unique=True)
+
+    op.create_table('audit_chain_head',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sequence', sa.BigInteger(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # New entries continue the chain from the newest existing entry
+    audit_logs = sa.table('audit_logs',
+        sa.column('checksum', sa.String), sa.column('timestamp', sa.DateTime)
+    )
+    chain_head = sa.table('audit_chain_head',
+        sa.column('id', sa.Integer), sa.column('sequence', sa.BigInteger), sa.column('checksum', sa.String)
+    )
+    newest = sa.select(audit_logs.c.checksum).order_by(audit_logs.c.timestamp.desc()).limit(1).scalar_subquery()
+    op.execute(chain_head.insert().from_select(
+        ['id', 'sequence', 'checksum'], sa.select(sa.literal(1), sa.literal(0), newest)
+    ))
+
+
+def downgrade():
+    op.drop_table('audit_chain_head')
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_audit_sequence')
+        batch_op.drop_column('sequence')
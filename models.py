@@ -1091,7 +1091,8 @@ class ModuleSpec(db.Model):
     @classmethod
     def find_or_create(cls, company, model):
         """Find existing module spec or create placeholder for web lookup"""
-        spec = cls.query.filter_by(company=company.upper(), model=model.upper()).first()
+        from database.statements import get_module_spec
+        spec = get_module_spec(company.upper(), model.upper())
         if not spec:
             spec = cls(
                 company=company.upper(),
@@ -1155,7 +1156,8 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     type = db.Column(db.String(50), nullable=False)  # 'approval_request', 'status_update', 'completion', etc.
     related_submission_id = db.Column(db.String(36), nullable=True)  # Link to report
-    read = db.Column(db.Boolean, default=False)
+    # Active history: the unread counter hook needs the stored value when ``read`` is reassigned
+    read = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     action_url = db.Column(db.String(500), nullable=True)  # Optional action link
 
@@ -1176,6 +1178,8 @@ class Notification(db.Model):
     @staticmethod
     def create_notification(user_email, title, message, notification_type, submission_id=None, action_url=None):
         """Create a new notification for a user"""
+        import database.notification_counters  # noqa: F401  the unread counter listener
+        from services.event_bus import publish_notifications
         notification = Notification(
             user_email=user_email,
             title=title,
@@ -1185,9 +1189,58 @@ class Notification(db.Model):
             action_url=action_url
         )
         db.session.add(notification)
+        db.session.flush()
+        # Serialized before the commit expires the instance
+        payload = notification.to_dict()
         db.session.commit()
+        publish_notifications([user_email], {user_email: payload})
         return notification
 
+    @staticmethod
+    def create_notifications(user_emails, title, message, notification_type, submission_id=None, action_url=None):
+        """Create the same notification for several users in one transaction"""
+        import database.notification_counters  # noqa: F401  the unread counter listener
+        from services.event_bus import publish_notifications
+        notifications = [
+            Notification(
+                user_email=user_email,
+                title=title,
+                message=message,
+                type=notification_type,
+                related_submission_id=submission_id,
+                action_url=action_url
+            )
+            for user_email in user_emails
+        ]
+        if not notifications:
+            return notifications
+        # The unread counter hook upserts every recipient's counter in one statement
+        db.session.add_all(notifications)
+        db.session.flush()
+        # Serialized before the commit expires the instances, so publishing does not reload them
+        payloads = {notification.user_email: notification.to_dict() for notification in notifications}
+        db.session.commit()
+        publish_notifications(user_emails, payloads)
+        return notifications
+
+    @staticmethod
+    def mark_read(user_email, notification_id=None):
+        """Mark one (or, without an id, every) unread notification of a user as read.
+
+        Returns the number of notifications that changed state.
+        """
+        from database.notification_counters import remove_unread
+        from services.event_bus import publish_notifications
+        query = Notification.query.filter_by(user_email=user_email, read=False)
+        if notification_id is not None:
+            query = query.filter_by(id=notification_id)
+        marked = query.update({'read': True}, synchronize_session='fetch')
+        remove_unread(user_email, marked)
+        db.session.commit()
+        if marked:
+            publish_notifications([user_email])
+        return marked
+
     @staticmethod
     def get_recent_notifications(user_email, limit=10):
         """Get recent notifications for a user"""
@@ -1198,7 +1251,21 @@ class Notification(db.Model):
     @staticmethod
     def get_unread_count(user_email):
         """Get count of unread notifications for a user"""
-        return Notification.query.filter_by(user_email=user_email, read=False).count()
+        from database.statements import count_unread_notifications
+        return count_unread_notifications(user_email)
 
     def __repr__(self):
         return f'<Notification {self.id}: {self.title}>'
+
+
+class NotificationCounter(db.Model):
+    """Unread notification count per recipient, kept in step with Notification writes"""
+    __tablename__ = 'notification_counters'
+
+    user_email = db.Column(db.String(120), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every change, used for ETags
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<NotificationCounter {self.user_email}: {self.unread_count}>'
@@ -90,6 +90,46 @@ database_queries_total = Counter(
     registry=REGISTRY
 )
 
+database_pool_size = Gauge(
+    'database_pool_size',
+    'Number of connections the database pool keeps',
+    registry=REGISTRY
+)
+
+database_pool_checkout_wait_seconds = Gauge(
+    'database_pool_checkout_wait_seconds',
+    '95th percentile wait for a pooled connection over the last autoscaler window',
+    registry=REGISTRY
+)
+
+database_pool_resizes_total = Counter(
+    'database_pool_resizes_total',
+    'Pool autoscaler decisions',
+    ['action'],
+    registry=REGISTRY
+)
+
+database_pool_connections_shed_total = Counter(
+    'database_pool_connections_shed_total',
+    'Idle connections closed by the pool autoscaler',
+    registry=REGISTRY
+)
+
+database_request_queries = Histogram(
+    'database_request_queries',
+    'Statements executed per request',
+    ['endpoint'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+    registry=REGISTRY
+)
+
+database_repeated_queries_total = Counter(
+    'database_repeated_queries_total',
+    'Requests that repeated one statement shape beyond the N+1 threshold',
+    ['endpoint'],
+    registry=REGISTRY
+)
+
 # Email metrics
 emails_sent_total = Counter(
     'emails_sent_total',
@@ -98,6 +138,29 @@ emails_sent_total = Counter(
     registry=REGISTRY
 )
 
+# LLM provider metrics
+llm_requests_total = Counter(
+    'llm_requests_total',
+    'LLM completions by outcome (success, error, cache_hit, coalesced)',
+    ['provider', 'outcome'],
+    registry=REGISTRY
+)
+
+llm_request_duration_seconds = Histogram(
+    'llm_request_duration_seconds',
+    'LLM provider call duration in seconds',
+    ['provider'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+    registry=REGISTRY
+)
+
+llm_tokens_total = Counter(
+    'llm_tokens_total',
+    'Tokens sent to and generated by LLM providers',
+    ['provider', 'kind'],  # kind: prompt, completion
+    registry=REGISTRY
+)
+
 # File upload metrics
 file_uploads_total = Counter(
     'file_uploads_total',
@@ -439,6 +502,32 @@ def record_login_attempt(success=True):
     user_login_attempts_total.labels(status=status).inc()
 
 
+def record_pool_decision(decision):
+    """Record a pool autoscaler decision."""
+    database_pool_size.set(decision['to_size'])
+    database_pool_checkout_wait_seconds.set(decision['sample']['wait_p95'])
+    database_pool_resizes_total.labels(action=decision['action']).inc()
+    if decision['closed']:
+        database_pool_connections_shed_total.inc(decision['closed'])
+
+
+def record_request_queries(endpoint, query_count, repeated_shapes):
+    """Record the statements issued by one request."""
+    database_request_queries.labels(endpoint=endpoint).observe(query_count)
+    if repeated_shapes:
+        database_repeated_queries_total.labels(endpoint=endpoint).inc()
+
+
+def record_llm_call(provider, outcome, latency=None, completion=None):
+    """Record an LLM gateway call."""
+    llm_requests_total.labels(provider=provider, outcome=outcome).inc()
+    if latency is not None:
+        llm_request_duration_seconds.labels(provider=provider).observe(latency)
+    if completion is not None:
+        llm_tokens_total.labels(provider=provider, kind='prompt').inc(completion.prompt_tokens)
+        llm_tokens_total.labels(provider=provider, kind='completion').inc(completion.completion_tokens)
+
+
 def record_application_error(error_type, severity='error'):
     """Record an application error."""
     application_errors_total.labels(error_type=error_type, severity=severity).inc()
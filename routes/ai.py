@@ -3,7 +3,7 @@ from flask_login import login_required
 
 from services.ai_assistant import generate_sat_suggestion, AISuggestionError, ai_is_configured
 from services.email_generator import generate_email_content
-from models import Report, SATReport
+from database.statements import get_report, get_sat_report
 import json
 
 ai_bp = Blueprint('ai', __name__, url_prefix='/ai')
@@ -46,13 +46,13 @@ def generate_email():
     if not submission_id:
         return jsonify({'error': 'submission_id is required'}), 400
 
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     if not report:
         return jsonify({'error': 'Report not found'}), 404
 
     report_data: dict = {}
     if report.type == 'SAT':
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             return jsonify({'error': 'SAT Report data not found'}), 404
         report_data = json.loads(sat_report.data_json)
@@ -6,6 +6,7 @@ from security.audit import AuditLog
 from auth import role_required
 from datetime import datetime, timedelta
 from sqlalchemy import func, extract
+from services.user_directory import resolve_users
 import json
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -124,9 +125,10 @@ def get_user_performance():
         ).group_by(Report.user_email).all()
         
         # Format user data
+        users_by_email = resolve_users(user_data[0] for user_data in user_reports)
         user_metrics = []
         for user_data in user_reports:
-            user = User.query.filter_by(email=user_data[0]).first()
+            user = users_by_email.get(user_data[0])
             if user:
                 user_metrics.append({
                     'name': user.full_name,
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from models import db, Report, SATReport, User
+from database.statements import get_sat_report
+from database.conditional import report_version, reports_version
+from middleware_optimized import conditional
 from api.security import APIKey, APIUsage
 from security.audit import AuditLog
 from functools import wraps
@@ -139,36 +142,43 @@ def api_documentation():
     
     return jsonify(docs)
 
+def _filtered_reports_query():
+    """Reports visible to the API key, filtered by the request arguments."""
+    status = request.args.get('status')
+    report_type = request.args.get('type')
+    client = request.args.get('client')
+    
+    query = Report.query
+    
+    if status:
+        query = query.filter(Report.status == status)
+    
+    if report_type:
+        query = query.filter(Report.type == report_type)
+    
+    if client:
+        query = query.filter(Report.client_name == client)
+    
+    # Check permissions
+    permissions = json.loads(request.api_key.permissions_json or '[]')
+    if 'reports:read:all' not in permissions:
+        # Limit to reports created by API key owner
+        query = query.filter(Report.user_email == request.api_key.user_email)
+    
+    return query
+
 # Report endpoints
 @api_bp.route('/v1/reports', methods=['GET'])
 @require_api_key
+@conditional(lambda: reports_version(_filtered_reports_query()))
 def get_reports():
     """Get list of reports with filtering"""
     try:
         # Parse query parameters
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
-        status = request.args.get('status')
-        report_type = request.args.get('type')
-        client = request.args.get('client')
         
-        # Build query
-        query = Report.query
-        
-        if status:
-            query = query.filter(Report.status == status)
-        
-        if report_type:
-            query = query.filter(Report.type == report_type)
-        
-        if client:
-            query = query.filter(Report.client_name == client)
-        
-        # Check permissions
-        permissions = json.loads(request.api_key.permissions_json or '[]')
-        if 'reports:read:all' not in permissions:
-            # Limit to reports created by API key owner
-            query = query.filter(Report.user_email == request.api_key.user_email)
+        query = _filtered_reports_query()
         
         # Paginate
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -205,6 +215,7 @@ def get_reports():
 
 @api_bp.route('/v1/reports/<report_id>', methods=['GET'])
 @require_api_key
+@conditional(report_version)
 def get_report(report_id):
     """Get a specific report"""
     try:
@@ -230,7 +241,7 @@ def get_report(report_id):
         }
         
         if report.type == 'SAT':
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = get_sat_report(report.id)
             if sat_report:
                 report_data['sat_data'] = json.loads(sat_report.data_json)
         
@@ -343,7 +354,7 @@ def update_report(report_id):
         
         # Update SAT data if provided
         if report.type == 'SAT' and 'sat_data' in data:
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = get_sat_report(report.id)
             if sat_report:
                 sat_report.data_json = json.dumps(data['sat_data'])
         
@@ -7,7 +7,8 @@ import json
 import html
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm
-from models import db, Report, SATReport, SystemSettings
+from models import db, SystemSettings
+from database.statements import get_report, get_sat_report
 from utils import (
     load_submissions,
     save_submissions,
@@ -151,9 +152,9 @@ def approve_submission(submission_id, stage):
             current_app.logger.error(f"Submissions loaded as list instead of dict: {type(submissions)}")
             # Try to load from database instead
             try:
-                report = Report.query.get(submission_id)
+                report = get_report(submission_id)
                 if report:
-                    sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+                    sat_report = get_sat_report(submission_id)
                     if sat_report and sat_report.data_json:
                         import json as json_module
                         submission_data = json_module.loads(sat_report.data_json)
@@ -316,7 +317,7 @@ def approve_submission(submission_id, stage):
             # Also update the database Report record
             try:
                 import json as json_module
-                report = Report.query.get(submission_id)
+                report = get_report(submission_id)
                 if report:
                     # Update the database with new approval data
                     report.approvals_json = json_module.dumps(approvals)
@@ -347,7 +348,7 @@ def approve_submission(submission_id, stage):
                     current_app.logger.info(f"Successfully updated Report database record for {submission_id}, locked={report.locked}, status={report.status}")
                     
                     # Update SAT report data with Word template fields
-                    sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+                    sat_report = get_sat_report(submission_id)
                     if sat_report:
                         import json as json_module
                         try:
@@ -578,7 +579,7 @@ def approve_submission(submission_id, stage):
                 )
                 if not creator_email:
                     try:
-                        report_record = Report.query.get(submission_id)
+                        report_record = get_report(submission_id)
                         creator_email = getattr(report_record, "user_email", None)
                     except Exception as lookup_error:
                         current_app.logger.warning(f"Could not resolve creator email for {submission_id}: {lookup_error}")
@@ -732,7 +733,7 @@ def reject_submission(submission_id, stage):
 
         # Persist rejection to the Report record for dashboard counts and gating
         try:
-            report = Report.query.get(submission_id)
+            report = get_report(submission_id)
             if report:
                 report.approvals_json = json.dumps(approvals)
                 report.status = "REJECTED"
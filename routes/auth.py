@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, session, make_response
 from flask_login import login_user, logout_user, current_user
 from models import db, User, CullyStatistics, SystemSettings
+from database.statements import count_unread_notifications, get_user_by_email
 from auth import login_required
 from werkzeug.security import generate_password_hash, check_password_hash
 from session_manager import session_manager
@@ -85,7 +86,7 @@ def register():
             return render_template('register.html')
 
         # Check if user already exists
-        if User.query.filter_by(email=email).first():
+        if get_user_by_email(email):
             flash('Email already registered. Please use a different email.', 'error')
             return render_template('register.html')
 
@@ -125,7 +126,7 @@ def login():
             return render_template('login.html')
 
         try:
-            user = User.query.filter_by(email=email).first()
+            user = get_user_by_email(email)
 
             if user and user.check_password(password):
                 # Check user status
@@ -242,7 +243,7 @@ def forgot_password():
             flash('Email is required.', 'error')
             return render_template('forgot_password.html')
 
-        user = User.query.filter_by(email=email).first()
+        user = get_user_by_email(email)
         # Always respond generically to avoid revealing account presence
         if not user:
             flash('If this email exists, reset instructions have been sent.', 'info')
@@ -370,7 +371,7 @@ def reset_password_otp():
             flash('Password must be at least 6 characters long.', 'error')
             return render_template('reset_password_otp.html', email=email)
 
-        user = User.query.filter_by(email=email).first()
+        user = get_user_by_email(email)
         if not user:
             flash('User not found.', 'error')
             return redirect(url_for('auth.forgot_password'))
@@ -393,11 +394,7 @@ def reset_password_otp():
 def change_password():
     """Change user password"""
     try:
-        from models import Notification
-        unread_count = Notification.query.filter_by(
-            user_email=current_user.email,
-            read=False
-        ).count()
+        unread_count = count_unread_notifications(current_user.email)
     except Exception as e:
         current_app.logger.warning(f"Could not get unread count: {e}")
         unread_count = 0
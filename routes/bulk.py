@@ -1,10 +1,11 @@
 from flask import Blueprint, render_template, request, jsonify, current_app, send_file
 from flask_login import login_required, current_user
-from models import db, Report, SATReport, ReportArchive
+from models import db
+from database.statements import get_report
 from security.audit import AuditLog
 from auth import role_required
-from datetime import datetime, timedelta
-import json
+from services import bulk_operations as bulk_ops
+from datetime import datetime
 import zipfile
 import io
 import os
@@ -37,7 +38,7 @@ def bulk_export():
         
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             for report_id in report_ids:
-                report = Report.query.get(report_id)
+                report = get_report(report_id)
                 
                 if not report:
                     continue
@@ -95,22 +96,8 @@ def bulk_status_update():
         if not report_ids or not new_status:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        updated_count = 0
-        
-        for report_id in report_ids:
-            report = Report.query.get(report_id)
-            
-            if report:
-                old_status = report.status
-                report.status = new_status
-                report.updated_at = datetime.utcnow()
-                updated_count += 1
-                
-                # Log the change
-                log_audit_action('update', 'report', report.id, 
-                               f'Bulk status update from {old_status} to {new_status}')
-        
-        db.session.commit()
+        result = bulk_ops.bulk_update_status(report_ids, new_status, current_user)
+        updated_count = result.affected
         
         return jsonify({
             'success': True,
@@ -134,30 +121,12 @@ def bulk_delete():
         if not report_ids:
             return jsonify({'error': 'No reports selected'}), 400
         
-        deleted_count = 0
-        
-        for report_id in report_ids:
-            report = Report.query.get(report_id)
-            
-            if report:
-                # Archive before deletion if needed
-                if request.json.get('archive_before_delete', True):
-                    archive_report(report)
-                
-                # Delete associated SAT report data
-                if report.type == 'SAT':
-                    sat_report = SATReport.query.filter_by(report_id=report.id).first()
-                    if sat_report:
-                        db.session.delete(sat_report)
-                
-                # Log the deletion
-                log_audit_action('delete', 'report', report.id, 
-                               f'Bulk deletion of report {report.document_title}')
-                
-                db.session.delete(report)
-                deleted_count += 1
-        
-        db.session.commit()
+        result = bulk_ops.bulk_delete(
+            report_ids,
+            current_user,
+            archive_first=request.json.get('archive_before_delete', True)
+        )
+        deleted_count = result.affected
         
         return jsonify({
             'success': True,
@@ -183,21 +152,8 @@ def bulk_archive():
         if not report_ids:
             return jsonify({'error': 'No reports selected'}), 400
         
-        archived_count = 0
-        
-        for report_id in report_ids:
-            report = Report.query.get(report_id)
-            
-            if report:
-                archive = archive_report(report, retention_days)
-                if archive:
-                    archived_count += 1
-                    
-                    # Log the archival
-                    log_audit_action('archive', 'report', report.id,
-                                   f'Archived for {retention_days} days')
-        
-        db.session.commit()
+        result = bulk_ops.bulk_archive(report_ids, retention_days, current_user)
+        archived_count = result.affected
         
         return jsonify({
             'success': True,
@@ -223,22 +179,8 @@ def bulk_assign():
         if not report_ids or not new_user_email:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        assigned_count = 0
-        
-        for report_id in report_ids:
-            report = Report.query.get(report_id)
-            
-            if report:
-                old_user = report.user_email
-                report.user_email = new_user_email
-                report.updated_at = datetime.utcnow()
-                assigned_count += 1
-                
-                # Log the assignment
-                log_audit_action('assign', 'report', report.id,
-                               f'Reassigned from {old_user} to {new_user_email}')
-        
-        db.session.commit()
+        result = bulk_ops.bulk_assign(report_ids, new_user_email, current_user)
+        assigned_count = result.affected
         
         return jsonify({
             'success': True,
@@ -268,7 +210,7 @@ def bulk_generate_documents():
         
         for report_id in report_ids:
             try:
-                report = Report.query.get(report_id)
+                report = get_report(report_id)
                 
                 if report:
                     # Import generation function
@@ -303,50 +245,6 @@ def bulk_generate_documents():
         current_app.logger.error(f"Error in bulk document generation: {e}")
         return jsonify({'error': str(e)}), 500
 
-def archive_report(report, retention_days=365):
-    """Archive a single report"""
-    try:
-        # Prepare archive data
-        archive_data = {
-            'report': {
-                'id': report.id,
-                'type': report.type,
-                'document_title': report.document_title,
-                'project_reference': report.project_reference,
-                'client_name': report.client_name,
-                'status': report.status,
-                'revision': report.revision,
-                'created_at': report.created_at.isoformat(),
-                'updated_at': report.updated_at.isoformat() if report.updated_at else None,
-                'user_email': report.user_email
-            }
-        }
-        
-        # Add SAT report data if applicable
-        if report.type == 'SAT':
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
-            if sat_report:
-                archive_data['sat_data'] = sat_report.data_json
-        
-        # Create archive record
-        archive = ReportArchive(
-            original_report_id=report.id,
-            report_type=report.type,
-            document_title=report.document_title,
-            project_reference=report.project_reference,
-            client_name=report.client_name,
-            archived_data=json.dumps(archive_data),
-            archived_by=current_user.email,
-            retention_until=datetime.utcnow() + timedelta(days=retention_days)
-        )
-        
-        db.session.add(archive)
-        return archive
-        
-    except Exception as e:
-        current_app.logger.error(f"Error archiving report: {e}")
-        return None
-
 def log_audit_action(action, entity_type, entity_id, details):
     """Log an audit action"""
     try:
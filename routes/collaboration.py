@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db, Report, ReportComment, User, Notification
+from sqlalchemy.orm import selectinload
 import json
 from datetime import datetime
 import re
@@ -16,7 +17,9 @@ def get_comments(report_id):
         report = Report.query.get_or_404(report_id)
         
         # Get comments with replies
-        comments = ReportComment.query.filter_by(
+        comments = ReportComment.query.options(
+            selectinload(ReportComment.replies)
+        ).filter_by(
             report_id=report_id,
             parent_comment_id=None
         ).order_by(ReportComment.created_at.desc()).all()
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-from models import db, Report, ReportVersion, SATReport
+from models import db, Report, ReportVersion
+from database.statements import get_report, get_sat_report
 import json
 import difflib
 from datetime import datetime
@@ -54,7 +55,7 @@ def compare_versions(report_id):
         v2 = ReportVersion.query.get_or_404(version2_id)
         
         # Check permissions
-        report = Report.query.get(report_id)
+        report = get_report(report_id)
         if report.user_email != current_user.email and current_user.role != 'Admin':
             return jsonify({'error': 'Unauthorized'}), 403
         
@@ -119,7 +120,7 @@ def create_version_snapshot(report):
     try:
         # Get report data
         if report.type == 'SAT':
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = get_sat_report(report.id)
             if sat_report:
                 data_snapshot = sat_report.data_json
             else:
@@ -7,7 +7,6 @@ from models import (
     User,
     Report,
     SATReport,
-    FDSReport,
     StorageConfig,
     StorageSettingsAudit,
     SystemSettings,
@@ -15,6 +14,9 @@ from models import (
     CullyStatistics,
     test_db_connection,
 )
+from database.notification_counters import drop_counter
+from database.query_cache import cache_system_stats
+from database.statements import count_unread_notifications, get_report, get_sat_report
 from api.security import APIKey, APIUsage
 from datetime import datetime
 import time
@@ -126,6 +128,20 @@ def home():
         flash('Invalid role. Contact your administrator.', 'error')
         return redirect(url_for('auth.logout'))
 
+@cache_system_stats(ttl=60)
+def _admin_counts():
+    """User and report totals shown on the admin dashboard (cached until users or reports change)"""
+    user_stats = db.session.query(
+        func.count(User.id).label('total'),
+        func.sum(case((User.status == 'Pending', 1), else_=0)).label('pending')
+    ).first()
+    return {
+        'total_users': user_stats.total or 0,
+        'pending_users': user_stats.pending or 0,
+        'total_reports': db.session.query(func.count(Report.id)).scalar() or 0,
+    }
+
+
 @dashboard_bp.route('/admin')
 @admin_required
 @no_cache
@@ -133,15 +149,10 @@ def admin():
     """Admin dashboard"""
     db_connected = test_db_connection()
 
-    # Calculate user statistics with optimized single query
-    user_stats = db.session.query(
-        func.count(User.id).label('total'),
-        func.sum(case((User.status == 'Active', 1), else_=0)).label('active'),
-        func.sum(case((User.status == 'Pending', 1), else_=0)).label('pending')
-    ).first()
-    
-    total_users = user_stats.total or 0
-    pending_users_count = user_stats.pending or 0
+    # User and report totals in one cached lookup
+    counts = _admin_counts()
+    total_users = counts['total_users']
+    pending_users_count = counts['pending_users']
     
     # Get all users for display (only if needed)
     users = db.session.query(User).all()
@@ -157,8 +168,7 @@ def admin():
 
     # Calculate report statistics
     try:
-        # Use optimized query for report count
-        total_reports = db.session.query(func.count(Report.id)).scalar() or 0
+        total_reports = counts['total_reports']
         current_app.logger.info(f"Admin dashboard: Found {total_reports} total reports")
         
         # Eager load SAT reports to prevent N+1 queries
@@ -231,10 +241,7 @@ def engineer():
 
     # Get unread notifications count
     try:
-        unread_count = Notification.query.filter_by(
-            user_email=current_user.email,
-            read=False
-        ).count()
+        unread_count = count_unread_notifications(current_user.email)
     except Exception as e:
         current_app.logger.warning(f"Could not get unread count for engineer: {e}")
         unread_count = 0
@@ -277,10 +284,7 @@ def automation_manager():
     """Automation Manager dashboard"""
     # Get unread notifications count
     try:
-        unread_count = Notification.query.filter_by(
-            user_email=current_user.email,
-            read=False
-        ).count()
+        unread_count = count_unread_notifications(current_user.email)
     except Exception as e:
         current_app.logger.warning(f"Could not get unread count for Automation Manager: {e}")
         unread_count = 0
@@ -291,7 +295,9 @@ def automation_manager():
     
     try:
         # Get all reports with PENDING status
-        all_reports = Report.query.filter_by(status='PENDING').all()
+        all_reports = Report.query.options(
+            joinedload(Report.sat_report)
+        ).filter_by(status='PENDING').all()
         current_app.logger.info(f"Automation Manager: Found {len(all_reports)} PENDING reports")
         
         for report in all_reports:
@@ -305,7 +311,7 @@ def automation_manager():
                             approval.get('status') == 'pending'):
                             
                             # Get additional data from SAT report
-                            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+                            sat_report = get_sat_report(report.id)
                             if sat_report and sat_report.data_json:
                                 try:
                                     data = json.loads(sat_report.data_json)
@@ -384,10 +390,7 @@ def pm():
     """Project Manager dashboard"""
     # Get unread notifications count
     try:
-        unread_count = Notification.query.filter_by(
-            user_email=current_user.email,
-            read=False
-        ).count()
+        unread_count = count_unread_notifications(current_user.email)
     except Exception as e:
         current_app.logger.warning(f"Could not get unread count for PM: {e}")
         unread_count = 0
@@ -398,7 +401,8 @@ def pm():
         """Fill in SAT metadata used on the dashboard cards."""
         if getattr(report, 'type', '') != 'SAT':
             return report
-        sat_report = SATReport.query.filter_by(report_id=report.id).first()
+        # sat_report is eager-loaded by the queries below
+        sat_report = report.sat_report
         if sat_report and sat_report.data_json:
             try:
                 data = json.loads(sat_report.data_json)
@@ -417,7 +421,9 @@ def pm():
     
     try:
         # Get all reports with PENDING status
-        all_reports = Report.query.filter_by(status='PENDING').all()
+        all_reports = Report.query.options(
+            joinedload(Report.sat_report)
+        ).filter_by(status='PENDING').all()
         current_app.logger.info(f"PM: Found {len(all_reports)} PENDING reports")
         
         for report in all_reports:
@@ -482,7 +488,9 @@ def pm():
     # Get recent reports for PM - only after Automation Manager approval
     recent_reports = []
     try:
-        candidates = Report.query.order_by(Report.updated_at.desc()).limit(50).all()
+        candidates = Report.query.options(
+            joinedload(Report.sat_report)
+        ).order_by(Report.updated_at.desc()).limit(50).all()
         for report in candidates:
             if not report.approvals_json:
                 continue
@@ -847,6 +855,7 @@ def delete_user(user_id):
     try:
         # Delete associated notifications first (to maintain referential integrity)
         Notification.query.filter_by(user_email=user_email).delete(synchronize_session=False)
+        drop_counter(user_email)
 
         # The deletion of the user will cascade to api_keys and api_usage tables
         # thanks to the `ondelete='CASCADE'` setting in the models.
@@ -953,7 +962,7 @@ def admin_reports():
         for report in reports:
             try:
                 # Get SAT report data if it exists
-                sat_report = SATReport.query.filter_by(report_id=report.id).first()
+                sat_report = get_sat_report(report.id)
                 
                 # Start with basic report data
                 project_name = report.document_title or 'Untitled Report'
@@ -1210,18 +1219,9 @@ def api_admin_settings():
 def api_admin_stats():
     """API endpoint for dashboard statistics"""
     try:
-        users = User.query.all()
-        total_users = len(users)
-        pending_users = len([u for u in users if u.status == 'Pending'])
-        total_reports = Report.query.count()
-
         return jsonify({
             'success': True,
-            'stats': {
-                'total_users': total_users,
-                'pending_users': pending_users,
-                'total_reports': total_reports
-            }
+            'stats': _admin_counts()
         })
     except Exception as e:
         current_app.logger.error(f"Error fetching stats: {e}")
@@ -1242,7 +1242,7 @@ def debug_reports():
         report_info = []
         
         for report in reports:
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = get_sat_report(report.id)
             report_info.append({
                 'id': report.id,
                 'type': report.type,
@@ -1270,7 +1270,7 @@ def debug_reports():
 def revoke_approval(report_id):
     """Revoke approval for a report"""
     try:
-        report = Report.query.get(report_id)
+        report = get_report(report_id)
         if not report:
             return jsonify({'success': False, 'message': 'Report not found'}), 404
         
@@ -1325,7 +1325,7 @@ def revoke_approval(report_id):
 def delete_report(report_id):
     """Delete a report with role-based safeguards."""
     try:
-        report = Report.query.get(report_id)
+        report = get_report(report_id)
         if not report:
             return jsonify({'success': False, 'message': 'Report not found'}), 404
 
@@ -1359,7 +1359,7 @@ def delete_report(report_id):
                     'message': 'This report has been approved/rejected and can only be deleted by an administrator.'
                 }), 403
 
-        sat_report = SATReport.query.filter_by(report_id=report_id).first()
+        sat_report = get_sat_report(report_id)
         if sat_report:
             db.session.delete(sat_report)
             db.session.flush()
@@ -1442,7 +1442,11 @@ def my_reports():
                 )
             )
         )
-    reports = reports_query.order_by(Report.updated_at.desc()).all()
+    # Load the SAT/FDS payloads with the reports instead of one query per row
+    reports = reports_query.options(
+        joinedload(Report.sat_report),
+        joinedload(Report.fds_report)
+    ).order_by(Report.updated_at.desc()).all()
 
     report_list = []
     for report in reports:
@@ -1487,7 +1491,7 @@ def my_reports():
         client_name = report.client_name or ''
 
         if report.type == 'SAT':
-            sat_report = getattr(report, 'sat_report', None) or SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = report.sat_report
             if sat_report and sat_report.data_json:
                 try:
                     stored_data = json.loads(sat_report.data_json)
@@ -1498,7 +1502,7 @@ def my_reports():
                 except json.JSONDecodeError:
                     current_app.logger.warning(f"Could not decode SAT report data for report ID: {report.id}")
         elif report.type == 'FDS':
-            fds_report = getattr(report, 'fds_report', None) or FDSReport.query.filter_by(report_id=report.id).first()
+            fds_report = report.fds_report
             if fds_report and fds_report.data_json:
                 try:
                     fds_data = json.loads(fds_report.data_json)
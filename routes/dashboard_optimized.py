@@ -4,8 +4,9 @@ Optimized dashboard routes with caching and eager loading
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, make_response
 from flask_login import login_required, current_user
 from auth import admin_required, role_required
-from models import db, User, Report, Notification, SystemSettings, SATReport
+from models import db, User, Report, SystemSettings, SATReport
 from utils import get_unread_count
+from database.statements import count_unread_notifications
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy import and_, or_, func
 from functools import wraps, lru_cache
@@ -29,10 +30,7 @@ def no_cache(f):
 def get_cached_unread_count(user_email: str, cache_buster: int) -> int:
     """Get cached unread notification count with 5-minute TTL"""
     try:
-        return Notification.query.filter_by(
-            user_email=user_email,
-            read=False
-        ).count()
+        return count_unread_notifications(user_email)
     except Exception:
         return 0
 
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
-from models import db, Report, SATReport, FDSReport, ReportEdit, User
+from models import db, Report, FDSReport, ReportEdit, User
+from database.statements import get_report, get_sat_report
 import json
 import uuid
 from datetime import datetime
@@ -61,7 +62,7 @@ def edit_report(report_id):
         return redirect(url_for('dashboard.home'))
     
     if report.type == 'SAT':
-        sat_report = SATReport.query.filter_by(report_id=report_id).first()
+        sat_report = get_sat_report(report_id)
         if not sat_report:
             flash('Report data not found.', 'error')
             return redirect(url_for('dashboard.home'))
@@ -114,7 +115,7 @@ def save_edit(report_id):
         return jsonify({'error': 'CSRF token validation failed'}), 403
     
     # Get existing SAT report
-    sat_report = SATReport.query.filter_by(report_id=report_id).first()
+    sat_report = get_sat_report(report_id)
     if not sat_report:
         return jsonify({'error': 'Report not found'}), 404
     
@@ -221,7 +222,7 @@ def view_edit_history(report_id):
 @login_required
 def check_edit_permission(report_id):
     """API endpoint to check if current user can edit a report"""
-    report = Report.query.get(report_id)
+    report = get_report(report_id)
     if not report:
         return jsonify({'can_edit': False, 'reason': 'Report not found'}), 404
     
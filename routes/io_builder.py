@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app, render_template
-from flask_login import login_required, current_user
+from flask_login import login_required
 import requests
 from bs4 import BeautifulSoup
 import re
 from models import db, ModuleSpec
+from database.statements import find_module_spec, get_module_spec
+from utils import get_unread_count
 import time
 from urllib.parse import quote
 import logging
@@ -11,18 +13,6 @@ import json
 
 io_builder_bp = Blueprint('io_builder', __name__)
 
-def get_unread_count():
-    """Get unread notifications count with error handling"""
-    try:
-        from models import Notification
-        return Notification.query.filter_by(
-            user_email=current_user.email, 
-            read=False
-        ).count()
-    except Exception as e:
-        current_app.logger.warning(f"Could not get unread count: {e}")
-        return 0
-
 @io_builder_bp.route('/')
 @login_required
 def index():
@@ -354,7 +344,7 @@ def module_lookup():
 
         # Tier 1: Database Lookup
         if vendor:
-            module = ModuleSpec.query.filter_by(company=vendor, model=model).first()
+            module = get_module_spec(vendor, model)
         else:
             module = ModuleSpec.query.filter(ModuleSpec.model.ilike(f'%{model}%')).first()
 
@@ -448,10 +438,7 @@ def save_module():
             return jsonify({'success': False, 'error': 'Company and model are required'}), 400
         
         # Check if module already exists
-        existing = ModuleSpec.query.filter(
-            db.func.upper(ModuleSpec.company) == company,
-            db.func.upper(ModuleSpec.model) == model
-        ).first()
+        existing = find_module_spec(company, model)
         
         specs = {
             'description': data.get('description', f'{company} {model}'),
@@ -640,7 +627,7 @@ def module_manual_entry():
             return jsonify({'success': False, 'message': 'At least one I/O point must be specified'}), 400
         
         # Check if already exists
-        existing = ModuleSpec.query.filter_by(company=company, model=model).first()
+        existing = get_module_spec(company, model)
         if existing:
             # Update existing
             existing.description = description
@@ -818,7 +805,7 @@ def save_custom_module():
             verified=True
         )
 
-        existing_spec = ModuleSpec.query.filter_by(company=spec.company, model=spec.model).first()
+        existing_spec = get_module_spec(spec.company, spec.model)
         if existing_spec:
             for key, value in data.items():
                 if hasattr(existing_spec, key) and value is not None:
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
 from flask_login import current_user
 from models import db, Report, SATReport, Notification, User
+from database.statements import get_report, get_sat_report
 from auth import login_required
 import json
 from services.sat_tables import extract_ui_tables, build_doc_tables, migrate_context_tables, TABLE_CONFIG
@@ -46,21 +47,19 @@ except ImportError as e:
     print(f"Warning: Could not import utils: {e}")
 
 def get_unread_count():
-    """Placeholder for getting unread notification count"""
-    return 0
+    """Get unread notification count for the current user"""
+    from utils import get_unread_count as unread_count_for_user
+    return unread_count_for_user()
 
 def create_approval_notification(approver_email, submission_id, stage, document_title):
     """Create approval notification"""
     try:
-        notification = Notification(
+        Notification.create_notification(
             user_email=approver_email,
             title="New Approval Request",
             message=f"You have a new approval request for: {document_title}",
-            type="approval",
-            read=False
+            notification_type="approval"
         )
-        db.session.add(notification)
-        db.session.commit()
         return True
     except Exception as e:
         current_app.logger.error(f"Error creating approval notification: {e}")
@@ -69,16 +68,12 @@ def create_approval_notification(approver_email, submission_id, stage, document_
 def create_new_submission_notification(admin_emails, submission_id, document_title, submitter_email):
     """Create new submission notification for admins"""
     try:
-        for email in admin_emails:
-            notification = Notification(
-                user_email=email,
-                title="New Report Submission",
-                message=f"New report submitted: {document_title} by {submitter_email}",
-                type="submission",
-                read=False
-            )
-            db.session.add(notification)
-        db.session.commit()
+        Notification.create_notifications(
+            admin_emails,
+            title="New Report Submission",
+            message=f"New report submitted: {document_title} by {submitter_email}",
+            notification_type="submission"
+        )
         return True
     except Exception as e:
         current_app.logger.error(f"Error creating submission notifications: {e}")
@@ -111,7 +106,7 @@ def _resolve_urls(key: str, model_value: Any, existing_data: dict) -> list[str]:
 @login_required
 def edit_submission(submission_id):
     """Edit a submission with role-based permissions"""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     if not report:
         flash('Report not found.', 'error')
         return redirect(url_for('dashboard.home'))
@@ -194,7 +189,7 @@ def generate():
             return redirect(url_for('status.view_status', submission_id=submission_id))
         RECENT_GENERATE[submission_id] = now_ts
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         is_new_report = False
         if not report:
             is_new_report = True
@@ -223,7 +218,7 @@ def generate():
             report.status = 'DRAFT'
             report.locked = False
 
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             sat_report = SATReport(
                 report_id=submission_id,
@@ -768,7 +763,7 @@ def save_progress():
         if not submission_id:
             submission_id = str(uuid.uuid4())
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         if not report:
             report = Report(
                 id=submission_id,
@@ -786,7 +781,7 @@ def save_progress():
             report.status = 'DRAFT'
         current_app.logger.info(f"Save progress: Report {submission_id} status is {report.status}")
 
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             sat_report = SATReport(
                 report_id=submission_id,
@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, jsonify, request, current_app
 from flask_login import current_user
 from models import db, Notification
+from database.statements import count_unread_notifications
+from database.conditional import notification_version
+from middleware_optimized import conditional
+from services.event_bus import event_stream, user_channel
 from auth import login_required
 import json
 from datetime import datetime
@@ -14,7 +18,15 @@ except ImportError as e:
 
 notifications_bp = Blueprint('notifications', __name__)
 
+
+def _current_user_notification_version(*args, **kwargs):
+    if not current_user.is_authenticated:
+        return None, None
+    return notification_version(current_user.email)
+
+
 @notifications_bp.route('/api/notifications')
+@conditional(_current_user_notification_version)
 def get_notifications():
     """Get notifications for current user"""
     try:
@@ -56,21 +68,26 @@ def get_notifications():
 
 @notifications_bp.route('/api/notifications/unread-count')
 @login_required
+@conditional(_current_user_notification_version)
 def get_unread_count_api():
     """Get unread notifications count for current user"""
     try:
         if not current_user.is_authenticated:
             return jsonify({'count': 0})
 
-        unread_count = Notification.query.filter_by(
-            user_email=current_user.email,
-            read=False
-        ).count()
+        unread_count = count_unread_notifications(current_user.email)
         return jsonify({'count': unread_count})
     except Exception as e:
         current_app.logger.warning(f"Notifications not available: {e}")
         return jsonify({'count': 0})
 
+@notifications_bp.route('/api/notifications/stream')
+@login_required
+def notification_stream():
+    """Server-sent events with the unread count and new notifications"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return event_stream([user_channel(current_user.email)], last_event_id)
+
 @notifications_bp.route('/api/notifications/<int:notification_id>/mark-read', methods=['POST'])
 @login_required
 def mark_notification_read(notification_id):
@@ -80,8 +97,7 @@ def mark_notification_read(notification_id):
         if not notification or notification.user_email != current_user.email:
             return jsonify({'success': False, 'error': 'Notification not found'}), 404
 
-        notification.read = True
-        db.session.commit()
+        Notification.mark_read(current_user.email, notification_id)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -92,9 +108,7 @@ def mark_notification_read(notification_id):
 def mark_all_read():
     """Mark all notifications as read for current user"""
     try:
-        Notification.query.filter_by(user_email=current_user.email, read=False)\
-                         .update({'read': True})
-        db.session.commit()
+        Notification.mark_read(current_user.email)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -13,7 +13,8 @@ from flask import (
 )
 from functools import wraps
 from flask_login import login_required, current_user
-from models import db, Report, User, SATReport, FDSReport, SiteSurveyReport, SystemArchitectureVersion
+from models import db, Report, User, FDSReport, SiteSurveyReport, SystemArchitectureVersion
+from database.statements import get_report, get_sat_report
 from auth import login_required, role_required
 from utils import (
     setup_approval_workflow_db,
@@ -25,6 +26,7 @@ from utils import (
 )
 from services.sat_tables import migrate_context_tables, TABLE_CONFIG
 from services.fds_generator import generate_fds_from_sat
+from services.event_bus import event_stream, report_channel
 from services.equipment_assets import (
     build_architecture_payload,
     list_cached_assets,
@@ -714,9 +716,9 @@ def new_sat_full():
 
         template_id = request.args.get('template_id')
         if template_id:
-            template_report = Report.query.get(template_id)
+            template_report = get_report(template_id)
             if template_report:
-                sat_template = SATReport.query.filter_by(report_id=template_id).first()
+                sat_template = get_sat_report(template_id)
                 if sat_template and sat_template.data_json:
                     try:
                         template_data = json.loads(sat_template.data_json)
@@ -760,7 +762,6 @@ def new_sat_full():
 def sat_wizard():
     """SAT wizard route for editing existing reports"""
     try:
-        from models import Report, SATReport
         import json
         from utils import get_unread_count
         
@@ -773,7 +774,7 @@ def sat_wizard():
             return redirect(url_for('reports.new_sat_full'))
         
         # Get the report from database
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         if not report:
             flash('Report not found.', 'error')
             return redirect(url_for('dashboard.home'))
@@ -789,7 +790,7 @@ def sat_wizard():
             return redirect(url_for('dashboard.home'))
         
         # Get SAT report data
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             flash('Report data not found.', 'error')
             return redirect(url_for('dashboard.home'))
@@ -962,7 +963,7 @@ def fds_wizard():
         if not submission_id or not edit_mode:
             return redirect(url_for('reports.new_fds'))
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         if not report or report.type != 'FDS':
             flash('FDS report not found.', 'error')
             return redirect(url_for('dashboard.my_reports'))
@@ -1024,7 +1025,7 @@ def generate_fds(sat_report_id):
     """Generate an FDS from an existing SAT report."""
     try:
         # 1. Fetch the SAT Report
-        sat_report = SATReport.query.filter_by(report_id=sat_report_id).first()
+        sat_report = get_sat_report(sat_report_id)
         if not sat_report:
             flash('SAT Report not found.', 'error')
             return redirect(url_for('dashboard.my_reports'))
@@ -1036,7 +1037,7 @@ def generate_fds(sat_report_id):
         fds_data = generate_fds_from_sat(sat_data)
 
         # 4. Create new Report and FDSReport objects
-        parent_report = Report.query.get(sat_report_id)
+        parent_report = get_report(sat_report_id)
 
         new_report = Report(
             id=str(uuid.uuid4()),
@@ -1092,7 +1093,7 @@ def preview_system_architecture():
 
     saved_layout = None
     if submission_id:
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         if report:
             _assert_report_access(report)
             if report.fds_report:
@@ -1119,7 +1120,7 @@ def preview_system_architecture():
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
 def fetch_system_architecture(submission_id):
     """Return the saved architecture layout (and regenerate assets if necessary)."""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     equipment_rows = []
@@ -1155,7 +1156,7 @@ def fetch_system_architecture(submission_id):
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
 def update_system_architecture_layout(submission_id):
     """Persist a live-updated architecture layout snapshot."""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     payload = request.get_json(silent=True) or {}
@@ -1319,7 +1320,7 @@ def delete_architecture_template(template_id: int):
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
 def list_architecture_versions(submission_id: str):
     """Return version history for a submission."""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     limit_param = request.args.get("limit")
@@ -1337,7 +1338,7 @@ def list_architecture_versions(submission_id: str):
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
 def get_architecture_version(submission_id: str, version_id: int):
     """Return a specific version payload."""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     payload = fetch_version(version_id)
@@ -1351,7 +1352,7 @@ def get_architecture_version(submission_id: str, version_id: int):
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
 def create_architecture_version(submission_id: str):
     """Create a manual snapshot of the current layout."""
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     payload = request.get_json(silent=True) or {}
@@ -1425,6 +1426,23 @@ def upload_architecture_asset():
     return jsonify({"success": True, "asset": asset}), 201
 
 
+@reports_bp.route('/system-architecture/live/<submission_id>/stream', methods=['GET'])
+@login_required
+@role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
+def stream_architecture_updates(submission_id: str):
+    """
+    Push architecture versions as they are saved (server-sent events).
+
+    A ``resync`` event means updates were missed; the client then loads the
+    latest layout once from ``poll_architecture_updates``.
+    """
+    report = get_report(submission_id)
+    _assert_report_access(report)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    return event_stream([report_channel(submission_id)], last_event_id)
+
+
 @reports_bp.route('/system-architecture/live/<submission_id>', methods=['GET'])
 @login_required
 @role_required(['Engineer', 'Automation Manager', 'PM', 'Admin'])
@@ -1432,7 +1450,7 @@ def poll_architecture_updates(submission_id: str):
     """
     Poll for architecture updates since a timestamp to support lightweight collaboration.
     """
-    report = Report.query.get(submission_id)
+    report = get_report(submission_id)
     _assert_report_access(report)
 
     since_param = request.args.get("since")
@@ -1498,7 +1516,7 @@ def submit_fds():
     try:
         submission_id = (request.form.get('submission_id') or '').strip() or str(uuid.uuid4())
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         is_new_report = False
 
         if not report:
@@ -1988,7 +2006,7 @@ def download_fds_submission(submission_id: str):
         if not submission_id:
             abort(404, description="Submission ID is required.")
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         _assert_report_access(report)
         if not report or report.type != 'FDS':
             abort(404, description="FDS report not found.")
@@ -2472,7 +2490,7 @@ def submit_site_survey():
     try:
         submission_id = (request.form.get('submission_id') or '').strip() or str(uuid.uuid4())
 
-        report = Report.query.get(submission_id)
+        report = get_report(submission_id)
         is_new_report = False
 
         if not report:
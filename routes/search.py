@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db, Report, SATReport, User, SavedSearch
 from sqlalchemy import or_, and_, func
+from database.pooling import read_replica
 import json
 from datetime import datetime, timedelta
 
@@ -39,6 +40,7 @@ def advanced_search():
 
 @search_bp.route('/api/search', methods=['POST'])
 @login_required
+@read_replica
 def search_reports():
     """Perform advanced search with multiple filters"""
     try:
@@ -4,10 +4,26 @@ import json
 from flask_login import current_user, login_required
 from services.sat_tables import build_doc_tables_from_context, migrate_context_tables
 import datetime as dt
+from middleware_optimized import conditional
 
 status_bp = Blueprint('status', __name__)
 
 
+def _status_page_version(submission_id):
+    """Report version plus the generated files the page links to."""
+    from database.conditional import report_version
+
+    version, last_modified = report_version(submission_id)
+    if version is None:
+        return None, None
+    output_dir = current_app.config['OUTPUT_DIR']
+    files = tuple(
+        os.path.exists(os.path.join(output_dir, f'SAT_Report_{submission_id}_Final.{ext}'))
+        for ext in ('pdf', 'docx')
+    )
+    return (version, files), last_modified
+
+
 def _pm_can_access_report(report, approvals):
     """Ensure PMs only see reports after Automation Manager approval."""
     if current_user.role != 'PM':
@@ -33,9 +49,11 @@ def _pm_can_access_report(report, approvals):
 
 @status_bp.route('/<submission_id>')
 @login_required
+@conditional(_status_page_version, html=True)
 def view_status(submission_id):
     """View a specific submission with auto-download"""
-    from models import Report, SATReport
+    from models import Report
+    from database.statements import get_sat_report
 
     # Check if submission_id is valid
     if not submission_id or submission_id == 'None':
@@ -47,7 +65,7 @@ def view_status(submission_id):
         flash('Report not found.', 'error')
         return redirect(url_for('dashboard.home'))
 
-    sat_report = SATReport.query.filter_by(report_id=report.id).first()
+    sat_report = get_sat_report(report.id)
     if not sat_report:
         flash('Report data not found.', 'error')
         return redirect(url_for('dashboard.home'))
@@ -424,7 +442,7 @@ def test_docx(submission_id):
 def debug_file(submission_id):
     """Debug endpoint to inspect file contents"""
     try:
-        from models import Report, SATReport
+        from models import Report
         import json
         
         # Only allow for admin users or in development
@@ -511,7 +529,8 @@ def simple_test(submission_id):
 @login_required
 def list_submissions():
     """List all submissions for admin view"""
-    from models import Report, SATReport
+    from models import Report
+    from database.statements import get_sat_report
 
     try:
         # SQLAlchemy attaches columns dynamically; getattr avoids static analysis warnings.
@@ -526,7 +545,7 @@ def list_submissions():
         submission_list = []
 
         for report in reports:
-            sat_report = SATReport.query.filter_by(report_id=report.id).first()
+            sat_report = get_sat_report(report.id)
             if not sat_report:
                 continue
 
@@ -0,0 +1,28 @@
+"""Precompress static assets into .br/.gz siblings served by the middleware.
+
+Run as part of the build, after static files change:
+    python scripts/precompress_static.py [--force] [static_dir]
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from middleware_optimized import brotli, precompress_static
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("static_dir", nargs="?", default=str(PROJECT_ROOT / "static"))
+    parser.add_argument("--force", action="store_true", help="Rewrite up-to-date siblings")
+    args = parser.parse_args()
+
+    stats = precompress_static(args.static_dir, force=args.force)
+    print(f"Precompressed {args.static_dir}: {stats['written']} written, "
+          f"{stats['unchanged']} unchanged, {stats['skipped']} skipped")
+    if brotli is None:
+        print("Brotli is not installed; only .gz files were written")
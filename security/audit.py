@@ -1,19 +1,28 @@
 """
 Audit logging and compliance for SAT Report Generator.
 """
+import os
 import json
+import time
+import queue
 import hashlib
+import logging
+import threading
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass, asdict
 from typing import Dict, Any, Optional, List
 from flask import request, session, current_app, g
 from flask_login import current_user
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index
+from sqlalchemy import (
+    BigInteger, Column, Integer, String, DateTime, Text, Boolean, Index, event, func, inspect, insert, select, update
+)
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from models import db
 import uuid
 
+logger = logging.getLogger(__name__)
+
 
 class AuditEventType(Enum):
     """Audit event types for categorization."""
@@ -115,10 +124,13 @@ class AuditLog(db.Model):
     details = Column(JSONB, nullable=True)
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
     checksum = Column(String(64), nullable=False)  # SHA-256 hash for integrity
+    previous_checksum = Column(String(64), nullable=True)  # Hash chain link to the prior entry
+    sequence = Column(BigInteger, nullable=True)  # Position in the hash chain; NULL before sequencing
     
     # Indexes for performance
     __table_args__ = (
         Index('idx_audit_timestamp', 'timestamp'),
+        Index('idx_audit_sequence', 'sequence', unique=True),
         Index('idx_audit_user_id', 'user_id'),
         Index('idx_audit_event_type', 'event_type'),
         Index('idx_audit_severity', 'severity'),
@@ -131,20 +143,31 @@ class AuditLog(db.Model):
     
     def _calculate_checksum(self):
         """Calculate SHA-256 checksum for integrity verification."""
-        data = {
-            'event_type': self.event_type,
-            'severity': self.severity,
-            'user_id': self.user_id,
-            'session_id': self.session_id,
-            'ip_address': self.ip_address,
-            'resource_type': self.resource_type,
-            'resource_id': self.resource_id,
-            'action': self.action,
-            'details': self.details,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None
-        }
+        return self.compute_checksum({
+            column: getattr(self, column)
+            for column in self.CHECKSUM_FIELDS + ('previous_checksum',)
+        })
+    
+    CHECKSUM_FIELDS = (
+        'event_type', 'severity', 'user_id', 'session_id', 'ip_address',
+        'resource_type', 'resource_id', 'action', 'details', 'timestamp'
+    )
+    
+    @classmethod
+    def compute_checksum(cls, values: Dict[str, Any]) -> str:
+        """Checksum for a row given as a plain dict (used by multi-row inserts).
+        
+        Chained rows prefix the previous entry's checksum, so altering or
+        removing any entry breaks the link of the one after it.
+        """
+        data = {field: values.get(field) for field in cls.CHECKSUM_FIELDS}
+        timestamp = data['timestamp']
+        data['timestamp'] = timestamp.isoformat() if timestamp else None
         
         json_str = json.dumps(data, sort_keys=True, default=str)
+        previous_checksum = values.get('previous_checksum')
+        if previous_checksum:
+            json_str = previous_checksum + json_str
         return hashlib.sha256(json_str.encode()).hexdigest()
     
     def verify_integrity(self):
@@ -166,10 +189,296 @@ class AuditLog(db.Model):
             'action': self.action,
             'details': self.details,
             'timestamp': self.timestamp.isoformat(),
-            'checksum': self.checksum
+            'checksum': self.checksum,
+            'previous_checksum': self.previous_checksum
         }
 
 
+class AuditChainHead(db.Model):
+    """The newest audit entry's sequence number and checksum (a single row).
+    
+    Writers claim sequence numbers by updating this row inside the
+    transaction that inserts their entries. The update locks the row until
+    that transaction ends, so writers in every process and thread link one
+    after another instead of forking the chain.
+    """
+    
+    __tablename__ = 'audit_chain_head'
+    
+    id = Column(Integer, primary_key=True)
+    sequence = Column(BigInteger, nullable=False, default=0)
+    checksum = Column(String(64), nullable=True)
+
+
+CHAIN_HEAD_ID = 1
+
+
+@event.listens_for(AuditChainHead.__table__, 'after_create')
+def _seed_chain_head(target, connection, **kw):
+    """Create the head row, continuing from the newest entry already written."""
+    legacy_head = None
+    if inspect(connection).has_table(AuditLog.__tablename__):
+        legacy_head = connection.execute(
+            select(AuditLog.checksum).order_by(AuditLog.timestamp.desc()).limit(1)
+        ).scalar()
+    connection.execute(target.insert().values(id=CHAIN_HEAD_ID, sequence=0, checksum=legacy_head))
+
+
+class AuditWriter:
+    """Batches audit rows and writes them from a background thread.
+    
+    Events are queued in-process and flushed as multi-row INSERTs. When the
+    bounded queue is full (or the writer is not running) rows are written
+    synchronously instead, so no event is dropped. Every row links to the
+    checksum of the row written before it; see ``AuditChainHead``.
+    
+    Writes use their own connection and transaction, never the request's
+    session. Batches that still fail after ``max_retries`` are appended to
+    ``spill_path`` (JSON lines) and written by the background thread once
+    the database accepts writes again.
+    """
+    
+    def __init__(self, app=None, max_queue_size: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5, spill_path: Optional[str] = None,
+                 max_retries: int = 3, retry_delay: float = 0.5):
+        self.app = app
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'batches': 0,
+            'sync_writes': 0,
+            'retries': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'failed': 0,
+        }
+    
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start the background flush thread."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='AuditWriter', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the thread and write whatever is still queued."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        remaining = self._drain(block=False)
+        while remaining:
+            self._write_batch(remaining)
+            remaining = self._drain(block=False)
+    
+    def submit(self, rows: List[Dict[str, Any]]):
+        """Queue ``rows`` for the background thread, writing overflow synchronously."""
+        if not self.running:
+            self.write(rows)
+            return
+        
+        overflow = []
+        for row in rows:
+            try:
+                self.queue.put_nowait(row)
+                self._count('queued')
+            except queue.Full:
+                overflow.append(row)
+        
+        if overflow:
+            logger.warning(f"Audit queue full, writing {len(overflow)} events synchronously")
+            self.write(overflow)
+    
+    def write(self, rows: List[Dict[str, Any]]):
+        """Synchronously chain and insert ``rows`` in their own transaction.
+        
+        A failed write is spilled for the background thread to retry; it is
+        only raised when there is no spill file.
+        """
+        try:
+            self._insert(rows)
+        except Exception as e:
+            if not self.spill_path:
+                raise
+            logger.critical(f"Audit write failed ({len(rows)} events), spilling to disk: {e}")
+            self._spill(rows)
+            return
+        self._count('sync_writes')
+    
+    def write_in_transaction(self, rows: List[Dict[str, Any]]):
+        """Chain and insert ``rows`` in the caller's transaction.
+        
+        The chain head moves with that transaction: a rollback discards it,
+        and other writers wait on the head row until it commits.
+        """
+        connection = db.session.connection()
+        self._link(rows, connection)
+        connection.execute(insert(AuditLog), rows)
+        self._count('written', len(rows))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'running': self.running,
+            'queue_size': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+        }
+    
+    def _link(self, rows: List[Dict[str, Any]], connection):
+        """Set ``sequence``/``previous_checksum``/``checksum`` on ``rows`` in ``connection``'s transaction.
+        
+        Claiming the sequence numbers comes first: the update locks the head
+        row, so the head read next cannot be moved by another writer before
+        this transaction ends.
+        """
+        head_table = AuditChainHead.__table__
+        claim = (
+            update(head_table)
+            .where(head_table.c.id == CHAIN_HEAD_ID)
+            .values(sequence=head_table.c.sequence + len(rows))
+        )
+        columns = (head_table.c.sequence, head_table.c.checksum)
+        if connection.dialect.update_returning:
+            claimed = connection.execute(claim.returning(*columns)).first()
+        else:  # MySQL: the row stays locked, so a separate read sees our update
+            claimed = None
+            if connection.execute(claim).rowcount:
+                claimed = connection.execute(select(*columns).where(head_table.c.id == CHAIN_HEAD_ID)).first()
+        if claimed is None:
+            raise RuntimeError("Audit chain head row is missing; run the database migrations")
+        
+        last_sequence, head = claimed
+        for sequence, row in enumerate(rows, start=last_sequence - len(rows) + 1):
+            row['sequence'] = sequence
+            row['previous_checksum'] = head
+            row['checksum'] = AuditLog.compute_checksum(row)
+            head = row['checksum']
+        
+        connection.execute(
+            update(head_table).where(head_table.c.id == CHAIN_HEAD_ID).values(checksum=head)
+        )
+    
+    def _engine(self):
+        if self.app is None:
+            return db.engine
+        with self.app.app_context():
+            return db.engine
+    
+    def _insert(self, rows: List[Dict[str, Any]]):
+        # Own connection: the caller's pending work is neither committed nor rolled back here
+        with self._engine().begin() as connection:
+            self._link(rows, connection)
+            connection.execute(insert(AuditLog), rows)
+        self._count('written', len(rows))
+    
+    def _spill(self, rows: List[Dict[str, Any]]):
+        """Append ``rows`` to the spill file without their chain fields."""
+        chain_fields = ('sequence', 'previous_checksum', 'checksum')
+        try:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with self._spill_lock, open(self.spill_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    record = {key: value for key, value in row.items() if key not in chain_fields}
+                    record['id'] = str(record['id'])
+                    record['timestamp'] = record['timestamp'].isoformat() if record.get('timestamp') else None
+                    f.write(json.dumps(record, default=str) + '\n')
+            self._count('spilled', len(rows))
+        except Exception as e:
+            self._count('failed', len(rows))
+            logger.critical(f"Could not spill {len(rows)} audit events to {self.spill_path}: {e}")
+    
+    def _replay_spilled(self) -> int:
+        """Write the spilled rows; rows that fail again go back to the spill file."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return 0
+        
+        # The rename claims the file, so two processes never replay the same rows
+        claimed = f"{self.spill_path}.{uuid.uuid4().hex}.replaying"
+        with self._spill_lock:
+            try:
+                os.replace(self.spill_path, claimed)
+            except FileNotFoundError:
+                return 0
+        
+        with open(claimed, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row['id'] = uuid.UUID(row['id'])
+            row['timestamp'] = datetime.fromisoformat(row['timestamp']) if row['timestamp'] else datetime.utcnow()
+        
+        replayed = 0
+        for start in range(0, len(rows), self.batch_size):
+            try:
+                self._insert(rows[start:start + self.batch_size])
+            except Exception as e:
+                logger.error(f"Replaying spilled audit events failed, keeping {len(rows) - start}: {e}")
+                self._spill(rows[start:])
+                break
+            replayed += len(rows[start:start + self.batch_size])
+        os.remove(claimed)
+        self._count('replayed', replayed)
+        return replayed
+    
+    def _drain(self, block: bool = True) -> List[Dict[str, Any]]:
+        batch = []
+        try:
+            if block:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write ``batch``, retrying with backoff; spill it if every attempt fails."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._insert(batch)
+                self._count('batches')
+                return True
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self.retry_delay * (attempt + 1))
+        
+        logger.critical(f"Audit batch write failed ({len(batch)} events): {error}")
+        if self.spill_path:
+            self._spill(batch)
+        else:
+            self._count('failed', len(batch))
+        return False
+    
+    def _run(self):
+        self._replay_spilled()
+        while not self._stop_event.is_set():
+            batch = self._drain()
+            if batch and self._write_batch(batch):
+                self._replay_spilled()
+
+
 class AuditLogger:
     """Centralized audit logging service."""
     
@@ -178,35 +487,20 @@ class AuditLogger:
         self.retention_days = 2555  # 7 years for compliance
     
     def log_event(self, event: AuditEvent):
-        """Log an audit event."""
+        """Log an audit event (queued for the background writer when it runs)."""
         if not self.enabled:
             return
         
         try:
-            # Create audit log entry
-            audit_log = AuditLog(
-                event_type=event.event_type.value,
-                severity=event.severity.value,
-                user_id=event.user_id,
-                session_id=event.session_id,
-                ip_address=event.ip_address,
-                user_agent=event.user_agent,
-                resource_type=event.resource_type,
-                resource_id=event.resource_id,
-                action=event.action,
-                details=event.details,
-                timestamp=event.timestamp
-            )
-            
-            db.session.add(audit_log)
-            db.session.commit()
+            row = self._event_to_row(event)
+            get_audit_writer().submit([row])
             
             # Log to application logger as well
             from monitoring.logging_config import audit_logger as app_logger
             app_logger.info(
                 "Audit event logged",
                 extra={
-                    'audit_id': str(audit_log.id),
+                    'audit_id': str(row['id']),
                     'event_type': event.event_type.value,
                     'severity': event.severity.value,
                     'user_id': event.user_id,
@@ -220,6 +514,149 @@ class AuditLogger:
             current_app.logger.critical(f"Audit logging failed: {str(e)}")
             # In production, this might trigger alerts
     
+    def log_events(self, events: List[AuditEvent], commit: bool = True) -> int:
+        """Write many audit events as multi-row INSERTs.
+        
+        With ``commit=False`` the rows join the caller's transaction, so bulk
+        operations and their audit trail succeed or fail together.
+        """
+        if not self.enabled or not events:
+            return 0
+        
+        rows = [self._event_to_row(event) for event in events]
+        writer = get_audit_writer()
+        if commit:
+            writer.submit(rows)
+        else:
+            writer.write_in_transaction(rows)
+        return len(rows)
+    
+    @staticmethod
+    def _event_to_row(event: AuditEvent) -> Dict[str, Any]:
+        """Column values for ``event``; the writer fills in the checksums."""
+        return {
+            'id': uuid.uuid4(),
+            'event_type': event.event_type.value,
+            'severity': event.severity.value,
+            'user_id': event.user_id,
+            'session_id': event.session_id,
+            'ip_address': event.ip_address,
+            'user_agent': event.user_agent,
+            'resource_type': event.resource_type,
+            'resource_id': event.resource_id,
+            'action': event.action,
+            'details': event.details,
+            'timestamp': event.timestamp,
+        }
+    
+    def verify_integrity(self, start_date: datetime = None, end_date: datetime = None,
+                         batch_size: int = 1000) -> Dict[str, Any]:
+        """Walk the hash chain in sequence order and verify every entry.
+        
+        The range covers the contiguous sequence numbers of the entries
+        logged between the dates, so every entry must directly follow the
+        one before it. The first entry links to its predecessor, or to an
+        anchor left by ``cleanup_old_logs``. Without ``end_date`` the newest
+        entry must also match the chain head, so removing entries from the
+        end is detected. Entries written before sequencing only have their
+        checksums checked.
+        """
+        table = AuditLog.__table__
+        in_range = []
+        if start_date:
+            in_range.append(table.c.timestamp >= start_date)
+        if end_date:
+            in_range.append(table.c.timestamp <= end_date)
+        
+        tampered = []
+        broken_links = []
+        verified = 0
+        
+        legacy = select(table).where(table.c.sequence.is_(None), *in_range)
+        for row in db.session.execute(legacy.execution_options(yield_per=batch_size)):
+            verified += 1
+            if row.checksum != AuditLog.compute_checksum(row._mapping):
+                tampered.append(str(row.id))
+        
+        first, last = db.session.execute(
+            select(func.min(table.c.sequence), func.max(table.c.sequence)).where(*in_range)
+        ).one()
+        previous = None  # (sequence, checksum) of the entry before the current one
+        if first is not None:
+            predecessor = db.session.execute(
+                select(table.c.checksum).where(table.c.sequence == first - 1)
+            ).scalar()
+            if predecessor is not None:
+                previous = (first - 1, predecessor)
+            
+            query = (
+                select(table)
+                .where(table.c.sequence.between(first, last))
+                .order_by(table.c.sequence)
+                .execution_options(yield_per=batch_size)
+            )
+            for row in db.session.execute(query):
+                values = row._mapping
+                verified += 1
+                if values['checksum'] != AuditLog.compute_checksum(values):
+                    tampered.append(str(values['id']))
+                if previous is None:
+                    linked = self._starts_chain(values)
+                else:
+                    linked = (values['sequence'] == previous[0] + 1
+                              and values['previous_checksum'] == previous[1])
+                if not linked:
+                    broken_links.append(str(values['id']))
+                previous = (values['sequence'], values['checksum'])
+        
+        head_mismatch = end_date is None and not self._chain_head_matches()
+        return {
+            'verified': verified,
+            'valid': not tampered and not broken_links and not head_mismatch,
+            'tampered': tampered,
+            'broken_links': broken_links,
+            'head_mismatch': head_mismatch,
+        }
+    
+    def _starts_chain(self, values) -> bool:
+        """Whether an entry without a stored predecessor may begin the chain."""
+        previous_checksum = values['previous_checksum']
+        if previous_checksum in self._pruned_chain_anchors():
+            return True
+        if values['sequence'] != 1:
+            return False
+        # The first sequenced entry continues from the newest unsequenced one
+        return previous_checksum is None or db.session.execute(
+            select(AuditLog.id).where(AuditLog.checksum == previous_checksum, AuditLog.sequence.is_(None))
+        ).first() is not None
+    
+    def _chain_head_matches(self) -> bool:
+        head = db.session.get(AuditChainHead, CHAIN_HEAD_ID)
+        if head is None or not head.sequence:
+            return True
+        newest = db.session.execute(
+            select(AuditLog.sequence, AuditLog.checksum)
+            .where(AuditLog.sequence.isnot(None))
+            .order_by(AuditLog.sequence.desc())
+            .limit(1)
+        ).first()
+        if newest is None:
+            # Everything was pruned since the head was written
+            return head.checksum in self._pruned_chain_anchors()
+        return (newest.sequence, newest.checksum) == (head.sequence, head.checksum)
+    
+    def _pruned_chain_anchors(self) -> set:
+        anchors = set()
+        cleanup_events = db.session.execute(
+            select(AuditLog.details).where(
+                AuditLog.resource_type == 'audit_log',
+                AuditLog.action == 'cleanup'
+            )
+        ).scalars()
+        for details in cleanup_events:
+            anchors.update((details or {}).get('chain_anchors', []))
+        return anchors
+    
     def log_authentication_event(self, event_type: AuditEventType, user_id: str = None, 
                                 success: bool = True, details: Dict = None):
         """Log authentication-related events."""
@@ -338,19 +775,44 @@ class AuditLogger:
         return query.order_by(AuditLog.timestamp.desc()).limit(limit).all()
     
     def cleanup_old_logs(self):
-        """Clean up old audit logs based on retention policy."""
+        """Clean up old audit logs based on retention policy.
+        
+        Sequenced entries are pruned up to the oldest one still retained, so
+        the surviving chain stays contiguous; the checksum it links back to
+        is recorded as an anchor for ``verify_integrity``.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=self.retention_days)
         
+        first_kept = db.session.execute(
+            select(func.min(AuditLog.sequence)).where(AuditLog.timestamp >= cutoff_date)
+        ).scalar()
+        if first_kept is not None:
+            chain_anchors = [db.session.execute(
+                select(AuditLog.previous_checksum).where(AuditLog.sequence == first_kept)
+            ).scalar()]
+            pruned = AuditLog.sequence < first_kept
+        else:
+            head = db.session.get(AuditChainHead, CHAIN_HEAD_ID)
+            chain_anchors = [head.checksum] if head is not None else []
+            pruned = AuditLog.sequence.isnot(None)
+        chain_anchors = [anchor for anchor in chain_anchors if anchor]
+        
         deleted_count = AuditLog.query.filter(
-            AuditLog.timestamp < cutoff_date
-        ).delete()
+            pruned | (AuditLog.sequence.is_(None) & (AuditLog.timestamp < cutoff_date))
+        ).delete(synchronize_session=False)
         
         db.session.commit()
         
         self.log_event(AuditEvent(
             event_type=AuditEventType.SYSTEM_START,
             severity=AuditSeverity.LOW,
-            details={'action': 'audit_log_cleanup', 'deleted_count': deleted_count}
+            resource_type='audit_log',
+            action='cleanup',
+            details={
+                'action': 'audit_log_cleanup',
+                'deleted_count': deleted_count,
+                'chain_anchors': sorted(set(chain_anchors))
+            }
         ))
         
         return deleted_count
@@ -523,6 +985,39 @@ audit_logger = None
 compliance_manager = None
 data_encryption = None
 
+audit_writer = None
+
+
+def init_audit_writer(app):
+    """Create the audit writer and start its background thread if enabled."""
+    global audit_writer
+    
+    if audit_writer is not None:
+        audit_writer.stop()
+    
+    audit_writer = AuditWriter(
+        app,
+        max_queue_size=app.config.get('AUDIT_QUEUE_MAX_SIZE', 10000),
+        batch_size=app.config.get('AUDIT_BATCH_SIZE', 200),
+        flush_interval=app.config.get('AUDIT_FLUSH_INTERVAL_SECONDS', 0.5),
+        spill_path=app.config.get('AUDIT_SPILL_PATH') or os.path.join(app.instance_path, 'audit_spill.jsonl')
+    )
+    if app.config.get('AUDIT_ASYNC_ENABLED', True):
+        audit_writer.start()
+        import atexit
+        atexit.register(audit_writer.stop)
+    
+    app.logger.info(f"Audit writer initialized (async={audit_writer.running})")
+    return audit_writer
+
+
+def get_audit_writer():
+    """Get the audit writer, falling back to a synchronous one."""
+    global audit_writer
+    if audit_writer is None:
+        audit_writer = AuditWriter()
+    return audit_writer
+
 def get_audit_logger():
     """Get or create audit logger instance."""
     global audit_logger
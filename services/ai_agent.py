@@ -18,7 +18,7 @@ import hashlib
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 import requests
 from flask import current_app, session, g
@@ -33,8 +33,10 @@ from services.report_types import (
     REPORT_TYPE_CONFIGS, get_report_type_config, get_all_report_types,
     get_report_types_by_category, get_related_report_types, get_report_type_summary
 )
+from services.conversation_store import clear_conversation, load_conversation, save_conversation
+from services.intent_classifier import DATE_PATTERN, EMAIL_PATTERN, PROJECT_REFERENCE_PATTERN, intent_classifier
 from services.memory_manager import (
-    memory_manager, initialize_memory_session, process_memory_interaction,
+    initialize_memory_session, process_memory_interaction,
     get_memory_context, get_response_context, add_memory_correction, end_memory_session
 )
 from services.mcp_integration import (
@@ -87,6 +89,8 @@ class AgentContext:
     knowledge_base: Dict[str, Any]
     learning_data: Dict[str, Any]
 
+_STATIC_CONTEXT_FIELDS = ('knowledge_base', 'capabilities')
+
 @dataclass
 class AgentResponse:
     """Structured response from the AI agent"""
@@ -198,7 +202,10 @@ class AIAgentCore:
     
     def get_context(self) -> AgentContext:
         """Retrieve or create agent context"""
-        context_data = session.get(self.session_key)
+        context_data = load_conversation(self.session_key)
+        if context_data is None:
+            # Contexts saved before the conversation store are moved out of the session
+            context_data = session.pop(self.session_key, None)
         
         if not context_data:
             # Create new context
@@ -216,13 +223,27 @@ class AIAgentCore:
                 learning_data={}
             )
         else:
-            context = AgentContext(**context_data)
+            # The knowledge base and capabilities are static, so they are not stored
+            context_data = {k: v for k, v in context_data.items() if k not in _STATIC_CONTEXT_FIELDS}
+            context_data['personality'] = AgentPersonality(context_data.get('personality', 'professional'))
+            context = AgentContext(
+                knowledge_base=self.knowledge_base,
+                capabilities=self.capabilities,
+                **context_data
+            )
             
         return context
     
     def save_context(self, context: AgentContext):
-        """Save agent context to session"""
-        session[self.session_key] = asdict(context)
+        """Save agent context to the conversation store, keeping a bounded history"""
+        history_limit = current_app.config.get('CONVERSATION_HISTORY_LIMIT', 50)
+        del context.conversation_history[:-history_limit]
+        data = {
+            f.name: getattr(context, f.name)
+            for f in fields(AgentContext) if f.name not in _STATIC_CONTEXT_FIELDS
+        }
+        data['personality'] = context.personality.value
+        save_conversation(self.session_key, data)
     
     def process_message(self, message: str, context_updates: Dict[str, Any] = None) -> AgentResponse:
         """
@@ -297,20 +318,9 @@ class AIAgentCore:
     def _analyze_intent(self, message: str, context: AgentContext) -> Dict[str, Any]:
         """Advanced intent analysis with context awareness"""
         
-        # Normalize message
-        normalized = message.lower().strip()
-        
-        # Intent categories
-        intents = {
-            "create_report": self._detect_create_intent(normalized),
-            "get_help": self._detect_help_intent(normalized),
-            "analyze_data": self._detect_analysis_intent(normalized),
-            "workflow_assistance": self._detect_workflow_intent(normalized),
-            "knowledge_query": self._detect_knowledge_intent(normalized),
-            "system_operation": self._detect_system_intent(normalized),
-            "collaboration": self._detect_collaboration_intent(normalized),
-            "troubleshooting": self._detect_troubleshooting_intent(normalized)
-        }
+        # Intents, sentiment, urgency and relevance from a single keyword scan
+        signals = intent_classifier.classify(message, context.current_task)
+        intents = signals["intents"]
         
         # Determine primary intent
         primary_intent = max(intents.items(), key=lambda x: x[1]["confidence"])
@@ -318,18 +328,14 @@ class AIAgentCore:
         # Extract entities and parameters
         entities = self._extract_entities(message, context)
         
-        # Analyze sentiment and urgency
-        sentiment = self._analyze_sentiment(message)
-        urgency = self._analyze_urgency(message, context)
-        
         return {
             "primary_intent": primary_intent[0],
             "confidence": primary_intent[1]["confidence"],
             "all_intents": intents,
             "entities": entities,
-            "sentiment": sentiment,
-            "urgency": urgency,
-            "context_relevance": self._assess_context_relevance(message, context)
+            "sentiment": signals["sentiment"],
+            "urgency": signals["urgency"],
+            "context_relevance": signals["context_relevance"]
         }
     
     def _generate_response(self, message: str, intent_analysis: Dict[str, Any], context: AgentContext) -> AgentResponse:
@@ -1053,155 +1059,28 @@ I can help implement these solutions automatically. Which would you like me to s
             metadata={"conversation_type": "general"}
         )
     
-    # Helper methods for intent detection
-    def _detect_create_intent(self, message: str) -> Dict[str, Any]:
-        """Detect report creation intent"""
-        create_keywords = ["create", "new", "generate", "make", "start", "begin", "build"]
-        report_keywords = ["report", "sat", "document", "form"]
-        
-        create_score = sum(1 for word in create_keywords if word in message) * 0.3
-        report_score = sum(1 for word in report_keywords if word in message) * 0.4
-        
-        confidence = min(create_score + report_score, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": create_score + report_score > 0}
-    
-    def _detect_help_intent(self, message: str) -> Dict[str, Any]:
-        """Detect help request intent"""
-        help_keywords = ["help", "how", "what", "guide", "explain", "show", "teach", "learn"]
-        
-        confidence = sum(0.2 for word in help_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_analysis_intent(self, message: str) -> Dict[str, Any]:
-        """Detect data analysis intent"""
-        analysis_keywords = ["analyze", "analysis", "data", "metrics", "insights", "trends", "statistics", "performance"]
-        
-        confidence = sum(0.25 for word in analysis_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_workflow_intent(self, message: str) -> Dict[str, Any]:
-        """Detect workflow assistance intent"""
-        workflow_keywords = ["workflow", "process", "steps", "procedure", "automation", "optimize", "streamline"]
-        
-        confidence = sum(0.3 for word in workflow_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_knowledge_intent(self, message: str) -> Dict[str, Any]:
-        """Detect knowledge query intent"""
-        knowledge_keywords = ["what is", "explain", "definition", "standard", "best practice", "guideline"]
-        
-        confidence = sum(0.25 for phrase in knowledge_keywords if phrase in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_system_intent(self, message: str) -> Dict[str, Any]:
-        """Detect system operation intent"""
-        system_keywords = ["status", "performance", "system", "health", "monitor", "check", "optimize"]
-        
-        confidence = sum(0.3 for word in system_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_collaboration_intent(self, message: str) -> Dict[str, Any]:
-        """Detect collaboration intent"""
-        collab_keywords = ["team", "collaborate", "review", "approve", "share", "assign", "workflow"]
-        
-        confidence = sum(0.25 for word in collab_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
-    def _detect_troubleshooting_intent(self, message: str) -> Dict[str, Any]:
-        """Detect troubleshooting intent"""
-        trouble_keywords = ["problem", "issue", "error", "bug", "fix", "broken", "not working", "trouble"]
-        
-        confidence = sum(0.3 for word in trouble_keywords if word in message)
-        confidence = min(confidence, 1.0)
-        
-        return {"confidence": confidence, "keywords_found": confidence > 0}
-    
     # Additional helper methods
     def _extract_entities(self, message: str, context: AgentContext) -> Dict[str, Any]:
         """Extract entities from message"""
         entities = {}
         
         # Extract project references
-        project_pattern = r'\b[A-Z0-9]{3,}-[A-Z0-9]{2,}\b'
-        projects = re.findall(project_pattern, message)
+        projects = PROJECT_REFERENCE_PATTERN.findall(message)
         if projects:
             entities['project_references'] = projects
         
         # Extract dates
-        date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
-        dates = re.findall(date_pattern, message)
+        dates = DATE_PATTERN.findall(message)
         if dates:
             entities['dates'] = dates
         
         # Extract email addresses
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, message)
+        emails = EMAIL_PATTERN.findall(message)
         if emails:
             entities['emails'] = emails
         
         return entities
     
-    def _analyze_sentiment(self, message: str) -> str:
-        """Analyze message sentiment"""
-        positive_words = ["good", "great", "excellent", "perfect", "amazing", "wonderful", "fantastic"]
-        negative_words = ["bad", "terrible", "awful", "horrible", "frustrated", "annoyed", "problem"]
-        
-        positive_count = sum(1 for word in positive_words if word in message.lower())
-        negative_count = sum(1 for word in negative_words if word in message.lower())
-        
-        if positive_count > negative_count:
-            return "positive"
-        elif negative_count > positive_count:
-            return "negative"
-        else:
-            return "neutral"
-    
-    def _analyze_urgency(self, message: str, context: AgentContext) -> str:
-        """Analyze message urgency"""
-        urgent_words = ["urgent", "asap", "immediately", "critical", "emergency", "now", "quickly"]
-        
-        urgency_score = sum(1 for word in urgent_words if word in message.lower())
-        
-        if urgency_score >= 2:
-            return "high"
-        elif urgency_score == 1:
-            return "medium"
-        else:
-            return "low"
-    
-    def _assess_context_relevance(self, message: str, context: AgentContext) -> float:
-        """Assess how relevant the message is to current context"""
-        current_task = context.current_task
-        if not current_task:
-            return 0.5
-        
-        # Simple relevance scoring based on task keywords
-        task_keywords = {
-            "create_report": ["report", "sat", "create", "generate", "form"],
-            "data_analysis": ["analyze", "data", "metrics", "insights", "trends"],
-            "workflow": ["workflow", "process", "steps", "automation"]
-        }
-        
-        if current_task in task_keywords:
-            keywords = task_keywords[current_task]
-            relevance = sum(0.2 for word in keywords if word in message.lower())
-            return min(relevance, 1.0)
-        
-        return 0.5
-    
     def _generate_session_id(self) -> str:
         """Generate unique session ID"""
         return hashlib.md5(f"{datetime.now().isoformat()}_{os.urandom(16).hex()}".encode()).hexdigest()
@@ -1711,9 +1590,9 @@ def process_ai_message(message: str, context_updates: Dict[str, Any] = None) ->
 
 def reset_ai_conversation() -> Dict[str, Any]:
     """Reset AI conversation"""
-    # Clear session data
-    if ai_agent.session_key in session:
-        del session[ai_agent.session_key]
+    # Clear stored conversation
+    clear_conversation(ai_agent.session_key)
+    session.pop(ai_agent.session_key, None)
     
     return start_ai_conversation()
 
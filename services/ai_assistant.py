@@ -1,11 +1,12 @@
 import json
-import os
 import re
 from typing import Dict, Any, List, Optional
 
-import requests
 from flask import current_app
 
+from services.llm_fanout import provider_fanout
+from services.llm_gateway import LLMError, user_message
+
 
 class AISuggestionError(Exception):
     """Raised when AI suggestion generation fails."""
@@ -17,86 +18,32 @@ _ALLOWED_FIELDS = {
 }
 
 
-def _get_hf_settings(app):
-    token = app.config.get('HF_API_TOKEN') or os.environ.get('HF_API_TOKEN')
-    model_id = app.config.get('HF_MODEL') or 'HuggingFaceH4/zephyr-7b-beta'
-    api_url = (app.config.get('HF_API_URL') or 'https://api-inference.huggingface.co/models').rstrip('/')
-    return token, model_id, api_url
-
+def _provider_order(provider: str) -> List[str]:
+    """``provider`` followed by the configured fallbacks used for hedging and failover."""
+    fallbacks = current_app.config.get('LLM_FALLBACK_PROVIDERS', 'openrouter,openai,huggingface')
+    if isinstance(fallbacks, str):
+        fallbacks = [name.strip().lower() for name in fallbacks.split(',') if name.strip()]
+    return [provider] + [name for name in fallbacks if name != provider]
 
-def _hf_generate(prompt: str, max_tokens: int = 400, temperature: float = 0.4) -> str:
-    app = current_app
-    token, model_id, api_url = _get_hf_settings(app)
-    if not token:
-        raise AISuggestionError('HF_API_TOKEN is not configured.')
-
-    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
-    payload = {
-        'inputs': prompt,
-        'parameters': {
-            'max_new_tokens': max_tokens,
-            'temperature': temperature,
-            'top_p': 0.9,
-        },
-        'options': {'wait_for_model': True},
-    }
 
+def _complete(provider: str, messages: List[Dict[str, str]], **params) -> str:
+    """Completion text from ``provider``, hedged against the fallback providers."""
     try:
-        response = requests.post(f"{api_url}/{model_id}", headers=headers, json=payload, timeout=30)
-    except requests.RequestException as exc:
-        raise AISuggestionError(f'HuggingFace request failed: {exc}') from exc
-
-    if response.status_code >= 400:
-        raise AISuggestionError(f'HuggingFace API error: {response.status_code} {response.text}')
+        return provider_fanout.complete(_provider_order(provider), messages, **params).text
+    except LLMError as exc:
+        raise AISuggestionError(str(exc)) from exc
 
-    data = response.json()
-    if isinstance(data, list) and data:
-        first = data[0]
-        if isinstance(first, dict) and first.get('generated_text'):
-            return str(first['generated_text']).strip()
-        if isinstance(first, str):
-            return first.strip()
-    if isinstance(data, dict) and data.get('generated_text'):
-        return str(data['generated_text']).strip()
 
-    raise AISuggestionError('HuggingFace response was empty.')
+def _hf_generate(prompt: str, max_tokens: int = 400, temperature: float = 0.4) -> str:
+    return _complete('huggingface', user_message(prompt), max_tokens=max_tokens, temperature=temperature, top_p=0.9)
 
 
 def _openrouter_chat(prompt: str, max_tokens: int = 400, temperature: float = 0.4) -> str:
-    app = current_app
-    token = app.config.get('OPENROUTER_API_KEY') or os.environ.get('OPENROUTER_API_KEY')
-    model_id = app.config.get('OPENROUTER_MODEL') or 'qwen/qwen3-coder:free'
-    if not token:
-        raise AISuggestionError('OPENROUTER_API_KEY is not configured.')
-
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Content-Type': 'application/json',
-    }
-    payload = {
-        'model': model_id,
-        'messages': [{'role': 'user', 'content': prompt}],
-        'temperature': temperature,
-        'top_p': 0.9,
-        'max_tokens': max_tokens,
-    }
-
-    try:
-        response = requests.post('https://openrouter.ai/api/v1/chat/completions', headers=headers, json=payload, timeout=30)
-    except requests.RequestException as exc:
-        raise AISuggestionError(f'OpenRouter request failed: {exc}') from exc
+    return _complete('openrouter', user_message(prompt), max_tokens=max_tokens, temperature=temperature, top_p=0.9)
 
-    if response.status_code >= 400:
-        raise AISuggestionError(f'OpenRouter API error: {response.status_code} {response.text}')
 
-    data = response.json()
-    try:
-        content = data['choices'][0]['message']['content']
-        if not content:
-            raise KeyError('empty content')
-        return str(content).strip()
-    except Exception as exc:
-        raise AISuggestionError('Unexpected response format from OpenRouter.') from exc
+def _openai_chat(messages: List[Dict[str, str]], max_tokens: int, temperature: float, timeout: float = 30) -> str:
+    return _complete('openai', messages, max_tokens=max_tokens, temperature=temperature, timeout=timeout)
 
 
 
@@ -258,12 +205,6 @@ def _generate_with_hf(field: str, submission_context: Dict[str, Any]) -> str:
     return _hf_generate(prompt, max_tokens=200, temperature=0.35)
 
 def _generate_with_openai(field: str, submission_context: Dict[str, Any]) -> str:
-    app = current_app
-    api_key = app.config.get('OPENAI_API_KEY')
-    if not api_key:
-        raise AISuggestionError('OPENAI_API_KEY is not configured.')
-
-    model = app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
     audience_hint = submission_context.get('audience') or 'project stakeholders'
 
     prompt_sections = [
@@ -284,40 +225,11 @@ def _generate_with_openai(field: str, submission_context: Dict[str, Any]) -> str
 
     prompt_sections.append(f"Craft the text addressing {audience_hint}.")
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "You are an assistant that helps prepare formal engineering SAT reports."},
-            {"role": "user", "content": "\n".join(prompt_sections)}
-        ],
-        "temperature": 0.3,
-        "max_tokens": 200
-    }
-
-    try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            data=json.dumps(payload),
-            timeout=30
-        )
-    except requests.RequestException as exc:
-        raise AISuggestionError(f'Failed to reach OpenAI: {exc}') from exc
-
-    if response.status_code >= 400:
-        raise AISuggestionError(f'OpenAI API error: {response.status_code} {response.text}')
-
-    try:
-        data = response.json()
-        suggestion = data['choices'][0]['message']['content'].strip()
-        if not suggestion:
-            raise KeyError('empty suggestion')
-        return suggestion
-    except (KeyError, IndexError, ValueError) as exc:
-        raise AISuggestionError('Unexpected response format from OpenAI.') from exc
+    messages = [
+        {"role": "system", "content": "You are an assistant that helps prepare formal engineering SAT reports."},
+        {"role": "user", "content": "\n".join(prompt_sections)}
+    ]
+    return _openai_chat(messages, max_tokens=200, temperature=0.3)
 
 
 def _generate_contextual_response(prompt: str, context: Dict[str, Any], max_tokens: int) -> str:
@@ -353,12 +265,6 @@ def _generate_contextual_response(prompt: str, context: Dict[str, Any], max_toke
         # Unsupported provider explicitly set
         raise RuntimeError(f"AI provider '{provider}' is not supported.")
 
-    api_key = app.config.get('OPENAI_API_KEY')
-    if not api_key:
-        raise RuntimeError('OPENAI_API_KEY is not configured.')
-
-    model = app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
-
     system_prompt = """You are an advanced AI assistant for a SAT (Site Acceptance Testing) report generation system.
 You have deep expertise in:
 - Automation systems (SCADA, PLC, DCS, HMI, IoT)
@@ -374,31 +280,11 @@ Focus on practical solutions and actionable advice."""
     if context:
         context_info = '\nContext: {0}'.format(json.dumps(context, indent=2))
 
-    payload = {
-        'model': model,
-        'messages': [
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': f"{prompt}{context_info}"}
-        ],
-        'temperature': 0.7,
-        'max_tokens': max_tokens
-    }
-
-    response = requests.post(
-        'https://api.openai.com/v1/chat/completions',
-        headers={
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        },
-        data=json.dumps(payload),
-        timeout=30
-    )
-
-    if response.status_code >= 400:
-        raise AISuggestionError(f"OpenAI API error: {response.status_code}")
-
-    data = response.json()
-    return data['choices'][0]['message']['content'].strip()
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': f"{prompt}{context_info}"}
+    ]
+    return _openai_chat(messages, max_tokens=max_tokens, temperature=0.7)
 
 
 
@@ -453,12 +339,9 @@ def _analyze_intent_with_ai(message: str, context: Dict[str, Any]) -> Dict[str,
     if provider not in ('openai', 'none'):
         raise RuntimeError(f"AI provider '{provider}' is not supported for intent analysis.")
 
-    api_key = app.config.get('OPENAI_API_KEY')
-    if not api_key:
+    if not app.config.get('OPENAI_API_KEY'):
         return _analyze_intent_fallback(message)
 
-    model = app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
-
     system_prompt = """Analyze the user's message and determine their intent. Return a JSON object with:
 - intent: primary intent (create_report, get_help, analyze_data, workflow_assistance, knowledge_query, system_operation, collaboration, troubleshooting, general)
 - confidence: confidence score (0.0-1.0)
@@ -466,44 +349,17 @@ def _analyze_intent_with_ai(message: str, context: Dict[str, Any]) -> Dict[str,
 - urgency: urgency level (low, medium, high)
 - sentiment: sentiment (positive, neutral, negative)"""
 
-    payload = {
-        'model': model,
-        'messages': [
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': f"Message: {message}\nContext: {json.dumps(context)}"}
-        ],
-        'temperature': 0.3,
-        'max_tokens': 200
-    }
-
-    response = requests.post(
-        'https://api.openai.com/v1/chat/completions',
-        headers={
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        },
-        data=json.dumps(payload),
-        timeout=15
-    )
-
-    if response.status_code >= 400:
-        return _analyze_intent_fallback(message)
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': f"Message: {message}\nContext: {json.dumps(context)}"}
+    ]
 
     try:
-        data = response.json()
-        result = json.loads(data['choices'][0]['message']['content'])
-        return result
+        return json.loads(_openai_chat(messages, max_tokens=200, temperature=0.3, timeout=15))
     except Exception:
         return _analyze_intent_fallback(message)
 
 
-    try:
-        data = response.json()
-        result = json.loads(data['choices'][0]['message']['content'])
-        return result
-    except:
-        return _analyze_intent_fallback(message)
-
 def _analyze_intent_fallback(message: str) -> Dict[str, Any]:
     """Fallback intent analysis using simple rules."""
     message_lower = message.lower()
@@ -588,8 +444,7 @@ def _generate_ai_suggestions(context: Dict[str, Any], user_history: List[Dict[st
     if provider not in ('openai', 'none'):
         raise RuntimeError(f"AI provider '{provider}' is not supported for suggestions.")
 
-    api_key = app.config.get('OPENAI_API_KEY')
-    if not api_key:
+    if not app.config.get('OPENAI_API_KEY'):
         return [
             'Create a new SAT report',
             'Analyze your data',
@@ -597,38 +452,17 @@ def _generate_ai_suggestions(context: Dict[str, Any], user_history: List[Dict[st
             'Explore system features'
         ]
 
-    model = app.config.get('OPENAI_MODEL', 'gpt-3.5-turbo')
-
     system_prompt = """Based on the user's context and history, suggest 4-5 relevant actions they might want to take.
 Focus on practical, actionable suggestions related to SAT report generation, data analysis, workflow optimization, etc.
 Return as a JSON array of strings."""
 
-    payload = {
-        'model': model,
-        'messages': [
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': f"Context: {json.dumps(context)}\nHistory: {json.dumps(user_history[-5:])}"}
-        ],
-        'temperature': 0.5,
-        'max_tokens': 150
-    }
+    messages = [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': f"Context: {json.dumps(context)}\nHistory: {json.dumps(user_history[-5:])}"}
+    ]
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            data=json.dumps(payload),
-            timeout=15
-        )
-
-        if response.status_code >= 400:
-            raise Exception('API error')
-
-        data = response.json()
-        suggestions = json.loads(data['choices'][0]['message']['content'])
+        suggestions = json.loads(_openai_chat(messages, max_tokens=150, temperature=0.5, timeout=15))
         return suggestions if isinstance(suggestions, list) else []
     except Exception:
         return [
@@ -23,9 +23,11 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     requests = None
 
-from models import Report, SATReport
+from models import Report
+from database.statements import get_sat_report
 from services.ai_assistant import analyze_user_intent
 from services.form_autofill import analyze_sat_upload, AutoFillResult
+from services.conversation_store import clear_conversation, load_conversation, save_conversation
 
 
 _ALIAS_SANITIZE = re.compile(r'[^a-z0-9]+')
@@ -272,7 +274,7 @@ for field_name, meta in FIELD_DEFINITIONS.items():
 
 
 class BotConversationState:
-    """Encapsulates bot state stored in the user session."""
+    """Encapsulates bot state kept in the conversation store for the user session."""
 
     SESSION_KEY = "bot_conversation_state"
 
@@ -285,7 +287,10 @@ class BotConversationState:
 
     @classmethod
     def load(cls) -> "BotConversationState":
-        raw = session.get(cls.SESSION_KEY)
+        raw = load_conversation(cls.SESSION_KEY)
+        if raw is None:
+            # State saved before the conversation store is moved out of the session
+            raw = session.pop(cls.SESSION_KEY, None)
         state = cls()
         if not raw:
             return state
@@ -297,15 +302,16 @@ class BotConversationState:
         return state
 
     def save(self) -> None:
-        session[self.SESSION_KEY] = {
+        save_conversation(self.SESSION_KEY, {
             "position": self.position,
             "answers": self.answers,
             "extracted": self.extracted,
             "ingested_files": self.ingested_files,
             "tables": self.tables,
-        }
+        })
 
     def reset(self) -> None:
+        clear_conversation(self.SESSION_KEY)
         session.pop(self.SESSION_KEY, None)
         self.position = 0
         self.answers = {}
@@ -1294,7 +1300,7 @@ def resolve_report_download_url(submission_id: str) -> Dict[str, str]:
     report = Report.query.filter_by(id=submission_id).first()
     if not report:
         return {"error": "Report not found."}
-    sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+    sat_report = get_sat_report(submission_id)
     if not sat_report:
         return {"error": "SAT data not available for this report."}
     return {
@@ -0,0 +1,216 @@
+"""Set-based bulk operations on reports.
+
+Every operation follows the same shape: resolve the permitted ids with one
+chunked ``SELECT``, apply the change as chunked ``UPDATE``/``DELETE``
+statements, write the audit trail with one multi-row ``INSERT`` and commit
+once. Caches and dashboard counters are invalidated a single time for the
+whole batch instead of once per report.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+from flask import current_app, has_app_context, has_request_context, request, session
+from sqlalchemy import delete, insert, update
+
+from models import (
+    db, Report, SATReport, FDSReport, HDSReport, SiteSurveyReport, SDSReport,
+    FATReport, ReportArchive,
+)
+from security.audit import AuditEvent, AuditEventType, AuditSeverity, get_audit_logger
+
+DEFAULT_CHUNK_SIZE = 500
+UNRESTRICTED_ROLES = ('Admin', 'Automation Manager')
+
+# One-to-one children removed with their report (the ORM cascade on Report)
+REPORT_CHILD_MODELS = (SATReport, FDSReport, HDSReport, SiteSurveyReport, SDSReport, FATReport)
+
+
+class BulkResult(NamedTuple):
+    affected: int
+    skipped: int
+
+
+def _chunk_size() -> int:
+    if has_app_context():
+        return max(1, int(current_app.config.get('BULK_OPERATION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)))
+    return DEFAULT_CHUNK_SIZE
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _unique_ids(report_ids: Iterable) -> List[str]:
+    seen = dict.fromkeys(str(report_id) for report_id in report_ids if report_id)
+    return list(seen)
+
+
+def _permitted_rows(report_ids: Sequence[str], user, *columns) -> List:
+    """Fetch ``columns`` for the reports ``user`` may act on, chunk by chunk."""
+    rows = []
+    restrict_to_owner = getattr(user, 'role', None) not in UNRESTRICTED_ROLES
+    for chunk in _chunks(report_ids, _chunk_size()):
+        query = db.session.query(Report.id, *columns).filter(Report.id.in_(chunk))
+        if restrict_to_owner:
+            query = query.filter(Report.user_email == user.email)
+        rows.extend(query.all())
+    return rows
+
+
+def _audit_events(user, action: str, event_type: AuditEventType, severity: AuditSeverity,
+                  messages: Dict[str, str]) -> List[AuditEvent]:
+    has_request = has_request_context()
+    now = datetime.utcnow()
+    return [
+        AuditEvent(
+            event_type=event_type,
+            severity=severity,
+            user_id=str(user.id) if getattr(user, 'id', None) is not None else None,
+            session_id=session.get('session_id') if has_request else None,
+            ip_address=request.remote_addr if has_request else None,
+            user_agent=request.headers.get('User-Agent', '')[:200] if has_request else None,
+            resource_type='report',
+            resource_id=report_id,
+            action=action,
+            details={'message': message, 'user_email': user.email, 'bulk': True},
+            timestamp=now,
+        )
+        for report_id, message in messages.items()
+    ]
+
+
+def _finish(user, action: str, event_type: AuditEventType, severity: AuditSeverity,
+            messages: Dict[str, str], tables: Iterable[str]) -> None:
+    """Write the audit rows, flag caches for invalidation and commit once."""
+    from database.tiered_cache import mark_tables_modified
+    from services.dashboard_stats import invalidate_dashboard_stats
+
+    get_audit_logger().log_events(
+        _audit_events(user, action, event_type, severity, messages), commit=False
+    )
+    invalidate_dashboard_stats()
+    mark_tables_modified(db.session, set(tables) | {'audit_logs', 'system_settings'})
+    db.session.commit()
+
+
+def bulk_update_status(report_ids: Iterable, new_status: str, user) -> BulkResult:
+    """Set ``status`` on every permitted report."""
+    ids = _unique_ids(report_ids)
+    rows = _permitted_rows(ids, user, Report.status)
+    messages = {row.id: f'Bulk status update from {row.status} to {new_status}' for row in rows}
+
+    now = datetime.utcnow()
+    for chunk in _chunks(list(messages), _chunk_size()):
+        db.session.execute(
+            update(Report).where(Report.id.in_(chunk)).values(status=new_status, updated_at=now),
+            execution_options={'synchronize_session': False},
+        )
+
+    _finish(user, 'update', AuditEventType.REPORT_UPDATE, AuditSeverity.LOW, messages, ['reports'])
+    return BulkResult(len(messages), len(ids) - len(messages))
+
+
+def bulk_assign(report_ids: Iterable, new_user_email: str, user) -> BulkResult:
+    """Reassign every permitted report to ``new_user_email``."""
+    ids = _unique_ids(report_ids)
+    rows = _permitted_rows(ids, user, Report.user_email)
+    messages = {row.id: f'Reassigned from {row.user_email} to {new_user_email}' for row in rows}
+
+    now = datetime.utcnow()
+    for chunk in _chunks(list(messages), _chunk_size()):
+        db.session.execute(
+            update(Report).where(Report.id.in_(chunk)).values(user_email=new_user_email, updated_at=now),
+            execution_options={'synchronize_session': False},
+        )
+
+    _finish(user, 'assign', AuditEventType.REPORT_UPDATE, AuditSeverity.LOW, messages, ['reports'])
+    return BulkResult(len(messages), len(ids) - len(messages))
+
+
+def _insert_archives(report_ids: Sequence[str], user, retention_days: int) -> int:
+    """Snapshot ``report_ids`` into ``report_archives`` with one INSERT per chunk."""
+    archived_at = datetime.utcnow()
+    retention_until = archived_at + timedelta(days=retention_days)
+    archived = 0
+
+    for chunk in _chunks(report_ids, _chunk_size()):
+        rows = db.session.query(Report, SATReport.data_json).outerjoin(
+            SATReport, SATReport.report_id == Report.id
+        ).filter(Report.id.in_(chunk)).all()
+
+        archive_rows = []
+        for report, sat_data in rows:
+            archive_data = {
+                'report': {
+                    'id': report.id,
+                    'type': report.type,
+                    'document_title': report.document_title,
+                    'project_reference': report.project_reference,
+                    'client_name': report.client_name,
+                    'status': report.status,
+                    'revision': report.revision,
+                    'created_at': report.created_at.isoformat() if report.created_at else None,
+                    'updated_at': report.updated_at.isoformat() if report.updated_at else None,
+                    'user_email': report.user_email
+                }
+            }
+            if report.type == 'SAT' and sat_data:
+                archive_data['sat_data'] = sat_data
+
+            archive_rows.append({
+                'original_report_id': report.id,
+                'report_type': report.type,
+                'document_title': report.document_title or '',
+                'project_reference': report.project_reference or '',
+                'client_name': report.client_name or '',
+                'archived_data': json.dumps(archive_data),
+                'archived_by': user.email,
+                'archived_at': archived_at,
+                'retention_until': retention_until,
+            })
+
+        if archive_rows:
+            db.session.execute(insert(ReportArchive), archive_rows)
+            archived += len(archive_rows)
+
+    return archived
+
+
+def bulk_archive(report_ids: Iterable, retention_days: int, user) -> BulkResult:
+    """Archive every permitted report for ``retention_days``."""
+    ids = _unique_ids(report_ids)
+    permitted = [row.id for row in _permitted_rows(ids, user)]
+    _insert_archives(permitted, user, retention_days)
+
+    messages = {report_id: f'Archived for {retention_days} days' for report_id in permitted}
+    _finish(user, 'archive', AuditEventType.REPORT_UPDATE, AuditSeverity.LOW, messages, ['report_archives'])
+    return BulkResult(len(permitted), len(ids) - len(permitted))
+
+
+def bulk_delete(report_ids: Iterable, user, archive_first: bool = True,
+                retention_days: int = 365) -> BulkResult:
+    """Delete every permitted report and its one-to-one child rows."""
+    ids = _unique_ids(report_ids)
+    rows = _permitted_rows(ids, user, Report.document_title)
+    permitted = [row.id for row in rows]
+
+    if archive_first:
+        _insert_archives(permitted, user, retention_days)
+
+    for chunk in _chunks(permitted, _chunk_size()):
+        for child_model in REPORT_CHILD_MODELS:
+            db.session.execute(
+                delete(child_model).where(child_model.report_id.in_(chunk)),
+                execution_options={'synchronize_session': False},
+            )
+        db.session.execute(
+            delete(Report).where(Report.id.in_(chunk)),
+            execution_options={'synchronize_session': False},
+        )
+
+    messages = {row.id: f'Bulk deletion of report {row.document_title}' for row in rows}
+    tables = ['reports', 'report_archives'] + [model.__tablename__ for model in REPORT_CHILD_MODELS]
+    _finish(user, 'delete', AuditEventType.REPORT_DELETE, AuditSeverity.MEDIUM, messages, tables)
+    return BulkResult(len(permitted), len(ids) - len(permitted))
@@ -0,0 +1,178 @@
+"""
+Server-side storage for AI agent and SAT bot conversation state.
+
+The Flask session only carries a short conversation ID; the state itself
+lives in a SQLite table in the instance folder, serialized as compact JSON
+(zlib-compressed above a size threshold). Entries expire after
+``CONVERSATION_TTL_SECONDS`` without a write and are purged periodically.
+
+State is loaded lazily the first time a request asks for it, cached on
+``g`` for the rest of the request, and written back only if it changed.
+"""
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from flask import current_app, g, has_request_context, session
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = 'conversation_id'
+
+
+class ConversationStore:
+    """Key/value store of conversation state with TTL eviction."""
+
+    def __init__(self, path, ttl=86400, purge_interval=300, compress_threshold=1024):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.compress_threshold = compress_threshold
+        self._next_purge = time.monotonic() + purge_interval
+        self._local = threading.local()
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS conversations ('
+            'key TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_conversations_expires_at ON conversations (expires_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        raw = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+        if len(raw) > self.compress_threshold:
+            return b'z' + zlib.compress(raw, 6)
+        return b'j' + raw
+
+    @staticmethod
+    def decode(blob: bytes) -> Dict[str, Any]:
+        blob = bytes(blob)
+        raw = zlib.decompress(blob[1:]) if blob[:1] == b'z' else blob[1:]
+        return json.loads(raw)
+
+    def get_raw(self, key) -> Optional[bytes]:
+        row = self._connection().execute(
+            'SELECT data, expires_at FROM conversations WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return bytes(row[0])
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        blob = self.get_raw(key)
+        return self.decode(blob) if blob is not None else None
+
+    def put_raw(self, key, blob: bytes):
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO conversations (key, data, expires_at) VALUES (?, ?, ?)',
+            (key, blob, time.time() + self.ttl)
+        )
+        if time.monotonic() >= self._next_purge:
+            self.purge_expired()
+
+    def put(self, key, data: Dict[str, Any]):
+        self.put_raw(key, self.encode(data))
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM conversations WHERE key = ?', (key,))
+
+    def purge_expired(self) -> int:
+        self._next_purge = time.monotonic() + self.purge_interval
+        deleted = self._connection().execute(
+            'DELETE FROM conversations WHERE expires_at <= ?', (time.time(),)
+        ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} expired conversations")
+        return deleted
+
+
+conversation_store: Optional[ConversationStore] = None
+
+
+def init_conversation_store(app):
+    """Create the conversation store in the app's instance folder."""
+    global conversation_store
+    conversation_store = ConversationStore(
+        app.config.get('CONVERSATION_STORE_PATH') or os.path.join(app.instance_path, 'conversations.db'),
+        ttl=app.config.get('CONVERSATION_TTL_SECONDS', 86400),
+    )
+    app.logger.info(f"Conversation store initialized at {conversation_store.path}")
+    return conversation_store
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the global store, creating it for the current app if needed."""
+    if conversation_store is None:
+        return init_conversation_store(current_app)
+    return conversation_store
+
+
+def _conversation_key(namespace: str, create: bool) -> Optional[str]:
+    conversation_id = session.get(SESSION_KEY)
+    if not conversation_id:
+        if not create:
+            return None
+        conversation_id = secrets.token_urlsafe(16)
+        session[SESSION_KEY] = conversation_id
+    return f"{namespace}:{conversation_id}"
+
+
+def _request_cache() -> Dict[str, Optional[bytes]]:
+    if not hasattr(g, '_conversation_blobs'):
+        g._conversation_blobs = {}
+    return g._conversation_blobs
+
+
+def load_conversation(namespace: str) -> Optional[Dict[str, Any]]:
+    """State saved for this session under ``namespace``, or None."""
+    key = _conversation_key(namespace, create=False)
+    if key is None:
+        return None
+
+    cache = _request_cache() if has_request_context() else {}
+    if key not in cache:
+        cache[key] = get_conversation_store().get_raw(key)
+    blob = cache[key]
+    return ConversationStore.decode(blob) if blob is not None else None
+
+
+def save_conversation(namespace: str, data: Dict[str, Any]):
+    """Store ``data`` for this session; unchanged state is not rewritten."""
+    store = get_conversation_store()
+    key = _conversation_key(namespace, create=True)
+    blob = store.encode(data)
+    cache = _request_cache()
+    if cache.get(key) == blob:
+        return
+    store.put_raw(key, blob)
+    cache[key] = blob
+
+
+def clear_conversation(namespace: str):
+    """Forget this session's state under ``namespace``."""
+    key = _conversation_key(namespace, create=False)
+    if key is None:
+        return
+    get_conversation_store().delete(key)
+    _request_cache()[key] = None
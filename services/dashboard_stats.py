@@ -173,6 +173,20 @@ def _compute_user_stats(email: str, stage: int) -> Dict[str, int]:
     return result
 
 
+def invalidate_dashboard_stats() -> int:
+    """Drop every cached dashboard stats payload in one statement.
+
+    Callers own the transaction; the next dashboard view (or the refresher)
+    recomputes the numbers.
+    """
+    return SystemSettings.query.filter(
+        or_(
+            SystemSettings.key.like('dashboard_stats:%'),
+            SystemSettings.key.like('ds:%'),
+        )
+    ).delete(synchronize_session=False)
+
+
 def refresh_all_dashboard_stats() -> None:
     """Recompute cached stats for all Automation Managers and PMs."""
     roles = (ROLE_AUTOMATION_MANAGER, ROLE_PM)
@@ -551,14 +551,15 @@ def generate_sat_report_direct(submission_id: str) -> Dict[str, Any]:
         Dict with 'path' and 'download_name' on success, or 'error' on failure
     """
     try:
-        from models import Report, SATReport
+        from models import Report
+        from database.statements import get_sat_report
         
         # Load report from database
         report = Report.query.filter_by(id=submission_id).first()
         if not report:
             return {'error': 'Report not found'}
 
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             return {'error': 'Report data not found'}
 
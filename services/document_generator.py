@@ -19,8 +19,10 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from PIL import Image
 
-from models import Report, SATReport, User, SystemSettings
+from models import Report, SystemSettings
+from database.statements import get_sat_report
 from services.sat_tables import extract_ui_tables, build_doc_tables, migrate_context_tables, TABLE_CONFIG
+from services.user_directory import resolve_users, resolve_user
 from utils import update_toc_page_numbers
 
 
@@ -191,7 +193,7 @@ def regenerate_document_from_db(submission_id: str) -> Dict[str, Any]:
         if not report:
             return {'error': 'Report not found'}
 
-        sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+        sat_report = get_sat_report(submission_id)
         if not sat_report:
             return {'error': 'Report data not found'}
 
@@ -260,7 +262,7 @@ def regenerate_document_from_db(submission_id: str) -> Dict[str, Any]:
         # If no signature stored, try user profile signature
         try:
             if not sig_prepared_source and report:
-                user = User.query.filter_by(email=report.user_email).first()
+                user = resolve_user(report.user_email)
                 if user:
                     user_sig_key = f"user_signature_{user.id}"
                     stored_sig = SystemSettings.get_setting(user_sig_key)
@@ -351,6 +353,12 @@ def regenerate_document_from_db(submission_id: str) -> Dict[str, Any]:
                 return cleaned
             return str(value)
 
+        # Resolve every approver in one query instead of one per stage
+        approvers_by_email = resolve_users(
+            (entry or {}).get('approver_email')
+            for entry in (tech_approval, pm_approval, client_approval)
+        )
+
         def resolve_approver_name(existing_value: str, approval_entry: Dict[str, Any]) -> str:
             """Use the freshest available name for an approval stage."""
             candidate = existing_value or ""
@@ -358,7 +366,7 @@ def regenerate_document_from_db(submission_id: str) -> Dict[str, Any]:
                 candidate = approval_entry.get('approver_name') or candidate
                 approver_email = approval_entry.get('approver_email')
                 if approver_email:
-                    user = User.query.filter_by(email=approver_email).first()
+                    user = approvers_by_email.get(approver_email)
                     if user and user.full_name:
                         candidate = user.full_name
             return candidate
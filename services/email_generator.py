@@ -5,9 +5,10 @@ import html as html_lib
 from html import escape
 from typing import Any, Dict, List, Optional, Tuple
 
-import requests
 from flask import current_app
 
+from services.llm_gateway import llm_gateway, user_message
+
 
 def generate_email_content(
     report_data: Dict[str, Any],
@@ -176,7 +177,7 @@ def _ensure_model() -> Tuple[str, Any]:
     raise RuntimeError(f"AI provider '{provider}' is not configured.")
 
 
-def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str, generation_config: Dict[str, Any]) -> str:
     token = (model_cfg.get("token") or "").strip()
     model_id = model_cfg.get("model_id")
     if not token or not model_id:
@@ -187,51 +188,30 @@ def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str, generation
     except Exception:
         pass
 
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": model_id,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": generation_config.get("temperature", 0.55),
-        "top_p": generation_config.get("top_p", 0.9),
-        "max_tokens": generation_config.get("max_tokens", 600),
-    }
-
-    response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=30)
-    if response.status_code >= 400:
-        raise RuntimeError(f"OpenRouter error {response.status_code}: {response.text}")
-    return response.json()
+    return llm_gateway.complete(
+        "openrouter",
+        user_message(prompt),
+        temperature=generation_config.get("temperature", 0.55),
+        top_p=generation_config.get("top_p", 0.9),
+        max_tokens=generation_config.get("max_tokens", 600),
+        config=model_cfg,
+    ).text
 
 
 def _generate_with_hf(model_cfg: Dict[str, str], prompt: str, generation_config: Dict[str, Any]) -> str:
     token = model_cfg.get("token")
     model_id = model_cfg.get("model_id")
-    api_url = model_cfg.get("api_url") or "https://api-inference.huggingface.co/models"
     if not token or not model_id:
         raise RuntimeError("HuggingFace credentials are missing.")
 
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": generation_config.get("max_tokens", 600),
-            "temperature": generation_config.get("temperature", 0.55),
-            "top_p": generation_config.get("top_p", 0.9),
-        },
-        "options": {"wait_for_model": True},
-    }
-
-    response = requests.post(f"{api_url}/{model_id}", headers=headers, json=payload, timeout=30)
-    if response.status_code >= 400:
-        raise RuntimeError(f"HuggingFace error {response.status_code}: {response.text}")
-
-    data = response.json()
-    text = _extract_hf_text(data)
-    if not text:
-        raise RuntimeError("HuggingFace response was empty.")
-    return text.strip()
+    return llm_gateway.complete(
+        "huggingface",
+        user_message(prompt),
+        temperature=generation_config.get("temperature", 0.55),
+        top_p=generation_config.get("top_p", 0.9),
+        max_tokens=generation_config.get("max_tokens", 600),
+        config={"api_url": "https://api-inference.huggingface.co/models", **model_cfg},
+    ).text
 
 
 def _parse_email_plan(response: Any) -> Optional[Dict[str, Any]]:
@@ -285,26 +265,6 @@ def _extract_text(response: Any) -> str:
     return ""
 
 
-def _extract_hf_text(data: Any) -> str:
-    if isinstance(data, list) and data:
-        first = data[0]
-        if isinstance(first, dict) and first.get("generated_text"):
-            return str(first.get("generated_text", "")).strip()
-        if isinstance(first, str):
-            return first.strip()
-
-    if isinstance(data, dict):
-        if data.get("generated_text"):
-            return str(data.get("generated_text", "")).strip()
-        # text-generation-inference style
-        if data.get("choices") and isinstance(data["choices"], list):
-            maybe = data["choices"][0]
-            if isinstance(maybe, dict):
-                return str(maybe.get("text", "")).strip()
-
-    return ""
-
-
 def _load_json_block(text: str) -> Optional[Any]:
     cleaned = text.strip()
     if cleaned.startswith("```"):
@@ -0,0 +1,486 @@
+"""
+Push channel for server-sent events (SSE).
+
+Events are published to named channels (``user:<email>`` for notification
+counts, ``report:<id>`` for live architecture edits) and delivered to the
+SSE streams subscribed to them. Each worker keeps an in-process bus with a
+short per-channel history so a reconnecting ``EventSource`` can resume from
+its ``Last-Event-ID``. Workers exchange events over Redis pub/sub when it
+is available, otherwise over UDP datagrams on localhost.
+
+An idle stream blocks on its queue and only wakes for events or the
+keep-alive comment: it runs no queries and holds no database connection.
+It does hold a server thread, so each worker accepts at most
+``SSE_MAX_STREAMS`` streams; past that the endpoint answers 503 and the
+client falls back to polling.
+"""
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from functools import partial
+from typing import Dict, Iterable, List, Optional
+
+from flask import Response, current_app, jsonify
+
+logger = logging.getLogger(__name__)
+
+RESYNC = 'resync'
+
+
+def user_channel(user_email):
+    return f"user:{(user_email or '').lower()}"
+
+
+def report_channel(report_id):
+    return f"report:{report_id}"
+
+
+class Event:
+    """A published event; its SSE frame is encoded once for all subscribers."""
+
+    __slots__ = ('id', 'channel', 'type', 'data', 'seq', '_encoded')
+
+    def __init__(self, event_id, channel, event_type, data, seq=0):
+        self.id = event_id
+        self.channel = channel
+        self.type = event_type
+        self.data = data  # JSON text
+        self.seq = seq
+        self._encoded = None
+
+    @property
+    def encoded(self):
+        if self._encoded is None:
+            frame = f"event: {self.type}\ndata: {self.data}\n\n"
+            if self.id:
+                frame = f"id: {self.id}\n{frame}"
+            self._encoded = frame
+        return self._encoded
+
+
+def _resync_event(channel):
+    # No id: the client keeps its Last-Event-ID and refetches the full state
+    return Event(None, channel, RESYNC, '{}')
+
+
+class Subscription:
+    """Queue of events for one SSE stream."""
+
+    def __init__(self, channels, max_pending=500):
+        self.channels = frozenset(channels)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client; it resynchronizes when the stream is closed
+            self.overflowed = True
+
+    def wait(self, timeout) -> List[Event]:
+        """Block until events arrive (returns them) or ``timeout`` passes (returns [])."""
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class LocalSocketTransport:
+    """Fan-out between the workers on one host over localhost UDP.
+
+    Each worker binds a port and registers it as ``<pid>-<port>.port`` in a
+    shared directory; publishers send one datagram to every registered
+    port. Events larger than a datagram are replaced by a resync notice.
+    """
+
+    name = 'local'
+    max_message_size = 60000
+
+    def __init__(self, directory, refresh_interval=2.0):
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._receiver.bind(('127.0.0.1', 0))
+        self._receiver.settimeout(1.0)
+        self.port = self._receiver.getsockname()[1]
+        self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self._peer_file = os.path.join(directory, f"{os.getpid()}-{self.port}.port")
+        with open(self._peer_file, 'w') as f:
+            f.write(str(self.port))
+
+        self._peers = []
+        self._peers_loaded_at = 0.0
+        self._listener = None
+        self._stop = threading.Event()
+
+    def _peer_ports(self):
+        now = time.monotonic()
+        if now - self._peers_loaded_at < self.refresh_interval:
+            return self._peers
+        peers = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.port'):
+                continue
+            try:
+                pid, port = (int(part) for part in filename[:-5].split('-'))
+            except ValueError:
+                continue
+            if port == self.port:
+                continue
+            if not _process_alive(pid):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+                continue
+            peers.append(port)
+        self._peers, self._peers_loaded_at = peers, now
+        return peers
+
+    def send(self, message: bytes) -> bool:
+        if len(message) > self.max_message_size:
+            return False
+        for port in self._peer_ports():
+            try:
+                self._sender.sendto(message, ('127.0.0.1', port))
+            except OSError:
+                pass
+        return True
+
+    def start(self, callback):
+        if self._listener is not None:
+            return
+
+        def listen():
+            while not self._stop.is_set():
+                try:
+                    message, _ = self._receiver.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    # Windows reports ICMP port-unreachable on the next receive
+                    if self._stop.is_set():
+                        return
+                    continue
+                try:
+                    callback(message)
+                except Exception as e:
+                    logger.error(f"Event bus message from a peer worker failed: {e}")
+
+        self._listener = threading.Thread(target=listen, name='event-bus-listener', daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+            self._listener = None
+        for sock in (self._receiver, self._sender):
+            sock.close()
+        try:
+            os.remove(self._peer_file)
+        except OSError:
+            pass
+
+
+class RedisTransport:
+    """Fan-out between workers on any host over Redis pub/sub."""
+
+    name = 'redis'
+    max_message_size = 512 * 1024
+
+    def __init__(self, redis_client, channel='event_bus:fanout'):
+        self.redis_client = redis_client
+        self.channel = channel
+        self._listener = None
+        self._stop = threading.Event()
+
+    def send(self, message: bytes) -> bool:
+        if len(message) > self.max_message_size:
+            return False
+        self.redis_client.publish(self.channel, message)
+        return True
+
+    def start(self, callback):
+        if self._listener is not None:
+            return
+
+        def listen():
+            while not self._stop.is_set():
+                try:
+                    pubsub = self.redis_client.pubsub()
+                    pubsub.subscribe(self.channel)
+                    while not self._stop.is_set():
+                        message = pubsub.get_message(timeout=1.0)
+                        if message and message.get('type') == 'message':
+                            callback(message['data'])
+                except Exception as e:
+                    logger.error(f"Event bus subscriber failed: {e}")
+                    self._stop.wait(5)
+
+        self._listener = threading.Thread(target=listen, name='event-bus-listener', daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+            self._listener = None
+
+
+def _process_alive(pid):
+    try:
+        import psutil
+    except ImportError:  # pragma: no cover - optional dependency
+        return True
+    return psutil.pid_exists(pid)
+
+
+class EventBus:
+    """In-process publish/subscribe with per-channel history for resume."""
+
+    def __init__(self, transport_factory=None, history_size=200, max_pending=500):
+        self.history_size = history_size
+        self.max_pending = max_pending
+        self.origin = uuid.uuid4().hex[:8]
+        self._transport_factory = transport_factory
+        self._transport = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._seq = 0  # Local delivery order, used to replay missed events
+        self._history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._subscribers: Dict[str, set] = defaultdict(set)
+
+    def _ensure_transport(self):
+        # A transport created before a pre-fork server forked has no listener
+        # thread in the child; each process starts its own.
+        if self._transport_factory is None or self._pid == os.getpid():
+            return self._transport
+        self._pid = os.getpid()
+        try:
+            self._transport = self._transport_factory()
+            self._transport.start(self._on_remote_message)
+            logger.info(f"Event bus fan-out started ({self._transport.name})")
+        except Exception as e:
+            logger.error(f"Event bus fan-out unavailable, events stay in this worker: {e}")
+            self._transport = None
+        return self._transport
+
+    def publish(self, channel, event_type, data) -> str:
+        """Publish ``data`` (JSON-serializable) on ``channel``; returns the event id."""
+        event_id = f"{int(time.time() * 1000)}-{self.origin}-{next(self._ids)}"
+        payload = json.dumps(data, separators=(',', ':'), default=str)
+        self._deliver(event_id, channel, event_type, payload)
+
+        transport = self._ensure_transport()
+        if transport is not None:
+            message = json.dumps({
+                'origin': self.origin, 'id': event_id, 'channel': channel,
+                'type': event_type, 'data': payload
+            }).encode('utf-8')
+            try:
+                if not transport.send(message):
+                    transport.send(json.dumps({
+                        'origin': self.origin, 'id': None, 'channel': channel, 'type': RESYNC, 'data': '{}'
+                    }).encode('utf-8'))
+            except Exception as e:
+                logger.error(f"Event bus fan-out failed for {channel}: {e}")
+        return event_id
+
+    def _on_remote_message(self, message):
+        if isinstance(message, bytes):
+            message = message.decode('utf-8')
+        payload = json.loads(message)
+        if payload.get('origin') != self.origin:
+            self._deliver(payload['id'], payload['channel'], payload['type'], payload['data'])
+
+    def _deliver(self, event_id, channel, event_type, data):
+        with self._lock:
+            self._seq += 1
+            event = Event(event_id, channel, event_type, data, seq=self._seq)
+            if event_id:
+                self._history[channel].append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self, channels: Iterable[str], last_event_id: Optional[str] = None,
+                  max_subscriptions: Optional[int] = None):
+        """Register a subscription; returns it with the events missed since ``last_event_id``.
+
+        An id no longer in the history (or from before this worker started)
+        yields a single resync event instead. With ``max_subscriptions``
+        already open, nothing is registered and ``(None, [])`` is returned.
+        """
+        self._ensure_transport()
+        subscription = Subscription(channels, max_pending=self.max_pending)
+        with self._lock:
+            if max_subscriptions is not None and self._subscription_count() >= max_subscriptions:
+                return None, []
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+            backlog = self._backlog(subscription.channels, last_event_id) if last_event_id else []
+        return subscription, backlog
+
+    def _backlog(self, channels, last_event_id):
+        history = [event for channel in channels for event in self._history.get(channel, ())]
+        last = next((event for event in history if event.id == last_event_id), None)
+        if last is None:
+            return [_resync_event(channel) for channel in sorted(channels)]
+        return sorted((event for event in history if event.seq > last.seq), key=lambda e: e.seq)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return self._subscription_count()
+
+    def _subscription_count(self) -> int:
+        return len({sub for subs in self._subscribers.values() for sub in subs})
+
+    def stop(self):
+        if self._transport is not None:
+            self._transport.stop()
+            self._transport = None
+
+
+event_bus: Optional[EventBus] = None
+
+
+def init_event_bus(app, redis_client=None):
+    """Create the event bus, with Redis or localhost fan-out between workers."""
+    global event_bus
+
+    if event_bus is not None:
+        event_bus.stop()
+
+    mode = app.config.get('EVENT_BUS_TRANSPORT', 'auto')
+    if mode == 'redis' or (mode == 'auto' and redis_client is not None and redis_client.is_available()):
+        transport_factory = partial(RedisTransport, redis_client)
+    elif mode in ('auto', 'local'):
+        directory = app.config.get('EVENT_BUS_SOCKET_DIR') or os.path.join(app.instance_path, 'event_bus')
+        transport_factory = partial(LocalSocketTransport, directory)
+    else:
+        transport_factory = None
+
+    event_bus = EventBus(transport_factory, history_size=app.config.get('EVENT_BUS_HISTORY', 200))
+    import atexit
+    atexit.register(event_bus.stop)
+
+    app.logger.info(f"Event bus initialized (fan-out: {mode})")
+    return event_bus
+
+
+def get_event_bus() -> EventBus:
+    """Get the global event bus, creating a worker-local one if needed."""
+    global event_bus
+    if event_bus is None:
+        event_bus = EventBus()
+    return event_bus
+
+
+def event_stream(channels, last_event_id=None):
+    """SSE response streaming ``channels``, resuming after ``last_event_id``.
+
+    Call after authorization checks; the stream does not use the request or
+    database session once it starts.
+    """
+    config = current_app.config
+    keepalive = config.get('SSE_KEEPALIVE_SECONDS', 15)
+    max_age = config.get('SSE_MAX_STREAM_SECONDS', 300)
+    retry_ms = config.get('SSE_RETRY_MS', 3000)
+
+    bus = get_event_bus()
+    subscription, backlog = bus.subscribe(channels, last_event_id, config.get('SSE_MAX_STREAMS', 2))
+    if subscription is None:
+        # EventSource gives up on a non-200 response and the client polls instead
+        response = jsonify({'error': 'Too many open event streams, poll instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max_age)
+        return response
+
+    def generate():
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            for event in backlog:
+                yield event.encoded
+            # Streams are recycled so long-lived connections rebalance;
+            # EventSource reconnects with Last-Event-ID
+            deadline = time.monotonic() + max_age
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or subscription.overflowed:
+                    return
+                events = subscription.wait(timeout=min(keepalive, remaining))
+                if not events:
+                    yield ": keepalive\n\n"
+                for event in events:
+                    yield event.encoded
+        finally:
+            bus.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    # A stream closed before its first chunk never runs the generator's finally
+    response.call_on_close(lambda: bus.unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering
+    return response
+
+
+def publish_notifications(user_emails, payloads=None):
+    """Push new unread counts (and new notifications) to their recipients.
+
+    ``payloads`` maps a recipient to their new notification's ``to_dict()``,
+    taken before the commit so publishing never reloads expired rows.
+    """
+    from database.notification_counters import unread_counts
+
+    try:
+        user_emails = list(dict.fromkeys(email for email in user_emails if email))
+        if not user_emails:
+            return
+        counts = unread_counts(user_emails)
+        payloads = payloads or {}
+        bus = get_event_bus()
+        for email in user_emails:
+            bus.publish(user_channel(email), 'notifications', {
+                'unread': counts.get(email, 0),
+                'notification': payloads.get(email),
+            })
+    except Exception as e:
+        logger.error(f"Failed to publish notification events: {e}")
+
+
+def publish_architecture_version(report_id, snapshot, layout):
+    """Push a saved architecture version (with its normalized layout) to report viewers."""
+    try:
+        get_event_bus().publish(report_channel(report_id), 'architecture', {
+            'version': snapshot.to_dict() if snapshot is not None else None,
+            'layout': layout,
+        })
+    except Exception as e:
+        logger.error(f"Failed to publish architecture update for {report_id}: {e}")
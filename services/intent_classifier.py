@@ -0,0 +1,200 @@
+"""
+Single-pass keyword classifier for the AI agent.
+
+All intent, sentiment, urgency and task-relevance vocabularies are compiled
+once into a single keyword matcher with precomputed weights. A message is
+lowercased and scanned a single time; every vocabulary score is then
+derived from the set of keywords found, so the cost of analysing a message
+depends on its length and not on how many intents are defined.
+
+Keywords match as substrings, as the per-intent checks they replaced did:
+"now" is found in "know", and "what" in "what is".
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Intent -> [(keywords, weight per keyword found)]; confidence is capped at 1.0
+INTENT_VOCABULARIES: Dict[str, List[Tuple[Tuple[str, ...], float]]] = {
+    'create_report': [
+        (('create', 'new', 'generate', 'make', 'start', 'begin', 'build'), 0.3),
+        (('report', 'sat', 'document', 'form'), 0.4),
+    ],
+    'get_help': [(('help', 'how', 'what', 'guide', 'explain', 'show', 'teach', 'learn'), 0.2)],
+    'analyze_data': [
+        (('analyze', 'analysis', 'data', 'metrics', 'insights', 'trends', 'statistics', 'performance'), 0.25),
+    ],
+    'workflow_assistance': [
+        (('workflow', 'process', 'steps', 'procedure', 'automation', 'optimize', 'streamline'), 0.3),
+    ],
+    'knowledge_query': [
+        (('what is', 'explain', 'definition', 'standard', 'best practice', 'guideline'), 0.25),
+    ],
+    'system_operation': [(('status', 'performance', 'system', 'health', 'monitor', 'check', 'optimize'), 0.3)],
+    'collaboration': [(('team', 'collaborate', 'review', 'approve', 'share', 'assign', 'workflow'), 0.25)],
+    'troubleshooting': [
+        (('problem', 'issue', 'error', 'bug', 'fix', 'broken', 'not working', 'trouble'), 0.3),
+    ],
+}
+
+SENTIMENT_VOCABULARIES = {
+    'positive': ('good', 'great', 'excellent', 'perfect', 'amazing', 'wonderful', 'fantastic'),
+    'negative': ('bad', 'terrible', 'awful', 'horrible', 'frustrated', 'annoyed', 'problem'),
+}
+
+URGENCY_KEYWORDS = ('urgent', 'asap', 'immediately', 'critical', 'emergency', 'now', 'quickly')
+
+# Current task -> keywords that keep a message on topic (0.2 each)
+TASK_VOCABULARIES = {
+    'create_report': ('report', 'sat', 'create', 'generate', 'form'),
+    'data_analysis': ('analyze', 'data', 'metrics', 'insights', 'trends'),
+    'workflow': ('workflow', 'process', 'steps', 'automation'),
+}
+
+# Entity patterns run on the original (case-preserving) message
+PROJECT_REFERENCE_PATTERN = re.compile(r'\b[A-Z0-9]{3,}-[A-Z0-9]{2,}\b')
+DATE_PATTERN = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation factored on common prefixes, longest alternative first."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of lowercase keywords occur in a text.
+
+    Every keyword occurrence lies inside a run of letters (or, for phrases,
+    runs joined by single spaces), so the text is split into its distinct
+    words once and each word is resolved to the keywords it contains
+    through a memo shared by all calls. Phrases are confirmed with a direct
+    substring check only when all of their words were seen.
+    """
+
+    _WORD = re.compile(r'[a-z]+')
+
+    def __init__(self, keywords: Iterable[str], memo_size=50_000):
+        self.keywords = frozenset(keywords)
+        invalid = [keyword for keyword in self.keywords if not re.fullmatch(r'[a-z]+(?: [a-z]+)*', keyword)]
+        if invalid:
+            raise ValueError(f"Keywords must be lowercase words separated by single spaces: {invalid}")
+        self.phrases = {keyword: tuple(keyword.split(' ')) for keyword in self.keywords if ' ' in keyword}
+        terms = (self.keywords - set(self.phrases)) | {part for parts in self.phrases.values() for part in parts}
+        self._terms = re.compile(f'(?=({_trie_regex(terms)}))')
+        # Every term present whenever a given term is present
+        self._implied: Dict[str, FrozenSet[str]] = {
+            term: frozenset(other for other in terms if other in term) for term in terms
+        }
+        self._memo: Dict[str, FrozenSet[str]] = {}
+        self.memo_size = memo_size
+
+    def _word_terms(self, word: str) -> FrozenSet[str]:
+        terms = self._memo.get(word)
+        if terms is None:
+            found = set()
+            for match in self._terms.finditer(word):
+                found |= self._implied[match.group(1)]
+            terms = frozenset(found)
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[word] = terms
+        return terms
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Keywords occurring in ``text`` (already lowercased) as substrings."""
+        found = set()
+        for word in set(self._WORD.findall(text)):
+            found |= self._word_terms(word)
+        for phrase, parts in self.phrases.items():
+            if found.issuperset(parts) and phrase in text:
+                found.add(phrase)
+        return frozenset(found & self.keywords)
+
+
+class IntentClassifier:
+    """Intent, sentiment, urgency and task relevance scores from one scan of a message."""
+
+    def __init__(self, intents=INTENT_VOCABULARIES, sentiment=SENTIMENT_VOCABULARIES,
+                 urgency=URGENCY_KEYWORDS, tasks=TASK_VOCABULARIES):
+        self.intents = list(intents)
+        # (signal, index) -> weight, keyword -> signals it contributes to
+        self._weights: Dict[Tuple[str, int], float] = {}
+        self._signals: Dict[str, List[Tuple[str, int]]] = {}
+
+        def register(signal, index, keywords, weight):
+            self._weights[(signal, index)] = weight
+            for keyword in keywords:
+                self._signals.setdefault(keyword, []).append((signal, index))
+
+        for intent, groups in intents.items():
+            for index, (keywords, weight) in enumerate(groups):
+                register(intent, index, keywords, weight)
+        for polarity, keywords in sentiment.items():
+            register(f'sentiment:{polarity}', 0, keywords, 1)
+        register('urgency', 0, urgency, 1)
+        for task, keywords in tasks.items():
+            register(f'task:{task}', 0, keywords, 0.2)
+
+        self.matcher = KeywordMatcher(self._signals)
+
+    def scan(self, message: str) -> Dict[Tuple[str, int], int]:
+        """Distinct keywords found per vocabulary group."""
+        counts: Dict[Tuple[str, int], int] = {}
+        for keyword in self.matcher.scan(message.lower()):
+            for signal in self._signals[keyword]:
+                counts[signal] = counts.get(signal, 0) + 1
+        return counts
+
+    def _score(self, counts, signal) -> float:
+        total = 0
+        index = 0
+        while (signal, index) in self._weights:
+            total += counts.get((signal, index), 0) * self._weights[(signal, index)]
+            index += 1
+        return total
+
+    def classify(self, message: str, current_task=None) -> Dict[str, object]:
+        counts = self.scan(message)
+
+        intents = {}
+        for intent in self.intents:
+            score = self._score(counts, intent)
+            intents[intent] = {'confidence': min(score, 1.0), 'keywords_found': score > 0}
+
+        positive = counts.get(('sentiment:positive', 0), 0)
+        negative = counts.get(('sentiment:negative', 0), 0)
+        if positive > negative:
+            sentiment = 'positive'
+        elif negative > positive:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+
+        urgent = counts.get(('urgency', 0), 0)
+        urgency = 'high' if urgent >= 2 else 'medium' if urgent == 1 else 'low'
+
+        if not current_task or (f'task:{current_task}', 0) not in self._weights:
+            relevance = 0.5
+        else:
+            relevance = min(self._score(counts, f'task:{current_task}'), 1.0)
+
+        return {'intents': intents, 'sentiment': sentiment, 'urgency': urgency, 'context_relevance': relevance}
+
+
+intent_classifier = IntentClassifier()
@@ -0,0 +1,140 @@
+"""
+Inverted tag index over long-term knowledge entries.
+
+Each tag maps to a max-heap of the entries carrying it, ordered by a static
+part of the relevance score::
+
+    importance * 0.5 + access_count * 0.1 - age_in_days * 0.01
+
+Age is the only part that changes with time and it shifts every entry
+equally, so ordering entries by ``importance * 0.5 + access_count * 0.1 +
+created_day * 0.01`` gives an upper bound on the exact score (within the
+0.01 lost to whole-day rounding). ``top_k`` walks each queried tag's heap
+from the best bound down and stops as soon as no remaining entry can beat
+the current k-th best exact score, so a query touches a handful of entries
+regardless of how many carry the tag.
+
+Entries whose score changes (an access) or that are removed leave stale
+heap items behind; those are skipped when reached and the heap is rebuilt
+once they outnumber the live ones.
+"""
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_EPOCH = datetime(2000, 1, 1)
+_DAY = 86400.0
+# Whole-day rounding of the age can lift the exact score this much above the bound
+_ROUNDING_SLACK = 0.01 + 1e-9
+
+
+def _days(moment: datetime) -> float:
+    return (moment - _EPOCH).total_seconds() / _DAY
+
+
+def relevance_score(entry, now: datetime) -> float:
+    """Importance, recency and access count, as ranked by get_relevant_knowledge."""
+    return entry.importance * 0.5 + (now - entry.timestamp).days * -0.01 + entry.access_count * 0.1
+
+
+def _static_score(entry) -> float:
+    return entry.importance * 0.5 + entry.access_count * 0.1 + _days(entry.timestamp) * 0.01
+
+
+class KnowledgeIndex:
+    """Knowledge entries by key, with per-tag heaps for top-k retrieval."""
+
+    def __init__(self):
+        self.entries: Dict[str, object] = {}
+        self._postings: Dict[str, List[Tuple[float, str, int]]] = {}
+        self._stale: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._tags: Dict[str, frozenset] = {}
+        self._version = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _post(self, key, entry):
+        self._version += 1
+        self._versions[key] = self._version
+        self._tags[key] = tags = frozenset(entry.tags)
+        bound = -_static_score(entry)
+        for tag in tags:
+            heapq.heappush(self._postings.setdefault(tag, []), (bound, key, self._version))
+
+    def _retire(self, key):
+        del self._versions[key]
+        for tag in self._tags.pop(key):
+            self._stale[tag] = self._stale.get(tag, 0) + 1
+
+    def add(self, key: str, entry):
+        """Index ``entry`` under its tags, replacing any entry stored under ``key``."""
+        if key in self.entries:
+            self._retire(key)
+        self.entries[key] = entry
+        self._post(key, entry)
+
+    def remove(self, key: str):
+        if self.entries.pop(key, None) is not None:
+            self._retire(key)
+
+    def reindex(self, key: str):
+        """Refresh ``key`` after its importance, access count or tags changed."""
+        self._retire(key)
+        self._post(key, self.entries[key])
+
+    def tag_counts(self) -> Dict[str, int]:
+        """Live entries per tag."""
+        return {tag: len(heap) - self._stale.get(tag, 0) for tag, heap in self._postings.items()}
+
+    def _compact(self, tag):
+        heap = self._postings[tag]
+        live = [item for item in heap if self._versions.get(item[1]) == item[2]]
+        heapq.heapify(live)
+        if live:
+            self._postings[tag] = live
+        else:
+            del self._postings[tag]
+        self._stale[tag] = 0
+
+    def top_k(self, tags: Iterable[str], k: int, now: Optional[datetime] = None) -> List[str]:
+        """Keys of the ``k`` best-scoring entries carrying any of ``tags``, best first."""
+        if k <= 0:
+            return []
+        now = now or datetime.now()
+        offset = _ROUNDING_SLACK - _days(now) * 0.01
+        best: List[Tuple[float, str]] = []
+        seen = set()
+
+        for tag in dict.fromkeys(tags):
+            heap = self._postings.get(tag)
+            if not heap:
+                continue
+            taken = []
+            while heap:
+                bound, key, version = heap[0]
+                if self._versions.get(key) != version:
+                    heapq.heappop(heap)
+                    self._stale[tag] -= 1
+                    continue
+                if len(best) >= k and -bound + offset < best[0][0]:
+                    break
+                taken.append(heapq.heappop(heap))
+                if key in seen:
+                    continue
+                seen.add(key)
+                item = (relevance_score(self.entries[key], now), key)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            for item in taken:
+                heapq.heappush(heap, item)
+            if self._stale.get(tag, 0) > len(heap) // 2:
+                self._compact(tag)
+
+        return [key for _, key in sorted(best, reverse=True)]
@@ -0,0 +1,252 @@
+"""
+Concurrent provider fan-out with hedged requests and circuit breakers.
+
+``ProviderFanout.complete`` asks the primary provider first. If it has not
+answered by its recent p95 latency (from the LLM gateway's statistics), the
+next provider is asked as well and whichever answers first wins; the other
+attempt is cancelled. A provider that fails is replaced immediately by the
+next one, and providers that keep failing are skipped by their circuit
+breaker until a probe succeeds again.
+
+The attempts are coordinated on one asyncio loop running in a background
+thread; sync Flask views reach it through ``complete`` (a thread bridge).
+Each attempt goes through ``llm_gateway.complete`` on a bounded executor,
+so responses are still cached, coalesced and metered, and share the
+gateway's pooled HTTP connections.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+from services.llm_gateway import Completion, LLMError, LLMGateway, Messages, llm_gateway, provider_config
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open single probe."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may start; in half-open state only one probe is let through."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a probe that was cancelled before it produced a result."""
+        with self._lock:
+            self._probing = False
+
+
+class ProviderFanout:
+    """Hedged, failover-aware completion across several providers."""
+
+    def __init__(self, gateway: LLMGateway = llm_gateway, max_workers=8, hedge_percentile=0.95,
+                 default_hedge_delay=2.0, min_hedge_delay=0.05, hedging=True,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.gateway = gateway
+        self.max_workers = max_workers
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.hedging = hedging
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._stats = {'requests': 0, 'hedged': 0, 'secondary_wins': 0, 'failovers': 0, 'cancelled': 0}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pid = None
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(provider)
+            if breaker is None:
+                breaker = self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def hedge_delay(self, provider: str) -> float:
+        """How long to wait for ``provider`` before asking the next one."""
+        latency = self.gateway.latency_percentile(provider, self.hedge_percentile)
+        if latency is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, latency)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop thread and executor, restarted after a fork."""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='llm-fanout', daemon=True)
+            thread.start()
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='llm-call')
+            self._loop = loop
+            self._pid = os.getpid()
+            return loop
+
+    async def _attempt(self, provider: str, config, messages: Messages, params, timeout) -> Completion:
+        breaker = self.breaker(provider)
+        call = partial(self.gateway.complete, provider, messages, config=config, timeout=timeout, **params)
+        try:
+            completion = await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return completion
+
+    async def complete_async(self, configs: Dict[str, Dict[str, str]], messages: Messages,
+                             params: Dict[str, Any], timeout: float = 30) -> Completion:
+        """Race the providers in ``configs`` (in priority order) for one completion."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiting = list(configs)
+        primary = waiting[0]
+        running: Dict[asyncio.Task, str] = {}
+        errors: List[Exception] = []
+        self._count('requests')
+
+        def launch() -> Optional[str]:
+            while waiting:
+                provider = waiting.pop(0)
+                if not self.breaker(provider).allow():
+                    errors.append(LLMError(f'{provider} is unavailable (circuit open).'))
+                    continue
+                task = loop.create_task(self._attempt(provider, configs[provider], messages, params, timeout))
+                running[task] = provider
+                return provider
+            return None
+
+        try:
+            latest = launch()
+            while running:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LLMError(f'AI providers did not answer within {timeout:g}s.')
+                wait = min(remaining, self.hedge_delay(latest)) if self.hedging and waiting else remaining
+                done, _ = await asyncio.wait(running, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than its p95: hedge with the next provider
+                    hedge = launch()
+                    if hedge is not None:
+                        logger.info(f"Hedging LLM request to {hedge} after {wait:.2f}s")
+                        self._count('hedged')
+                        latest = hedge
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        if provider != primary:
+                            self._count('secondary_wins')
+                        return task.result()
+                    errors.append(task.exception())
+                    logger.warning(f"LLM provider {provider} failed: {task.exception()}")
+
+                if waiting:
+                    self._count('failovers')
+                    latest = launch() or latest
+        finally:
+            for task in running:
+                task.cancel()
+                self._count('cancelled')
+
+        if len(errors) == 1:
+            raise errors[0]
+        raise LLMError('All AI providers failed: ' + '; '.join(str(e) for e in errors))
+
+    def complete(self, providers: Sequence[str], messages: Messages, *, timeout: float = 30,
+                 **params) -> Completion:
+        """Blocking entry point for sync views; unconfigured providers are skipped."""
+        configs, errors = {}, []
+        for provider in dict.fromkeys(providers):
+            try:
+                configs[provider] = provider_config(provider)
+            except LLMError as exc:
+                errors.append(exc)
+        if not configs:
+            raise errors[0] if errors else LLMError('No AI provider is configured.')
+
+        params = {name: value for name, value in params.items() if value is not None}
+        future = asyncio.run_coroutine_threadsafe(
+            self.complete_async(configs, messages, params, timeout), self._ensure_loop()
+        )
+        try:
+            return future.result(timeout + 1)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise LLMError(f'AI providers did not answer within {timeout:g}s.')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedging counters and circuit breaker state per provider."""
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = dict(self.breakers)
+        stats['breakers'] = {
+            provider: {'state': breaker.state, 'failures': breaker.failures}
+            for provider, breaker in breakers.items()
+        }
+        return stats
+
+
+# Global fan-out used by the AI assistant
+provider_fanout = ProviderFanout()
+
+
+def init_provider_fanout(app):
+    """Apply the app's hedging and circuit breaker settings."""
+    provider_fanout.hedging = app.config.get('LLM_HEDGING_ENABLED', True)
+    provider_fanout.hedge_percentile = app.config.get('LLM_HEDGE_PERCENTILE', 0.95)
+    provider_fanout.default_hedge_delay = app.config.get('LLM_HEDGE_DEFAULT_DELAY', 2.0)
+    provider_fanout.max_workers = app.config.get('LLM_FANOUT_WORKERS', 8)
+    provider_fanout.failure_threshold = app.config.get('LLM_BREAKER_FAILURES', 5)
+    provider_fanout.reset_timeout = app.config.get('LLM_BREAKER_RESET_SECONDS', 30)
+    app.logger.info(f"LLM provider fan-out initialized (hedging: {'on' if provider_fanout.hedging else 'off'})")
+    return provider_fanout
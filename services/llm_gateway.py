@@ -0,0 +1,439 @@
+"""
+Gateway for LLM provider calls (OpenRouter, OpenAI, HuggingFace).
+
+Every completion in the AI assistant and the email generators goes through
+``LLMGateway.complete``:
+
+- identical requests (provider, model, whitespace-normalized messages and
+  sampling parameters) are answered from a SQLite cache with a TTL and a
+  size limit;
+- concurrent identical requests in one worker share a single provider call;
+- per-provider latency, errors, cache hits and token usage are kept in
+  ``get_stats()`` and exported as Prometheus metrics.
+
+Providers are functions ``(config, messages, params, timeout) -> Completion``
+registered in ``PROVIDERS``; tests swap in a ``StubProvider``.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+
+class LLMError(RuntimeError):
+    """Raised when a provider is not configured or its call fails."""
+
+
+@dataclass
+class Completion:
+    """Text returned by a provider with its token usage."""
+
+    text: str
+    provider: str = ''
+    model: str = ''
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+
+
+def user_message(prompt: str) -> Messages:
+    return [{'role': 'user', 'content': prompt}]
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for providers that report no usage
+    return max(1, len(text) // 4) if text else 0
+
+
+# Provider settings: (token setting, model setting, default model, URL setting, default URL)
+_PROVIDER_SETTINGS = {
+    'openrouter': ('OPENROUTER_API_KEY', 'OPENROUTER_MODEL', 'qwen/qwen3-coder:free',
+                   'OPENROUTER_API_URL', 'https://openrouter.ai/api/v1'),
+    'openai': ('OPENAI_API_KEY', 'OPENAI_MODEL', 'gpt-3.5-turbo',
+               'OPENAI_API_URL', 'https://api.openai.com/v1'),
+    'huggingface': ('HF_API_TOKEN', 'HF_MODEL', 'HuggingFaceH4/zephyr-7b-beta',
+                    'HF_API_URL', 'https://api-inference.huggingface.co/models'),
+}
+
+
+def provider_config(provider: str) -> Dict[str, str]:
+    """Token, model and URL for ``provider`` from the app config or environment."""
+    if provider not in _PROVIDER_SETTINGS:
+        return {'model_id': provider}
+    token_key, model_key, default_model, url_key, default_url = _PROVIDER_SETTINGS[provider]
+    config = current_app.config
+    token = config.get(token_key) or os.environ.get(token_key)
+    if not token:
+        raise LLMError(f'{token_key} is not configured.')
+    return {
+        'token': token,
+        'model_id': config.get(model_key) or default_model,
+        'api_url': (config.get(url_key) or default_url).rstrip('/'),
+    }
+
+
+# One pooled HTTP session for all provider calls, sized for concurrent fan-out
+_http = requests.Session()
+
+
+def configure_http_pool(pool_size: int):
+    adapter = HTTPAdapter(pool_connections=len(_PROVIDER_SETTINGS), pool_maxsize=pool_size)
+    _http.mount('https://', adapter)
+    _http.mount('http://', adapter)
+
+
+def _post(url: str, token: str, payload: Dict[str, Any], timeout: float, label: str) -> Any:
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    try:
+        response = _http.post(url, headers=headers, json=payload, timeout=timeout)
+    except requests.RequestException as exc:
+        raise LLMError(f'{label} request failed: {exc}') from exc
+    if response.status_code >= 400:
+        raise LLMError(f'{label} API error: {response.status_code} {response.text}')
+    return response.json()
+
+
+def _chat_completion(url: str, label: str, config, messages: Messages, params, timeout) -> Completion:
+    data = _post(url, (config.get('token') or '').strip(), {'model': config['model_id'], 'messages': messages, **params},
+                 timeout, label)
+    try:
+        content = data['choices'][0]['message']['content']
+        if not content:
+            raise KeyError('empty content')
+    except (KeyError, IndexError, TypeError) as exc:
+        raise LLMError(f'Unexpected response format from {label}.') from exc
+    usage = data.get('usage') or {}
+    text = str(content).strip()
+    return Completion(
+        text,
+        model=config['model_id'],
+        prompt_tokens=usage.get('prompt_tokens') or _estimate_tokens(''.join(m['content'] for m in messages)),
+        completion_tokens=usage.get('completion_tokens') or _estimate_tokens(text),
+    )
+
+
+def openrouter_provider(config, messages: Messages, params, timeout) -> Completion:
+    return _chat_completion(f"{config.get('api_url', 'https://openrouter.ai/api/v1')}/chat/completions",
+                            'OpenRouter', config, messages, params, timeout)
+
+
+def openai_provider(config, messages: Messages, params, timeout) -> Completion:
+    return _chat_completion(f"{config.get('api_url', 'https://api.openai.com/v1')}/chat/completions",
+                            'OpenAI', config, messages, params, timeout)
+
+
+def _hf_text(data: Any) -> str:
+    if isinstance(data, list) and data:
+        first = data[0]
+        if isinstance(first, dict) and first.get('generated_text'):
+            return str(first['generated_text']).strip()
+        if isinstance(first, str):
+            return first.strip()
+    if isinstance(data, dict):
+        if data.get('generated_text'):
+            return str(data['generated_text']).strip()
+        # text-generation-inference style
+        if data.get('choices') and isinstance(data['choices'], list):
+            maybe = data['choices'][0]
+            if isinstance(maybe, dict):
+                return str(maybe.get('text', '')).strip()
+    return ''
+
+
+def huggingface_provider(config, messages: Messages, params, timeout) -> Completion:
+    prompt = '\n\n'.join(m['content'] for m in messages)
+    payload = {
+        'inputs': prompt,
+        'parameters': {
+            'max_new_tokens': params.get('max_tokens', 400),
+            'temperature': params.get('temperature', 0.4),
+            'top_p': params.get('top_p', 0.9),
+        },
+        'options': {'wait_for_model': True},
+    }
+    data = _post(f"{config['api_url']}/{config['model_id']}", config.get('token'), payload, timeout, 'HuggingFace')
+    text = _hf_text(data)
+    if not text:
+        raise LLMError('HuggingFace response was empty.')
+    return Completion(text, model=config['model_id'], prompt_tokens=_estimate_tokens(prompt),
+                      completion_tokens=_estimate_tokens(text))
+
+
+class StubProvider:
+    """Offline provider for tests and local development; counts its calls."""
+
+    def __init__(self, reply: Any = None, delay: float = 0.0, error: Optional[Exception] = None):
+        self.reply = reply if reply is not None else (lambda messages: f"stub: {messages[-1]['content'][:80]}")
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, config, messages: Messages, params, timeout) -> Completion:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        text = self.reply(messages) if callable(self.reply) else str(self.reply)
+        prompt = ''.join(m['content'] for m in messages)
+        return Completion(text, model=config.get('model_id', 'stub'), prompt_tokens=_estimate_tokens(prompt),
+                          completion_tokens=_estimate_tokens(text))
+
+
+PROVIDERS: Dict[str, Callable[..., Completion]] = {
+    'openrouter': openrouter_provider,
+    'openai': openai_provider,
+    'huggingface': huggingface_provider,
+}
+
+
+def cache_key(provider: str, model: str, messages: Messages, params: Dict[str, Any]) -> str:
+    """Hash of the request with whitespace differences removed."""
+    normalized = {
+        'provider': provider,
+        'model': model,
+        'messages': [[m.get('role', 'user'), ' '.join(str(m.get('content', '')).split())] for m in messages],
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Exact-match completion cache in SQLite, shared by the workers on a host."""
+
+    def __init__(self, path, ttl=86400, max_entries=5000, trim_every=50):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._writes = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_responses ('
+            'key TEXT PRIMARY KEY, provider TEXT NOT NULL, model TEXT NOT NULL, text TEXT NOT NULL, '
+            'prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL, expires_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_responses_expires_at ON llm_responses (expires_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key) -> Optional[Completion]:
+        row = self._connection().execute(
+            'SELECT provider, model, text, prompt_tokens, completion_tokens FROM llm_responses '
+            'WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return Completion(row[2], provider=row[0], model=row[1], prompt_tokens=row[3], completion_tokens=row[4],
+                          cached=True)
+
+    def put(self, key, completion: Completion):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, completion.provider, completion.model, completion.text, completion.prompt_tokens,
+             completion.completion_tokens, time.time() + self.ttl)
+        )
+        self._writes += 1
+        if self._writes % self.trim_every == 0:
+            self.trim()
+
+    def trim(self) -> int:
+        """Drop expired entries, then the oldest ones beyond ``max_entries``."""
+        conn = self._connection()
+        deleted = conn.execute('DELETE FROM llm_responses WHERE expires_at <= ?', (time.time(),)).rowcount
+        excess = conn.execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0] - self.max_entries
+        if excess > 0:
+            deleted += conn.execute(
+                'DELETE FROM llm_responses WHERE key IN '
+                '(SELECT key FROM llm_responses ORDER BY expires_at LIMIT ?)', (excess,)
+            ).rowcount
+        return deleted
+
+    def clear(self):
+        self._connection().execute('DELETE FROM llm_responses')
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGateway:
+    """Cached, coalesced and metered access to the registered providers."""
+
+    def __init__(self, cache: Optional[ResponseCache] = None, latency_window=200):
+        self.cache = cache
+        self.latency_window = latency_window
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def complete(self, provider: str, messages: Messages, *, temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None, top_p: Optional[float] = None, timeout: float = 30,
+                 config: Optional[Dict[str, str]] = None, use_cache: bool = True) -> Completion:
+        """Completion for ``messages``, from the cache when an identical request was answered."""
+        call = PROVIDERS.get(provider)
+        if call is None:
+            raise LLMError(f"AI provider '{provider}' is not supported.")
+        config = config or provider_config(provider)
+        params = {
+            name: value for name, value in
+            (('temperature', temperature), ('max_tokens', max_tokens), ('top_p', top_p)) if value is not None
+        }
+        model = config.get('model_id', '')
+        key = cache_key(provider, model, messages, params)
+        cache = self.cache if use_cache else None
+
+        if cache is not None:
+            try:
+                cached = cache.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                self._record(provider, 'cache_hit')
+                return cached
+
+        def fetch():
+            started = time.perf_counter()
+            try:
+                completion = call(config, messages, params, timeout)
+            except Exception:
+                self._record(provider, 'error', time.perf_counter() - started)
+                raise
+            completion = replace(completion, provider=provider, model=completion.model or model)
+            self._record(provider, 'success', time.perf_counter() - started, completion)
+            if cache is not None:
+                try:
+                    cache.put(key, completion)
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache write failed: {e}")
+            return completion
+
+        return self._single_flight(provider, key, fetch, timeout)
+
+    def _single_flight(self, provider, key, fetch, timeout) -> Completion:
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise LLMError(f'Timed out waiting for an identical {provider} request.')
+            self._record(provider, 'coalesced')
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _record(self, provider, outcome, latency=None, completion=None):
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None:
+                stats = self._stats[provider] = {
+                    'success': 0, 'error': 0, 'cache_hit': 0, 'coalesced': 0,
+                    'prompt_tokens': 0, 'completion_tokens': 0,
+                    'latencies': deque(maxlen=self.latency_window),
+                }
+            stats[outcome] += 1
+            if latency is not None:
+                stats['latencies'].append(latency)
+            if completion is not None:
+                stats['prompt_tokens'] += completion.prompt_tokens
+                stats['completion_tokens'] += completion.completion_tokens
+
+        try:
+            from monitoring.metrics import record_llm_call
+        except ImportError:
+            return
+        try:
+            record_llm_call(provider, outcome, latency, completion)
+        except Exception as e:
+            logger.debug(f"Could not export LLM metrics: {e}")
+
+    def latency_percentile(self, provider: str, percentile: float) -> Optional[float]:
+        """Latency of recent successful and failed calls at ``percentile`` (0-1)."""
+        with self._lock:
+            latencies = sorted(self._stats.get(provider, {}).get('latencies', ()))
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters, token totals and p50/p95 latency per provider."""
+        with self._lock:
+            providers = list(self._stats)
+            snapshot = {
+                provider: {k: v for k, v in stats.items() if k != 'latencies'}
+                for provider, stats in self._stats.items()
+            }
+        for provider in providers:
+            snapshot[provider]['latency_p50'] = self.latency_percentile(provider, 0.5)
+            snapshot[provider]['latency_p95'] = self.latency_percentile(provider, 0.95)
+        return snapshot
+
+
+# Global gateway; init_llm_gateway adds the shared response cache
+llm_gateway = LLMGateway()
+
+
+def init_llm_gateway(app):
+    """Attach the response cache configured for ``app`` to the gateway."""
+    if app.config.get('LLM_CACHE_ENABLED', True):
+        llm_gateway.cache = ResponseCache(
+            app.config.get('LLM_CACHE_PATH') or os.path.join(app.instance_path, 'llm_cache.db'),
+            ttl=app.config.get('LLM_CACHE_TTL_SECONDS', 86400),
+            max_entries=app.config.get('LLM_CACHE_MAX_ENTRIES', 5000),
+        )
+    else:
+        llm_gateway.cache = None
+    configure_http_pool(app.config.get('LLM_HTTP_POOL_SIZE', 20))
+    app.logger.info(f"LLM gateway initialized (cache: {'on' if llm_gateway.cache else 'off'})")
+    return llm_gateway
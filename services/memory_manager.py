@@ -3,17 +3,19 @@ Advanced Memory Management System for AI Agent
 Implements hierarchical memory architecture with consolidation protocols
 """
 
+import bisect
 import json
 import os
-import hashlib
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict, field
-from collections import deque, defaultdict
-import pickle
+from collections import OrderedDict, deque, defaultdict
 from flask import current_app, session, g
 
+from services.knowledge_index import KnowledgeIndex
+from services.memory_store import MemoryStore
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -126,6 +128,7 @@ class MidTermMemory:
         self.task_dependencies: Dict[str, List[str]] = defaultdict(list)
         self.project_relationships: Dict[str, List[str]] = defaultdict(list)
         self.session_insights: List[MemoryEntry] = []
+        self._insight_keys: List[float] = []  # Negated importances, parallel to session_insights
         self.decision_history: List[Dict[str, Any]] = []
         self.session_start: datetime = datetime.now()
         
@@ -162,14 +165,19 @@ class MidTermMemory:
     
     def add_insight(self, insight: MemoryEntry):
         """Add session insight"""
-        self.session_insights.append(insight)
-        
-        # Keep insights sorted by importance
-        self.session_insights.sort(key=lambda x: x.importance, reverse=True)
+        # Keep insights sorted by importance (after earlier insights of equal importance)
+        position = bisect.bisect_right(self._insight_keys, -insight.importance)
+        self.session_insights.insert(position, insight)
+        self._insight_keys.insert(position, -insight.importance)
         
         # Limit number of insights
         if len(self.session_insights) > 50:
-            self.session_insights = self.session_insights[:50]
+            del self.session_insights[50:]
+            del self._insight_keys[50:]
+    
+    def insights_above(self, importance: float) -> List[MemoryEntry]:
+        """Session insights more important than ``importance``, most important first"""
+        return self.session_insights[:bisect.bisect_left(self._insight_keys, -importance)]
     
     def record_decision(self, decision: Dict[str, Any]):
         """Record important decisions made in session"""
@@ -193,10 +201,16 @@ class MidTermMemory:
 class LongTermMemory:
     """Manages persistent learning and cross-session knowledge"""
     
-    def __init__(self, storage_path: str = "instance/memory"):
+    # Beyond knowledge_limit entries, only the knowledge_trim_to most important are kept
+    knowledge_limit = 1000
+    knowledge_trim_to = 800
+    
+    def __init__(self, storage_path: str = "instance/memory", flush_interval: float = 1.0,
+                 profile_cache_size: int = 256):
         self.storage_path = storage_path
-        self.user_profiles: Dict[str, UserProfile] = {}
-        self.domain_knowledge: Dict[str, MemoryEntry] = {}
+        self.user_profiles: "OrderedDict[str, UserProfile]" = OrderedDict()
+        self.profile_cache_size = profile_cache_size
+        self.knowledge_index = KnowledgeIndex()
         self.historical_patterns: Dict[str, Dict[str, Any]] = defaultdict(dict)
         self.cross_project_insights: List[MemoryEntry] = []
         self.optimization_patterns: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
@@ -205,82 +219,57 @@ class LongTermMemory:
         # Ensure storage directory exists
         os.makedirs(storage_path, exist_ok=True)
         
+        # Rows are written behind by a background flusher
+        self.store = MemoryStore(os.path.join(storage_path, "memory.db"), flush_interval=flush_interval)
+        
         # Load existing data
         self._load_persistent_data()
     
-    def _get_user_profile_path(self, user_id: str) -> str:
-        """Get file path for user profile"""
-        safe_user_id = hashlib.md5(user_id.encode()).hexdigest()
-        return os.path.join(self.storage_path, f"profile_{safe_user_id}.pkl")
-    
-    def _get_domain_knowledge_path(self) -> str:
-        """Get file path for domain knowledge"""
-        return os.path.join(self.storage_path, "domain_knowledge.pkl")
-    
-    def _get_patterns_path(self) -> str:
-        """Get file path for historical patterns"""
-        return os.path.join(self.storage_path, "historical_patterns.pkl")
-    
     def _load_persistent_data(self):
-        """Load persistent data from storage"""
+        """Load shared knowledge and patterns; user profiles are loaded on first use"""
         try:
-            # Load domain knowledge
-            domain_path = self._get_domain_knowledge_path()
-            if os.path.exists(domain_path):
-                with open(domain_path, 'rb') as f:
-                    self.domain_knowledge = pickle.load(f)
-            
-            # Load historical patterns
-            patterns_path = self._get_patterns_path()
-            if os.path.exists(patterns_path):
-                with open(patterns_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.historical_patterns = data.get('patterns', defaultdict(dict))
-                    self.cross_project_insights = data.get('insights', [])
-                    self.optimization_patterns = data.get('optimizations', defaultdict(list))
-                    self.global_statistics = data.get('statistics', {})
-                    
+            self.store.import_pickle_files(self.storage_path)
         except Exception as e:
-            logger.error(f"Error loading persistent memory data: {e}")
-    
-    def _save_persistent_data(self):
-        """Save persistent data to storage"""
+            logger.error(f"Error migrating pickled memory data: {e}")
+        
         try:
-            # Save domain knowledge
-            domain_path = self._get_domain_knowledge_path()
-            with open(domain_path, 'wb') as f:
-                pickle.dump(self.domain_knowledge, f)
-            
-            # Save historical patterns and insights
-            patterns_path = self._get_patterns_path()
-            data = {
-                'patterns': dict(self.historical_patterns),
-                'insights': self.cross_project_insights,
-                'optimizations': dict(self.optimization_patterns),
-                'statistics': self.global_statistics
-            }
-            with open(patterns_path, 'wb') as f:
-                pickle.dump(data, f)
-                
+            for key, entry in self.store.items('knowledge'):
+                self.knowledge_index.add(key, entry)
+            self.historical_patterns = defaultdict(dict, self.store.items('pattern'))
+            self.optimization_patterns = defaultdict(list, self.store.items('optimization'))
+            self.global_statistics = dict(self.store.items('statistic'))
+            self.cross_project_insights = self.store.get('insights', 'cross_project', [])
         except Exception as e:
-            logger.error(f"Error saving persistent memory data: {e}")
+            logger.error(f"Error loading persistent memory data: {e}")
+    
+    @property
+    def domain_knowledge(self) -> Dict[str, MemoryEntry]:
+        """Knowledge entries by key (read-only view; use add_domain_knowledge to change)"""
+        return self.knowledge_index.entries
+    
+    def flush(self):
+        """Write queued memory changes now"""
+        self.store.flush()
     
     def get_user_profile(self, user_id: str) -> UserProfile:
         """Get or create user profile"""
-        if user_id not in self.user_profiles:
-            # Try to load from storage
-            profile_path = self._get_user_profile_path(user_id)
-            if os.path.exists(profile_path):
-                try:
-                    with open(profile_path, 'rb') as f:
-                        self.user_profiles[user_id] = pickle.load(f)
-                except Exception as e:
-                    logger.error(f"Error loading user profile: {e}")
-                    self.user_profiles[user_id] = UserProfile(user_id=user_id)
-            else:
-                self.user_profiles[user_id] = UserProfile(user_id=user_id)
+        profile = self.user_profiles.get(user_id)
+        if profile is not None:
+            self.user_profiles.move_to_end(user_id)
+            return profile
         
-        return self.user_profiles[user_id]
+        try:
+            profile = self.store.get('profile', user_id)
+        except Exception as e:
+            logger.error(f"Error loading user profile: {e}")
+            profile = None
+        if profile is None:
+            profile = UserProfile(user_id=user_id)
+        
+        self.user_profiles[user_id] = profile
+        while len(self.user_profiles) > self.profile_cache_size:
+            self.user_profiles.popitem(last=False)
+        return profile
     
     def update_user_profile(self, user_id: str, updates: Dict[str, Any]):
         """Update user profile with new information"""
@@ -294,15 +283,13 @@ class LongTermMemory:
         profile.updated_at = datetime.now()
         profile.total_interactions += 1
         
-        # Save to storage
+        # Queue for storage
         self._save_user_profile(user_id, profile)
     
     def _save_user_profile(self, user_id: str, profile: UserProfile):
-        """Save user profile to storage"""
+        """Queue user profile for storage"""
         try:
-            profile_path = self._get_user_profile_path(user_id)
-            with open(profile_path, 'wb') as f:
-                pickle.dump(profile, f)
+            self.store.put('profile', user_id, profile)
         except Exception as e:
             logger.error(f"Error saving user profile: {e}")
     
@@ -316,19 +303,20 @@ class LongTermMemory:
         )
         
         key = f"{domain}_{datetime.now().isoformat()}"
-        self.domain_knowledge[key] = entry
+        self.knowledge_index.add(key, entry)
+        self.store.put('knowledge', key, entry)
         
         # Cleanup old entries if too many
-        if len(self.domain_knowledge) > 1000:
+        if len(self.knowledge_index) > self.knowledge_limit:
             # Keep only the most important and recent entries
             sorted_entries = sorted(
-                self.domain_knowledge.items(),
+                self.knowledge_index.entries.items(),
                 key=lambda x: (x[1].importance, x[1].timestamp),
                 reverse=True
             )
-            self.domain_knowledge = dict(sorted_entries[:800])
-        
-        self._save_persistent_data()
+            for evicted_key, _ in sorted_entries[self.knowledge_trim_to:]:
+                self.knowledge_index.remove(evicted_key)
+                self.store.delete('knowledge', evicted_key)
     
     def add_historical_pattern(self, pattern_type: str, pattern_data: Dict[str, Any]):
         """Add historical pattern"""
@@ -352,7 +340,7 @@ class LongTermMemory:
             self.historical_patterns[pattern_type]['data'] = \
                 self.historical_patterns[pattern_type]['data'][-50:]
         
-        self._save_persistent_data()
+        self.store.put('pattern', pattern_type, self.historical_patterns[pattern_type])
     
     def add_cross_project_insight(self, insight: MemoryEntry):
         """Add cross-project insight"""
@@ -363,7 +351,7 @@ class LongTermMemory:
         if len(self.cross_project_insights) > 200:
             self.cross_project_insights = self.cross_project_insights[:150]
         
-        self._save_persistent_data()
+        self.store.put('insights', 'cross_project', self.cross_project_insights)
     
     def add_optimization_pattern(self, optimization_type: str, pattern: Dict[str, Any]):
         """Add optimization pattern"""
@@ -375,34 +363,27 @@ class LongTermMemory:
             self.optimization_patterns[optimization_type] = \
                 self.optimization_patterns[optimization_type][-30:]
         
-        self._save_persistent_data()
+        self.store.put('optimization', optimization_type, self.optimization_patterns[optimization_type])
     
     def get_relevant_knowledge(self, query_tags: List[str], limit: int = 10) -> List[MemoryEntry]:
-        """Get relevant knowledge based on tags"""
+        """Get relevant knowledge based on tags, ranked by importance, recency and access count"""
         relevant_entries = []
         
-        for entry in self.domain_knowledge.values():
-            if any(tag in entry.tags for tag in query_tags):
-                entry.access()
-                relevant_entries.append(entry)
-        
-        # Sort by relevance (importance + recency + access count)
-        relevant_entries.sort(
-            key=lambda x: (
-                x.importance * 0.5 +
-                (datetime.now() - x.timestamp).days * -0.01 +
-                x.access_count * 0.1
-            ),
-            reverse=True
-        )
+        for key in self.knowledge_index.top_k(query_tags, limit):
+            entry = self.knowledge_index.entries[key]
+            entry.access()
+            self.knowledge_index.reindex(key)
+            self.store.put('knowledge', key, entry)
+            relevant_entries.append(entry)
         
-        return relevant_entries[:limit]
+        return relevant_entries
     
     def update_global_statistics(self, stats: Dict[str, Any]):
         """Update global statistics"""
         self.global_statistics.update(stats)
         self.global_statistics['last_updated'] = datetime.now()
-        self._save_persistent_data()
+        for key in list(stats) + ['last_updated']:
+            self.store.put('statistic', key, self.global_statistics[key])
 
 class MemoryConsolidationProtocol:
     """Handles memory consolidation between different memory levels"""
@@ -498,14 +479,13 @@ class MemoryConsolidationProtocol:
                 )
         
         # Extract domain knowledge from insights
-        for insight in self.mid_term.session_insights:
-            if insight.importance > 0.7:
-                domain = insight.tags[0] if insight.tags else 'general'
-                self.long_term.add_domain_knowledge(
-                    domain,
-                    insight.content,
-                    insight.importance
-                )
+        for insight in self.mid_term.insights_above(0.7):
+            domain = insight.tags[0] if insight.tags else 'general'
+            self.long_term.add_domain_knowledge(
+                domain,
+                insight.content,
+                insight.importance
+            )
         
         # Extract optimization patterns
         for decision in self.mid_term.decision_history:
@@ -559,13 +539,12 @@ class MemoryConsolidationProtocol:
         
         # Analyze successful interactions
         successful_patterns = []
-        for insight in self.mid_term.session_insights:
-            if insight.importance > 0.8:
-                successful_patterns.append({
-                    'intent': insight.content.get('intent'),
-                    'confidence': insight.content.get('confidence'),
-                    'context': insight.content.get('context', {})
-                })
+        for insight in self.mid_term.insights_above(0.8):
+            successful_patterns.append({
+                'intent': insight.content.get('intent'),
+                'confidence': insight.content.get('confidence'),
+                'context': insight.content.get('context', {})
+            })
         
         if successful_patterns:
             self.long_term.add_optimization_pattern(
@@ -581,10 +560,11 @@ class MemoryConsolidationProtocol:
 class AdvancedMemoryManager:
     """Main memory management system coordinating all memory levels"""
     
-    def __init__(self, storage_path: str = "instance/memory"):
+    def __init__(self, storage_path: str = "instance/memory", flush_interval: float = 1.0,
+                 profile_cache_size: int = 256):
         self.short_term = ShortTermMemory()
         self.mid_term = MidTermMemory()
-        self.long_term = LongTermMemory(storage_path)
+        self.long_term = LongTermMemory(storage_path, flush_interval, profile_cache_size)
         self.consolidation = MemoryConsolidationProtocol(
             self.short_term, self.mid_term, self.long_term
         )
@@ -732,34 +712,53 @@ class AdvancedMemoryManager:
         self.mid_term = MidTermMemory()
 
 # Global memory manager instance
-memory_manager = AdvancedMemoryManager()
+memory_manager: Optional[AdvancedMemoryManager] = None
+
+def init_memory_manager(app):
+    """Create the memory manager with its store in the app's instance folder"""
+    global memory_manager
+    if memory_manager is not None:
+        memory_manager.long_term.store.close()
+    memory_manager = AdvancedMemoryManager(
+        app.config.get('MEMORY_STORAGE_PATH') or os.path.join(app.instance_path, 'memory'),
+        flush_interval=app.config.get('MEMORY_FLUSH_INTERVAL_SECONDS', 1.0),
+        profile_cache_size=app.config.get('MEMORY_PROFILE_CACHE_SIZE', 256)
+    )
+    app.logger.info(f"Agent memory store initialized at {memory_manager.long_term.store.path}")
+    return memory_manager
+
+def get_memory_manager() -> AdvancedMemoryManager:
+    """Get the global memory manager, creating it for the current app if needed"""
+    if memory_manager is None:
+        return init_memory_manager(current_app)
+    return memory_manager
 
 # Public interface functions
 def initialize_memory_session(user_id: str, session_id: str):
     """Initialize memory system for a new session"""
-    return memory_manager.initialize_session(user_id, session_id)
+    return get_memory_manager().initialize_session(user_id, session_id)
 
 def process_memory_interaction(user_id: str, user_message: str, agent_response: str,
                              intent: str, entities: Dict[str, Any], context: Dict[str, Any],
                              confidence: float, task_context: Optional[str] = None):
     """Process interaction through memory system"""
-    return memory_manager.process_interaction(
+    return get_memory_manager().process_interaction(
         user_id, user_message, agent_response, intent, entities, 
         context, confidence, task_context
     )
 
 def get_memory_context(user_id: str, query_tags: List[str] = None) -> Dict[str, Any]:
     """Get comprehensive memory context"""
-    return memory_manager.get_contextual_memory(user_id, query_tags)
+    return get_memory_manager().get_contextual_memory(user_id, query_tags)
 
 def get_response_context(user_id: str, current_intent: str) -> Dict[str, Any]:
     """Get memory-influenced response context"""
-    return memory_manager.get_memory_influenced_response_context(user_id, current_intent)
+    return get_memory_manager().get_memory_influenced_response_context(user_id, current_intent)
 
 def add_memory_correction(correction: Dict[str, Any]):
     """Add user correction to memory"""
-    return memory_manager.add_user_correction(correction)
+    return get_memory_manager().add_user_correction(correction)
 
 def end_memory_session(user_id: str):
     """End memory session"""
-    return memory_manager.end_session(user_id)
\ No newline at end of file
+    return get_memory_manager().end_session(user_id)
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+SQLite-backed persistence for the AI agent's long-term memory.
+
+Each profile, knowledge entry, pattern and statistic is its own row in
+``memory_entries`` (kind, key). Writes are write-behind: ``put`` and
+``delete`` serialize the value and queue it, and a background flusher
+commits queued rows in one transaction every ``flush_interval`` seconds
+(or sooner when ``max_pending`` rows are waiting). Reads see queued writes
+first, then the batch being flushed until its transaction commits, so
+callers never observe stale data.
+
+``import_pickle_files`` migrates the pickle files written by earlier
+versions and renames them to ``*.migrated``.
+"""
+import atexit
+import glob
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Marks a queued delete
+_DELETED = object()
+
+
+class MemoryStore:
+    """Key/value rows grouped by kind, with batched background writes."""
+
+    def __init__(self, path, flush_interval=1.0, max_pending=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        # Batch being written by flush(); readable until its COMMIT
+        self._inflight: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._local = threading.local()
+        self._flusher = None
+        self._flusher_pid = None
+        self._connection()
+        atexit.register(self.close)
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS memory_entries ('
+            'kind TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL, updated_at REAL NOT NULL, '
+            'PRIMARY KEY (kind, key)) WITHOUT ROWID'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        self._flusher = threading.Thread(target=self._run_flusher, name='memory-store-flusher', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Memory store flush failed: {e}")
+
+    def put(self, kind: str, key: str, value: Any):
+        """Queue ``value`` for writing; it is serialized now, so later mutations are not captured."""
+        self._queue(kind, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def delete(self, kind: str, key: str):
+        self._queue(kind, key, _DELETED)
+
+    def _queue(self, kind, key, blob):
+        with self._lock:
+            self._pending[(kind, key)] = blob
+            pending = len(self._pending)
+            self._ensure_flusher()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all queued rows in one transaction; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            now = time.time()
+            upserts = [(kind, key, blob, now) for (kind, key), blob in batch.items() if blob is not _DELETED]
+            deletes = [(kind, key) for (kind, key), blob in batch.items() if blob is _DELETED]
+            conn = self._connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany('INSERT OR REPLACE INTO memory_entries VALUES (?, ?, ?, ?)', upserts)
+                conn.executemany('DELETE FROM memory_entries WHERE kind = ? AND key = ?', deletes)
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                # Requeue, keeping anything written since
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                    self._inflight = {}
+                raise
+            with self._lock:
+                self._inflight = {}
+            return len(batch)
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush memory store on shutdown: {e}")
+
+    def get(self, kind: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            blob = self._pending.get((kind, key))
+            if blob is None:
+                blob = self._inflight.get((kind, key))
+        if blob is None:
+            row = self._connection().execute(
+                'SELECT data FROM memory_entries WHERE kind = ? AND key = ?', (kind, key)
+            ).fetchone()
+            blob = row[0] if row else _DELETED
+        return default if blob is _DELETED else pickle.loads(blob)
+
+    def items(self, kind: str) -> Iterator[Tuple[str, Any]]:
+        """All (key, value) pairs of ``kind``, including queued writes."""
+        with self._lock:
+            pending = {key: blob for (k, key), blob in self._inflight.items() if k == kind}
+            pending.update((key, blob) for (k, key), blob in self._pending.items() if k == kind)
+        rows = self._connection().execute(
+            'SELECT key, data FROM memory_entries WHERE kind = ?', (kind,)
+        ).fetchall()
+        merged = {key: blob for key, blob in rows}
+        merged.update(pending)
+        for key, blob in merged.items():
+            if blob is not _DELETED:
+                try:
+                    yield key, pickle.loads(blob)
+                except Exception as e:
+                    logger.error(f"Skipping unreadable memory entry {kind}/{key}: {e}")
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def import_pickle_files(self, directory) -> int:
+        """Import the pickle files of the previous storage format; returns entries imported."""
+        imported = 0
+        migrated = []
+
+        domain_path = os.path.join(directory, 'domain_knowledge.pkl')
+        if os.path.exists(domain_path):
+            with open(domain_path, 'rb') as f:
+                for key, entry in pickle.load(f).items():
+                    self.put('knowledge', key, entry)
+                    imported += 1
+            migrated.append(domain_path)
+
+        patterns_path = os.path.join(directory, 'historical_patterns.pkl')
+        if os.path.exists(patterns_path):
+            with open(patterns_path, 'rb') as f:
+                data = pickle.load(f)
+            for kind, values in (('pattern', data.get('patterns', {})),
+                                 ('optimization', data.get('optimizations', {})),
+                                 ('statistic', data.get('statistics', {}))):
+                for key, value in values.items():
+                    self.put(kind, key, value)
+                    imported += 1
+            if data.get('insights'):
+                self.put('insights', 'cross_project', data['insights'])
+                imported += 1
+            migrated.append(patterns_path)
+
+        for profile_path in sorted(glob.glob(os.path.join(directory, 'profile_*.pkl'))):
+            try:
+                with open(profile_path, 'rb') as f:
+                    profile = pickle.load(f)
+                self.put('profile', profile.user_id, profile)
+                imported += 1
+                migrated.append(profile_path)
+            except Exception as e:
+                logger.error(f"Could not migrate memory profile {profile_path}: {e}")
+
+        if migrated:
+            self.flush()
+            for path in migrated:
+                os.replace(path, f"{path}.migrated")
+            logger.info(f"Migrated {imported} memory entries from {len(migrated)} pickle files")
+        return imported
@@ -5,6 +5,7 @@ Uses database-first approach with intelligent fallback
 
 from flask import current_app
 from models import ModuleSpec, db
+from database.statements import find_module_spec
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,10 +27,7 @@ def lookup_module(company: str, model: str) -> dict:
     logger.info(f"Looking up module: {company_normalized} {model_normalized}")
     
     # TIER 1: Database Lookup (INSTANT, RELIABLE)
-    existing = ModuleSpec.query.filter(
-        db.func.upper(ModuleSpec.company) == company_normalized,
-        db.func.upper(ModuleSpec.model) == model_normalized
-    ).first()
+    existing = find_module_spec(company_normalized, model_normalized)
     
     if existing:
         logger.info(f"Found in database: {company_normalized} {model_normalized}")
@@ -170,10 +168,7 @@ def save_module_manually(company: str, model: str, specs: dict) -> dict:
         model_normalized = model.strip().upper()
         
         # Check if already exists
-        existing = ModuleSpec.query.filter(
-            db.func.upper(ModuleSpec.company) == company_normalized,
-            db.func.upper(ModuleSpec.model) == model_normalized
-        ).first()
+        existing = find_module_spec(company_normalized, model_normalized)
         
         if existing:
             logger.info(f"Updating existing module: {company_normalized} {model_normalized}")
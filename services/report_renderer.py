@@ -9,7 +9,8 @@ from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Pt
 
-from models import Report, SATReport
+from models import Report
+from database.statements import get_sat_report
 
 TABLE_SECTION_KEYS: List[Tuple[str, str]] = [
     ('PRE_TEST_REQUIREMENTS', 'Pre-Test Requirements'),
@@ -35,7 +36,7 @@ def generate_modern_sat_report(submission_id: str) -> Dict[str, Any]:
     if not report:
         return {'error': 'Report not found.'}
 
-    sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+    sat_report = get_sat_report(submission_id)
     if not sat_report:
         return {'error': 'SAT data not available for this report.'}
 
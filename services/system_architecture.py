@@ -11,6 +11,7 @@ from models import (
     SystemArchitectureTemplate,
     SystemArchitectureVersion,
 )
+from services.event_bus import publish_architecture_version
 
 DEFAULT_CANVAS_SETTINGS: Dict = {
     "width": 1920,
@@ -332,13 +333,14 @@ def persist_layout(
         report.fds_report = fds_report
 
     fds_report.set_system_architecture(layout)
-    fds_report.record_architecture_version(
+    snapshot = fds_report.record_architecture_version(
         layout,
         created_by=created_by,
         note=note,
         version_label=version_label,
     )
     db.session.commit()
+    publish_architecture_version(report.id, snapshot, layout)
 
 
 def list_templates(*, include_shared: bool = True, owned_by: Optional[str] = None) -> List[Dict]:
@@ -474,6 +476,7 @@ def record_version_snapshot(
         version_label=version_label,
     )
     db.session.commit()
+    publish_architecture_version(report_id, snapshot, layout)
     return snapshot
 
 
@@ -0,0 +1,134 @@
+"""Batched email -> user resolution for views that display many users.
+
+Lookups go through three layers: a request-scoped identity map (``g``), a
+process-wide TTL cache, and finally a single ``IN`` query for whatever is
+still missing. Views should resolve every email they need up front with
+``resolve_users`` instead of calling ``User.query.filter_by(email=...)``
+per row.
+"""
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+
+from models import User
+
+DEFAULT_TTL_SECONDS = 60
+MAX_CACHED_USERS = 5000
+
+
+class UserInfo(NamedTuple):
+    id: int
+    email: str
+    full_name: str
+    role: Optional[str]
+
+
+_CACHE: Dict[str, tuple] = {}  # email -> (UserInfo or None, expires_at)
+_CACHE_LOCK = threading.Lock()
+
+
+def _ttl_seconds() -> int:
+    if has_app_context():
+        return int(current_app.config.get('USER_DIRECTORY_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    return DEFAULT_TTL_SECONDS
+
+
+def _identity_map() -> Dict[str, Optional[UserInfo]]:
+    if not has_app_context():
+        return {}
+    identity_map = g.get('_user_identity_map')
+    if identity_map is None:
+        identity_map = {}
+        g._user_identity_map = identity_map
+    return identity_map
+
+
+def resolve_users(emails: Iterable[str]) -> Dict[str, UserInfo]:
+    """Resolve ``emails`` to ``UserInfo`` records with at most one query.
+
+    Unknown emails are omitted from the result (and remembered as unknown
+    for the TTL so they are not queried again).
+    """
+    wanted = {email for email in emails if email}
+    if not wanted:
+        return {}
+
+    identity_map = _identity_map()
+    resolved: Dict[str, Optional[UserInfo]] = {}
+
+    missing = []
+    for email in wanted:
+        if email in identity_map:
+            resolved[email] = identity_map[email]
+        else:
+            missing.append(email)
+
+    if missing:
+        now = time.time()
+        still_missing = []
+        with _CACHE_LOCK:
+            for email in missing:
+                entry = _CACHE.get(email)
+                if entry and entry[1] > now:
+                    resolved[email] = entry[0]
+                else:
+                    still_missing.append(email)
+
+        if still_missing:
+            rows = User.query.with_entities(
+                User.id, User.email, User.full_name, User.role
+            ).filter(User.email.in_(still_missing)).all()
+            found = {row.email: UserInfo(row.id, row.email, row.full_name, row.role) for row in rows}
+
+            expires_at = now + _ttl_seconds()
+            with _CACHE_LOCK:
+                if len(_CACHE) + len(still_missing) > MAX_CACHED_USERS:
+                    _CACHE.clear()
+                for email in still_missing:
+                    info = found.get(email)
+                    _CACHE[email] = (info, expires_at)
+                    resolved[email] = info
+
+        for email in missing:
+            identity_map[email] = resolved[email]
+
+    return {email: info for email, info in resolved.items() if info is not None}
+
+
+def resolve_user(email: str) -> Optional[UserInfo]:
+    """Resolve a single email (served from the identity map or cache when possible)."""
+    return resolve_users([email]).get(email)
+
+
+def resolve_full_name(email: str, default: str = '') -> str:
+    """Return the user's current full name, or ``default`` when unknown."""
+    info = resolve_user(email)
+    return info.full_name if info and info.full_name else default
+
+
+def invalidate_user(email: Optional[str] = None) -> None:
+    """Drop ``email`` (or every entry) from the process-wide cache."""
+    with _CACHE_LOCK:
+        if email is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(email, None)
+    identity_map = g.get('_user_identity_map') if has_app_context() else None
+    if identity_map:
+        if email is None:
+            identity_map.clear()
+        else:
+            identity_map.pop(email, None)
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.email)
+    # A changed email must also evict the old address
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_user(old_email)
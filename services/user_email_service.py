@@ -6,9 +6,10 @@ import json
 import os
 from html import escape
 from typing import Any, Dict, Optional, Union
-import requests
 from flask import current_app
 
+from services.llm_gateway import LLMError, llm_gateway
+
 
 class UserEmailError(Exception):
     """Custom exception for user email generation errors."""
@@ -194,7 +195,7 @@ def _build_welcome_prompt(user_data: Dict[str, Any]) -> str:
     return "\n".join(prompt_lines)
 
 
-def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str) -> Any:
+def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str) -> str:
     """Generate email content using OpenRouter API."""
     token = model_cfg.get("token", "").strip()
     model_id = model_cfg.get("model_id")
@@ -202,120 +203,43 @@ def _generate_with_openrouter(model_cfg: Dict[str, str], prompt: str) -> Any:
     if not token or not model_id:
         raise UserEmailError("OpenRouter credentials are missing.")
     
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": model_id,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.5,
-        "max_tokens": 500,
-    }
-    
-    try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-    except requests.RequestException as exc:
-        raise UserEmailError(f"OpenRouter request failed: {exc}") from exc
-    
-    if response.status_code >= 400:
-        raise UserEmailError(f"OpenRouter error {response.status_code}: {response.text}")
-    
-    return response.json()
+    return _complete("openrouter", model_cfg, [{"role": "user", "content": prompt}])
 
 
-def _generate_with_openai(model_cfg: Dict[str, str], prompt: str) -> Any:
+def _generate_with_openai(model_cfg: Dict[str, str], prompt: str) -> str:
     """Generate email content using OpenAI API."""
     token = model_cfg.get("token", "").strip()
-    model_id = model_cfg.get("model_id", "gpt-3.5-turbo")
     
     if not token:
         raise UserEmailError("OpenAI API key is missing.")
     
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": model_id,
-        "messages": [
-            {"role": "system", "content": "You are a professional email writer for an industrial automation company."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.5,
-        "max_tokens": 500,
-    }
-    
-    try:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-    except requests.RequestException as exc:
-        raise UserEmailError(f"OpenAI request failed: {exc}") from exc
-    
-    if response.status_code >= 400:
-        raise UserEmailError(f"OpenAI error {response.status_code}: {response.text}")
-    
-    return response.json()
+    messages = [
+        {"role": "system", "content": "You are a professional email writer for an industrial automation company."},
+        {"role": "user", "content": prompt}
+    ]
+    return _complete("openai", {"model_id": "gpt-3.5-turbo", **model_cfg}, messages)
 
 
 def _generate_with_hf(model_cfg: Dict[str, str], prompt: str) -> str:
     """Generate email content using HuggingFace API."""
     token = model_cfg.get("token")
     model_id = model_cfg.get("model_id")
-    api_url = model_cfg.get("api_url", "https://api-inference.huggingface.co/models")
     
     if not token or not model_id:
         raise UserEmailError("HuggingFace credentials are missing.")
     
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": 500,
-            "temperature": 0.5,
-            "top_p": 0.9,
-        },
-        "options": {"wait_for_model": True},
-    }
-    
+    config = {"api_url": "https://api-inference.huggingface.co/models", **model_cfg}
+    return _complete("huggingface", config, [{"role": "user", "content": prompt}], top_p=0.9)
+
+
+def _complete(provider: str, model_cfg: Dict[str, str], messages, **params) -> str:
+    """Call the provider through the LLM gateway (cached and coalesced)."""
     try:
-        response = requests.post(
-            f"{api_url}/{model_id}",
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-    except requests.RequestException as exc:
-        raise UserEmailError(f"HuggingFace request failed: {exc}") from exc
-    
-    if response.status_code >= 400:
-        raise UserEmailError(f"HuggingFace error {response.status_code}: {response.text}")
-    
-    data = response.json()
-    
-    if isinstance(data, list) and data:
-        first = data[0]
-        if isinstance(first, dict) and first.get("generated_text"):
-            return str(first["generated_text"]).strip()
-        if isinstance(first, str):
-            return first.strip()
-    
-    if isinstance(data, dict) and data.get("generated_text"):
-        return str(data["generated_text"]).strip()
-    
-    raise UserEmailError("HuggingFace response was empty.")
+        return llm_gateway.complete(
+            provider, messages, temperature=0.5, max_tokens=500, config=model_cfg, **params
+        ).text
+    except LLMError as exc:
+        raise UserEmailError(str(exc)) from exc
 
 
 def _parse_email_response(response: Any) -> Optional[Dict[str, Any]]:
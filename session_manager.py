@@ -1,108 +1,275 @@
 """
 Session Management and Revocation System for SAT Report Generator
 Handles server-side session invalidation and tracking
+
+Revoked session IDs are appended to a SQLite log shared by every worker on
+the host. Each worker keeps the unexpired IDs in memory, so the per-request
+check is a dict lookup; new rows written by other workers are replayed at
+most ``sync_interval`` seconds later, and expired rows are compacted away.
 """
 
 import os
 import json
 import time
-import hashlib
-from datetime import datetime, timedelta
-from flask import session, current_app
+import logging
+import sqlite3
+import threading
+from flask import session
 from threading import Lock
 import secrets
 
+logger = logging.getLogger(__name__)
+
 SESSION_TIMEOUT_SECONDS = 1800  # 30 minutes
 ACTIVITY_UPDATE_THRESHOLD = 60  # seconds between disk writes
+REVOCATION_TTL_SECONDS = 86400  # revoked IDs are remembered for 24 hours
+REVOCATION_SYNC_SECONDS = 1.0  # max delay before other workers see a revocation
+REVOCATION_COMPACT_SECONDS = 300  # how often expired revocations are deleted
+
+
+class RevocationStore:
+    """
+    Append-only log of revoked session IDs with a per-worker in-memory view
+
+    Rows are never updated, only appended by ``revoke`` and deleted by
+    ``compact`` once expired. ``seq`` is AUTOINCREMENT so it is never reused
+    and each worker can replay just the rows after the last one it has seen.
+    """
+
+    def __init__(self, path, ttl=REVOCATION_TTL_SECONDS, sync_interval=REVOCATION_SYNC_SECONDS,
+                 compact_interval=REVOCATION_COMPACT_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.compact_interval = compact_interval
+        self._revoked = {}  # session_id -> expires_at
+        self._last_seq = 0
+        self._next_sync = 0.0
+        self._next_compact = time.monotonic() + compact_interval
+        self._sync_lock = Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS revoked_sessions ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'session_id TEXT NOT NULL, '
+            'revoked_at REAL NOT NULL, '
+            'expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_revoked_sessions_expires_at ON revoked_sessions (expires_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def revoke(self, session_id, revoked_at=None):
+        """Record a revocation; visible in this worker immediately."""
+        revoked_at = revoked_at or time.time()
+        expires_at = revoked_at + self.ttl
+        self._revoked[session_id] = expires_at
+        try:
+            self._connection().execute(
+                'INSERT INTO revoked_sessions (session_id, revoked_at, expires_at) VALUES (?, ?, ?)',
+                (session_id, revoked_at, expires_at)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error saving revoked session: {e}")
+
+    def revoke_many(self, revocations):
+        """Append several ``(session_id, revoked_at)`` pairs in one transaction."""
+        now = time.time()
+        rows = [(sid, ts, ts + self.ttl) for sid, ts in revocations if ts + self.ttl > now]
+        if not rows:
+            return 0
+        conn = self._connection()
+        with self._sync_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT INTO revoked_sessions (session_id, revoked_at, expires_at) VALUES (?, ?, ?)', rows
+                )
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        for sid, _, expires_at in rows:
+            self._revoked[sid] = expires_at
+        return len(rows)
+
+    def is_revoked(self, session_id):
+        """O(1) membership check; replays other workers' revocations when due."""
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        expires_at = self._revoked.get(session_id)
+        return expires_at is not None and expires_at > time.time()
+
+    def sync(self):
+        """Apply rows appended since the last sync and compact when due.
+
+        Only one thread syncs at a time; the others keep answering from the
+        current view instead of waiting.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sync = time.monotonic() + self.sync_interval
+            rows = self._connection().execute(
+                'SELECT seq, session_id, expires_at FROM revoked_sessions WHERE seq > ? ORDER BY seq',
+                (self._last_seq,)
+            ).fetchall()
+            now = time.time()
+            for seq, session_id, expires_at in rows:
+                if expires_at > now:
+                    self._revoked[session_id] = expires_at
+            if rows:
+                self._last_seq = rows[-1][0]
+
+            if time.monotonic() >= self._next_compact:
+                self._compact(now)
+        except sqlite3.Error as e:
+            logger.warning(f"Error syncing revoked sessions: {e}")
+        finally:
+            self._sync_lock.release()
+
+    def compact(self):
+        """Delete expired revocations from the log and this worker's view."""
+        with self._sync_lock:
+            return self._compact(time.time())
+
+    def _compact(self, now):
+        self._next_compact = time.monotonic() + self.compact_interval
+        deleted = self._connection().execute(
+            'DELETE FROM revoked_sessions WHERE expires_at <= ?', (now,)
+        ).rowcount
+        for session_id, expires_at in list(self._revoked.items()):
+            if expires_at <= now:
+                self._revoked.pop(session_id, None)
+        if deleted:
+            logger.info(f"Compacted {deleted} expired session revocations")
+        return deleted
+
+    def import_legacy_file(self, json_path):
+        """Move revocations from the old ``{session_id: timestamp}`` JSON file into the log.
+
+        The file is renamed before reading so only one worker imports it.
+        """
+        claimed = f"{json_path}.migrated"
+        try:
+            os.rename(json_path, claimed)
+        except OSError:
+            return 0
+        try:
+            with open(claimed, 'r') as f:
+                data = json.load(f)
+            imported = self.revoke_many((sid, float(ts)) for sid, ts in data.items())
+            logger.info(f"Imported {imported} revoked sessions from {json_path}")
+            return imported
+        except (ValueError, OSError, sqlite3.Error) as e:
+            logger.error(f"Error importing revoked sessions from {json_path}: {e}")
+            return 0
+
+    def __len__(self):
+        return len(self._revoked)
 
 
 class SessionManager:
     """
     Manages session revocation and validation
-    Uses both in-memory and file-based storage for persistence
+    Revocations are kept in a shared ``RevocationStore``
     """
-    
+
     def __init__(self):
-        self.revoked_sessions = set()
         self.session_timestamps = {}
         self.lock = Lock()
-        self.revocation_file = 'instance/revoked_sessions.json'
+        self.revocation_file = 'instance/revoked_sessions.json'  # Legacy format, imported once
+        self.revocation_db = 'instance/revoked_sessions.db'
+        self.revocation_ttl = REVOCATION_TTL_SECONDS
+        self.revocation_sync_interval = REVOCATION_SYNC_SECONDS
         self.session_timeout = SESSION_TIMEOUT_SECONDS
         self.activity_update_threshold = ACTIVITY_UPDATE_THRESHOLD
-        self._load_revoked_sessions()
-        
-    def _load_revoked_sessions(self):
-        """Load revoked sessions from persistent storage"""
-        try:
-            if os.path.exists(self.revocation_file):
-                with open(self.revocation_file, 'r') as f:
-                    data = json.load(f)
-                    # Only load sessions revoked in last 24 hours
-                    cutoff_time = time.time() - 86400  # 24 hours
-                    self.revoked_sessions = {
-                        sid for sid, timestamp in data.items() 
-                        if float(timestamp) > cutoff_time
-                    }
-        except Exception as e:
-            print(f"Error loading revoked sessions: {e}")
-            self.revoked_sessions = set()
-    
-    def _save_revoked_sessions(self):
-        """Save revoked sessions to persistent storage"""
-        try:
-            os.makedirs('instance', exist_ok=True)
-            # Save with timestamps for cleanup
-            data = {sid: time.time() for sid in self.revoked_sessions}
-            with open(self.revocation_file, 'w') as f:
-                json.dump(data, f)
-        except Exception as e:
-            print(f"Error saving revoked sessions: {e}")
-    
+        self._store = None
+
+    def configure(self, revocation_db=None, revocation_file=None, ttl=None, sync_interval=None):
+        """Point the manager at a revocation log; the store is reopened on next use."""
+        with self.lock:
+            if revocation_db:
+                self.revocation_db = revocation_db
+            if revocation_file:
+                self.revocation_file = revocation_file
+            if ttl is not None:
+                self.revocation_ttl = ttl
+            if sync_interval is not None:
+                self.revocation_sync_interval = sync_interval
+            self._store = None
+
+    @property
+    def store(self):
+        """Revocation store, opened lazily so importing this module has no side effects."""
+        store = self._store
+        if store is None:
+            with self.lock:
+                store = self._store
+                if store is None:
+                    store = RevocationStore(
+                        self.revocation_db,
+                        ttl=self.revocation_ttl,
+                        sync_interval=self.revocation_sync_interval,
+                    )
+                    if self.revocation_file and os.path.exists(self.revocation_file):
+                        store.import_legacy_file(self.revocation_file)
+                    self._store = store
+        return store
+
     def generate_session_id(self):
         """Generate a unique session identifier"""
         return secrets.token_hex(32)
-    
+
     def create_session(self, user_id):
         """Create a new session with tracking"""
         session_id = self.generate_session_id()
-        
+
         with self.lock:
             # Store session creation time
             self.session_timestamps[session_id] = time.time()
-            
-            # Remove from revoked list if it exists (reusing ID)
-            self.revoked_sessions.discard(session_id)
-        
+
         # Store in Flask session
         session['session_id'] = session_id
         session['user_id'] = user_id
         session['created_at'] = time.time()
         session['last_activity'] = time.time()
         session.permanent = False  # Never persist session
-        
+
         return session_id
-    
+
     def revoke_session(self, session_id=None):
         """Revoke a session, making it invalid"""
         if not session_id:
             session_id = session.get('session_id')
-        
+
         if session_id:
-            with self.lock:
-                self.revoked_sessions.add(session_id)
-                # Remove from active timestamps
-                self.session_timestamps.pop(session_id, None)
-                self._save_revoked_sessions()
-        
+            self.store.revoke(session_id)
+            # Remove from active timestamps
+            self.session_timestamps.pop(session_id, None)
+
         # Clear Flask session completely
         session.clear()
         session.permanent = False
-        
+
     def is_session_revoked(self, session_id):
         """Check if a specific session ID has been revoked"""
-        with self.lock:
-            return session_id in self.revoked_sessions
-    
+        return self.store.is_revoked(session_id)
+
     def is_session_valid(self, session_id=None):
         """Return True when the session exists, is active, and not revoked."""
         if not session_id:
@@ -111,25 +278,21 @@ class SessionManager:
         if not session_id:
             return False
 
-        now = time.time()
-
-        with self.lock:
-            if session_id in self.revoked_sessions:
-                return False
+        if self.store.is_revoked(session_id):
+            return False
 
-            created_at = float(session.get('created_at', 0) or 0)
-            if created_at and now - created_at > self.session_timeout:
-                self.revoked_sessions.add(session_id)
-                self._save_revoked_sessions()
-                return False
+        now = time.time()
 
-            last_activity = float(session.get('last_activity', 0) or 0)
-            if last_activity and now - last_activity > self.session_timeout:
-                self.revoked_sessions.add(session_id)
-                self._save_revoked_sessions()
-                return False
+        created_at = float(session.get('created_at', 0) or 0)
+        if created_at and now - created_at > self.session_timeout:
+            self.store.revoke(session_id)
+            return False
 
         last_activity = float(session.get('last_activity', 0) or 0)
+        if last_activity and now - last_activity > self.session_timeout:
+            self.store.revoke(session_id)
+            return False
+
         if not last_activity:
             session['last_activity'] = now
             session.modified = True
@@ -140,21 +303,20 @@ class SessionManager:
         return True
 
     def cleanup_old_sessions(self):
-        """Remove old revoked sessions from tracking (housekeeping)"""
+        """Remove expired revocations and stale session timestamps (housekeeping)"""
+        cutoff_time = time.time() - self.session_timeout
         with self.lock:
-            cutoff_time = time.time() - 86400  # 24 hours
-            # Since we're using a set, we need to track timestamps separately
-            # For simplicity, clear very old sessions periodically
-            if len(self.revoked_sessions) > 10000:  # Arbitrary limit
-                # Keep only recent revocations
-                self._load_revoked_sessions()
-    
+            self.session_timestamps = {
+                sid: created for sid, created in self.session_timestamps.items() if created > cutoff_time
+            }
+        return self.store.compact()
+
     def invalidate_all_user_sessions(self, user_id):
         """Invalidate all sessions for a specific user"""
         # In a real implementation, you'd track user_id -> session_id mapping
         # For now, just revoke the current session
         self.revoke_session()
-    
+
     def get_session_info(self):
         """Get current session information for debugging"""
         return {
@@ -165,5 +327,15 @@ class SessionManager:
             'is_valid': self.is_session_valid()
         }
 
+
+def init_session_manager(app):
+    """Keep the revocation log in the app's instance folder."""
+    session_manager.configure(
+        revocation_db=app.config.get('SESSION_REVOCATION_DB') or os.path.join(app.instance_path, 'revoked_sessions.db'),
+        revocation_file=os.path.join(app.instance_path, 'revoked_sessions.json'),
+        ttl=app.config.get('SESSION_REVOCATION_TTL'),
+        sync_interval=app.config.get('SESSION_REVOCATION_SYNC_SECONDS'),
+    )
+
 # Global session manager instance
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = SessionManager()
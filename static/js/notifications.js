@@ -1,8 +1,9 @@
 
 class NotificationSystem {
     constructor() {
-        this.pollInterval = 30000; // Poll every 30 seconds
+        this.pollInterval = 30000; // Poll every 30 seconds when streaming is unavailable
         this.isPolling = false;
+        this.eventSource = null;
         this.notificationContainer = null;
         this.init();
     }
@@ -10,7 +11,7 @@ class NotificationSystem {
     init() {
         this.createNotificationElements();
         this.loadInitialNotifications();
-        this.startPolling();
+        this.startStreaming();
         this.bindEvents();
     }
 
@@ -82,6 +83,45 @@ class NotificationSystem {
         }
     }
 
+    startStreaming() {
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+
+        // The browser reconnects with Last-Event-ID and the server replays missed events
+        this.eventSource = new EventSource('/notifications/api/notifications/stream');
+
+        this.eventSource.addEventListener('notifications', (event) => {
+            const data = JSON.parse(event.data);
+            this.updateNotificationBadge(data.unread);
+            const dropdown = document.getElementById('notification-dropdown');
+            if (data.notification && dropdown && dropdown.style.display === 'block') {
+                this.loadNotifications();
+            }
+        });
+
+        // Events were missed (e.g. after a long disconnect): fetch the count once
+        this.eventSource.addEventListener('resync', () => this.refreshUnreadCount());
+
+        this.eventSource.onerror = () => {
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.startPolling();
+            }
+        };
+    }
+
+    async refreshUnreadCount() {
+        try {
+            const response = await fetch('/notifications/api/notifications/unread-count');
+            const data = await response.json();
+            this.updateNotificationBadge(data.count);
+        } catch (error) {
+            console.error('Error refreshing notification count:', error);
+        }
+    }
+
     async startPolling() {
         if (this.isPolling) return;
         this.isPolling = true;
@@ -91,7 +131,7 @@ class NotificationSystem {
                 const response = await fetch('/notifications/api/notifications/unread-count');
                 const data = await response.json();
                 
-                if (data.success) {
+                if (typeof data.count === 'number') {
                     this.updateNotificationBadge(data.count);
                 }
             } catch (error) {
@@ -122,6 +122,11 @@ def make_celery(app: Flask) -> Celery:
                 'task': 'tasks.monitoring_tasks.health_check_task',
                 'schedule': timedelta(minutes=1),  # Every minute
                 'options': {'queue': 'monitoring'}
+            },
+            'reconcile-notification-counters': {
+                'task': 'tasks.maintenance_tasks.reconcile_notification_counters_task',
+                'schedule': timedelta(minutes=30),  # Every 30 minutes
+                'options': {'queue': 'maintenance'}
             }
         },
         beat_schedule_filename='celerybeat-schedule'
@@ -585,4 +585,35 @@ def sync_cully_statistics_task(self) -> Dict[str, Any]:
             'status': 'failed',
             'error': str(e),
             'completed_at': datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+        }
+
+
+@celery_app.task(bind=True)
+def reconcile_notification_counters_task(self) -> Dict[str, Any]:
+    """
+    Repair drift between unread notification counters and the notifications table.
+    
+    Returns:
+        Dict with the number of corrected counters
+    """
+    try:
+        from models import db
+        from database.notification_counters import reconcile_unread_counters
+        
+        corrected = reconcile_unread_counters()
+        db.session.commit()
+        if corrected:
+            logger.warning(f"Reconciled {corrected} unread notification counters")
+        
+        return {
+            'status': 'success',
+            'corrected': corrected,
+            'completed_at': datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Notification counter reconciliation failed: {e}")
+        return {
+            'status': 'failed',
+            'error': str(e),
+            'completed_at': datetime.utcnow().isoformat()
+        }
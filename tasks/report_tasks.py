@@ -39,11 +39,12 @@ def generate_report_task(self, report_id: str, report_type: str,
         logger.info(f"Starting report generation for {report_id} ({report_type})")
         
         # Import report generation modules
-        from models import db, Report
+        from models import db
+        from database.statements import get_report
         from utils.report_generator import ReportGenerator
         
         # Get report from database
-        report = Report.query.get(report_id)
+        report = get_report(report_id)
         if not report:
             raise ValueError(f"Report {report_id} not found")
         
@@ -124,8 +125,9 @@ def generate_report_task(self, report_id: str, report_type: str,
         
         # Update report status to failed
         try:
-            from models import db, Report
-            report = Report.query.get(report_id)
+            from models import db
+            from database.statements import get_report
+            report = get_report(report_id)
             if report:
                 report.status = 'GENERATION_FAILED'
                 report.updated_at = datetime.utcnow()
@@ -168,15 +170,16 @@ def process_report_approval_task(self, report_id: str, approver_email: str,
         logger.info(f"Processing approval for report {report_id} by {approver_email}: {approval_action}")
         
         # Import required modules
-        from models import db, Report, User
+        from models import db
+        from database.statements import get_report, get_user_by_email
         from tasks.email_tasks import send_notification_email_task
         
         # Get report and approver
-        report = Report.query.get(report_id)
+        report = get_report(report_id)
         if not report:
             raise ValueError(f"Report {report_id} not found")
         
-        approver = User.query.filter_by(email=approver_email).first()
+        approver = get_user_by_email(approver_email)
         if not approver:
             raise ValueError(f"Approver {approver_email} not found")
         
@@ -222,7 +225,7 @@ def process_report_approval_task(self, report_id: str, approver_email: str,
         )
         
         # Send notification to report creator
-        creator = User.query.filter_by(email=report.user_email).first()
+        creator = get_user_by_email(report.user_email)
         if creator:
             notification_data = {
                 'user_name': creator.full_name,
@@ -303,8 +306,8 @@ def batch_report_generation_task(self, report_ids: list, output_format: str = 'p
                 )
                 
                 # Get report data
-                from models import Report
-                report = Report.query.get(report_id)
+                from database.statements import get_report
+                report = get_report(report_id)
                 if not report:
                     failed_generations.append({
                         'report_id': report_id,
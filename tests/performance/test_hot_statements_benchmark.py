@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the hot statement registry against the equivalent ORM calls.
+
+Run with ``pytest -s -m performance tests/performance/test_hot_statements_benchmark.py``
+to print the per-call timings.
+"""
+import time
+import uuid
+
+import pytest
+from flask import Flask
+
+from database import statements
+from models import db, ModuleSpec, Notification, Report, SATReport, User
+
+ITERATIONS = 2000
+
+
+@pytest.fixture
+def bench_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'bench.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        report_id = str(uuid.uuid4())
+        db.session.add_all([
+            User(full_name='Bench User', email='bench@example.com', password_hash='x', status='Active'),
+            Report(id=report_id, type='SAT', user_email='bench@example.com'),
+            SATReport(report_id=report_id, data_json='{}'),
+            ModuleSpec(company='ABB', model='DI810'),
+        ] + [
+            Notification(user_email='bench@example.com', title='t', message='m', type='status_update',
+                         read=bool(i % 2))
+            for i in range(50)
+        ])
+        db.session.commit()
+        app.report_id = report_id
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _per_call(func):
+    func()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - started) / ITERATIONS
+
+
+@pytest.mark.performance
+class TestHotStatementBenchmark:
+    """Compare ORM query construction with the pre-built statements."""
+
+    def test_registry_is_faster_than_orm(self, bench_app):
+        """Each registered lookup returns the same row in less time."""
+        report_id = bench_app.report_id
+        cases = [
+            ('report by id',
+             lambda: Report.query.get(report_id),
+             lambda: statements.get_report(report_id)),
+            ('sat report by report_id',
+             lambda: SATReport.query.filter_by(report_id=report_id).first(),
+             lambda: statements.get_sat_report(report_id)),
+            ('user by email',
+             lambda: User.query.filter_by(email='bench@example.com').first(),
+             lambda: statements.get_user_by_email('bench@example.com')),
+            ('unread notification count',
+             lambda: Notification.query.filter_by(user_email='bench@example.com', read=False).count(),
+             lambda: statements.count_unread_notifications('bench@example.com')),
+            ('module spec by company/model',
+             lambda: ModuleSpec.query.filter_by(company='ABB', model='DI810').first(),
+             lambda: statements.get_module_spec('ABB', 'DI810')),
+        ]
+
+        with bench_app.app_context():
+            total_orm = total_registry = 0.0
+            for name, orm_call, registry_call in cases:
+                assert orm_call() == registry_call()
+                orm = _per_call(orm_call)
+                registry = _per_call(registry_call)
+                total_orm += orm
+                total_registry += registry
+                print(f"{name:32s} orm {orm * 1e6:8.1f}us  registry {registry * 1e6:8.1f}us  "
+                      f"({orm / registry:.1f}x)")
+
+        assert total_registry < total_orm
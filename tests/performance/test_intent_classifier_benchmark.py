@@ -0,0 +1,76 @@
+"""
+Benchmark of AI agent intent analysis on long pasted messages.
+
+Run with ``pytest -s -m performance tests/performance/test_intent_classifier_benchmark.py``
+to print the timings.
+"""
+import random
+import time
+
+import pytest
+
+from services.intent_classifier import (
+    INTENT_VOCABULARIES, SENTIMENT_VOCABULARIES, TASK_VOCABULARIES, URGENCY_KEYWORDS, IntentClassifier,
+)
+
+ITERATIONS = 50
+
+
+def _pasted_log(size):
+    random.seed(7)
+    words = ['PLC', 'tag', 'AI-101', 'value', 'ok', 'timeout', 'error', 'loop', 'setpoint', 'alarm', 'reset',
+             'scada', 'the', 'report', 'FAT-2024', 'now', 'trend', 'please', 'check', '12/03/2024']
+    text = []
+    while sum(map(len, text)) < size:
+        text.append(random.choice(words))
+    return ' '.join(text)
+
+
+def _per_keyword_scan(message, vocabularies):
+    """The previous approach: one substring search per keyword per vocabulary."""
+    lowered = message.lower()
+    return {name: sum(1 for word in keywords if word in lowered) for name, keywords in vocabularies.items()}
+
+
+def _per_call(func):
+    func()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - started) / ITERATIONS
+
+
+def _synthetic_intents(count):
+    random.seed(count)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return {
+        f'intent_{i}': [(tuple(''.join(random.choice(letters) for _ in range(7)) for _ in range(8)), 0.25)]
+        for i in range(count)
+    }
+
+
+@pytest.mark.performance
+class TestIntentClassifierBenchmark:
+    """Measure classification cost against message length and vocabulary size."""
+
+    def test_single_pass_cost_does_not_grow_with_intents(self):
+        """Ten times more intents barely changes the cost of classifying a long message."""
+        message = _pasted_log(20_000)
+        classifier = IntentClassifier()
+        base = _per_call(lambda: classifier.classify(message, 'create_report'))
+
+        intents = dict(INTENT_VOCABULARIES, **_synthetic_intents(80))
+        large = IntentClassifier(intents=intents)
+        many = _per_call(lambda: large.classify(message, 'create_report'))
+
+        vocabularies = {name: [w for keywords, _ in groups for w in keywords] for name, groups in intents.items()}
+        vocabularies.update(SENTIMENT_VOCABULARIES, urgency=URGENCY_KEYWORDS, **TASK_VOCABULARIES)
+        legacy = _per_call(lambda: _per_keyword_scan(message, vocabularies))
+
+        print(f"\n  20 KB message, {len(INTENT_VOCABULARIES)} intents: {base * 1e3:.2f} ms")
+        print(f"  20 KB message, {len(intents)} intents: {many * 1e3:.2f} ms")
+        print(f"  per-keyword scans, {len(intents)} intents: {legacy * 1e3:.2f} ms")
+
+        assert large.classify(message)['intents']['troubleshooting']['keywords_found']
+        assert many < base * 2
+        assert many < legacy
@@ -0,0 +1,65 @@
+"""
+Benchmark of long-term knowledge retrieval with a large knowledge base.
+
+Run with ``pytest -s -m performance tests/performance/test_knowledge_index_benchmark.py``
+to print the timings.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.knowledge_index import KnowledgeIndex
+from services.memory_manager import MemoryEntry
+
+ENTRIES = 200_000
+QUERIES = 500
+DOMAINS = ['conversation', 'plc', 'scada', 'hmi', 'io_testing', 'network', 'safety', 'reporting']
+
+
+def _full_scan(entries, tags, limit, now):
+    """The previous approach: score every matching entry and sort them all."""
+    matching = [entry for entry in entries.values() if any(tag in entry.tags for tag in tags)]
+    matching.sort(key=lambda x: x.importance * 0.5 + (now - x.timestamp).days * -0.01 + x.access_count * 0.1,
+                  reverse=True)
+    return matching[:limit]
+
+
+@pytest.mark.performance
+class TestKnowledgeIndexBenchmark:
+    """Measure top-k retrieval against knowledge base size."""
+
+    def test_top_k_stays_sub_millisecond(self):
+        """Queries over 200k entries, including a tag every entry carries."""
+        random.seed(11)
+        now = datetime.now()
+        index = KnowledgeIndex()
+        for i in range(ENTRIES):
+            entry = MemoryEntry(
+                timestamp=now - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+                content={'n': i},
+                importance=random.random(),
+                access_count=random.randint(0, 3),
+                tags=[random.choice(DOMAINS), 'domain_knowledge'],
+            )
+            index.add(f'k{i}', entry)
+
+        queries = [random.sample(DOMAINS + ['domain_knowledge'], random.randint(1, 3)) for _ in range(QUERIES)]
+        started = time.perf_counter()
+        for tags in queries:
+            for key in index.top_k(tags, 10, now):
+                index.entries[key].access()
+                index.reindex(key)
+        per_query = (time.perf_counter() - started) / QUERIES
+
+        started = time.perf_counter()
+        expected = _full_scan(index.entries, ['plc', 'domain_knowledge'], 10, now)
+        full_scan = time.perf_counter() - started
+        got = [index.entries[key] for key in index.top_k(['plc', 'domain_knowledge'], 10, now)]
+
+        print(f"\n  top-10 over {ENTRIES} entries: {per_query * 1e6:.0f} us per query (with access updates)")
+        print(f"  full scan and sort: {full_scan * 1e3:.0f} ms")
+
+        assert [e.importance for e in got] == [e.importance for e in expected]
+        assert per_query < 1e-3
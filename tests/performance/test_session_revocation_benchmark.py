@@ -0,0 +1,68 @@
+"""
+Benchmark of per-request session checks with a large revocation log.
+
+Run with ``pytest -s -m performance tests/performance/test_session_revocation_benchmark.py``
+to print the timings.
+"""
+import secrets
+import time
+
+import pytest
+from flask import Flask
+
+from session_manager import RevocationStore, SessionManager
+
+REVOKED = 100_000
+ITERATIONS = 20_000
+
+
+def _per_call(func):
+    func()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - started) / ITERATIONS
+
+
+@pytest.mark.performance
+class TestSessionRevocationBenchmark:
+    """Measure the request-path cost of revocation checks with 100k revoked IDs."""
+
+    def test_check_cost_is_independent_of_log_size(self, tmp_path):
+        """Validation stays in the microsecond range and a worker catches up quickly."""
+        db_path = str(tmp_path / 'revoked_sessions.db')
+        writer = RevocationStore(db_path)
+        now = time.time()
+        writer.revoke_many((secrets.token_hex(32), now) for _ in range(REVOKED))
+
+        started = time.perf_counter()
+        worker = RevocationStore(db_path, sync_interval=1)
+        worker.sync()
+        replay = time.perf_counter() - started
+        assert len(worker) == REVOKED
+
+        manager = SessionManager()
+        manager.configure(revocation_db=db_path, revocation_file=str(tmp_path / 'none.json'), sync_interval=1)
+        manager._store = worker
+
+        app = Flask(__name__)
+        app.secret_key = 'bench'
+        with app.test_request_context():
+            manager.create_session(user_id=1)
+            valid = _per_call(manager.is_session_valid)
+        revoked_id = next(iter(worker._revoked))
+        revoked = _per_call(lambda: worker.is_revoked(revoked_id))
+
+        writer.revoke('late')
+        started = time.perf_counter()
+        worker.sync()
+        incremental = time.perf_counter() - started
+        assert worker.is_revoked('late')
+
+        print(f"\n  replay {REVOKED} revocations: {replay * 1e3:.1f} ms")
+        print(f"  is_session_valid (live session): {valid * 1e6:.2f} us")
+        print(f"  is_revoked (revoked id): {revoked * 1e6:.2f} us")
+        print(f"  incremental sync of 1 row: {incremental * 1e6:.1f} us")
+
+        assert valid < 50e-6
+        assert revoked < 20e-6
@@ -0,0 +1,207 @@
+"""
+Tests for the batched audit writer and the audit hash chain.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from models import db, SystemSettings
+from security import audit
+from security.audit import (
+    AuditEvent, AuditEventType, AuditLog, AuditLogger, AuditSeverity, AuditWriter
+)
+
+
+@pytest.fixture
+def audit_app(tmp_path):
+    """Application with a file database (writers use their own connections) and a fresh audit writer."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'audit.db'}",
+        AUDIT_BATCH_SIZE=20,
+        AUDIT_FLUSH_INTERVAL_SECONDS=0.05
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        if audit.audit_writer is not None:
+            audit.audit_writer.stop()
+            audit.audit_writer = None
+        db.session.remove()
+        db.drop_all()
+
+
+def _events(count, start=None):
+    start = start or datetime.utcnow()
+    return [
+        AuditEvent(
+            event_type=AuditEventType.REPORT_UPDATE,
+            severity=AuditSeverity.LOW,
+            user_id='1',
+            resource_type='report',
+            resource_id=f'report-{i}',
+            action='update',
+            details={'n': i},
+            timestamp=start + timedelta(milliseconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+class TestAuditWriter:
+    """Test queued batch writes and chain verification."""
+
+    def test_background_writer_batches_events(self, audit_app):
+        """Queued events are flushed in multi-row batches."""
+        writer = audit.init_audit_writer(audit_app)
+        assert writer.running
+
+        AuditLogger().log_events(_events(50))
+        writer.stop()
+
+        assert AuditLog.query.count() == 50
+        stats = writer.get_stats()
+        assert stats['written'] == 50
+        assert 0 < stats['batches'] < 50
+        assert stats['sync_writes'] == 0
+
+    def test_full_queue_falls_back_to_sync_writes(self, audit_app):
+        """Events that do not fit in the queue are written immediately."""
+        writer = AuditWriter(audit_app, max_queue_size=2)
+        with patch.object(AuditWriter, 'running', new_callable=PropertyMock, return_value=True):
+            writer.submit([AuditLogger._event_to_row(event) for event in _events(5)])
+
+        assert AuditLog.query.count() == 3
+        assert writer.queue.qsize() == 2
+
+        writer.stop()
+        assert AuditLog.query.count() == 5
+
+    def test_chain_verifies_in_one_pass(self, audit_app):
+        """Every entry links to its predecessor and the range verifies."""
+        logger = AuditLogger()
+        logger.log_events(_events(30))
+
+        rows = AuditLog.query.order_by(AuditLog.timestamp).all()
+        assert rows[0].previous_checksum is None
+        assert all(rows[i].previous_checksum == rows[i - 1].checksum for i in range(1, len(rows)))
+        assert all(row.verify_integrity() for row in rows)
+
+        result = logger.verify_integrity()
+        assert result == {'verified': 30, 'valid': True, 'tampered': [], 'broken_links': [],
+                          'head_mismatch': False}
+
+        # A sub-range links back to entries before it
+        start = rows[10].timestamp
+        assert logger.verify_integrity(start_date=start)['valid']
+
+    def test_tampering_and_deletion_are_detected(self, audit_app):
+        """Edited entries fail their checksum and removed entries break the chain."""
+        logger = AuditLogger()
+        logger.log_events(_events(10))
+        rows = AuditLog.query.order_by(AuditLog.timestamp).all()
+
+        db.session.execute(
+            text("UPDATE audit_logs SET action = 'approve' WHERE resource_id = 'report-3'")
+        )
+        db.session.execute(
+            text("DELETE FROM audit_logs WHERE resource_id = 'report-6'")
+        )
+        db.session.commit()
+
+        result = logger.verify_integrity()
+        assert not result['valid']
+        assert result['tampered'] == [str(rows[3].id)]
+        assert result['broken_links'] == [str(rows[7].id)]
+
+    def test_transactional_writes_advance_chain_on_commit(self, audit_app):
+        """Rows written inside a caller's transaction join the chain after commit."""
+        logger = AuditLogger()
+        logger.log_events(_events(2), commit=False)
+        db.session.rollback()
+        assert AuditLog.query.count() == 0
+
+        logger.log_events(_events(2), commit=False)
+        db.session.commit()
+        logger.log_events(_events(2, start=datetime.utcnow() + timedelta(seconds=1)))
+
+        assert AuditLog.query.count() == 4
+        assert logger.verify_integrity()['valid']
+
+    def test_writers_in_separate_processes_share_one_chain(self, audit_app):
+        """Writers link onto the head stored in the database, not a cached one."""
+        worker_a, worker_b = AuditWriter(audit_app), AuditWriter(audit_app)
+        for writer, events in ((worker_a, _events(3)), (worker_b, _events(2)), (worker_a, _events(2))):
+            writer.write([AuditLogger._event_to_row(event) for event in events])
+
+        rows = AuditLog.query.order_by(AuditLog.sequence).all()
+        assert [row.sequence for row in rows] == list(range(1, 8))
+        assert all(rows[i].previous_checksum == rows[i - 1].checksum for i in range(1, len(rows)))
+        assert AuditLogger().verify_integrity()['valid']
+
+    def test_removing_the_newest_entries_is_detected(self, audit_app):
+        """The chain tip must match the stored head."""
+        logger = AuditLogger()
+        logger.log_events(_events(5))
+        newest = AuditLog.query.order_by(AuditLog.sequence.desc()).first()
+        db.session.delete(newest)
+        db.session.commit()
+
+        result = logger.verify_integrity()
+        assert result['broken_links'] == [] and result['tampered'] == []
+        assert result['head_mismatch'] and not result['valid']
+
+    def test_pruned_chain_still_verifies(self, audit_app):
+        """Retention pruning leaves a contiguous, verifiable chain."""
+        logger = AuditLogger()
+        logger.log_events(_events(5, start=datetime.utcnow() - timedelta(days=logger.retention_days + 10)))
+        logger.log_events(_events(5))
+
+        assert logger.cleanup_old_logs() == 5
+        assert AuditLog.query.count() == 6
+        assert logger.verify_integrity()['valid']
+
+    def test_sync_writes_leave_the_callers_transaction_alone(self, audit_app, tmp_path):
+        """Logging neither commits the request's pending work nor rolls it back on failure."""
+        audit.audit_writer = AuditWriter(audit_app, spill_path=str(tmp_path / 'spill.jsonl'))
+        logger = AuditLogger()
+
+        db.session.add(SystemSettings(key='pending', value='1'))
+        logger.log_event(_events(1)[0])
+        db.session.rollback()
+        assert AuditLog.query.count() == 1
+        assert SystemSettings.query.count() == 0
+
+        # Without a chain head every write fails; the caller's work still commits
+        db.session.execute(text('DELETE FROM audit_chain_head'))
+        db.session.commit()
+        db.session.add(SystemSettings(key='kept', value='1'))
+        logger.log_event(_events(1)[0])
+        db.session.commit()
+        assert SystemSettings.query.filter_by(key='kept').count() == 1
+        assert audit.audit_writer.get_stats()['spilled'] == 1
+
+    def test_failed_batches_are_spilled_and_replayed(self, audit_app, tmp_path):
+        """Batches that keep failing go to the spill file and are written later."""
+        spill_path = tmp_path / 'spill.jsonl'
+        writer = AuditWriter(audit_app, spill_path=str(spill_path), max_retries=2, retry_delay=0)
+        db.session.execute(text('DELETE FROM audit_chain_head'))
+        db.session.commit()
+
+        assert not writer._write_batch([AuditLogger._event_to_row(event) for event in _events(3)])
+        stats = writer.get_stats()
+        assert (stats['retries'], stats['spilled'], stats['failed']) == (2, 3, 0)
+        assert len(spill_path.read_text().splitlines()) == 3
+
+        db.session.execute(text('INSERT INTO audit_chain_head (id, sequence) VALUES (1, 0)'))
+        db.session.commit()
+        assert writer._replay_spilled() == 3
+        assert not spill_path.exists()
+        assert AuditLog.query.count() == 3
+        assert AuditLogger().verify_integrity()['valid']
@@ -407,11 +407,11 @@ class TestTaskIntegration:
             with patch('tasks.report_tasks.ReportGenerator') as mock_generator:
                 with patch('tasks.report_tasks.os.path.exists', return_value=True):
                     with patch('tasks.report_tasks.os.path.getsize', return_value=1024):
-                        with patch('tasks.report_tasks.Report') as mock_report_model:
+                        with patch('database.statements.get_report') as mock_get_report:
                             # Mock database operations
                             mock_report = Mock()
                             mock_report.status = 'PENDING'
-                            mock_report_model.query.get.return_value = mock_report
+                            mock_get_report.return_value = mock_report
                             
                             # Mock report generator
                             mock_gen_instance = Mock()
@@ -0,0 +1,166 @@
+"""
+Tests for the set-based bulk report operations.
+"""
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+import database.query_cache as query_cache
+import database.tiered_cache as tiered_cache
+from database.performance import install_cache_invalidation
+from models import db, Report, SATReport, ReportArchive, SystemSettings
+from security.audit import AuditLog
+from services import bulk_operations
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements executed on ``engine`` inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+ADMIN = SimpleNamespace(id=1, email='admin@example.com', role='Admin')
+ENGINEER = SimpleNamespace(id=2, email='engineer@example.com', role='Engineer')
+
+
+@pytest.fixture
+def bulk_app():
+    """Application with an in-memory database and a small chunk size."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        BULK_OPERATION_CHUNK_SIZE=7
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _add_reports(count, owner='engineer@example.com'):
+    ids = []
+    for i in range(count):
+        report_id = str(uuid.uuid4())
+        db.session.add(Report(
+            id=report_id,
+            type='SAT',
+            status='DRAFT',
+            document_title=f'Report {i}',
+            project_reference=f'P-{i}',
+            client_name='Client',
+            user_email=owner
+        ))
+        db.session.add(SATReport(report_id=report_id, data_json=json.dumps({'n': i})))
+        ids.append(report_id)
+    db.session.commit()
+    return ids
+
+
+class TestBulkOperations:
+    """Test bulk status/assign/archive/delete."""
+
+    def test_status_update_is_set_based(self, bulk_app):
+        """Statement count depends on chunks, not on the number of reports."""
+        ids = _add_reports(50)
+
+        with count_queries(db.engine) as statements:
+            result = bulk_operations.bulk_update_status(ids + ['missing'], 'APPROVED', ADMIN)
+
+        assert result == bulk_operations.BulkResult(affected=50, skipped=1)
+        # 8 chunked selects + 8 chunked updates + audit insert + chain head claim/update + stats delete
+        assert len(statements) <= 22
+        assert Report.query.filter_by(status='APPROVED').count() == 50
+
+        audit_rows = AuditLog.query.all()
+        assert len(audit_rows) == 50
+        assert all(row.verify_integrity() for row in audit_rows)
+        assert audit_rows[0].details['message'] == 'Bulk status update from DRAFT to APPROVED'
+
+    def test_permission_filter_restricts_to_owned_reports(self, bulk_app):
+        """Non-privileged users only touch their own reports."""
+        own = _add_reports(3)
+        other = _add_reports(2, owner='someone@example.com')
+
+        result = bulk_operations.bulk_assign(own + other, 'new@example.com', ENGINEER)
+
+        assert result.affected == 3
+        assert result.skipped == 2
+        assert Report.query.filter_by(user_email='new@example.com').count() == 3
+        assert Report.query.filter_by(user_email='someone@example.com').count() == 2
+
+    def test_delete_archives_and_removes_children(self, bulk_app):
+        """Deletion snapshots the reports and removes their SAT rows."""
+        ids = _add_reports(10)
+        keep = _add_reports(1)
+
+        result = bulk_operations.bulk_delete(ids, ADMIN)
+
+        assert result.affected == 10
+        assert Report.query.count() == 1
+        assert SATReport.query.count() == 1
+        assert SATReport.query.first().report_id == keep[0]
+
+        archives = ReportArchive.query.all()
+        assert len(archives) == 10
+        assert json.loads(archives[0].archived_data)['sat_data']
+        assert AuditLog.query.filter_by(event_type='report_delete').count() == 10
+
+    def test_archive_and_stats_invalidated_once(self, bulk_app):
+        """Archiving writes archives and drops cached dashboard stats."""
+        ids = _add_reports(4)
+        db.session.add(SystemSettings(key='dashboard_stats:pm:pm@example.com', value='{}'))
+        db.session.add(SystemSettings(key='company_name', value='Cully'))
+        db.session.commit()
+
+        tiered = Mock()
+        install_cache_invalidation(db.session)
+        with patch.object(tiered_cache, 'tiered_cache', tiered), \
+                patch.object(query_cache, 'cache_manager', None):
+            result = bulk_operations.bulk_archive(ids, 30, ADMIN)
+
+        assert result.affected == 4
+        assert ReportArchive.query.count() == 4
+        assert Report.query.count() == 4
+        assert SystemSettings.query.filter_by(key='company_name').count() == 1
+        assert SystemSettings.query.filter(SystemSettings.key.like('dashboard_stats:%')).count() == 0
+        # Invalidated by the after-commit hook, once for the whole batch
+        tiered.invalidate_tables.assert_called_once()
+        assert {'report_archives', 'audit_logs'} <= set(tiered.invalidate_tables.call_args.args[0])
+
+
+class TestBulkRoutes:
+    """Test the bulk endpoints end to end."""
+
+    def test_status_update_endpoint(self, client, admin_user, sample_report):
+        """The view reaches the service module, not the same-named view function."""
+        now = time.time()
+        with client.session_transaction() as sess:
+            sess.update({'_user_id': str(admin_user.id), 'user_id': admin_user.id, '_fresh': True,
+                         'session_id': 'bulk-test', 'created_at': now, 'last_activity': now})
+
+        response = client.post('/bulk/api/status-update',
+                               json={'report_ids': [sample_report.id], 'status': 'APPROVED'})
+
+        assert response.status_code == 200
+        assert response.get_json()['updated_count'] == 1
+        assert db.session.get(Report, sample_report.id).status == 'APPROVED'
@@ -0,0 +1,132 @@
+"""
+Tests for streaming response compression and precompressed static assets.
+"""
+import gzip
+import json
+import os
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify, stream_with_context
+from werkzeug.datastructures import Accept
+
+import middleware_optimized
+from middleware_optimized import OptimizedMiddleware, negotiate_encoding, precompress_static
+
+
+@pytest.fixture
+def compression_app(tmp_path):
+    static_dir = tmp_path / 'static'
+    (static_dir / 'js').mkdir(parents=True)
+    (static_dir / 'js' / 'app.js').write_text('function f() { return 1; }\n' * 200)
+
+    app = Flask(__name__, static_folder=str(static_dir))
+    app.config.update(TESTING=True, COMPRESSION_STREAM_THRESHOLD=16 * 1024, COMPRESSION_CHUNK_SIZE=4 * 1024)
+    OptimizedMiddleware(app)
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            for i in range(5):
+                yield f'{{"row": {i}, "payload": "{"x" * 400}"}}\n'
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    @app.route('/json/<int:rows>')
+    def large_json(rows):
+        return jsonify([{'id': i, 'name': f'report {i}'} for i in range(rows)])
+
+    @app.route('/events')
+    def events():
+        return Response('data: x\n\n' * 200, mimetype='text/event-stream')
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' + b'\x00' * 2000, mimetype='image/png')
+
+    return app
+
+
+class TestResponseCompression:
+    """Test encoding negotiation and streamed compression."""
+
+    def test_negotiation_honours_quality_values(self, monkeypatch):
+        """The best accepted encoding wins; q=0 refuses it."""
+        monkeypatch.setattr(middleware_optimized, 'brotli', object())
+        assert negotiate_encoding(Accept([('gzip', 1), ('br', 1)])) == 'br'
+        assert negotiate_encoding(Accept([('gzip', 1), ('br', 0.5)])) == 'gzip'
+        assert negotiate_encoding(Accept([('*', 1), ('br', 0)])) == 'gzip'
+        assert negotiate_encoding(Accept([('identity', 1)])) is None
+
+        monkeypatch.setattr(middleware_optimized, 'brotli', None)
+        assert negotiate_encoding(Accept([('br', 1), ('gzip', 0.1)])) == 'gzip'
+
+    def test_generator_responses_are_compressed_per_chunk(self, compression_app):
+        """Each yielded chunk is flushed, so the client can decode it immediately."""
+        response = compression_app.test_client().get(
+            '/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False
+        )
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+
+        decoder = zlib.decompressobj(31)
+        chunks = iter(response.response)
+        assert decoder.decompress(next(chunks)).startswith(b'{"row": 0')
+        body = b''.join(decoder.decompress(chunk) for chunk in chunks)
+        assert body.count(b'"row"') == 4
+        response.close()
+
+    def test_large_buffered_bodies_are_streamed(self, compression_app):
+        """Bodies above the threshold go out in chunks; small ones keep Content-Length."""
+        client = compression_app.test_client()
+
+        large = client.get('/json/2000', headers={'Accept-Encoding': 'gzip'})
+        assert large.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in large.headers
+        assert len(json.loads(gzip.decompress(large.data))) == 2000
+
+        small = client.get('/json/100', headers={'Accept-Encoding': 'gzip'})
+        assert small.headers['Content-Encoding'] == 'gzip'
+        assert int(small.headers['Content-Length']) == len(small.data)
+        assert 'Accept-Encoding' in small.headers['Vary']
+
+        plain = client.get('/json/100')
+        assert 'Content-Encoding' not in plain.headers
+
+    def test_incompressible_types_are_untouched(self, compression_app):
+        """Images and event streams are sent as-is."""
+        client = compression_app.test_client()
+        for path in ('/image', '/events'):
+            response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+            assert 'Content-Encoding' not in response.headers
+
+
+class TestPrecompressedStatic:
+    """Test build-time precompression and serving of static siblings."""
+
+    def test_precompressed_siblings_are_served_directly(self, compression_app):
+        """A fresh .gz sibling is served; stale ones and identity clients get the source."""
+        static_dir = compression_app.static_folder
+        source = os.path.join(static_dir, 'js', 'app.js')
+
+        stats = precompress_static(static_dir)
+        assert stats['written'] >= 1
+        assert precompress_static(static_dir)['written'] == 0
+
+        client = compression_app.test_client()
+        response = client.get('/static/js/app.js', headers={'Accept-Encoding': 'gzip'})
+        with open(source + '.gz', 'rb') as f:
+            assert response.data == f.read()
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype in ('application/javascript', 'text/javascript')
+        response.close()
+
+        identity = client.get('/static/js/app.js')
+        assert 'Content-Encoding' not in identity.headers
+        identity.close()
+
+        # An edited source makes the sibling stale until the next build
+        stale = os.path.getmtime(source + '.gz') - 10
+        os.utime(source + '.gz', (stale, stale))
+        response = client.get('/static/js/app.js', headers={'Accept-Encoding': 'gzip'})
+        assert gzip.decompress(response.data) == open(source, 'rb').read()
+        response.close()
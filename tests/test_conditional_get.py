@@ -0,0 +1,153 @@
+"""
+Tests for conditional GET handling driven by data versions.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, get_flashed_messages, jsonify, request
+
+from database.conditional import install_report_touch, notification_version, report_version, reports_version
+from middleware_optimized import conditional
+from models import db, Notification, Report, SATReport
+
+
+@pytest.fixture
+def conditional_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY='test',
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'conditional.db'}"
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        install_report_touch(db.session)
+        db.session.add_all([
+            Report(id='r-1', type='SAT', user_email='jo@example.com', updated_at=datetime(2026, 1, 1)),
+            SATReport(report_id='r-1', data_json='{}'),
+        ])
+        db.session.commit()
+        Notification.create_notification('jo@example.com', 'a', 'm', 't')
+
+    app.view_calls = 0
+
+    @app.before_request
+    def authenticate():
+        # Stand-in for require_api_key
+        request.api_key = SimpleNamespace(id=request.headers.get('X-Key', '1'))
+
+    @app.route('/reports/<report_id>')
+    @conditional(report_version)
+    def report_detail(report_id):
+        app.view_calls += 1
+        return jsonify(id=report_id)
+
+    @app.route('/reports')
+    @conditional(lambda: reports_version(Report.query.filter(Report.user_email == 'jo@example.com')))
+    def report_list():
+        app.view_calls += 1
+        return jsonify(count=Report.query.count())
+
+    @app.route('/notifications/unread-count')
+    @conditional(lambda: notification_version('jo@example.com'))
+    def unread_count():
+        app.view_calls += 1
+        return jsonify(count=1)
+
+    @app.route('/page/<report_id>')
+    @conditional(report_version, html=True)
+    def page(report_id):
+        app.view_calls += 1
+        # Rendering the page consumes the flashed messages, as base.html does
+        return f"<html>{get_flashed_messages()}</html>"
+
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+class TestConditionalGet:
+    """Test validators, 304 short-circuiting and invalidation."""
+
+    def test_matching_etag_skips_the_view(self, conditional_app):
+        """A revalidation with the current ETag gets a 304 without running the view."""
+        client = conditional_app.test_client()
+
+        first = client.get('/reports/r-1')
+        etag = first.headers['ETag']
+        assert first.status_code == 200
+        assert etag.startswith('W/"')
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+        assert first.headers['Last-Modified'] == 'Thu, 01 Jan 2026 00:00:00 GMT'
+
+        second = client.get('/reports/r-1', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.headers['ETag'] == etag
+        assert second.data == b''
+        assert conditional_app.view_calls == 1
+
+        by_date = client.get('/reports/r-1', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert by_date.status_code == 304
+
+        other_key = client.get('/reports/r-1', headers={'If-None-Match': etag, 'X-Key': '2'})
+        assert other_key.status_code == 200
+        assert conditional_app.view_calls == 2
+
+    def test_detail_row_edits_change_the_report_etag(self, conditional_app):
+        """Editing only SATReport.data_json still invalidates the report."""
+        client = conditional_app.test_client()
+        etag = client.get('/reports/r-1').headers['ETag']
+        list_etag = client.get('/reports').headers['ETag']
+
+        with conditional_app.app_context():
+            SATReport.query.filter_by(report_id='r-1').one().data_json = '{"changed": true}'
+            db.session.commit()
+
+        assert client.get('/reports/r-1', headers={'If-None-Match': etag}).status_code == 200
+        assert client.get('/reports', headers={'If-None-Match': list_etag}).status_code == 200
+
+        with conditional_app.app_context():
+            db.session.add(Report(id='r-2', type='SAT', user_email='jo@example.com',
+                                  updated_at=datetime(2025, 1, 1)))
+            db.session.commit()
+        # An older row changes the count, not max(updated_at)
+        list_etag = client.get('/reports').headers['ETag']
+        with conditional_app.app_context():
+            db.session.delete(db.session.get(Report, 'r-2'))
+            db.session.commit()
+        assert client.get('/reports', headers={'If-None-Match': list_etag}).status_code == 200
+
+    def test_notification_reads_change_the_high_water_mark(self, conditional_app):
+        """Marking notifications read or receiving new ones changes the ETag."""
+        client = conditional_app.test_client()
+        etag = client.get('/notifications/unread-count').headers['ETag']
+        assert client.get('/notifications/unread-count', headers={'If-None-Match': etag}).status_code == 304
+
+        with conditional_app.app_context():
+            Notification.mark_read('jo@example.com')
+
+        response = client.get('/notifications/unread-count', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_html_pages_are_not_revalidated_with_pending_flashes(self, conditional_app):
+        """Pages rendered after a flash are served in full so the message is shown."""
+        client = conditional_app.test_client()
+        etag = client.get('/page/r-1').headers['ETag']
+
+        with client.session_transaction() as session:
+            session['_flashes'] = [('message', 'Saved')]
+        assert client.get('/page/r-1', headers={'If-None-Match': etag}).status_code == 200
+        assert client.get('/page/r-1', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_unknown_rows_fall_through_to_the_view(self, conditional_app):
+        """Without a version the view decides, e.g. to return 404."""
+        client = conditional_app.test_client()
+        response = client.get('/reports/missing', headers={'If-Modified-Since': 'Thu, 01 Jan 2026 00:00:00 GMT'})
+
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+        assert conditional_app.view_calls == 1
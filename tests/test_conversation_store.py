@@ -0,0 +1,93 @@
+"""
+Tests for server-side AI agent and SAT bot conversation state.
+"""
+import pickle
+import time
+
+import pytest
+from flask import Flask, session
+
+import services.conversation_store as conversation_store_module
+from services.ai_agent import AIAgentCore, AgentPersonality
+from services.bot_assistant import BotConversationState
+from services.conversation_store import ConversationStore
+
+
+@pytest.fixture
+def store_app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.config.update(TESTING=True, CONVERSATION_HISTORY_LIMIT=4)
+    store = ConversationStore(str(tmp_path / 'conversations.db'), ttl=60, compress_threshold=256)
+    monkeypatch.setattr(conversation_store_module, 'conversation_store', store)
+    app.store = store
+    return app
+
+
+class TestConversationStore:
+    """Test encoding, expiry and request-level caching."""
+
+    def test_round_trip_compression_and_expiry(self, tmp_path):
+        """Large state is compressed; expired entries are invisible and purged."""
+        store = ConversationStore(str(tmp_path / 'conversations.db'), ttl=60, compress_threshold=256)
+        state = {'answers': {'PROJECT_REFERENCE': 'P-1'}, 'tables': {'io': [{'tag': f'AI-{i}'} for i in range(200)]}}
+        store.put('bot:abc', state)
+        assert store.get('bot:abc') == state
+        assert store.get_raw('bot:abc')[:1] == b'z'
+
+        store.ttl = -1
+        store.put('bot:old', {'answers': {}})
+        assert store.get('bot:old') is None
+        assert store.purge_expired() == 1
+        assert store.get('bot:abc') == state
+
+    def test_session_holds_only_a_reference(self, store_app):
+        """Bot state lives in the store; unchanged state is not rewritten."""
+        writes = []
+        put_raw = store_app.store.put_raw
+        store_app.store.put_raw = lambda key, blob: (writes.append(key), put_raw(key, blob))
+
+        with store_app.test_request_context():
+            state = BotConversationState.load()
+            state.answers['CLIENT_NAME'] = 'Cully'
+            state.tables['io'] = [{'tag': f'DI-{i}', 'description': 'x' * 40} for i in range(500)]
+            state.save()
+            state.save()
+            assert len(writes) == 1
+            assert list(session.keys()) == ['conversation_id']
+            assert len(pickle.dumps(dict(session))) < 200
+            session_data = dict(session)
+
+        with store_app.test_request_context():
+            session.update(session_data)
+            state = BotConversationState.load()
+            assert state.answers == {'CLIENT_NAME': 'Cully'}
+            assert len(state.tables['io']) == 500
+            state.save()
+            assert len(writes) == 1
+
+            state.reset()
+            assert BotConversationState.load().answers == {}
+
+    def test_agent_context_is_stored_without_static_data(self, store_app):
+        """The knowledge base is not persisted and the history is bounded."""
+        agent = AIAgentCore()
+        with store_app.test_request_context():
+            # A context saved by the previous version is migrated out of the session
+            legacy = agent.get_context()
+            session[agent.session_key] = {**legacy.__dict__, 'conversation_history': [{'content': 'old'}]}
+
+            context = agent.get_context()
+            assert agent.session_key not in session
+            assert context.conversation_history == [{'content': 'old'}]
+            context.conversation_history.extend({'content': f'message {i}', 'at': time.time()} for i in range(10))
+            context.personality = AgentPersonality.TECHNICAL
+            agent.save_context(context)
+
+            stored = store_app.store.get(f"{agent.session_key}:{session['conversation_id']}")
+            assert 'knowledge_base' not in stored and 'capabilities' not in stored
+
+            restored = agent.get_context()
+            assert [m['content'] for m in restored.conversation_history] == [f'message {i}' for i in range(6, 10)]
+            assert restored.personality is AgentPersonality.TECHNICAL
+            assert restored.knowledge_base is agent.knowledge_base
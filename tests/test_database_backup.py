@@ -0,0 +1,188 @@
+"""
+Tests for incremental, deduplicated backups.
+"""
+import gzip
+import os
+import sqlite3
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from database import backup
+from database.backup import DatabaseBackupManager, IncrementalBackupEngine
+
+
+@pytest.fixture
+def backup_env(tmp_path):
+    """Application rooted in ``tmp_path`` with a SQLite database and uploads."""
+    db_file = tmp_path / 'instance' / 'app.db'
+    db_file.parent.mkdir()
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE reports (id INTEGER PRIMARY KEY, title TEXT)')
+    conn.executemany('INSERT INTO reports (title) VALUES (?)', [(f'Report {i}',) for i in range(100)])
+    conn.commit()
+    conn.close()
+
+    uploads = tmp_path / 'static' / 'uploads'
+    uploads.mkdir(parents=True)
+    for i in range(3):
+        (uploads / f'file{i}.bin').write_bytes(os.urandom(5000))
+
+    app = Flask(__name__, root_path=str(tmp_path))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_file}',
+        BACKUP_DIR=str(tmp_path / 'backups'),
+        BACKUP_CHUNK_SIZE=4096
+    )
+    manager = DatabaseBackupManager()
+    manager.init_app(app)
+
+    with app.app_context():
+        yield manager, tmp_path, db_file
+
+
+def _count_reports(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestIncrementalBackup:
+    """Test chunked, deduplicated backups and restores."""
+
+    def test_second_backup_only_stores_changes(self, backup_env):
+        """Unchanged files are carried over and identical chunks reused."""
+        manager, root, _ = backup_env
+
+        first = manager.create_backup('first')
+        assert first['success']
+        assert first['stats']['new_chunks'] > 0
+        assert first['stats']['files_read'] == 3
+
+        (root / 'static' / 'uploads' / 'file1.bin').write_bytes(os.urandom(6000))
+        second = manager.create_backup('second')
+
+        stats = second['stats']
+        assert stats['files_unchanged'] == 2
+        assert stats['files_read'] == 1
+        # Only the rewritten upload produced new chunks
+        assert stats['new_chunks'] == 2
+        assert stats['stored_bytes'] < first['stats']['stored_bytes']
+
+        names = [backup['name'] for backup in manager.list_backups()]
+        assert names == ['second', 'first']
+
+    def test_restore_rewrites_only_what_differs(self, backup_env):
+        """Restore replays the snapshot and skips intact files."""
+        manager, root, db_file = backup_env
+        assert manager.create_backup('snap')['success']
+
+        conn = sqlite3.connect(db_file)
+        conn.execute('DELETE FROM reports')
+        conn.commit()
+        conn.close()
+        (root / 'static' / 'uploads' / 'file0.bin').unlink()
+
+        result = manager.restore_backup('snap')
+
+        assert result['success']
+        assert result['files'] == {'restored': 1, 'skipped': 2}
+        assert _count_reports(db_file) == 100
+        assert (root / 'static' / 'uploads' / 'file0.bin').exists()
+
+    def test_verify_detects_missing_and_corrupt_chunks(self, backup_env):
+        """Quick verification checks presence; deep verification re-hashes."""
+        manager, root, _ = backup_env
+        assert manager.create_backup('snap')['success']
+        assert manager.verify_backup('snap')['valid']
+
+        engine = manager.get_engine()
+        manifest = engine.load_manifest('snap')
+        digest = manifest['files']['uploads/file2.bin']['chunks'][0]
+        chunk_path = engine.store._path(digest)
+
+        with open(chunk_path, 'wb') as f:
+            f.write(gzip.compress(b'tampered'))
+        assert manager.verify_backup('snap', deep=False)['valid']
+        deep = manager.verify_backup('snap')
+        assert not deep['valid']
+        assert 'uploads/file2.bin' in deep['errors'][0]
+
+        os.remove(chunk_path)
+        assert not manager.verify_backup('snap', deep=False)['valid']
+
+    def test_delete_frees_unreferenced_chunks(self, backup_env):
+        """Chunks shared with another backup survive deletion."""
+        manager, root, _ = backup_env
+        assert manager.create_backup('first')['success']
+        (root / 'static' / 'uploads' / 'extra.bin').write_bytes(os.urandom(3000))
+        assert manager.create_backup('second')['success']
+
+        engine = manager.get_engine()
+        assert manager.delete_backup('second')
+        assert not engine.has_manifest('second')
+        assert manager.verify_backup('first')['valid']
+        extra = len(list(engine.store.iter_digests()))
+
+        assert manager.delete_backup('first')
+        assert extra > 0
+        assert list(engine.store.iter_digests()) == []
+
+
+def _python_tool(script):
+    """Stand-in for ``_pg_command`` running ``script`` in a Python child."""
+    return lambda program, parsed_uri: ([sys.executable, '-c', script], os.environ.copy())
+
+
+class TestDumpProcesses:
+    """Test streaming to and from external dump and restore tools."""
+
+    def test_chatty_stderr_does_not_block_the_dump(self, tmp_path):
+        """A tool filling stderr before stdout still completes."""
+        engine = IncrementalBackupEngine(str(tmp_path), chunk_size=4096)
+        script = (
+            "import sys\n"
+            "sys.stderr.write('warning\\n' * 100000)\n"
+            "sys.stdout.write('x' * 10000)\n"
+        )
+
+        with patch.object(backup, '_pg_command', _python_tool(script)):
+            manifest = engine.create('dump', 'postgresql://localhost/app')
+
+        assert manifest['database']['format'] == 'pg_custom'
+        assert manifest['database']['size'] == 10000
+
+    def test_failed_read_kills_and_reaps_the_tool(self, tmp_path):
+        """The child is not left running when storing its output fails."""
+        engine = IncrementalBackupEngine(str(tmp_path))
+        spawned = []
+        popen = subprocess.Popen
+
+        def track(*args, **kwargs):
+            spawned.append(popen(*args, **kwargs))
+            return spawned[-1]
+
+        script = "import sys\nwhile True:\n    sys.stdout.write('x' * 4096)\n"
+        with patch.object(backup, '_pg_command', _python_tool(script)), \
+                patch.object(backup.subprocess, 'Popen', track), \
+                patch.object(engine, '_store_stream', side_effect=OSError('disk full')):
+            with pytest.raises(OSError, match='disk full'):
+                engine.create('dump', 'postgresql://localhost/app')
+
+        assert spawned[0].returncode is not None
+
+    def test_restore_failure_reports_stderr(self, tmp_path):
+        """The tool's error output is surfaced when a restore fails."""
+        engine = IncrementalBackupEngine(str(tmp_path))
+        with patch.object(backup, '_pg_command', _python_tool("print('dump')")):
+            manifest = engine.create('dump', 'postgresql://localhost/app')
+        script = "import sys; sys.stdin.read(); sys.exit('role does not exist')"
+
+        with patch.object(backup, '_pg_command', _python_tool(script)):
+            with pytest.raises(RuntimeError, match='role does not exist'):
+                engine.restore_database(manifest, 'postgresql://localhost/app')
@@ -7,10 +7,36 @@ import threading
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 
-from database.query_cache import QueryCache, QueryCacheManager, init_query_cache
+from database.query_cache import CachedQuery, QueryCache, QueryCacheManager, init_query_cache
 from database.query_analyzer import QueryAnalyzer, QueryMetrics, setup_query_analysis
 from database.pooling import ConnectionPoolManager, ConnectionLeakDetector
 from database.performance import DatabaseIndexManager, QueryOptimizer
+from database.tiered_cache import L1Cache, SQLiteL2Backend, TieredQueryCache
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the Redis client wrapper."""
+    
+    def __init__(self):
+        self.data = {}
+        self.keys = Mock(side_effect=AssertionError("KEYS must not be used"))
+    
+    def is_available(self):
+        return True
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+    
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+    
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
 
 
 class TestQueryCache:
@@ -39,12 +65,7 @@ class TestQueryCache:
     
     def test_cache_get_set(self):
         """Test cache get and set operations."""
-        mock_redis = Mock()
-        mock_redis.is_available.return_value = True
-        mock_redis.get.return_value = '{"result": "cached_data"}'
-        mock_redis.set.return_value = True
-        
-        cache = QueryCache(mock_redis)
+        cache = QueryCache(FakeRedis())
         
         # Test cache miss
         result = cache.get("SELECT * FROM users")
@@ -55,26 +76,59 @@ class TestQueryCache:
         assert success == True
         
         # Test cache hit
-        mock_redis.get.return_value = '{"result": "test_data"}'
         result = cache.get("SELECT * FROM users")
         assert result == {"result": "test_data"}
     
     def test_cache_invalidation(self):
-        """Test cache invalidation."""
-        mock_redis = Mock()
-        mock_redis.is_available.return_value = True
-        mock_redis.keys.return_value = ['query_cache:key1', 'query_cache:key2']
-        mock_redis.delete.return_value = 2
-        
-        cache = QueryCache(mock_redis)
-        
-        # Test pattern-based invalidation
-        deleted_count = cache.invalidate(pattern="users")
-        assert deleted_count == 2
-        
-        # Test table-based invalidation
-        deleted_count = cache.invalidate(table_name="reports")
-        assert deleted_count == 2
+        """Test invalidation bumps generations instead of deleting keys."""
+        redis = FakeRedis()
+        cache = QueryCache(redis)
+        
+        cache.set("user_reports:a@example.com", ["r1"], namespaces=['user_reports'])
+        cache.set("settings:theme", "dark", namespaces=['settings'])
+        assert cache.get("user_reports:a@example.com", namespaces=['user_reports']) == ["r1"]
+        
+        # Table-based invalidation bumps every dependent namespace
+        bumped = cache.invalidate(table_name="reports")
+        assert bumped == len(cache.invalidation_patterns['reports'])
+        assert cache.get("user_reports:a@example.com", namespaces=['user_reports']) is None
+        assert cache.get("settings:theme", namespaces=['settings']) == "dark"
+        
+        # Pattern-based invalidation targets a single namespace
+        assert cache.invalidate(pattern="settings") == 1
+        assert cache.get("settings:theme", namespaces=['settings']) is None
+        
+        # Global invalidation reaches every entry
+        cache.set("SELECT 1", [1])
+        assert cache.invalidate() == 1
+        assert cache.get("SELECT 1") is None
+        redis.keys.assert_not_called()
+    
+    def test_invalidation_during_load_is_not_cached_as_current(self):
+        """Test a result loaded across an invalidation stays unreachable."""
+        redis = FakeRedis()
+        cache = QueryCache(redis)
+        
+        def load():
+            # A commit from another worker lands while the query runs
+            cache.invalidate(table_name='reports')
+            return ['stale']
+        
+        decorated = CachedQuery(cache, invalidate_on=['report_details'])(load)
+        assert decorated() == ['stale']
+        assert cache.get(load.__name__, namespaces=['report_details']) is None
+        assert cache.set_count == 1
+    
+    def test_generations_read_in_one_round_trip(self):
+        """Test every namespace generation comes from a single MGET."""
+        redis = FakeRedis()
+        redis.get = Mock(side_effect=redis.get)
+        cache = QueryCache(redis)
+        
+        cache.set("user_reports:a@example.com", ["r1"], namespaces=['user_reports', 'reports'])
+        cache.get("user_reports:a@example.com", namespaces=['user_reports', 'reports'])
+        # Only the entry itself is fetched with GET
+        assert redis.get.call_count == 1
     
     def test_cache_stats(self):
         """Test cache statistics."""
@@ -93,6 +147,143 @@ class TestQueryCache:
         assert stats['hit_rate'] == 66.67
 
 
+class TestTieredQueryCache:
+    """Test the two-tier query cache and cross-worker invalidation."""
+    
+    def _make_worker(self, path):
+        backend = SQLiteL2Backend(path, poll_interval=0.05)
+        cache = TieredQueryCache(backend, l1_ttl=60)
+        cache.start()
+        return cache
+    
+    def test_l1_lru_eviction(self):
+        """Test L1 evicts least recently used entries."""
+        l1 = L1Cache(max_entries=2)
+        l1.set('a', 1)
+        l1.set('b', 2)
+        l1.get('a')
+        l1.set('c', 3)
+        
+        assert l1.get('a') == 1
+        assert l1.get('c') == 3
+        assert len(l1) == 2
+    
+    def test_l1_rejects_stale_fill(self):
+        """Test a fill started before an invalidation is discarded."""
+        l1 = L1Cache()
+        epoch = l1.epoch
+        l1.invalidate_tags(['reports'])
+        
+        assert l1.set('reports:1', {'status': 'OLD'}, ['reports'], epoch=epoch) is False
+    
+    def test_l2_shared_between_workers(self, tmp_path):
+        """Test a value cached by one worker is served from L2 to another."""
+        path = str(tmp_path / 'l2.db')
+        worker_a = self._make_worker(path)
+        worker_b = self._make_worker(path)
+        try:
+            worker_a.set('reports:user@example.com', [1, 2, 3], tags=['reports'])
+            
+            assert worker_b.get('reports:user@example.com') == [1, 2, 3]
+            assert worker_b.get_stats()['l2_hits'] == 1
+            
+            # Second read is served from L1
+            assert worker_b.get('reports:user@example.com') == [1, 2, 3]
+            assert worker_b.get_stats()['l1_hits'] == 1
+        finally:
+            worker_a.stop()
+            worker_b.stop()
+    
+    def test_invalidation_broadcast_to_other_workers(self, tmp_path):
+        """Test invalidating a table clears the L1 of every worker."""
+        path = str(tmp_path / 'l2.db')
+        worker_a = self._make_worker(path)
+        worker_b = self._make_worker(path)
+        try:
+            worker_a.set('reports:count', 10, tags=['reports'])
+            worker_a.set('users:count', 4, tags=['users'])
+            assert worker_b.get('reports:count') == 10
+            assert worker_b.get('users:count') == 4
+            
+            worker_a.invalidate_tables(['reports'])
+            
+            deadline = time.time() + 2
+            while worker_b.get_stats()['remote_invalidations'] == 0 and time.time() < deadline:
+                time.sleep(0.02)
+            
+            assert worker_b.get('reports:count') is None
+            assert worker_b.get('users:count') == 4
+        finally:
+            worker_a.stop()
+            worker_b.stop()
+    
+    def test_get_or_load(self, tmp_path):
+        """Test loader runs only on a miss."""
+        cache = TieredQueryCache(SQLiteL2Backend(str(tmp_path / 'l2.db')))
+        loader = Mock(return_value={'total': 5})
+        
+        assert cache.get_or_load('stats', loader, tags=['reports']) == {'total': 5}
+        assert cache.get_or_load('stats', loader, tags=['reports']) == {'total': 5}
+        assert loader.call_count == 1
+
+
+    def test_l2_fill_rejected_after_remote_invalidation(self, tmp_path):
+        """Test a load racing with another worker's commit is not stored in L2."""
+        path = str(tmp_path / 'l2.db')
+        worker_a = TieredQueryCache(SQLiteL2Backend(path))
+        worker_b = TieredQueryCache(SQLiteL2Backend(path))
+        
+        def load():
+            # Worker A commits to reports while B is still loading
+            worker_a.invalidate_tables(['reports'])
+            return {'status': 'OLD'}
+        
+        assert worker_b.get_or_load('reports:1', load, tags=['reports']) == {'status': 'OLD'}
+        assert worker_b.get_stats()['stale_fills'] == 1
+        assert worker_a.get('reports:1') is None
+        assert worker_b.get('reports:1') is None
+        
+        # Fills unrelated to the invalidated table still go through
+        assert worker_b.get_or_load('users:1', lambda: 'ok', tags=['users']) == 'ok'
+        assert worker_a.get('users:1') == 'ok'
+    
+    def test_cached_results_require_tables(self, tmp_path):
+        """Test results that could never be invalidated are refused."""
+        from database.performance import cached_query
+        
+        with pytest.raises(ValueError):
+            cached_query(ttl=60)
+        with pytest.raises(ValueError):
+            TieredQueryCache(SQLiteL2Backend(str(tmp_path / 'l2.db'))).cached(tables=())
+    
+    def test_query_cache_reads_go_through_l1(self, tmp_path):
+        """Test the query cache decorators are served from L1 and invalidated by table."""
+        import database.query_cache as query_cache
+        import database.tiered_cache as tiered_cache
+        
+        tiered = TieredQueryCache(SQLiteL2Backend(str(tmp_path / 'l2.db')))
+        loader = Mock(return_value={'total_users': 3}, __name__='admin_counts')
+        stats = query_cache.cache_system_stats(ttl=60)(loader)
+        with patch.object(tiered_cache, 'tiered_cache', tiered), \
+                patch.object(query_cache, 'cache_manager', None):
+            assert stats() == {'total_users': 3}
+            assert stats() == {'total_users': 3}
+            assert loader.call_count == 1
+            assert tiered.get_stats()['l1_hits'] == 1
+            
+            # system_stats depends on users and reports
+            tiered.invalidate_tables(['users'])
+            assert stats() == {'total_users': 3}
+            assert loader.call_count == 2
+    
+    def test_namespace_tables(self):
+        """Test namespaces map back to the tables that invalidate them."""
+        from database.query_cache import tables_for_namespaces
+        
+        assert tables_for_namespaces(['report_details']) == ['report_details', 'reports', 'sat_reports']
+        assert tables_for_namespaces(['module_specs']) == ['module_specs']
+
+
 class TestQueryAnalyzer:
     """Test query performance analyzer."""
     
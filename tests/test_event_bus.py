@@ -0,0 +1,145 @@
+"""
+Tests for the server-sent events push channel.
+"""
+import json
+
+import pytest
+from flask import Flask
+
+import services.event_bus as event_bus_module
+from services.event_bus import EventBus, LocalSocketTransport, event_stream, user_channel
+from database.query_budget import record_queries
+from models import db, Notification
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = EventBus(history_size=10)
+    monkeypatch.setattr(event_bus_module, 'event_bus', bus)
+    return bus
+
+
+class TestEventBus:
+    """Test delivery, resume and fan-out between workers."""
+
+    def test_subscribers_receive_events_and_resume_from_last_event_id(self, bus):
+        """Missed events are replayed after Last-Event-ID; unknown ids ask for a resync."""
+        subscription, backlog = bus.subscribe(['user:jo@example.com'])
+        assert backlog == []
+
+        first = bus.publish('user:jo@example.com', 'notifications', {'unread': 1})
+        bus.publish('user:sam@example.com', 'notifications', {'unread': 5})
+        events = subscription.wait(timeout=1)
+        assert [e.id for e in events] == [first]
+        assert events[0].encoded == f'id: {first}\nevent: notifications\ndata: {{"unread":1}}\n\n'
+        bus.unsubscribe(subscription)
+
+        second = bus.publish('user:jo@example.com', 'notifications', {'unread': 2})
+        third = bus.publish('user:jo@example.com', 'notifications', {'unread': 3})
+        _, backlog = bus.subscribe(['user:jo@example.com'], last_event_id=first)
+        assert [e.id for e in backlog] == [second, third]
+
+        _, backlog = bus.subscribe(['user:jo@example.com'], last_event_id='expired')
+        assert [e.type for e in backlog] == ['resync']
+        assert backlog[0].encoded.startswith('event: resync')
+
+    def test_stream_sends_events_and_keepalives(self, bus):
+        """The SSE response streams published events without touching the request."""
+        app = Flask(__name__)
+        app.config.update(SSE_KEEPALIVE_SECONDS=0.05, SSE_MAX_STREAM_SECONDS=5)
+
+        with app.test_request_context():
+            response = event_stream(['report:r-1'])
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+        chunks = iter(response.response)
+        assert next(chunks).startswith('retry:')
+        assert next(chunks) == ': keepalive\n\n'
+        bus.publish('report:r-1', 'architecture', {'version': {'id': 7}})
+        assert 'event: architecture' in next(chunks)
+
+        assert bus.subscriber_count() == 1
+        response.close()
+        assert bus.subscriber_count() == 0
+
+    def test_streams_beyond_the_cap_fall_back_to_polling(self, bus):
+        """Each worker holds at most SSE_MAX_STREAMS open streams."""
+        app = Flask(__name__)
+        app.config.update(SSE_MAX_STREAMS=1, SSE_MAX_STREAM_SECONDS=5)
+
+        with app.test_request_context():
+            first = event_stream(['user:jo@example.com'])
+            second = event_stream(['user:sam@example.com'])
+        assert first.status_code == 200
+        assert second.status_code == 503 and second.headers['Retry-After'] == '5'
+        assert bus.subscriber_count() == 1
+
+        # Closing a stream that never started frees its slot
+        first.close()
+        assert bus.subscriber_count() == 0
+        with app.test_request_context():
+            assert event_stream(['user:sam@example.com']).status_code == 200
+
+    def test_local_socket_fan_out_between_workers(self, tmp_path):
+        """An event published in one worker reaches subscribers in another."""
+        directory = str(tmp_path / 'event_bus')
+        worker_a = EventBus(lambda: LocalSocketTransport(directory, refresh_interval=0))
+        worker_b = EventBus(lambda: LocalSocketTransport(directory, refresh_interval=0))
+        try:
+            subscription, _ = worker_b.subscribe(['user:jo@example.com'])
+            worker_a.subscribe(['unused'])
+
+            event_id = worker_a.publish('user:jo@example.com', 'notifications', {'unread': 4})
+            events = subscription.wait(timeout=2)
+            assert [e.id for e in events] == [event_id]
+            assert json.loads(events[0].data) == {'unread': 4}
+
+            # Oversized events become a resync notice for the other workers
+            worker_a.publish('user:jo@example.com', 'notifications', {'blob': 'x' * 70000})
+            assert [e.type for e in subscription.wait(timeout=2)] == ['resync']
+        finally:
+            worker_a.stop()
+            worker_b.stop()
+
+    def test_notification_writes_publish_unread_counts(self, bus, tmp_path):
+        """Creating and reading notifications pushes the new count to the recipient."""
+        app = Flask(__name__)
+        app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'events.db'}")
+        db.init_app(app)
+        subscription, _ = bus.subscribe([user_channel('Jo@Example.com')])
+
+        with app.app_context():
+            db.create_all()
+            Notification.create_notifications(['jo@example.com', 'sam@example.com'], 'New report', 'm', 'new_submission')
+            Notification.mark_read('jo@example.com')
+
+            payloads = [json.loads(e.data) for e in subscription.wait(timeout=1)]
+            assert [p['unread'] for p in payloads] == [1, 0]
+            assert payloads[0]['notification']['title'] == 'New report'
+            assert payloads[1]['notification'] is None
+            db.session.remove()
+            db.drop_all()
+
+    def test_fan_out_publishes_without_reloading_notifications(self, bus, tmp_path):
+        """Payloads are serialized before commit; publishing only reads the counters."""
+        app = Flask(__name__)
+        app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'events.db'}")
+        db.init_app(app)
+        admins = [f'admin{i}@example.com' for i in range(20)]
+        subscription, _ = bus.subscribe([user_channel(email) for email in admins])
+
+        with app.app_context():
+            db.create_all()
+            with record_queries() as recorder:
+                Notification.create_notifications(admins, 'New report', 'm', 'new_submission')
+
+            # Besides the notification INSERTs: one counter upsert and one counter read
+            others = [s for s in recorder.statements if not s.startswith('INSERT INTO notifications ')]
+            assert len(others) == 2
+            assert not [s for s in others if 'FROM notifications' in s]
+            payloads = [json.loads(e.data) for e in subscription.wait(timeout=1)]
+            assert len(payloads) == 20
+            assert all(p['notification']['title'] == 'New report' and p['notification']['id'] for p in payloads)
+            db.session.remove()
+            db.drop_all()
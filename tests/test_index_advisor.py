@@ -0,0 +1,169 @@
+"""
+Tests for the workload-driven index advisor.
+"""
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, inspect
+
+from database import index_advisor
+from database.index_advisor import IndexAdvisor, get_cached_index_advice, render_migration
+from models import db
+from database.performance import QueryPerformanceMonitor
+from database.query_analyzer import QueryAnalyzer
+
+REPORTS_BY_OWNER = (
+    "SELECT reports.id, reports.status FROM reports "
+    "WHERE reports.user_email = ? AND reports.status = ? "
+    "ORDER BY reports.created_at DESC LIMIT ? OFFSET ?"
+)
+UNREAD_COUNT = (
+    "SELECT count(*) FROM notifications "
+    "WHERE notifications.user_email = ? AND notifications.read = 0"
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """SQLite database with enough rows for scans to be expensive."""
+    path = tmp_path / 'advisor.db'
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE reports (id VARCHAR(36) PRIMARY KEY, user_email VARCHAR(120), "
+        "status VARCHAR(20), type VARCHAR(20), created_at TIMESTAMP)"
+    )
+    conn.execute(
+        "CREATE TABLE notifications (id INTEGER PRIMARY KEY, user_email VARCHAR(120), "
+        "read BOOLEAN, created_at TIMESTAMP)"
+    )
+    statuses = ['DRAFT', 'PENDING', 'APPROVED']
+    conn.executemany(
+        "INSERT INTO reports VALUES (?, ?, ?, ?, ?)",
+        [(str(i), f"user{i % 200}@example.com", statuses[i % 3], 'SAT', f"2026-01-{i % 28 + 1:02d}")
+         for i in range(3000)]
+    )
+    conn.executemany(
+        "INSERT INTO notifications VALUES (?, ?, ?, ?)",
+        [(i, f"user{i % 300}@example.com", i % 2, f"2026-01-{i % 28 + 1:02d}") for i in range(3000)]
+    )
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+def _monitor_with(statements):
+    monitor = QueryPerformanceMonitor()
+    for sql, count in statements:
+        for _ in range(count):
+            monitor.record_query(sql, 0.01)
+    return monitor
+
+
+class TestIndexAdvisor:
+    """Test candidate generation, what-if validation and migration output."""
+
+    def test_workload_merges_monitor_and_analyzer(self, engine):
+        """Statements seen by both collectors are counted once; rare reads are ignored."""
+        monitor = _monitor_with([(REPORTS_BY_OWNER, 5), ("SELECT 1 FROM reports WHERE id = ?", 1)])
+        analyzer = QueryAnalyzer()
+        analyzer.analyze_query(REPORTS_BY_OWNER.replace('?', '1'), 0.01)
+        analyzer.analyze_query(UNREAD_COUNT, 0.01)
+        analyzer.analyze_query(UNREAD_COUNT, 0.01)
+
+        workload = IndexAdvisor(engine, monitor=monitor, analyzer=analyzer).collect_workload()
+
+        counts = sorted((list(q.tables.values())[0], q.count) for q in workload)
+        assert counts == [('notifications', 2), ('reports', 5)]
+
+    def test_candidates_follow_equality_range_and_sort_columns(self, engine):
+        """Equality columns lead, then a range or sort column; existing indexes are skipped."""
+        workload = [
+            {'sql': REPORTS_BY_OWNER, 'count': 10},
+            {'sql': "SELECT r.id FROM reports AS r WHERE r.type = ? AND r.created_at >= ?", 'count': 10},
+            {'sql': "SELECT * FROM reports WHERE id = ?", 'count': 10},
+        ]
+        advisor = IndexAdvisor(engine, workload=workload)
+
+        candidates = {(c.table, c.columns) for c in advisor.generate_candidates(advisor.collect_workload())}
+
+        assert ('reports', ('user_email', 'status', 'created_at')) in candidates
+        assert ('reports', ('type', 'created_at')) in candidates
+        assert ('reports', ('id',)) not in candidates
+
+    def test_suggestions_are_validated_and_ranked(self, engine):
+        """Only candidates that lower measured plan cost are kept, biggest savings first."""
+        monitor = _monitor_with([(REPORTS_BY_OWNER, 50), (UNREAD_COUNT, 20)])
+        advice = IndexAdvisor(engine, monitor=monitor).advise()
+
+        suggestions = advice['suggestions']
+        assert [(s['table'], s['columns']) for s in suggestions] == [
+            ('reports', ['user_email', 'status', 'created_at']),
+            ('notifications', ['user_email', 'read']),
+        ]
+        assert suggestions[0]['estimated_savings'] > suggestions[1]['estimated_savings'] > 0
+        assert all(s['new_cost'] < s['baseline_cost'] for s in suggestions)
+
+        # The scratch copy is discarded; the real database is untouched
+        assert inspect(engine).get_indexes('reports') == []
+
+    def test_write_heavy_tables_need_larger_savings(self, engine):
+        """Index maintenance on frequent writes can outweigh a small read gain."""
+        workload = [
+            {'sql': UNREAD_COUNT, 'count': 2},
+            {'sql': "INSERT INTO notifications (user_email, read) VALUES (?, ?)", 'count': 100000},
+        ]
+        advice = IndexAdvisor(engine, workload=workload).advise()
+
+        assert advice['workload_statements'] == 2
+        assert advice['suggestions'] == []
+        assert advice['migration'] is None
+
+    def test_migration_creates_and_drops_indexes(self, engine):
+        """The rendered migration is valid Alembic code revising the given head."""
+        monitor = _monitor_with([(REPORTS_BY_OWNER, 50), (UNREAD_COUNT, 20)])
+        advisor = IndexAdvisor(engine, monitor=monitor)
+        workload = advisor.collect_workload()
+        chosen = advisor.select(advisor.generate_candidates(workload), workload)
+
+        source = render_migration(chosen, down_revision='abc123')
+        namespace = {}
+        exec(compile(source, 'migration.py', 'exec'), namespace)
+
+        assert namespace['down_revision'] == 'abc123'
+        assert "op.create_index('ix_reports_user_email_status_created_at', 'reports', " \
+               "['user_email', 'status', 'created_at'], unique=False)" in source
+        assert "op.drop_index('ix_notifications_user_email_read', table_name='notifications')" in source
+        assert source.index('ix_reports_user_email') < source.index('ix_notifications_user_email_read')
+
+
+class TestCachedAdvice:
+    """Test that API callers share one validation run."""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'cached.db'}")
+        db.init_app(app)
+        index_advisor._advice_cache.clear()
+        with app.app_context():
+            yield app
+        index_advisor._advice_cache.clear()
+
+    def test_advice_is_reused_until_it_expires(self, app):
+        """The scratch copy is only rebuilt after the TTL or on refresh."""
+        runs = iter(range(100))
+        with patch.object(index_advisor, 'get_index_advice', side_effect=lambda limit: {'run': next(runs)}):
+            assert get_cached_index_advice() == {'run': 0}
+            assert get_cached_index_advice() == {'run': 0}
+            assert get_cached_index_advice(limit=5) == {'run': 1}
+            assert get_cached_index_advice(refresh=True) == {'run': 2}
+            assert get_cached_index_advice() == {'run': 2}
+
+            app.config['INDEX_ADVISOR_CACHE_TTL'] = 0
+            assert get_cached_index_advice(limit=5, refresh=True) == {'run': 3}
+            assert get_cached_index_advice(limit=5) == {'run': 4}
@@ -0,0 +1,62 @@
+"""
+Tests for the single-pass AI agent intent classifier.
+"""
+import pytest
+
+from services.ai_agent import AIAgentCore, AgentContext
+from services.intent_classifier import IntentClassifier, KeywordMatcher, intent_classifier
+
+
+class TestKeywordMatcher:
+    """Test substring semantics of the compiled matcher."""
+
+    def test_keywords_match_as_substrings(self):
+        """Keywords inside longer words and overlapping keywords are all found."""
+        matcher = KeywordMatcher(['now', 'what', 'what is', 'not working', 'work', 'ork'])
+        assert matcher.scan('i know what is going on') == {'now', 'what', 'what is'}
+        assert matcher.scan('somewhat isolated') == {'what', 'what is'}
+        assert matcher.scan('it is not  working') == {'work', 'ork'}
+        assert matcher.scan('not working, again') == {'not working', 'work', 'ork'}
+        # Repeated calls are served from the per-word memo
+        assert matcher.scan('i know what is going on') == {'now', 'what', 'what is'}
+
+    def test_rejects_keywords_it_cannot_match(self):
+        """Keywords outside the word alphabet would silently never match."""
+        with pytest.raises(ValueError):
+            KeywordMatcher(['e-mail'])
+
+
+class TestIntentClassifier:
+    """Test the scores derived from one scan."""
+
+    def test_scores(self):
+        """Weights, caps, sentiment, urgency and task relevance follow the vocabularies."""
+        signals = intent_classifier.classify('Please CREATE a new SAT report now, urgent!', 'create_report')
+        intents = signals['intents']
+        assert intents['create_report']['confidence'] == 1.0
+        assert intents['troubleshooting'] == {'confidence': 0, 'keywords_found': False}
+        assert signals['urgency'] == 'high'
+        assert signals['sentiment'] == 'neutral'
+        assert signals['context_relevance'] == pytest.approx(0.6)
+
+        signals = intent_classifier.classify('Great, but there is a problem with a bug', 'unknown_task')
+        assert signals['intents']['troubleshooting']['confidence'] == pytest.approx(0.6)
+        assert signals['sentiment'] == 'neutral'
+        assert signals['context_relevance'] == 0.5
+
+    def test_custom_vocabularies(self):
+        """New intents only add vocabulary; no new detection code is needed."""
+        classifier = IntentClassifier(intents={'calibrate': [(('calibrat', 'span', 'zero'), 0.5)]},
+                                      sentiment={}, urgency=(), tasks={})
+        assert classifier.classify('Recalibrate the zero point')['intents']['calibrate']['confidence'] == 1.0
+
+    def test_agent_uses_single_pass_analysis(self):
+        """AIAgentCore gets intents, entities and relevance from the classifier."""
+        agent = AIAgentCore.__new__(AIAgentCore)
+        context = AgentContext(user_id='1', session_id='s', current_task=None, conversation_history=[],
+                               user_preferences={}, project_context={}, system_state={}, knowledge_base={},
+                               learning_data={}, personality=None, capabilities=[])
+        analysis = agent._analyze_intent('The PLC is broken, error E-101 on PRJ-2024 since 01/02/2024', context)
+        assert analysis['primary_intent'] == 'troubleshooting'
+        assert analysis['entities'] == {'project_references': ['PRJ-2024'], 'dates': ['01/02/2024']}
+        assert analysis['context_relevance'] == 0.5
@@ -0,0 +1,107 @@
+"""
+Tests for the tag index behind long-term knowledge retrieval.
+"""
+import random
+from datetime import datetime, timedelta
+
+from services.knowledge_index import KnowledgeIndex, relevance_score
+from services.memory_manager import LongTermMemory, MemoryEntry, MidTermMemory
+
+
+def _entry(importance, days_old=0, access_count=0, tags=('plc',)):
+    return MemoryEntry(timestamp=datetime.now() - timedelta(days=days_old, minutes=random.randint(0, 1439)),
+                       content={'importance': importance}, importance=importance,
+                       access_count=access_count, tags=list(tags))
+
+
+def _full_sort(index, tags, k, now):
+    matching = [key for key, entry in index.entries.items() if any(tag in entry.tags for tag in tags)]
+    matching.sort(key=lambda key: relevance_score(index.entries[key], now), reverse=True)
+    return [relevance_score(index.entries[key], now) for key in matching[:k]]
+
+
+class TestKnowledgeIndex:
+    """Test top-k retrieval against a full sort."""
+
+    def test_top_k_matches_full_sort(self):
+        """Scores of the returned keys equal the best scores of a full sort, through updates."""
+        random.seed(3)
+        now = datetime.now()
+        index = KnowledgeIndex()
+        tags = ['plc', 'scada', 'hmi', 'network']
+        for i in range(2000):
+            index.add(f'k{i}', _entry(random.random(), random.randint(0, 400), random.randint(0, 5),
+                                      random.sample(tags, random.randint(1, 2))))
+
+        for round_ in range(200):
+            query = random.sample(tags, random.randint(1, 3))
+            k = random.choice([1, 5, 10, 50])
+            keys = index.top_k(query, k, now)
+            assert [relevance_score(index.entries[key], now) for key in keys] == _full_sort(index, query, k, now)
+            for key in keys[:2]:
+                index.entries[key].access()
+                index.reindex(key)
+            index.remove(f'k{round_ * 7}')
+
+        counts = index.tag_counts()
+        for tag in tags:
+            assert counts[tag] == sum(tag in entry.tags for entry in index.entries.values())
+
+    def test_replacing_and_removing_entries(self):
+        """Replaced and removed entries are never returned."""
+        index = KnowledgeIndex()
+        index.add('a', _entry(0.9))
+        index.add('b', _entry(0.5))
+        index.add('a', _entry(0.1, tags=('scada',)))
+        assert index.top_k(['plc'], 10) == ['b']
+        index.remove('b')
+        index.remove('missing')
+        assert index.top_k(['plc'], 10) == []
+        assert index.top_k(['scada', 'scada'], 10) == ['a']
+        assert index.top_k(['scada'], 0) == []
+        assert len(index) == 1 and 'a' in index
+
+
+class TestLongTermKnowledge:
+    """Test retrieval and consolidation helpers in the memory manager."""
+
+    def test_only_returned_entries_are_accessed(self, tmp_path):
+        """get_relevant_knowledge ranks with the index and persists the access counts it changes."""
+        memory = LongTermMemory(str(tmp_path / 'memory'), flush_interval=60)
+        for importance in (0.2, 0.9, 0.5, 0.7):
+            memory.add_domain_knowledge('plc', {'importance': importance}, importance=importance)
+        memory.add_domain_knowledge('hmi', {'importance': 1.0}, importance=1.0)
+
+        top = memory.get_relevant_knowledge(['plc'], limit=2)
+        assert [entry.importance for entry in top] == [0.9, 0.7]
+        assert sorted(entry.access_count for entry in memory.domain_knowledge.values()) == [0, 0, 0, 1, 1]
+        # Access counts feed back into the ranking
+        assert [entry.importance for entry in memory.get_relevant_knowledge(['plc'], limit=3)] == [0.9, 0.7, 0.5]
+
+        memory.flush()
+        reloaded = LongTermMemory(str(tmp_path / 'memory'))
+        assert max(entry.access_count for entry in reloaded.domain_knowledge.values()) == 2
+        assert [entry.importance for entry in reloaded.get_relevant_knowledge(['plc', 'hmi'], limit=3)] == [0.9, 0.7, 1.0]
+
+    def test_knowledge_is_trimmed_to_most_important(self, tmp_path):
+        """Past the limit, the least important entries leave the index and the store."""
+        memory = LongTermMemory(str(tmp_path / 'memory'), flush_interval=60)
+        memory.knowledge_limit, memory.knowledge_trim_to = 10, 6
+        for i in range(11):
+            memory.add_domain_knowledge('plc', {'n': i}, importance=i / 10)
+        assert sorted(entry.importance for entry in memory.domain_knowledge.values()) == [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+        assert len(memory.get_relevant_knowledge(['plc'], limit=20)) == 6
+        memory.flush()
+        assert len(dict(memory.store.items('knowledge'))) == 6
+
+    def test_session_insights_stay_sorted(self):
+        """Insights are kept by importance, capped at 50, and thresholded by prefix."""
+        mid_term = MidTermMemory()
+        random.seed(5)
+        importances = [round(random.random(), 2) for _ in range(80)]
+        for importance in importances:
+            mid_term.add_insight(_entry(importance))
+        assert [entry.importance for entry in mid_term.session_insights] == sorted(importances, reverse=True)[:50]
+        expected = [entry for entry in mid_term.session_insights if entry.importance > 0.7]
+        assert mid_term.insights_above(0.7) == expected
+        assert mid_term.insights_above(2.0) == []
@@ -0,0 +1,131 @@
+"""
+Tests for hedged provider fan-out and circuit breakers, against a local fake provider server.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask
+
+import services.ai_assistant as ai_assistant_module
+from services.ai_assistant import generate_sat_suggestion
+from services.llm_fanout import CircuitBreaker, ProviderFanout
+from services.llm_gateway import LLMError, LLMGateway, user_message
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Chat completions under /<behaviour>/chat/completions: fast, slow or fail."""
+
+    def do_POST(self):
+        behaviour = self.path.strip('/').split('/')[0]
+        self.server.hits[behaviour] += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if behaviour == 'fail':
+            self.send_response(503)
+            self.end_headers()
+            self.wfile.write(b'overloaded')
+            return
+        if behaviour == 'slow':
+            time.sleep(self.server.slow_delay)
+        body = json.dumps({
+            'choices': [{'message': {'content': f'answer from {behaviour}'}}],
+            'usage': {'prompt_tokens': 12, 'completion_tokens': 4},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeProviderHandler)
+    server.daemon_threads = True
+    server.hits = Counter()
+    server.slow_delay = 1.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_app(server, primary, secondary):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True, AI_PROVIDER='openrouter', LLM_FALLBACK_PROVIDERS='openai',
+        OPENROUTER_API_KEY='or-key', OPENROUTER_API_URL=f'{server.url}/{primary}',
+        OPENAI_API_KEY='oa-key', OPENAI_API_URL=f'{server.url}/{secondary}',
+    )
+    return app
+
+
+class TestProviderFanout:
+    """Test hedging, failover, cancellation and circuit breaking."""
+
+    def test_slow_primary_is_hedged_by_secondary(self, fake_server, monkeypatch):
+        """A primary slower than its p95 deadline loses to the hedged secondary."""
+        fanout = ProviderFanout(LLMGateway(), default_hedge_delay=0.1)
+        monkeypatch.setattr(ai_assistant_module, 'provider_fanout', fanout)
+
+        with make_app(fake_server, 'slow', 'fast').app_context():
+            started = time.perf_counter()
+            text = generate_sat_suggestion('purpose', {'project_reference': 'P-1'})
+            elapsed = time.perf_counter() - started
+
+        assert text == 'answer from fast'
+        assert elapsed < 0.6
+        assert fake_server.hits == {'slow': 1, 'fast': 1}
+        stats = fanout.get_stats()
+        assert stats['hedged'] == 1 and stats['secondary_wins'] == 1 and stats['cancelled'] == 1
+        assert stats['breakers']['openrouter']['state'] == CircuitBreaker.CLOSED
+
+    def test_primary_within_its_p95_is_not_hedged(self, fake_server):
+        """The hedge deadline comes from the primary's recent latency."""
+        fake_server.slow_delay = 0.05
+        gateway = LLMGateway()
+        for _ in range(20):
+            gateway._record('openrouter', 'success', 0.4)
+        fanout = ProviderFanout(gateway, default_hedge_delay=0.01)
+        assert fanout.hedge_delay('openrouter') == pytest.approx(0.4)
+        assert fanout.hedge_delay('openai') == 0.01
+
+        with make_app(fake_server, 'slow', 'fast').app_context():
+            completion = fanout.complete(['openrouter', 'openai'], user_message('status?'), max_tokens=20)
+        assert completion.provider == 'openrouter'
+        assert completion.prompt_tokens == 12
+        assert fake_server.hits == {'slow': 1}
+        assert fanout.get_stats()['hedged'] == 0
+
+    def test_failing_primary_trips_its_circuit_breaker(self, fake_server):
+        """Failures fail over immediately; an open breaker skips the provider until a probe succeeds."""
+        fanout = ProviderFanout(LLMGateway(), default_hedge_delay=5, failure_threshold=2, reset_timeout=0.2)
+        app = make_app(fake_server, 'fail', 'fast')
+
+        with app.app_context():
+            for i in range(4):
+                started = time.perf_counter()
+                completion = fanout.complete(['openrouter', 'openai'], user_message(f'question {i}'))
+                assert completion.text == 'answer from fast'
+                assert time.perf_counter() - started < 1
+            assert fake_server.hits['fail'] == 2
+            assert fanout.breaker('openrouter').state == CircuitBreaker.OPEN
+            assert fanout.get_stats()['failovers'] == 2
+
+            time.sleep(0.25)
+            app.config['OPENROUTER_API_URL'] = f'{fake_server.url}/fast'
+            assert fanout.complete(['openrouter', 'openai'], user_message('probe')).provider == 'openrouter'
+            assert fanout.breaker('openrouter').state == CircuitBreaker.CLOSED
+
+            app.config['OPENAI_API_URL'] = f'{fake_server.url}/fail'
+            app.config['OPENROUTER_API_URL'] = f'{fake_server.url}/fail'
+            with pytest.raises(LLMError, match='All AI providers failed'):
+                fanout.complete(['openrouter', 'openai'], user_message('nobody home'))
@@ -0,0 +1,107 @@
+"""
+Tests for the LLM gateway: response cache, request coalescing and accounting.
+"""
+import json
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import services.llm_gateway as llm_gateway_module
+from services.ai_assistant import AISuggestionError, generate_sat_suggestion
+from services.llm_gateway import LLMError, LLMGateway, ResponseCache, StubProvider, user_message
+from services.user_email_service import generate_user_approval_email
+
+
+@pytest.fixture
+def ai_app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, AI_PROVIDER='openrouter', OPENROUTER_API_KEY='test-key',
+                      OPENROUTER_MODEL='test-model')
+    monkeypatch.setattr(llm_gateway_module.llm_gateway, 'cache', ResponseCache(str(tmp_path / 'llm_cache.db')))
+    return app
+
+
+class TestLLMGateway:
+    """Test caching, coalescing and provider accounting."""
+
+    def test_repeat_suggestions_are_served_from_cache(self, ai_app, monkeypatch):
+        """The same field and context reach the provider once; errors are not cached."""
+        stub = StubProvider('The purpose of this SAT is to verify the control system.')
+        monkeypatch.setitem(llm_gateway_module.PROVIDERS, 'openrouter', stub)
+
+        with ai_app.app_context():
+            context = {'project_reference': 'P-100', 'client_name': 'Cully'}
+            first = generate_sat_suggestion('purpose', context)
+            started = time.perf_counter()
+            second = generate_sat_suggestion('purpose', dict(context))
+            assert time.perf_counter() - started < 0.05
+            assert first == second
+            assert stub.calls == 1
+
+            generate_sat_suggestion('scope', context)
+            assert stub.calls == 2
+
+            monkeypatch.setitem(llm_gateway_module.PROVIDERS, 'openrouter', StubProvider(error=LLMError('boom')))
+            with pytest.raises(AISuggestionError, match='boom'):
+                generate_sat_suggestion('purpose', {'project_reference': 'P-200'})
+
+    def test_identical_in_flight_requests_share_one_call(self, monkeypatch):
+        """Concurrent identical prompts wait for the first call instead of repeating it."""
+        stub = StubProvider('shared answer', delay=0.2)
+        monkeypatch.setitem(llm_gateway_module.PROVIDERS, 'stub', stub)
+        gateway = LLMGateway()
+        results = []
+
+        def ask():
+            results.append(gateway.complete('stub', user_message('Summarise  the\nreport'), max_tokens=50,
+                                            config={'model_id': 'stub-model'}).text)
+
+        threads = [threading.Thread(target=ask) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['shared answer'] * 5
+        assert stub.calls == 1
+        stats = gateway.get_stats()['stub']
+        assert stats['success'] == 1 and stats['coalesced'] == 4
+        assert stats['prompt_tokens'] > 0 and stats['completion_tokens'] > 0
+        assert stats['latency_p95'] >= 0.2
+
+    def test_cache_expiry_and_size_limit(self, tmp_path):
+        """Expired entries are ignored and the oldest are trimmed beyond the limit."""
+        cache = ResponseCache(str(tmp_path / 'llm_cache.db'), ttl=60, max_entries=3, trim_every=1)
+        gateway = LLMGateway(cache)
+        stub = StubProvider(lambda messages: messages[-1]['content'].upper())
+        llm_gateway_module.PROVIDERS['stub'] = stub
+        try:
+            for i in range(5):
+                gateway.complete('stub', user_message(f'prompt {i}'), config={'model_id': 'm'})
+            assert gateway.complete('stub', user_message('prompt 4'), config={'model_id': 'm'}).cached
+            assert not gateway.complete('stub', user_message('prompt 0'), config={'model_id': 'm'}).cached
+
+            cache.ttl = -1
+            gateway.complete('stub', user_message('short lived'), config={'model_id': 'm'})
+            calls = stub.calls
+            assert gateway.complete('stub', user_message('short lived'), config={'model_id': 'm'}).text == 'SHORT LIVED'
+            assert stub.calls == calls + 1
+        finally:
+            del llm_gateway_module.PROVIDERS['stub']
+
+    def test_email_generation_goes_through_gateway(self, ai_app, monkeypatch):
+        """Approval emails reuse a cached plan for the same user."""
+        plan = {'subject': 'Welcome aboard', 'greeting': 'Hi Jo,', 'body': 'Your account is approved.',
+                'call_to_action': 'Log in'}
+        stub = StubProvider(json.dumps(plan))
+        monkeypatch.setitem(llm_gateway_module.PROVIDERS, 'openrouter', stub)
+
+        with ai_app.app_context():
+            user = {'full_name': 'Jo Bloggs', 'email': 'jo@example.com', 'role': 'Engineer',
+                    'login_url': 'https://example.com/login'}
+            first = generate_user_approval_email(user)
+            second = generate_user_approval_email(dict(user))
+        assert first['subject'] == second['subject'] == 'Welcome aboard'
+        assert stub.calls == 1
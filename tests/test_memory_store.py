@@ -0,0 +1,157 @@
+"""
+Tests for the write-behind SQLite store behind the AI agent's long-term memory.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from services.memory_manager import AdvancedMemoryManager, LongTermMemory, MemoryEntry, UserProfile
+from services.memory_store import MemoryStore
+
+
+def _rows(path, kind):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute('SELECT key, data FROM memory_entries WHERE kind = ?', (kind,)).fetchall())
+
+
+class TestMemoryStore:
+    """Test queued writes, reads and batching."""
+
+    def test_writes_are_queued_until_flushed(self, tmp_path):
+        """Reads see queued writes immediately; the database only after a flush."""
+        path = str(tmp_path / 'memory.db')
+        store = MemoryStore(path, flush_interval=60)
+        store.put('profile', 'u1', {'expertise_level': 'expert'})
+        store.put('knowledge', 'k1', [1, 2, 3])
+        store.put('knowledge', 'k2', 'gone soon')
+
+        assert store.get('profile', 'u1') == {'expertise_level': 'expert'}
+        assert _rows(path, 'profile') == {}
+
+        assert store.flush() == 3
+        assert pickle.loads(_rows(path, 'profile')['u1']) == {'expertise_level': 'expert'}
+
+        store.delete('knowledge', 'k2')
+        store.put('knowledge', 'k3', 'new')
+        assert dict(store.items('knowledge')) == {'k1': [1, 2, 3], 'k3': 'new'}
+        assert store.get('knowledge', 'k2', 'missing') == 'missing'
+        store.flush()
+        assert set(_rows(path, 'knowledge')) == {'k1', 'k3'}
+
+    def test_background_flusher_batches_writes(self, tmp_path):
+        """Queued rows reach the database without an explicit flush."""
+        path = str(tmp_path / 'memory.db')
+        store = MemoryStore(path, flush_interval=0.05)
+        for i in range(200):
+            store.put('statistic', f'stat_{i}', i)
+        deadline = time.monotonic() + 2
+        while len(_rows(path, 'statistic')) < 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(_rows(path, 'statistic')) == 200
+        assert store.pending_count() == 0
+
+    def test_batch_stays_readable_until_committed(self, tmp_path):
+        """A row taken off the queue by flush() is still read until its COMMIT."""
+        path = str(tmp_path / 'memory.db')
+        store = MemoryStore(path, flush_interval=60)
+        store.put('profile', 'u1', {'expertise_level': 'expert'})
+
+        # Another writer holds the lock, so the flush waits inside BEGIN IMMEDIATE
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        flusher = threading.Thread(target=store.flush)
+        flusher.start()
+        deadline = time.monotonic() + 2
+        while store.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert store.pending_count() == 0
+        assert store.get('profile', 'u1') == {'expertise_level': 'expert'}
+        assert dict(store.items('profile')) == {'u1': {'expertise_level': 'expert'}}
+
+        blocker.execute('ROLLBACK')
+        flusher.join()
+        assert store.get('profile', 'u1') == {'expertise_level': 'expert'}
+        assert pickle.loads(_rows(path, 'profile')['u1']) == {'expertise_level': 'expert'}
+
+
+class TestLongTermMemory:
+    """Test lazy profiles, write-behind persistence and migration."""
+
+    def test_profile_updates_do_not_write_synchronously(self, tmp_path):
+        """Profiles are cached LRU, queued on update and reloaded lazily."""
+        storage = str(tmp_path / 'memory')
+        memory = LongTermMemory(storage, flush_interval=60, profile_cache_size=2)
+        for user_id in ('a', 'b', 'c'):
+            memory.update_user_profile(user_id, {'expertise_level': 'expert'})
+        assert list(memory.user_profiles) == ['b', 'c']
+        assert _rows(os.path.join(storage, 'memory.db'), 'profile') == {}
+        assert not [name for name in os.listdir(storage) if name.endswith('.pkl')]
+
+        # Evicted profiles are served from the queue before the flush
+        assert memory.get_user_profile('a').expertise_level == 'expert'
+        memory.add_domain_knowledge('plc', {'fact': 'scan cycle'}, importance=0.9)
+        memory.update_global_statistics({'sessions': 3})
+        memory.flush()
+
+        reloaded = LongTermMemory(storage)
+        assert reloaded.user_profiles == {}
+        assert reloaded.get_user_profile('c').total_interactions == 1
+        assert [entry.content for entry in reloaded.domain_knowledge.values()] == [{'fact': 'scan cycle'}]
+        assert reloaded.global_statistics['sessions'] == 3
+
+    def test_pickle_files_are_migrated(self, tmp_path):
+        """Data written by the pickle-based storage is imported once."""
+        storage = tmp_path / 'memory'
+        storage.mkdir()
+        entry = MemoryEntry(timestamp=datetime.now(), content={'tip': 'check IO'}, importance=0.8, tags=['io'])
+        with open(storage / 'domain_knowledge.pkl', 'wb') as f:
+            pickle.dump({'io_1': entry}, f)
+        with open(storage / 'historical_patterns.pkl', 'wb') as f:
+            pickle.dump({'patterns': {'workflow_sat': {'occurrences': 4, 'data': []}}, 'insights': [entry],
+                         'optimizations': {'response_strategy': [{'user_id': '7'}]},
+                         'statistics': {'last_session_end': 'yesterday'}}, f)
+        profile_name = f"profile_{hashlib.md5(b'7').hexdigest()}.pkl"
+        with open(storage / profile_name, 'wb') as f:
+            pickle.dump(UserProfile(user_id='7', expertise_level='beginner', total_interactions=12), f)
+
+        memory = LongTermMemory(str(storage))
+        assert memory.domain_knowledge['io_1'].content == {'tip': 'check IO'}
+        assert memory.historical_patterns['workflow_sat']['occurrences'] == 4
+        assert memory.cross_project_insights[0].tags == ['io']
+        assert memory.optimization_patterns['response_strategy'] == [{'user_id': '7'}]
+        assert memory.global_statistics == {'last_session_end': 'yesterday'}
+        assert memory.get_user_profile('7').total_interactions == 12
+        assert sorted(name for name in os.listdir(storage) if 'pkl' in name) == sorted([
+            'domain_knowledge.pkl.migrated', 'historical_patterns.pkl.migrated', f'{profile_name}.migrated',
+        ])
+
+        assert LongTermMemory(str(storage)).get_user_profile('7').expertise_level == 'beginner'
+
+    def test_consolidation_keeps_interactions_off_disk(self, tmp_path):
+        """Consolidation during interactions only queues writes."""
+        manager = AdvancedMemoryManager(str(tmp_path / 'memory'), flush_interval=60)
+        manager.initialize_session('u1', 's1')
+        manager.mid_term.track_workflow_pattern('sat_creation', ['open', 'fill', 'submit'])
+        for i in range(20):
+            manager.process_interaction('u1', f'message {i}', 'ok', 'create_report', {}, {}, 0.9)
+        assert manager.consolidation.consolidation_counter == 2
+        assert manager.long_term.store.pending_count() > 0
+        assert manager.long_term.store.flush() > 0
+        assert manager.long_term.get_user_profile('u1').common_tasks == ['sat_creation']
+
+    def test_store_lives_in_the_app_instance_folder(self, tmp_path, monkeypatch):
+        """Nothing is opened at import; the app's instance folder holds the store."""
+        import services.memory_manager as memory_module
+        from flask import Flask
+
+        monkeypatch.setattr(memory_module, 'memory_manager', None)
+        app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+        with app.app_context():
+            manager = memory_module.get_memory_manager()
+        assert manager is memory_module.memory_manager
+        assert manager.long_term.store.path == str(tmp_path / 'instance' / 'memory' / 'memory.db')
@@ -0,0 +1,110 @@
+"""
+Tests for the denormalized unread notification counters.
+"""
+import pytest
+from flask import Flask
+
+from sqlalchemy import insert
+
+from database.notification_counters import reconcile_unread_counters
+from database.query_budget import record_queries
+from database.statements import count_unread_notifications
+from models import db, Notification, NotificationCounter
+
+
+@pytest.fixture
+def counter_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'counters.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestUnreadCounters:
+    """Test that notification writes keep the counters in step."""
+
+    def test_create_and_mark_read_update_the_counter(self, counter_app):
+        """Creating, marking one and marking all read adjust the count."""
+        first = Notification.create_notification('jo@example.com', 'a', 'm', 't')
+        Notification.create_notification('jo@example.com', 'b', 'm', 't')
+        Notification.create_notification('jo@example.com', 'c', 'm', 't')
+        assert count_unread_notifications('jo@example.com') == 3
+
+        assert Notification.mark_read('jo@example.com', first.id) == 1
+        # Marking the same notification again changes nothing
+        assert Notification.mark_read('jo@example.com', first.id) == 0
+        # Another user's notification id is not theirs to mark
+        assert Notification.mark_read('sam@example.com', first.id) == 0
+        assert count_unread_notifications('jo@example.com') == 2
+
+        assert Notification.mark_read('jo@example.com') == 2
+        assert count_unread_notifications('jo@example.com') == 0
+        assert count_unread_notifications('nobody@example.com') == 0
+
+    def test_fan_out_updates_all_counters_in_one_statement(self, counter_app):
+        """A bulk notification updates every recipient's counter with one statement."""
+        Notification.create_notification('a@example.com', 'earlier', 'm', 't')
+        admins = ['a@example.com', 'b@example.com', 'c@example.com']
+
+        with record_queries() as recorder:
+            created = Notification.create_notifications(admins, 'New report', 'm', 'new_submission')
+        counter_writes = [
+            s for s in recorder.statements
+            if 'notification_counters' in s and not s.lstrip().upper().startswith('SELECT')
+        ]
+
+        assert len(created) == 3
+        assert len(counter_writes) == 1
+        assert [count_unread_notifications(email) for email in admins] == [2, 1, 1]
+
+    def test_orm_writes_update_the_counter(self, counter_app):
+        """Adding, deleting and assigning ``read`` through the ORM adjust the count."""
+        first = Notification(user_email='jo@example.com', title='a', message='m', type='t')
+        db.session.add_all([
+            first,
+            Notification(user_email='jo@example.com', title='b', message='m', type='t'),
+            Notification(user_email='jo@example.com', title='c', message='m', type='t', read=True),
+        ])
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 2
+
+        # The stored value is loaded even though the commit expired it
+        first.read = True
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 1
+
+        first.read = True
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 1
+
+        first.read = False
+        db.session.commit()
+        db.session.delete(Notification.query.filter_by(title='b').one())
+        db.session.delete(Notification.query.filter_by(title='c').one())
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 1
+        assert reconcile_unread_counters() == 0
+
+    def test_reconciler_repairs_drift(self, counter_app):
+        """Writes that bypass the ORM are corrected by the reconciler."""
+        Notification.create_notification('jo@example.com', 'a', 'm', 't')
+        db.session.execute(insert(Notification), [
+            {'user_email': 'jo@example.com', 'title': 'b', 'message': 'm', 'type': 't', 'read': False},
+            {'user_email': 'sam@example.com', 'title': 'c', 'message': 'm', 'type': 't', 'read': False},
+        ])
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 1
+
+        assert reconcile_unread_counters() == 2
+        db.session.commit()
+        assert count_unread_notifications('jo@example.com') == 2
+        assert count_unread_notifications('sam@example.com') == 1
+        assert reconcile_unread_counters() == 0
+
+        version = db.session.get(NotificationCounter, 'jo@example.com').version
+        Notification.mark_read('jo@example.com')
+        assert db.session.get(NotificationCounter, 'jo@example.com').version > version
@@ -0,0 +1,162 @@
+"""
+Tests for the adaptive connection pool autoscaler.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from database.pool_autoscaler import PoolAutoscaler
+from monitoring.metrics import REGISTRY
+
+
+class FakeClock:
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+def simulate_load(engine, workers, hold, iterations=3):
+    """Run ``workers`` threads that each hold a connection ``iterations`` times."""
+    errors = []
+
+    def worker():
+        for _ in range(iterations):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                    time.sleep(hold)
+            except exc.TimeoutError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def hold_connections(engine, count):
+    return [engine.connect() for _ in range(count)]
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def factory(pool_size, max_overflow=0, timeout=5):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=timeout,
+            connect_args={'check_same_thread': False}
+        )
+        engines.append(engine)
+        return engine
+
+    yield factory
+    for engine in engines:
+        engine.dispose()
+
+
+class TestPoolAutoscaler:
+    """Test pool sizing decisions against a simulated load."""
+
+    def test_contention_grows_pool_up_to_limit(self, make_engine):
+        """Checkout waits grow the pool step by step until the maximum."""
+        engine = make_engine(pool_size=1)
+        autoscaler = PoolAutoscaler(engine, min_size=1, max_size=4, target_wait=0.005, grow_step=1)
+
+        sizes = []
+        for _ in range(4):
+            simulate_load(engine, workers=8, hold=0.02)
+            decision = autoscaler.tick()
+            sizes.append(autoscaler.size)
+
+        assert sizes == [2, 3, 4, 4]
+        assert decision['action'] == 'hold'
+        assert decision['reason'] == 'at maximum size'
+        assert autoscaler.stats['grown'] == 3
+        assert REGISTRY.get_sample_value('database_pool_size') == 4
+
+        # Four workers now run without waiting for each other's connections
+        simulate_load(engine, workers=4, hold=0.02)
+        assert autoscaler.sample()['wait_max'] < 0.02
+
+    def test_checkout_timeouts_force_growth(self, make_engine):
+        """Timed-out checkouts count as contention even without wait samples above target."""
+        engine = make_engine(pool_size=1, timeout=0.05)
+        autoscaler = PoolAutoscaler(engine, min_size=1, max_size=3, target_wait=10)
+
+        errors = simulate_load(engine, workers=3, hold=0.1, iterations=1)
+        assert errors
+
+        decision = autoscaler.tick()
+        assert decision['action'] == 'grow'
+        assert decision['sample']['timeouts'] == len(errors)
+        assert simulate_load(engine, workers=3, hold=0.05, iterations=1) == []
+
+    def test_idle_pool_shrinks_after_cooldown(self, make_engine):
+        """Unused capacity is released one step per cooldown period."""
+        engine = make_engine(pool_size=6)
+        for conn in hold_connections(engine, 6):
+            conn.close()
+        assert engine.pool.checkedin() == 6
+
+        clock = FakeClock()
+        autoscaler = PoolAutoscaler(engine, min_size=2, max_size=10, cooldown=60, clock=clock)
+
+        simulate_load(engine, workers=1, hold=0)
+        decision = autoscaler.tick()
+        assert (decision['action'], decision['to_size'], decision['closed']) == ('shrink', 5, 1)
+        assert engine.pool.checkedin() == 5
+
+        assert autoscaler.tick()['action'] == 'hold'
+
+        clock.value = 61
+        assert autoscaler.tick()['to_size'] == 4
+        assert engine.pool.checkedin() == 4
+
+    def test_quiet_hours_shed_idle_connections(self, make_engine):
+        """At night the pool drops to its minimum and closes idle connections."""
+        engine = make_engine(pool_size=5)
+        for conn in hold_connections(engine, 5):
+            conn.close()
+
+        autoscaler = PoolAutoscaler(
+            engine, min_size=1, max_size=10, quiet_hours='1-5',
+            now=lambda: datetime(2026, 1, 1, 3, 0)
+        )
+        decision = autoscaler.tick()
+
+        assert decision['action'] == 'shed'
+        assert decision['to_size'] == 1
+        assert decision['closed'] == 4
+        assert engine.pool.checkedin() == 1
+
+    def test_resize_keeps_pool_accounting_consistent(self, make_engine):
+        """Capacity follows the new size and returned surplus connections are closed."""
+        engine = make_engine(pool_size=2, max_overflow=1, timeout=0.05)
+        autoscaler = PoolAutoscaler(engine, min_size=1, max_size=10)
+
+        autoscaler.resize(4)
+        held = hold_connections(engine, 5)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        autoscaler.resize(1)
+        for conn in held:
+            conn.close()
+
+        assert engine.pool.size() == 1
+        assert engine.pool.checkedin() == 1
+        assert engine.pool.overflow() == 0
+        assert len(hold_connections(engine, 2)) == 2
@@ -0,0 +1,125 @@
+"""
+Tests for per-request query recording and N+1 detection.
+"""
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from database.query_budget import QueryRecorder, assert_max_queries, init_query_budget, record_queries
+from monitoring.metrics import REGISTRY
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, owner_id INTEGER)'))
+        conn.execute(text('CREATE TABLE owners (id INTEGER PRIMARY KEY, name TEXT)'))
+        for i in range(20):
+            conn.execute(text('INSERT INTO owners (id, name) VALUES (:i, :name)'), {'i': i, 'name': f'owner {i}'})
+            conn.execute(text('INSERT INTO items (id, owner_id) VALUES (:i, :i)'), {'i': i})
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def budget_app(engine):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, QUERY_BUDGET_REPEAT_THRESHOLD=5)
+    init_query_budget(app)
+
+    @app.route('/items/n-plus-one')
+    def items_n_plus_one():
+        with engine.connect() as conn:
+            items = conn.execute(text('SELECT id, owner_id FROM items')).fetchall()
+            names = [
+                conn.execute(text('SELECT name FROM owners WHERE id = :id'), {'id': item.owner_id}).scalar()
+                for item in items
+            ]
+        return jsonify(names)
+
+    @app.route('/items/batched')
+    def items_batched():
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                'SELECT items.id, owners.name FROM items JOIN owners ON owners.id = items.owner_id'
+            )).fetchall()
+        return jsonify([row.name for row in rows])
+
+    return app
+
+
+class TestQueryBudget:
+    """Test request-scoped recording, headers, metrics and the test helper."""
+
+    def test_statement_shapes_ignore_literals_and_in_list_length(self):
+        """Statements differing only in values or IN-list size share a shape."""
+        recorder = QueryRecorder()
+        recorder.record("SELECT * FROM t WHERE id = 1", 0.0)
+        recorder.record("SELECT * FROM t WHERE id = 22", 0.0)
+        recorder.record("SELECT * FROM t WHERE id IN (?, ?, ?)", 0.0)
+        recorder.record("SELECT * FROM t WHERE id IN (?)", 0.0)
+
+        assert recorder.shapes == {
+            "select * from t where id = ?": 2,
+            "select * from t where id in (?)": 2,
+        }
+
+    def test_repeated_shape_is_flagged_in_header_and_metrics(self, budget_app):
+        """An endpoint looping over rows is reported as a likely N+1."""
+        budget_app.debug = True
+        client = budget_app.test_client()
+        before = REGISTRY.get_sample_value(
+            'database_repeated_queries_total', {'endpoint': 'items_n_plus_one'}
+        ) or 0
+
+        response = client.get('/items/n-plus-one')
+
+        assert response.headers['X-Query-Count'] == '21'
+        assert response.headers['X-Query-Repeated'] == '20'
+        assert REGISTRY.get_sample_value(
+            'database_repeated_queries_total', {'endpoint': 'items_n_plus_one'}
+        ) == before + 1
+
+        response = client.get('/items/batched')
+        assert response.headers['X-Query-Count'] == '1'
+        assert 'X-Query-Repeated' not in response.headers
+
+    def test_headers_are_debug_only(self, budget_app):
+        """Outside debug mode the counts only go to logs and metrics."""
+        response = budget_app.test_client().get('/items/batched')
+
+        assert response.status_code == 200
+        assert 'X-Query-Count' not in response.headers
+
+    def test_assert_max_queries_enforces_budget(self, budget_app, engine):
+        """The helper fails when the total or a repeated shape exceeds the budget."""
+        client = budget_app.test_client()
+
+        with assert_max_queries(1, max_repeats=1) as recorder:
+            client.get('/items/batched')
+        assert recorder.count == 1
+
+        with pytest.raises(AssertionError, match='Expected at most 5 queries, 21 were executed'):
+            with assert_max_queries(5):
+                client.get('/items/n-plus-one')
+
+        with pytest.raises(AssertionError, match='repeated 20 times'):
+            with assert_max_queries(50, max_repeats=1):
+                client.get('/items/n-plus-one')
+
+    def test_nested_recorders_each_see_their_statements(self, engine):
+        """Outer blocks include everything recorded by inner blocks."""
+        with record_queries() as outer:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+                with record_queries() as inner:
+                    conn.execute(text('SELECT 2'))
+
+        assert inner.count == 1
+        assert outer.count == 2
+
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 3'))
+        assert outer.count == 2
@@ -0,0 +1,85 @@
+"""
+Tests for cached statement fingerprints and per-thread query statistics.
+"""
+import threading
+
+from database.performance import QueryPerformanceMonitor
+from database.query_analyzer import QueryAnalyzer
+from database.query_fingerprint import fingerprint, fingerprint_cache_info
+
+
+def run_in_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestQueryFingerprint:
+    """Test fingerprint caching and lock-free statistics."""
+
+    def test_fingerprint_is_computed_once_per_statement(self):
+        """Repeated executions of the same statement text hit the cache."""
+        statement = "SELECT reports.id FROM reports /* list */ WHERE reports.user_email = ? AND n = 42"
+        before = fingerprint_cache_info()
+
+        first = fingerprint(statement)
+        second = fingerprint(statement)
+
+        assert first is second
+        assert fingerprint_cache_info()['hits'] >= before['hits'] + 1
+        assert first.normalized == "SELECT reports.id FROM reports /* list */ WHERE reports.user_email = ? AND n = ?"
+        assert first.pattern == "select reports.id from reports where reports.user_email = ? and n = ?"
+        assert first.tables == ('reports',)
+
+    def test_in_lists_of_any_length_share_a_pattern(self):
+        """Expanded IN lists collapse so batched lookups group together."""
+        assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)").pattern == \
+            fingerprint("SELECT * FROM t WHERE id IN (?)").pattern == "select * from t where id in (?)"
+
+    def test_monitor_merges_thread_shards(self):
+        """Statistics recorded by many threads add up on read."""
+        monitor = QueryPerformanceMonitor()
+
+        def record():
+            for i in range(200):
+                monitor.record_query(f"SELECT * FROM reports WHERE id = {i % 4}", 0.01 * (i % 5))
+
+        run_in_threads(record, 8)
+
+        ((query, stats),) = monitor.get_query_stats()
+        assert query == "SELECT * FROM reports WHERE id = ?"
+        assert stats['count'] == 1600
+        assert stats['max_time'] == 0.04
+        assert stats['min_time'] == 0.0
+        assert abs(stats['avg_time'] - 0.02) < 1e-9
+
+    def test_analyzer_reads_include_live_and_finished_threads(self):
+        """Finished threads are folded into one shard without losing counts."""
+        analyzer = QueryAnalyzer(slow_query_threshold=1.0)
+        release = threading.Event()
+        recorded = threading.Event()
+
+        def long_lived():
+            analyzer.analyze_query("SELECT * FROM users WHERE id = 1", 2.0)
+            recorded.set()
+            release.wait()
+
+        worker = threading.Thread(target=long_lived)
+        worker.start()
+        recorded.wait()
+        run_in_threads(lambda: analyzer.analyze_query("SELECT * FROM users WHERE id = 2", 0.5), 10)
+
+        summary = analyzer.get_performance_summary()
+        release.set()
+        worker.join()
+
+        assert summary['total_queries'] == 11
+        assert summary['unique_queries'] == 1
+        assert summary['slow_queries'] == 1
+        assert summary['most_accessed_tables'] == {'users': 11}
+        assert len(analyzer._stats._shards) <= 2
+
+        analyzer.reset_metrics()
+        assert analyzer.query_metrics == {}
@@ -0,0 +1,119 @@
+"""
+Tests for the GCRA rate limiter and its shared storage.
+"""
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from api.rate_limit import LimitCache, MemoryRateLimitStorage, SQLiteRateLimitStorage, gcra
+from api.security import APIKey, RateLimiter
+from models import db, User
+
+
+class TestRateLimitEngine:
+    """Test the algorithm and the storage backends."""
+
+    def test_burst_then_steady_rate(self):
+        """A client gets its full limit as a burst, then one request per interval."""
+        tat, now = None, 1000.0
+        for expected_remaining in (2, 1, 0):
+            tat, result = gcra(tat, now, limit=3, window=60)
+            assert result.allowed and result.remaining == expected_remaining
+
+        rejected_tat, result = gcra(tat, now, limit=3, window=60)
+        assert rejected_tat is None and not result.allowed
+        assert result.retry_after == pytest.approx(20)
+        assert result.headers()['Retry-After'] == '20'
+        assert result.headers()['RateLimit-Policy'] == '3;w=60'
+
+        tat, result = gcra(tat, now + 20, limit=3, window=60)
+        assert result.allowed and result.remaining == 0
+
+        # Idle for a full window restores the whole quota
+        _, result = gcra(tat, now + 200, limit=3, window=60, cost=0)
+        assert result.remaining == 3 and result.reset_after == 0
+
+    @pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+    def test_storage_enforces_limit_across_instances(self, backend, tmp_path):
+        """SQLite storage is shared by separate instances, like separate workers."""
+        if backend == 'memory':
+            worker_a = worker_b = MemoryRateLimitStorage()
+        else:
+            path = str(tmp_path / 'rate_limits.db')
+            worker_a, worker_b = SQLiteRateLimitStorage(path), SQLiteRateLimitStorage(path)
+
+        results = [worker.apply('ip:10.0.0.1', 4, 3600) for worker in (worker_a, worker_b) * 3]
+        assert [r.allowed for r in results] == [True] * 4 + [False] * 2
+        assert worker_b.apply('ip:10.0.0.1', 4, 3600, cost=0).remaining == 0
+        assert worker_a.apply('ip:10.0.0.2', 4, 3600).remaining == 3
+
+        worker_b.reset('ip:10.0.0.1')
+        assert worker_a.apply('ip:10.0.0.1', 4, 3600).allowed
+
+
+class TestRateLimiter:
+    """Test identifier resolution and API key limit caching."""
+
+    def test_api_key_limit_is_cached_until_invalidated(self, tmp_path):
+        """The key's limit is read from the database once, not on every request."""
+        app = Flask(__name__)
+        app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'keys.db'}")
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            user = User(full_name='Api User', email='api@example.com', password_hash='x', status='Active')
+            db.session.add(user)
+            db.session.flush()
+            key_hash = APIKey.hash_key('sk_test_abc')
+            api_key = APIKey(name='ci', key_hash=key_hash, user_id=user.id, rate_limit=2)
+            db.session.add(api_key)
+            db.session.commit()
+
+            queries = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+            limiter = RateLimiter(api_key_cache_size=8)
+            with app.test_request_context(headers={'X-API-Key': 'sk_test_abc'}):
+                identifier = limiter.get_identifier()
+                assert identifier == f'api_key:{key_hash}'
+                assert [limiter.hit().allowed for _ in range(3)] == [True, True, False]
+            assert len(queries) == 1
+
+            api_key.rate_limit = 5
+            db.session.commit()
+            limiter.invalidate_api_key(key_hash)
+            assert limiter.get_rate_limit_status(identifier)['limit'] == 5
+
+            db.session.remove()
+            db.drop_all()
+
+    def test_limit_cache_evicts_least_recently_used(self):
+        """Entries beyond maxsize are evicted oldest-first."""
+        cache = LimitCache(maxsize=2, ttl=60)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 0)
+        cache.get('c', lambda: 3)
+        assert len(cache) == 2
+        assert cache.get('a', lambda: 0) == 1
+        assert cache.get('b', lambda: 20) == 20
+
+    def test_repeat_violations_block_the_ip_on_every_worker(self, tmp_path):
+        """Rejections past twice the limit block the IP for all limiters sharing the storage."""
+        app = Flask(__name__)
+        path = str(tmp_path / 'rate_limits.db')
+        limiter = RateLimiter(storage=SQLiteRateLimitStorage(path))
+        other_worker = RateLimiter(storage=SQLiteRateLimitStorage(path))
+        limiter.limits['anonymous'] = {'requests': 2, 'window': 3600}
+
+        with app.test_request_context(environ_base={'REMOTE_ADDR': '10.0.0.9'}):
+            blocked = []
+            for _ in range(5):
+                limiter.hit('ip:10.0.0.9')
+                blocked.append(limiter.is_ip_blocked())
+            assert blocked == [False, False, False, False, True]
+            assert other_worker.is_ip_blocked()
+            assert other_worker.ip_block_status().reset_after > 3500
+            assert not other_worker.is_ip_blocked('10.0.0.10')
+
+            other_worker.unblock_ip('10.0.0.9')
+            assert not limiter.is_ip_blocked()
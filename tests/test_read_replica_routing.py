@@ -0,0 +1,125 @@
+"""
+Tests for read replica routing in database/pooling.
+"""
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from database.pooling import (
+    RoutingSession, init_read_replicas, read_replica, replica_reads, primary_reads
+)
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """Application with one primary and one replica SQLite file."""
+    primary_uri = f"sqlite:///{tmp_path / 'primary.db'}"
+    replica_uri = f"sqlite:///{tmp_path / 'replica.db'}"
+    
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test-secret-key',
+        SQLALCHEMY_DATABASE_URI=primary_uri,
+        SQLALCHEMY_REPLICA_URIS=[replica_uri],
+        READ_REPLICA_ENDPOINTS=['reads.'],
+        READ_REPLICA_LAG_SECONDS=60
+    )
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+    
+    class Item(db.Model):
+        __tablename__ = 'items'
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(50))
+    
+    with app.app_context():
+        db.create_all()
+        router = init_read_replicas(app, db)
+        # The replica holds a differently-labelled copy so reads reveal their source
+        for engine, label in ((db.engine, 'primary'), (router.replicas[0], 'replica')):
+            with engine.begin() as conn:
+                conn.execute(text(
+                    'CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name VARCHAR(50))'
+                ))
+                conn.execute(text('INSERT INTO items (id, name) VALUES (1, :name)'), {'name': label})
+    
+    @app.route('/reads/item', endpoint='reads.item')
+    def read_item():
+        return db.session.get(Item, 1).name
+    
+    @app.route('/writes/item', methods=['POST'])
+    def write_item():
+        db.session.add(Item(name='new'))
+        db.session.commit()
+        return 'ok'
+    
+    @app.route('/decorated/item')
+    @read_replica
+    def decorated_item():
+        return db.session.get(Item, 1).name
+    
+    app.db = db
+    app.Item = Item
+    yield app
+    
+    with app.app_context():
+        app.extensions['replica_router'].dispose()
+
+
+class TestReadReplicaRouting:
+    """Test routing of reads and writes between primary and replica."""
+    
+    def test_reads_outside_replica_context_use_primary(self, replica_app):
+        with replica_app.app_context():
+            item = replica_app.db.session.get(replica_app.Item, 1)
+            assert item.name == 'primary'
+    
+    def test_replica_reads_block(self, replica_app):
+        with replica_app.app_context():
+            with replica_reads():
+                assert replica_app.db.session.get(replica_app.Item, 1).name == 'replica'
+    
+    def test_primary_reads_block_overrides(self, replica_app):
+        with replica_app.app_context():
+            with replica_reads(), primary_reads():
+                assert replica_app.db.session.get(replica_app.Item, 1).name == 'primary'
+    
+    def test_configured_endpoint_routes_to_replica(self, replica_app):
+        client = replica_app.test_client()
+        assert client.get('/reads/item').data == b'replica'
+    
+    def test_decorated_view_routes_to_replica(self, replica_app):
+        client = replica_app.test_client()
+        assert client.get('/decorated/item').data == b'replica'
+    
+    def test_writes_go_to_primary(self, replica_app):
+        with replica_app.app_context():
+            with replica_reads():
+                replica_app.db.session.add(replica_app.Item(id=2, name='written'))
+                replica_app.db.session.commit()
+            
+            with replica_app.extensions['replica_router'].replicas[0].connect() as conn:
+                assert conn.execute(text('SELECT COUNT(*) FROM items')).scalar() == 1
+            with replica_app.db.engine.connect() as conn:
+                assert conn.execute(text('SELECT COUNT(*) FROM items')).scalar() == 2
+    
+    def test_session_sticks_to_primary_after_flush(self, replica_app):
+        with replica_app.app_context():
+            with replica_reads():
+                replica_app.db.session.add(replica_app.Item(id=3, name='pending'))
+                replica_app.db.session.flush()
+                assert replica_app.db.session.get(replica_app.Item, 1, populate_existing=True).name == 'primary'
+    
+    def test_recent_writer_falls_back_to_primary(self, replica_app):
+        client = replica_app.test_client()
+        client.post('/writes/item')
+        
+        assert client.get('/reads/item').data == b'primary'
+        assert replica_app.extensions['replica_router'].stats['lag_fallbacks'] == 1
+    
+    def test_unhealthy_replica_falls_back_to_primary(self, replica_app):
+        router = replica_app.extensions['replica_router']
+        router.mark_unhealthy(router.replicas[0])
+        
+        client = replica_app.test_client()
+        assert client.get('/reads/item').data == b'primary'
@@ -0,0 +1,93 @@
+"""
+Tests for the schema fingerprint check run at startup.
+"""
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, Integer, MetaData, Table, inspect
+
+from database import fix_missing_columns
+from database.fix_missing_columns import (
+    compute_schema_fingerprint, ensure_database_ready, read_schema_fingerprint
+)
+from models import db
+
+
+@pytest.fixture
+def schema_app(tmp_path):
+    """Application backed by an empty SQLite file."""
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'app.db'}"
+    )
+    db.init_app(app)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+class TestSchemaFingerprint:
+    """Test that startup migrations only run when the schema changed."""
+
+    def test_first_start_migrates_and_stamps(self, schema_app):
+        """An unstamped database is migrated once and then stamped."""
+        assert ensure_database_ready(schema_app, db)
+
+        with schema_app.app_context():
+            assert 'reports' in inspect(db.engine).get_table_names()
+            assert read_schema_fingerprint(db.engine) == compute_schema_fingerprint(db.metadata)
+
+    def test_matching_fingerprint_skips_introspection(self, schema_app):
+        """Later starts neither inspect the schema nor issue DDL."""
+        assert ensure_database_ready(schema_app, db)
+
+        with patch.object(fix_missing_columns, 'run_migration') as run_migration, \
+                patch.object(fix_missing_columns, 'inspect') as inspector, \
+                patch.object(db, 'create_all') as create_all:
+            assert ensure_database_ready(schema_app, db)
+
+        run_migration.assert_not_called()
+        inspector.assert_not_called()
+        create_all.assert_not_called()
+
+    def test_waiting_worker_rechecks_after_lock(self, schema_app):
+        """A worker that queued behind another migration does not repeat it."""
+        with schema_app.app_context():
+            fingerprint = compute_schema_fingerprint(db.metadata)
+
+        with patch.object(fix_missing_columns, 'read_schema_fingerprint', side_effect=[None, fingerprint]), \
+                patch.object(fix_missing_columns, 'run_migration') as run_migration:
+            assert ensure_database_ready(schema_app, db)
+
+        run_migration.assert_not_called()
+
+    def test_fingerprint_tracks_models_and_version(self):
+        """Column changes and migration version bumps change the fingerprint."""
+        metadata = MetaData()
+        table = Table('widgets', metadata, Column('id', Integer, primary_key=True))
+        original = compute_schema_fingerprint(metadata)
+
+        assert compute_schema_fingerprint(metadata) == original
+        assert compute_schema_fingerprint(metadata, version=2) != original
+
+        table.append_column(Column('size', Integer))
+        assert compute_schema_fingerprint(metadata) != original
+
+    def test_fingerprint_covers_models_outside_models_py(self):
+        """Tables from every model module are registered before fingerprinting."""
+        script = (
+            "from models import db\n"
+            "from database.fix_missing_columns import import_model_modules\n"
+            "import_model_modules()\n"
+            "print(' '.join(sorted(db.metadata.tables)))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        tables = set(result.stdout.split())
+        assert {'api_keys', 'api_usage', 'audit_chain_head', 'audit_logs', 'reports'} <= tables, result.stderr
@@ -0,0 +1,90 @@
+"""
+Tests for the shared session revocation log.
+"""
+import json
+import sqlite3
+import time
+
+import pytest
+from flask import Flask, session
+
+from session_manager import RevocationStore, SessionManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'revoked_sessions.db')
+
+
+class TestRevocationStore:
+    """Test cross-worker visibility, expiry and compaction."""
+
+    def test_revocations_reach_other_workers_on_next_sync(self, db_path):
+        """A worker sees its own revocation at once and other workers' after the sync interval."""
+        worker_a = RevocationStore(db_path, sync_interval=60)
+        worker_b = RevocationStore(db_path, sync_interval=60)
+        assert not worker_b.is_revoked('sid-1')
+
+        worker_a.revoke('sid-1')
+        assert worker_a.is_revoked('sid-1')
+        assert not worker_b.is_revoked('sid-1')  # Not due for a sync yet
+
+        worker_b.sync()
+        assert worker_b.is_revoked('sid-1')
+
+        # A new worker replays the whole log
+        assert RevocationStore(db_path, sync_interval=0).is_revoked('sid-1')
+
+    def test_each_revocation_expires_on_its_own_schedule(self, db_path):
+        """Expiry uses the revocation time, and compaction deletes only expired rows."""
+        store = RevocationStore(db_path, ttl=100, sync_interval=0)
+        now = time.time()
+        store.revoke('old', revoked_at=now - 150)
+        store.revoke('recent', revoked_at=now - 50)
+        store.revoke('new')
+
+        assert not store.is_revoked('old')
+        assert store.is_revoked('recent')
+        assert store.compact() == 1
+        assert len(store) == 2
+
+        rows = sqlite3.connect(db_path).execute('SELECT session_id FROM revoked_sessions ORDER BY seq').fetchall()
+        assert rows == [('recent',), ('new',)]
+
+    def test_legacy_json_file_is_imported_once(self, db_path, tmp_path):
+        """Entries from revoked_sessions.json keep their timestamps; expired ones are dropped."""
+        legacy = tmp_path / 'revoked_sessions.json'
+        legacy.write_text(json.dumps({'kept': time.time() - 60, 'expired': time.time() - 90000}))
+
+        store = RevocationStore(db_path, sync_interval=0)
+        assert store.import_legacy_file(str(legacy)) == 1
+        assert store.import_legacy_file(str(legacy)) == 0
+        assert store.is_revoked('kept')
+        assert not store.is_revoked('expired')
+        assert not legacy.exists()
+
+
+class TestSessionManager:
+    """Test session validation against the revocation store."""
+
+    def test_logout_and_timeout_revoke_the_session(self, db_path):
+        """Revoked and timed-out sessions are rejected by every worker."""
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        manager = SessionManager()
+        manager.configure(revocation_db=db_path, revocation_file=db_path + '.json', sync_interval=0)
+        other_worker = SessionManager()
+        other_worker.configure(revocation_db=db_path, revocation_file=db_path + '.json', sync_interval=0)
+
+        with app.test_request_context():
+            session_id = manager.create_session(user_id=1)
+            assert manager.is_session_valid()
+            manager.revoke_session()
+            assert not manager.is_session_valid(session_id)
+            assert other_worker.is_session_revoked(session_id)
+
+        with app.test_request_context():
+            session_id = manager.create_session(user_id=1)
+            session['last_activity'] = time.time() - manager.session_timeout - 1
+            assert not manager.is_session_valid()
+            assert other_worker.is_session_revoked(session_id)
@@ -0,0 +1,65 @@
+"""
+Tests for the registry of pre-built hot statements.
+"""
+import pytest
+from flask import Flask
+
+from database import statements
+from database.query_budget import record_queries
+from models import db, ModuleSpec, Notification, Report, SATReport, User
+
+
+@pytest.fixture
+def statements_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'statements.db'}")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(full_name='Jo Engineer', email='jo@example.com', password_hash='x'),
+            Report(id='r-1', type='SAT', user_email='jo@example.com'),
+            SATReport(report_id='r-1', data_json='{}'),
+            ModuleSpec(company='ABB', model='DI810'),
+        ])
+        db.session.commit()
+        Notification.create_notification('jo@example.com', 'a', 'm', 't')
+        read = Notification.create_notification('jo@example.com', 'b', 'm', 't')
+        Notification.mark_read('jo@example.com', read.id)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestHotStatements:
+    """Test that registry lookups match the ORM calls they replace."""
+
+    def test_lookups_return_the_orm_results(self, statements_app):
+        """Each helper returns the row (or count) the ORM query would."""
+        with statements_app.app_context():
+            assert statements.get_sat_report('r-1').report_id == 'r-1'
+            assert statements.get_sat_report('missing') is None
+            assert statements.get_user_by_email('jo@example.com').full_name == 'Jo Engineer'
+            assert statements.count_unread_notifications('jo@example.com') == 1
+            assert statements.count_unread_notifications('nobody@example.com') == 0
+            assert statements.get_module_spec('ABB', 'DI810').model == 'DI810'
+            assert statements.get_module_spec('abb', 'di810') is None
+            assert statements.find_module_spec('ABB', 'DI810').company == 'ABB'
+            assert statements.get_report(None) is None
+
+            # Loaded reports come from the identity map without a query
+            report = statements.get_report('r-1')
+            with record_queries() as recorder:
+                assert statements.get_report('r-1') is report
+            assert recorder.count == 0
+
+    def test_statements_are_built_once(self, statements_app):
+        """The same statement object is reused, and names cannot be registered twice."""
+        with statements_app.app_context():
+            statements.get_user_by_email('jo@example.com')
+            built = statements.get_statement('user_by_email')
+            statements.get_user_by_email('someone@example.com')
+            assert statements.get_statement('user_by_email') is built
+
+        with pytest.raises(ValueError):
+            statements.hot_statement('user_by_email')(lambda: None)
@@ -0,0 +1,143 @@
+"""
+Tests for batched user resolution and the query counts of pages using it.
+"""
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager
+from sqlalchemy import event
+
+from models import db, User, Report, ReportComment
+from services import user_directory
+from services.user_directory import resolve_users, resolve_user
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements executed on ``engine`` inside the block."""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def directory_app():
+    """Minimal application with an in-memory database and the collaboration routes."""
+    from routes.collaboration import collaboration_bp
+    
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        LOGIN_DISABLED=True,
+        SECRET_KEY='test-secret-key',
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:'
+    )
+    db.init_app(app)
+    LoginManager(app)
+    app.register_blueprint(collaboration_bp, url_prefix='/collaboration')
+    
+    with app.app_context():
+        db.create_all()
+        for i in range(5):
+            user = User(full_name=f'User {i}', email=f'user{i}@example.com', role='Engineer', status='Active')
+            user.set_password('password')
+            db.session.add(user)
+        db.session.commit()
+    
+    user_directory.invalidate_user()
+    yield app
+    user_directory.invalidate_user()
+    
+    with app.app_context():
+        db.drop_all()
+
+
+def _add_thread(report_id, comment_count):
+    for i in range(comment_count):
+        comment = ReportComment(
+            report_id=report_id,
+            user_email=f'user{i % 5}@example.com',
+            user_name='Name When Posted',
+            comment_text=f'Comment {i}'
+        )
+        db.session.add(comment)
+        db.session.flush()
+        for j in range(2):
+            db.session.add(ReportComment(
+                report_id=report_id,
+                user_email=f'user{(i + j + 1) % 5}@example.com',
+                user_name='Name When Posted',
+                comment_text=f'Reply {j}',
+                parent_comment_id=comment.id
+            ))
+    db.session.commit()
+
+
+class TestResolveUsers:
+    """Test batched email -> user resolution."""
+    
+    def test_resolves_many_users_in_one_query(self, directory_app):
+        emails = [f'user{i}@example.com' for i in range(5)] + ['missing@example.com']
+        with directory_app.app_context():
+            with count_queries(db.engine) as statements:
+                users = resolve_users(emails)
+            
+            assert len(statements) == 1
+            assert set(users) == set(emails[:5])
+            assert users['user3@example.com'].full_name == 'User 3'
+    
+    def test_repeat_lookups_are_served_from_cache(self, directory_app):
+        with directory_app.app_context():
+            resolve_users(['user1@example.com', 'missing@example.com'])
+        
+        # New app context: identity map is gone, process cache still answers
+        with directory_app.app_context():
+            with count_queries(db.engine) as statements:
+                assert resolve_user('user1@example.com').full_name == 'User 1'
+                assert resolve_user('missing@example.com') is None
+            assert statements == []
+    
+    def test_user_update_invalidates_cache(self, directory_app):
+        with directory_app.app_context():
+            assert resolve_user('user2@example.com').full_name == 'User 2'
+            
+            user = User.query.filter_by(email='user2@example.com').first()
+            user.full_name = 'Renamed User'
+            db.session.commit()
+            
+            assert resolve_user('user2@example.com').full_name == 'Renamed User'
+
+
+class TestCommentsQueryCount:
+    """The comments page must run a fixed number of queries however long the thread is."""
+    
+    @pytest.mark.parametrize('comment_count', [3, 30])
+    def test_get_comments_query_count(self, directory_app, comment_count):
+        report_id = str(uuid.uuid4())
+        with directory_app.app_context():
+            db.session.add(Report(id=report_id, type='SAT', user_email='user0@example.com'))
+            db.session.commit()
+            _add_thread(report_id, comment_count)
+            engine = db.engine
+        
+        client = directory_app.test_client()
+        with count_queries(engine) as statements:
+            response = client.get(f'/collaboration/comments/{report_id}')
+        
+        payload = response.get_json()
+        assert payload['success'] is True
+        assert len(payload['comments']) == comment_count
+        # Comments show the name stored when they were posted
+        assert payload['comments'][0]['user_name'] == 'Name When Posted'
+        assert payload['comments'][0]['replies'][0]['user_name'] == 'Name When Posted'
+        # Report, top-level comments, replies
+        assert len(statements) == 3
@@ -14,6 +14,7 @@ import tempfile
 from contextlib import contextmanager
 from datetime import datetime
 from models import Notification
+from database.statements import count_unread_notifications, get_report, get_sat_report
 
 # Added get_unread_count from app.py to resolve circular import
 def get_unread_count(user_email=None):
@@ -27,10 +28,7 @@ def get_unread_count(user_email=None):
         if not user_email:
             return 0
 
-        return Notification.query.filter_by(
-            user_email=user_email,
-            read=False
-        ).count()
+        return count_unread_notifications(user_email)
     except Exception as e:
         if current_app:
             current_app.logger.warning(f"Could not get unread count: {e}")
@@ -223,19 +221,14 @@ def create_new_submission_notification(admin_emails, submission_id, document_tit
     message = f"New SAT Report '{document_title}' submitted by {submitter_email}"
     action_url = url_for('status.view_status', submission_id=submission_id, _external=True)
 
-    notifications = []
-    for admin_email in admin_emails:
-        notification = Notification.create_notification(
-            user_email=admin_email,
-            title=title,
-            message=message,
-            notification_type='new_submission',
-            submission_id=submission_id,
-            action_url=action_url
-        )
-        notifications.append(notification)
-
-    return notifications
+    return Notification.create_notifications(
+        admin_emails,
+        title=title,
+        message=message,
+        notification_type='new_submission',
+        submission_id=submission_id,
+        action_url=action_url
+    )
 
 # Updated function to use the new file lock
 def load_submissions():
@@ -463,12 +456,11 @@ def send_approval_link(approver_email, submission_id, stage, subject=None, html_
     )
     if (not subject or not html_content) and ai_enabled:
         try:
-            from models import Report, SATReport
             from services.email_generator import generate_email_content
 
-            report_obj = Report.query.get(submission_id)
+            report_obj = get_report(submission_id)
             if report_obj and report_obj.type == 'SAT':
-                sat_report = SATReport.query.filter_by(report_id=submission_id).first()
+                sat_report = get_sat_report(submission_id)
                 if sat_report:
                     sat_payload = json.loads(sat_report.data_json or '{}')
                     report_context = sat_payload.get('context', {})
@@ -23,7 +23,7 @@ def run_production_server():
         app,
         host=host,
         port=port,
-        threads=6,  # Optimal thread count for most systems
+        threads=int(os.environ.get('WAITRESS_THREADS', 6)),  # Raise together with SSE_MAX_STREAMS
         connection_limit=50,  # Prevent connection overload
         cleanup_interval=10,  # Frequent cleanup of idle connections
         channel_timeout=60,  # Reasonable timeout for idle connections